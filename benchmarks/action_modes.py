@@ -0,0 +1,117 @@
+"""
+Compare per-turn tokens and latency of the text, tools and json action modes.
+
+    python benchmarks/action_modes.py --rounds 3
+    python benchmarks/action_modes.py --dry-run
+
+Every mode answers the same scripted turns against the configured Ollama
+model. Prompt and output tokens come from Ollama's own counts, and a turn
+counts as a parse failure when the actions recovered from the reply differ
+from the expected ones. With --dry-run no model is called and only the
+static prompt cost of each mode (system prompt plus tool definitions or
+response schema) is reported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.config.settings import llm_config, banking_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.tools import ACTION_MODES
+
+
+# (user input, expected action names)
+TURNS = [
+    ("Hi, I'm Ana!", []),
+    ("Please deposit 120 euros", ["add"]),
+    ("What's my balance?", ["check_balance"]),
+    ("Take out 35", ["withdraw"]),
+    ("How much is 50 euros in dollars?", ["convert"]),
+    ("Withdraw 10 and then deposit 60, all or nothing", ["batch"]),
+    ("How much did I deposit this week?", ["transaction_total"]),
+    ("Show my last 3 transactions", ["recent_transactions"]),
+    ("Thanks, that's all", []),
+]
+
+
+def run_mode(mode: str, rounds: int) -> dict:
+    """Play the scripted turns in one mode and collect per-turn measurements."""
+    config = llm_config.model_copy(update={"action_mode": mode, "response_cache_enabled": False})
+    latencies, prompt_tokens, output_tokens = [], [], []
+    failures = 0
+    
+    for _ in range(rounds):
+        assistant = BankingAssistant(config)
+        for user_input, expected in TURNS:
+            started = time.perf_counter()
+            parsed = assistant.chat_turn(user_input, current_balance=100.0)
+            latencies.append(time.perf_counter() - started)
+            if parsed is None:
+                failures += 1
+                continue
+            prompt_tokens.append(assistant.last_usage.get("input_tokens", 0))
+            output_tokens.append(assistant.last_usage.get("output_tokens", 0))
+            if [action["action"] for action in parsed.actions] != expected:
+                failures += 1
+    
+    turns = rounds * len(TURNS)
+    return {
+        "turns": turns,
+        "parse_failures": failures,
+        "latency_mean_ms": statistics.mean(latencies) * 1000,
+        "latency_p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        "prompt_tokens_mean": statistics.mean(prompt_tokens) if prompt_tokens else 0,
+        "output_tokens_mean": statistics.mean(output_tokens) if output_tokens else 0,
+    }
+
+
+def static_cost(mode: str) -> dict:
+    """Estimate the tokens every prompt of a mode carries before any history."""
+    assistant = BankingAssistant(llm_config.model_copy(update={"action_mode": mode}))
+    assistant._ensure_chain(banking_config.currency)
+    schema = assistant.schema_tokens()
+    return {"system_prompt_tokens": assistant._system_prompt_tokens - schema, "schema_tokens": schema}
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3, help="Times the scripted conversation is played per mode")
+    parser.add_argument("--modes", nargs="+", default=list(ACTION_MODES), choices=ACTION_MODES, help="Modes to compare")
+    parser.add_argument("--dry-run", action="store_true", help="Only report static prompt tokens, without calling the model")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    results = {"model": llm_config.model_name, "modes": {}}
+    for mode in args.modes:
+        results["modes"][mode] = static_cost(mode)
+        if not args.dry_run:
+            results["modes"][mode].update(run_mode(mode, args.rounds))
+    
+    if args.dry_run:
+        print(f"{'mode':<8} {'system':>8} {'schema':>8} {'total':>8}")
+        for mode, result in results["modes"].items():
+            total = result["system_prompt_tokens"] + result["schema_tokens"]
+            print(f"{mode:<8} {result['system_prompt_tokens']:>8} {result['schema_tokens']:>8} {total:>8}")
+    else:
+        print(f"{'mode':<8} {'prompt tok':>10} {'output tok':>10} {'mean ms':>9} {'p95 ms':>9} {'failures':>9}")
+        for mode, result in results["modes"].items():
+            print(
+                f"{mode:<8} {result['prompt_tokens_mean']:>10.0f} {result['output_tokens_mean']:>10.1f} "
+                f"{result['latency_mean_ms']:>9.0f} {result['latency_p95_ms']:>9.0f} "
+                f"{result['parse_failures']:>4}/{result['turns']}"
+            )
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare one model endpoint with a routed, hedged pool of endpoints.
+
+    python benchmarks/backend_pool.py
+    python benchmarks/backend_pool.py --requests 800 --concurrency 16 --streaming
+
+Every scenario gets fresh stand-in Ollama servers (see standin_ollama.py):
+two fast ones whose requests occasionally stall for --tail-seconds, and a
+busy one that slows down with every concurrent request. The scenarios send
+the same requests to
+
+    single         one fast server
+    pool           all three, routed by latency and queue depth
+    hedged         the pool, with slow requests duplicated after the p95
+    single_outage  one fast server that is stopped halfway through
+    pool_outage    the hedged pool with a fast server stopped halfway through
+
+and report latency percentiles, errors, hedges and failovers. The first
+--warmup-requests give the router a latency history and are not measured.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.messages import HumanMessage
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.backend import OllamaBackend
+from src.bankbot.llm.pool import BackendPool
+import standin_ollama
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile of a list of latencies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def servers(args):
+    """Options of the two fast stand-ins and the busy one."""
+    common = ["--model", llm_config.model_name, "--load-seconds", "0",
+              "--tokens-per-second", str(args.tokens_per_second)]
+    tail = ["--tail-probability", str(args.tail_probability), "--tail-seconds", str(args.tail_seconds)]
+    return [
+        common + tail + ["--ttft", str(args.ttft), "--seed", "1"],
+        common + tail + ["--ttft", str(args.ttft), "--seed", "2"],
+        common + ["--ttft", str(args.ttft * 4), "--queue-penalty", "1.0"],
+    ]
+
+
+def run_scenario(args, pooled: bool, hedge: bool, outage: bool) -> dict:
+    """Send the requests and collect latencies; stop one fast server halfway for an outage."""
+    options = servers(args) if pooled else servers(args)[:1]
+    standins = [standin_ollama.BackgroundServer(argv) for argv in options]
+    urls = [standin.start() for standin in standins]
+    config = llm_config.model_copy(update={
+        "base_url": urls[0], "endpoints": ",".join(urls), "hedge_enabled": hedge,
+        "endpoint_cooldown": args.cooldown,
+    })
+    backend = BackendPool(config, urls) if pooled else OllamaBackend(config)
+    backend.start(background=False)
+    model = backend.chat_model()
+    
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    
+    def send(index: int):
+        nonlocal errors
+        if outage and index == args.warmup_requests + args.requests // 2:
+            standins[0].stop()
+        messages = [HumanMessage(content=f"Hello, this is request {index}")]
+        started = time.perf_counter()
+        try:
+            if args.streaming:
+                for _ in model.stream(messages):
+                    pass
+            else:
+                model.invoke(messages)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        if index >= args.warmup_requests:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+    
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # The router needs some latency history before it can route and hedge well
+        list(pool.map(send, range(args.warmup_requests)))
+        started = time.perf_counter()
+        list(pool.map(send, range(args.warmup_requests, args.warmup_requests + args.requests)))
+    elapsed = time.perf_counter() - started
+    
+    result = {
+        "requests": args.requests,
+        "errors": errors,
+        "seconds": elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+    if pooled:
+        result.update({
+            "hedges": backend.stats.hedges,
+            "hedge_wins": backend.stats.hedge_wins,
+            "failovers": backend.stats.failovers,
+            "per_endpoint": [endpoint.requests for endpoint in backend.endpoints],
+        })
+    backend.close()
+    for standin in standins:
+        standin.stop()
+    return result
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400, help="Requests per scenario")
+    parser.add_argument("--warmup-requests", type=int, default=50, help="Unmeasured requests sent first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at the same time")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Prompt evaluation time of the fast servers")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Stand-in generation speed")
+    parser.add_argument("--tail-probability", type=float, default=0.02, help="Fraction of requests that stall")
+    parser.add_argument("--tail-seconds", type=float, default=1.0, help="Seconds a stalled request waits")
+    parser.add_argument("--cooldown", type=float, default=10.0, help="Seconds a failed endpoint is skipped")
+    parser.add_argument("--streaming", action="store_true", help="Stream replies and hedge on the first chunk")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    # Stopped servers log every connection they drop
+    logging.getLogger("aiohttp").setLevel(logging.CRITICAL)
+    
+    scenarios = {
+        "single": dict(pooled=False, hedge=False, outage=False),
+        "pool": dict(pooled=True, hedge=False, outage=False),
+        "hedged": dict(pooled=True, hedge=True, outage=False),
+        "single_outage": dict(pooled=False, hedge=False, outage=True),
+        "pool_outage": dict(pooled=True, hedge=True, outage=True),
+    }
+    results = {name: run_scenario(args, **options) for name, options in scenarios.items()}
+    
+    print(f"{'scenario':<14} {'p50':>7} {'p95':>7} {'p99':>7} {'errors':>7} {'hedges':>7} {'failovers':>9}")
+    for name, result in results.items():
+        print(f"{name:<14} {result['p50']:>6.3f}s {result['p95']:>6.3f}s {result['p99']:>6.3f}s "
+              f"{result['errors']:>7} {result.get('hedges', '-'):>7} {result.get('failovers', '-'):>9}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
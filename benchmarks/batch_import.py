@@ -0,0 +1,94 @@
+"""
+Benchmark bulk imports through apply_batch against one deposit/withdraw call per entry.
+
+    python benchmarks/batch_import.py --entries 1000000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.ledger import TransactionLedger
+
+
+def statement(entries: int) -> list:
+    """Build alternating deposits and withdrawals that never overdraw."""
+    return [("deposit", 10.0) if i % 2 == 0 else ("withdraw", 5.0) for i in range(entries)]
+
+
+def open_account(directory: str = None) -> BankAccount:
+    """Create an empty account, optionally backed by a ledger."""
+    ledger = None
+    if directory is not None:
+        ledger = TransactionLedger(directory, fsync_policy="never", snapshot_interval=10 ** 9)
+    return BankAccount(ledger=ledger)
+
+
+def import_per_entry(account: BankAccount, operations: list) -> float:
+    """Apply each entry with its own call and return the elapsed seconds."""
+    started = time.perf_counter()
+    for action, amount in operations:
+        if action == "deposit":
+            account.deposit(amount)
+        else:
+            account.withdraw(amount)
+    account.close()
+    return time.perf_counter() - started
+
+
+def import_batch(account: BankAccount, operations: list) -> float:
+    """Apply all entries with one apply_batch call and return the elapsed seconds."""
+    started = time.perf_counter()
+    result = account.apply_batch(operations)
+    account.close()
+    if not result.success:
+        raise RuntimeError(result.message)
+    return time.perf_counter() - started
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1000000, help="Statement entries to import")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    operations = statement(args.entries)
+    results = {"entries": args.entries}
+    root = tempfile.mkdtemp(prefix="bankbot-batch-")
+    try:
+        results["memory_per_entry_s"] = import_per_entry(open_account(), operations)
+        results["memory_batch_s"] = import_batch(open_account(), operations)
+        
+        per_entry_dir = os.path.join(root, "per-entry")
+        batch_dir = os.path.join(root, "batch")
+        results["ledger_per_entry_s"] = import_per_entry(open_account(per_entry_dir), operations)
+        results["ledger_batch_s"] = import_batch(open_account(batch_dir), operations)
+        
+        for name, directory in (("per_entry", per_entry_dir), ("batch", batch_dir)):
+            started = time.perf_counter()
+            open_account(directory).close()
+            results[f"replay_{name}_s"] = time.perf_counter() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    
+    print(f"{args.entries} entries")
+    print(f"{'':<10} {'per entry s':>12} {'batch s':>9}")
+    print(f"{'memory':<10} {results['memory_per_entry_s']:>12.2f} {results['memory_batch_s']:>9.2f}")
+    print(f"{'ledger':<10} {results['ledger_per_entry_s']:>12.2f} {results['ledger_batch_s']:>9.2f}")
+    print(f"{'replay':<10} {results['replay_per_entry_s']:>12.2f} {results['replay_batch_s']:>9.2f}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
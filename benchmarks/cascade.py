@@ -0,0 +1,173 @@
+"""
+Compare serving every turn with the large model against the small/large cascade.
+
+    python benchmarks/cascade.py
+    python benchmarks/cascade.py --turns 500 --large-latency 0.4 --small-latency 0.05
+    python benchmarks/cascade.py --classifier classifier.npz --output cascade.json
+
+Both tiers are SimulatedChatModels: the large one always answers correctly,
+the small one is faster but returns an unparseable action for most
+multi-step requests and, rarely, for simple ones. Utterances are generated
+from labelled templates that are not in the classifier's seed examples, so
+the reported accuracy is on unseen phrasing. The run reports each tier's
+share of turns and latency, the escalations, the end-to-end latency of both
+setups and the share of turns that ended without a valid reply.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.cascade import IntentClassifier, SEED_EXAMPLES
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+# (template, tier, reply) with {n} and {m} filled with amounts
+WORKLOAD = [
+    ("hey there", "small", "Hello! How can I help you today?"),
+    ("good evening, who am I talking to?", "small", "I'm your banking assistant."),
+    ("cheers, bye", "small", "Goodbye!"),
+    ("what do I have in my account", "small", '{{"action": "balance"}}'),
+    ("could you tell me my current balance please", "small", '{{"action": "balance"}}'),
+    ("put {n} in", "small", '{{"action": "deposit", "amount": {n}}}'),
+    ("I'd like to deposit {n} euros please", "small", '{{"action": "deposit", "amount": {n}}}'),
+    ("take {n} out", "small", '{{"action": "withdraw", "amount": {n}}}'),
+    ("withdraw {n} eur", "small", '{{"action": "withdraw", "amount": {n}}}'),
+    ("please pay in {n} dollars", "small", '{{"action": "deposit", "amount": {n}, "currency": "USD"}}'),
+    ("deposit {n} then withdraw {m}", "large",
+     '{{"action": "deposit", "amount": {n}}} {{"action": "withdraw", "amount": {m}}}'),
+    ("move {n} out and put {m} back, only if both work", "large",
+     '{{"action": "batch", "actions": [{{"action": "withdraw", "amount": {n}}}, {{"action": "deposit", "amount": {m}}}]}}'),
+    ("how much did I spend over the last two weeks compared to before", "large",
+     "You withdrew less than in the two weeks before."),
+    ("list my last {n} transactions and tell me which one was the biggest", "large",
+     '{{"action": "history", "limit": {n}}}'),
+    ("if I took out {n} every day, when would I run out?", "large",
+     '{{"action": "balance"}} Let me check your balance first.'),
+    ("convert {n} euros to dollars and deposit the result", "large",
+     '{{"action": "deposit", "amount": {n}, "currency": "EUR"}}'),
+]
+
+BROKEN_REPLY = 'Sure, doing that now. {"action": "deposit", "amount": }'
+
+
+def make_turns(count: int, seed: int):
+    """Generate (utterance, tier, reply) triples."""
+    rng = random.Random(seed)
+    turns = []
+    for _ in range(count):
+        template, tier, reply = rng.choice(WORKLOAD)
+        n, m = rng.randint(2, 400), rng.randint(2, 400)
+        turns.append((template.format(n=n, m=m), tier, reply.format(n=n, m=m)))
+    return turns
+
+
+def make_models(turns, args):
+    """Create the large and small stand-in models answering the given turns."""
+    replies = {utterance: (tier, reply) for utterance, tier, reply in turns}
+    rng = random.Random(args.seed + 1)
+    
+    def large(utterance: str) -> str:
+        return replies[utterance][1]
+    
+    def small(utterance: str) -> str:
+        tier, reply = replies[utterance]
+        failure_rate = args.small_failure_rate if tier == "large" else args.small_slip_rate
+        return BROKEN_REPLY if rng.random() < failure_rate else reply
+    
+    large_model = SimulatedChatModel(respond=large, latency=args.large_latency,
+                                      tokens_per_second=args.large_tokens_per_second)
+    small_model = SimulatedChatModel(respond=small, latency=args.small_latency,
+                                      tokens_per_second=args.small_tokens_per_second)
+    return large_model, small_model
+
+
+def run(turns, config, llm, small_llm=None):
+    """Play the turns through one assistant and time them; returns the results and the assistant."""
+    assistant = BankingAssistant(config, llm=llm, small_llm=small_llm)
+    latencies, failed = [], 0
+    for utterance, _, _ in turns:
+        started = time.perf_counter()
+        parsed = assistant.chat_turn(utterance, 100.0)
+        latencies.append(time.perf_counter() - started)
+        if parsed is None or (parsed.invalid and not parsed.actions):
+            failed += 1
+    latencies.sort()
+    return {
+        "mean": statistics.fmean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "total": sum(latencies),
+        "failed": failed / len(turns),
+    }, assistant
+
+
+def main():
+    """Run both setups and print the comparison."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=120, help="Turns played through each setup")
+    parser.add_argument("--seed", type=int, default=7, help="Seed of the generated workload")
+    parser.add_argument("--classifier", help="Trained classifier (.npz) instead of the seed examples")
+    parser.add_argument("--min-margin", type=float, default=llm_config.cascade_min_margin,
+                        help="Margin below which a turn goes to the large model")
+    parser.add_argument("--large-latency", type=float, default=0.12, help="Large model time to first token")
+    parser.add_argument("--large-tokens-per-second", type=float, default=60.0, help="Large model generation speed")
+    parser.add_argument("--small-latency", type=float, default=0.02, help="Small model time to first token")
+    parser.add_argument("--small-tokens-per-second", type=float, default=200.0, help="Small model generation speed")
+    parser.add_argument("--small-failure-rate", type=float, default=0.7,
+                        help="Share of multi-step turns the small model gets wrong")
+    parser.add_argument("--small-slip-rate", type=float, default=0.03,
+                        help="Share of simple turns the small model gets wrong")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    turns = make_turns(args.turns, args.seed)
+    classifier = IntentClassifier.load(args.classifier) if args.classifier else IntentClassifier.fit(SEED_EXAMPLES)
+    
+    started = time.perf_counter()
+    predicted = [classifier.predict(utterance)[0] for utterance, _, _ in turns]
+    classify_us = (time.perf_counter() - started) / len(turns) * 1e6
+    accuracy = sum(label == tier for label, (_, tier, _) in zip(predicted, turns)) / len(turns)
+    
+    config = llm_config.model_copy(update={
+        "response_cache_enabled": False,
+        "cascade_classifier_path": args.classifier,
+        "cascade_min_margin": args.min_margin,
+    })
+    large_model, small_model = make_models(turns, args)
+    baseline, _ = run(turns, config, large_model)
+    cascaded, assistant = run(turns, config, large_model, small_model)
+    stats = assistant.cascade.stats
+    
+    results = {
+        "turns": len(turns),
+        "classifier": {"accuracy": accuracy, "microseconds_per_turn": classify_us},
+        "large_only": baseline,
+        "cascade": dict(cascaded, small_share=stats.share("small"), ambiguous=stats.ambiguous,
+                        escalations=stats.escalations,
+                        small_p50=stats.percentile("small", 50), large_p50=stats.percentile("large", 50)),
+    }
+    
+    print(f"classifier: {accuracy:.1%} of {len(turns)} unseen turns routed to their tier, {classify_us:.0f}µs per turn")
+    print(stats.summary())
+    print(f"{'setup':<12} {'mean':>8} {'p50':>8} {'p95':>8} {'failed':>7}")
+    for name, result in (("large only", baseline), ("cascade", cascaded)):
+        print(f"{name:<12} {result['mean'] * 1000:>6.0f}ms {result['p50'] * 1000:>6.0f}ms "
+              f"{result['p95'] * 1000:>6.0f}ms {result['failed']:>7.1%}")
+    print(f"cascade: {1 - cascaded['total'] / baseline['total']:.0%} less model time than large only")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
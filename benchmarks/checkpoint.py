@@ -0,0 +1,136 @@
+"""
+Measure incremental session checkpoints and lazy resume.
+
+    python benchmarks/checkpoint.py
+    python benchmarks/checkpoint.py --turns 2000 --sessions 5000
+
+A session of --turns turns, each adding a user message, a reply and a
+transaction, is checkpointed after every turn twice: with delta frames and
+by rewriting the whole state each time (as a checkpoint without deltas
+would). Then --sessions such checkpoints of --resume-turns turns are
+resumed: opening a BankBotApp restores its account, and the chat history
+is only decoded into the assistant's memory when it is first needed.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import orjson
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.config.settings import app_config
+from src.bankbot.llm.memory import ConversationMemory
+from src.bankbot.utils.checkpoint import SessionCheckpoint, SessionState
+
+
+def play(turns: int):
+    """Yield the session state after each of a number of turns."""
+    account = BankAccount(initial_balance=1000.0)
+    memory = ConversationMemory(max_tokens=1024, max_messages=20)
+    for turn in range(turns):
+        memory.add_user_message(f"Please deposit {turn % 50 + 1} euros for the groceries of week {turn}")
+        memory.add_ai_message(f"Done! I deposited {turn % 50 + 1} euros. {{\"action\": \"add\", \"amount\": {turn % 50 + 1}}}")
+        account.deposit(turn % 50 + 1)
+        messages, summary = memory.dump()
+        yield SessionState(messages=messages, summary=summary, balance=account.balance, history=account.history)
+
+
+def save_every_turn(path: str, turns: int, incremental: bool) -> dict:
+    """Checkpoint after every turn and time the saves."""
+    # A negative ratio makes every save rewrite the whole file
+    checkpoint = SessionCheckpoint(path, compact_ratio=1.0 if incremental else -1.0)
+    timings = []
+    for state in play(turns):
+        started = time.perf_counter()
+        checkpoint.save(state)
+        timings.append(time.perf_counter() - started)
+    last = timings[-100:]
+    return {
+        "mean_us": statistics.mean(timings) * 1e6,
+        "last_100_mean_us": statistics.mean(last) * 1e6,
+        "bytes_written": checkpoint.bytes_written,
+        "file_bytes": os.path.getsize(path),
+        "json_bytes": len(orjson.dumps({
+            "messages": state.messages, "summary": state.summary, "balance": state.balance,
+            "history": [[t.action, t.amount, t.balance_before, t.balance_after, t.timestamp]
+                        for t in state.history.view()],
+        })),
+    }
+
+
+def resume(directory: str, sessions: int, turns: int) -> dict:
+    """Write many checkpoints, then time resuming them."""
+    for state in play(turns):
+        pass
+    for session in range(sessions):
+        SessionCheckpoint(os.path.join(directory, f"session-{session}.ckpt")).save(state)
+    
+    # Imported here so the timing below does not include loading the app
+    from src.bankbot.app import BankBotApp
+    from src.bankbot.llm.simulated import SimulatedChatModel
+    app_config.checkpoint_path = directory
+    app_config.telemetry_enabled = False
+    llm = SimulatedChatModel(responses=["ok"])
+    
+    started = time.perf_counter()
+    apps = [BankBotApp(session_id=f"session-{session}", llm=llm) for session in range(sessions)]
+    opened = time.perf_counter() - started
+    assert all(app.account.balance == state.balance for app in apps)
+    
+    started = time.perf_counter()
+    for app in apps[:100]:
+        app.assistant
+    history = (time.perf_counter() - started) / min(100, sessions)
+    return {
+        "sessions": sessions,
+        "open_ms_per_session": opened / sessions * 1000,
+        "history_ms_per_session": history * 1000,
+    }
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1000, help="Turns of the checkpointed session")
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions to resume")
+    parser.add_argument("--resume-turns", type=int, default=200, help="Turns of each resumed session")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    directory = tempfile.mkdtemp(prefix="bankbot-checkpoint-")
+    try:
+        results = {
+            "incremental": save_every_turn(os.path.join(directory, "incremental.ckpt"), args.turns, True),
+            "full_rewrite": save_every_turn(os.path.join(directory, "full.ckpt"), args.turns, False),
+        }
+        sessions = os.path.join(directory, "sessions")
+        os.makedirs(sessions)
+        results["resume"] = resume(sessions, args.sessions, args.resume_turns)
+    finally:
+        shutil.rmtree(directory)
+    
+    for name in ("incremental", "full_rewrite"):
+        result = results[name]
+        print(f"{name:<13} save {result['mean_us']:7.1f} us mean, {result['last_100_mean_us']:7.1f} us over the "
+              f"last 100 turns, {result['bytes_written'] / 1024:8.1f} KiB written, "
+              f"file {result['file_bytes'] / 1024:.1f} KiB (JSON {result['json_bytes'] / 1024:.1f} KiB)")
+    resumed = results["resume"]
+    print(f"resume        {resumed['sessions']} sessions: {resumed['open_ms_per_session']:.3f} ms/session to open "
+          f"with the account restored, {resumed['history_ms_per_session']:.3f} ms/session more to create the "
+          f"assistant with the restored history")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark cached exchange rates and vectorized conversion.
+
+    python benchmarks/currency.py
+    python benchmarks/currency.py --transactions 1000000 --latency 0.05
+
+A stand-in rate service serves benchmarks/data/rates.json over HTTP after
+--latency seconds. The benchmark reports
+
+    lookups     rate lookups through a converter that fetches every time
+                (TTL 0) against one that caches the table for the TTL
+    pairs       cross-rate lookups through the precomputed matrix against
+                triangulating through the base currency
+    history     converting every amount and balance of a history with
+                NumPy against a Python loop over the transactions
+    mixed       converting amounts in mixed currencies with convert_many
+                against a per-amount loop
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from src.bankbot.banking.currency import CurrencyConverter, HttpRateProvider
+from src.bankbot.banking.history import TransactionHistory
+
+
+RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rates.json")
+
+
+def standin_rates(latency: float) -> ThreadingHTTPServer:
+    """Serve the sample rates on a free port from a background thread."""
+    with open(RATES_PATH, "rb") as fh:
+        body = fh.read()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def lookups(url: str, count: int, ttl: float) -> dict:
+    """Look up random pairs through a converter with the given TTL."""
+    converter = CurrencyConverter(HttpRateProvider(url), ttl=ttl)
+    codes = converter.table().codes
+    rng = random.Random(0)
+    pairs = [(rng.choice(codes), rng.choice(codes)) for _ in range(count)]
+    started = time.perf_counter()
+    for from_currency, to_currency in pairs:
+        converter.rate(from_currency, to_currency)
+    elapsed = time.perf_counter() - started
+    return {"lookups": count, "fetches": converter.stats.fetches, "us_per_lookup": elapsed / count * 1e6}
+
+
+def pairs(table, count: int) -> dict:
+    """Compare matrix lookups with triangulation through the base currency."""
+    per_base = {code: table.rate(table.base, code) for code in table.codes}
+    rng = random.Random(1)
+    sample = [(rng.choice(table.codes), rng.choice(table.codes)) for _ in range(count)]
+    
+    started = time.perf_counter()
+    for from_currency, to_currency in sample:
+        per_base[to_currency] / per_base[from_currency]
+    triangulated = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    for from_currency, to_currency in sample:
+        table.rate(from_currency, to_currency)
+    matrix = time.perf_counter() - started
+    return {"triangulated_us": triangulated / count * 1e6, "matrix_us": matrix / count * 1e6}
+
+
+def history(converter: CurrencyConverter, transactions: int) -> dict:
+    """Convert a whole history with NumPy and with a Python loop."""
+    rng = np.random.default_rng(2)
+    amounts = rng.uniform(1, 500, transactions)
+    balances_after = 1000 + np.cumsum(amounts)
+    entries = TransactionHistory("EUR")
+    entries.extend([0] * transactions, amounts.tolist(), (balances_after - amounts).tolist(),
+                   balances_after.tolist(), [time.time()] * transactions)
+    
+    started = time.perf_counter()
+    vectorized = converter.convert_history(entries, "USD")
+    numpy_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    rate = converter.rate("EUR", "USD")
+    looped = {
+        name: [value * rate for value in getattr(entries, name)]
+        for name in ("amounts", "balances_before", "balances_after")
+    }
+    loop_seconds = time.perf_counter() - started
+    
+    assert np.allclose(vectorized["amounts"], looped["amounts"])
+    return {"transactions": transactions, "numpy_seconds": numpy_seconds, "loop_seconds": loop_seconds}
+
+
+def mixed(converter: CurrencyConverter, count: int) -> dict:
+    """Convert amounts in mixed currencies with convert_many and one by one."""
+    table = converter.table()
+    rng = random.Random(3)
+    amounts = [rng.uniform(1, 500) for _ in range(count)]
+    currencies = [rng.choice(table.codes) for _ in range(count)]
+    
+    started = time.perf_counter()
+    vectorized = table.convert_many(amounts, currencies, "EUR")
+    numpy_seconds = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    looped = [converter.convert(amount, currency, "EUR") for amount, currency in zip(amounts, currencies)]
+    loop_seconds = time.perf_counter() - started
+    
+    assert np.allclose(vectorized, looped)
+    return {"amounts": count, "numpy_seconds": numpy_seconds, "loop_seconds": loop_seconds}
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stand-in rate service takes")
+    parser.add_argument("--lookups", type=int, default=200, help="Rate lookups per converter")
+    parser.add_argument("--pairs", type=int, default=200000, help="Cross-rate lookups")
+    parser.add_argument("--transactions", type=int, default=1000000, help="Transactions in the converted history")
+    parser.add_argument("--amounts", type=int, default=200000, help="Amounts in mixed currencies")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    server = standin_rates(args.latency)
+    url = f"http://127.0.0.1:{server.server_address[1]}/latest"
+    converter = CurrencyConverter(HttpRateProvider(url))
+    results = {
+        "uncached": lookups(url, args.lookups, ttl=0.0),
+        "cached": lookups(url, args.lookups, ttl=3600.0),
+        "pairs": pairs(converter.table(), args.pairs),
+        "history": history(converter, args.transactions),
+        "mixed": mixed(converter, args.amounts),
+    }
+    server.shutdown()
+    
+    for name in ("uncached", "cached"):
+        result = results[name]
+        print(f"{name:<9} {result['us_per_lookup']:10.1f} us/lookup, {result['fetches']} fetches "
+              f"for {result['lookups']} lookups")
+    print(f"pairs     triangulated {results['pairs']['triangulated_us']:.2f} us, "
+          f"matrix {results['pairs']['matrix_us']:.2f} us")
+    for name, count in (("history", "transactions"), ("mixed", "amounts")):
+        result = results[name]
+        print(f"{name:<9} {result[count]} {count}: numpy {result['numpy_seconds'] * 1000:.1f} ms, "
+              f"loop {result['loop_seconds'] * 1000:.1f} ms "
+              f"({result['loop_seconds'] / result['numpy_seconds']:.0f}x)")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Measure first-turn latency with and without warm-up, and connection reuse across sessions.
+
+    python benchmarks/first_turn.py
+    python benchmarks/first_turn.py --load-seconds 5 --sessions 64 --concurrency 8
+    python benchmarks/first_turn.py --base-url http://localhost:11434
+
+By default every scenario gets a fresh stand-in Ollama server (see
+standin_ollama.py) whose model starts unloaded, so the cold first turn pays
+--load-seconds. The warm scenario starts the backend's background warm-up
+and waits --think-time seconds, as a user reading the welcome message would,
+before sending the first turn. The pooling scenario runs many sessions, a few
+at a time, against one shared backend and against one backend per session,
+and reports how many TCP connections each needed. With --base-url the scenarios run
+against a real server instead; its model must be unloaded for a cold start.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config.settings import llm_config, app_config
+from src.bankbot.llm.backend import OllamaBackend
+import standin_ollama
+
+
+@contextlib.contextmanager
+def standin_server(args):
+    """Run a fresh stand-in server on a free port and yield its URL."""
+    if args.base_url:
+        yield args.base_url
+        return
+    
+    with standin_ollama.BackgroundServer([
+        "--model", llm_config.model_name,
+        "--load-seconds", str(args.load_seconds), "--ttft", str(args.ttft),
+        "--tokens-per-second", str(args.tokens_per_second),
+    ]) as url:
+        yield url
+
+
+def make_backend(url: str) -> OllamaBackend:
+    """Create a backend of its own for one scenario."""
+    return OllamaBackend(llm_config.model_copy(update={"base_url": url}))
+
+
+def timed_turn(app: BankBotApp, user_input: str) -> float:
+    """Run one turn and return its latency in seconds."""
+    started = time.perf_counter()
+    app.process_user_input(user_input)
+    return time.perf_counter() - started
+
+
+def first_turn(args, warm: bool) -> dict:
+    """Measure the first and second turn of a fresh session."""
+    with standin_server(args) as url:
+        backend = make_backend(url)
+        if warm:
+            backend.start(background=True)
+            time.sleep(args.think_time)
+        app = BankBotApp(llm=backend.chat_model())
+        result = {
+            "first_turn_seconds": timed_turn(app, "Hi, I'm Ana!"),
+            "second_turn_seconds": timed_turn(app, "What can you do?"),
+            "warmup_seconds": backend.stats.warmup_seconds,
+        }
+        backend.close()
+    return result
+
+
+def pooling(args, shared: bool) -> dict:
+    """Run concurrent sessions on one shared backend or one backend per session."""
+    with standin_server(args) as url:
+        backends = [make_backend(url)] if shared else [make_backend(url) for _ in range(args.sessions)]
+        backends[0].warm_up()
+        
+        def session(index: int):
+            backend = backends[0] if shared else backends[index]
+            app = BankBotApp(llm=backend.chat_model())
+            for turn in range(args.turns):
+                timed_turn(app, f"Tell me something nice, number {turn}")
+        
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(session, range(args.sessions)))
+        requests = sum(backend.stats.requests for backend in backends)
+        connections = sum(backend.stats.connections_opened for backend in backends)
+        for backend in backends:
+            backend.close()
+    return {"requests": requests, "connections_opened": connections, "connection_reuse": 1 - connections / requests}
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", help="Real Ollama server to use instead of the stand-in")
+    parser.add_argument("--load-seconds", type=float, default=3.0, help="Stand-in model load time")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Stand-in prompt evaluation time")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Stand-in generation speed")
+    parser.add_argument("--think-time", type=float, default=5.0, help="Seconds between startup and the first message")
+    parser.add_argument("--sessions", type=int, default=32, help="Sessions in the pooling scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions talking at the same time")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session in the pooling scenario")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    llm_config.streaming = False
+    app_config.fast_path_enabled = False
+    app_config.telemetry_enabled = False
+    llm_config.response_cache_enabled = False
+    
+    # Sessions print their replies; stdout is process-wide, so silence it once for all threads
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        results = {
+            "cold": first_turn(args, warm=False),
+            "warm": first_turn(args, warm=True),
+            "per_session_clients": pooling(args, shared=False),
+            "shared_pool": pooling(args, shared=True),
+        }
+    
+    for name in ("cold", "warm"):
+        result = results[name]
+        print(f"{name:<5} first turn {result['first_turn_seconds']:.2f}s, second turn {result['second_turn_seconds']:.2f}s")
+    for name in ("per_session_clients", "shared_pool"):
+        result = results[name]
+        print(f"{name:<20} {result['requests']} requests over {result['connections_opened']} connections "
+              f"({result['connection_reuse'] * 100:.0f}% reused)")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
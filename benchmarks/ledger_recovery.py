@@ -0,0 +1,102 @@
+"""
+Benchmark ledger write throughput per fsync policy and recovery time against ledger size.
+
+    python benchmarks/ledger_recovery.py --sizes 1000 10000 100000
+    python benchmarks/ledger_recovery.py --writers 16
+
+Throughput is measured with one writer and with --writers threads sharing
+one account, where the "group" policy lets concurrent transactions share
+an fsync.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.ledger import TransactionLedger, FSYNC_POLICIES
+
+
+def write_ledger(directory: str, operations: int, policy: str, snapshot_interval: int, writers: int = 1) -> float:
+    """Apply alternating deposits and withdrawals from several threads and return operations per second."""
+    account = BankAccount(
+        initial_balance=1000.0,
+        ledger=TransactionLedger(directory, fsync_policy=policy, snapshot_interval=snapshot_interval)
+    )
+    
+    def write(share: int):
+        for i in range(share):
+            if i % 2:
+                account.withdraw(5.0)
+            else:
+                account.deposit(10.0)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(write, [operations // writers] * writers))
+    elapsed = time.perf_counter() - started
+    account.close()
+    return operations // writers * writers / elapsed
+
+
+def recover(directory: str) -> float:
+    """Open the ledger again and return the recovery time in seconds."""
+    started = time.perf_counter()
+    account = BankAccount(ledger=TransactionLedger(directory, fsync_policy="never"))
+    elapsed = time.perf_counter() - started
+    account.close()
+    return elapsed
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Ledger sizes to recover")
+    parser.add_argument("--throughput-ops", type=int, default=2000, help="Operations per fsync policy")
+    parser.add_argument("--writers", type=int, default=8, help="Threads writing to one account concurrently")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    results = {"throughput": {}, "recovery": []}
+    root = tempfile.mkdtemp(prefix="bankbot-ledger-")
+    try:
+        print(f"{'policy':<8} {'1 writer ops/s':>15} {f'{args.writers} writers ops/s':>17}")
+        for policy in FSYNC_POLICIES:
+            row = {}
+            for writers in (1, args.writers):
+                directory = os.path.join(root, f"throughput-{policy}-{writers}")
+                row[writers] = write_ledger(directory, args.throughput_ops, policy, 10 ** 9, writers)
+            results["throughput"][policy] = {"single": row[1], "concurrent": row[args.writers]}
+            print(f"{policy:<8} {row[1]:>15.0f} {row[args.writers]:>17.0f}")
+        
+        print(f"\n{'records':>9} {'log only ms':>12} {'snapshot+tail ms':>17}")
+        for size in args.sizes:
+            log_only = os.path.join(root, f"log-{size}")
+            write_ledger(log_only, size, "never", snapshot_interval=10 ** 9)
+            with_snapshot = os.path.join(root, f"snap-{size}")
+            write_ledger(with_snapshot, size, "never", snapshot_interval=max(1, size // 10))
+            
+            row = {
+                "records": size,
+                "log_only_ms": recover(log_only) * 1000,
+                "snapshot_ms": recover(with_snapshot) * 1000,
+            }
+            results["recovery"].append(row)
+            print(f"{size:>9} {row['log_only_ms']:>12.1f} {row['snapshot_ms']:>17.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
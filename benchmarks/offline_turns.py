@@ -0,0 +1,163 @@
+"""
+Time every stage of a conversation turn without a GPU or network.
+
+    python benchmarks/offline_turns.py --turns 2000 --output turns.json
+    python benchmarks/offline_turns.py --latency 0.3 --tokens-per-second 40 --turns 20
+    python benchmarks/offline_turns.py --record cassette.jsonl --turns 30
+    python benchmarks/offline_turns.py --replay cassette.jsonl --baseline turns.json
+
+The model is a SimulatedChatModel replaying the replies in
+benchmarks/data/model_outputs.jsonl, with zero latency by default so only
+the Python-side hot path is measured: prompt build, model call, parse,
+action execution and history trimming. --record plays the scripted inputs
+against the configured Ollama model and saves its replies to a cassette;
+--replay serves them back offline. With --baseline the run fails when a
+stage got slower than the baseline by more than --tolerance, so CI can
+catch regressions.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config.settings import llm_config, app_config
+from src.bankbot.llm.simulated import SimulatedChatModel, CassetteChatModel
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "model_outputs.jsonl")
+
+INPUTS = [
+    "Hi, I'm Ana!",
+    "Please deposit 120 euros",
+    "What's my balance?",
+    "Take out 35",
+    "How much is 50 euros in dollars?",
+    "Withdraw 10 and then deposit 60, all or nothing",
+    "How much did I deposit this week?",
+    "Show my last 3 transactions",
+    "Thanks, that's all",
+]
+
+# Stages whose time is spent in the model rather than in our code
+MODEL_STAGES = ("llm", "turn")
+
+
+def build_model(args) -> object:
+    """Create the chat model for the run, or None to use the configured provider."""
+    if args.replay:
+        return CassetteChatModel(path=args.replay, replay_latency=args.replay_latency)
+    if args.record:
+        return None
+    with open(CORPUS, encoding="utf-8") as fh:
+        replies = [json.loads(line)["output"] for line in fh if line.strip()]
+    return SimulatedChatModel(responses=replies, latency=args.latency, tokens_per_second=args.tokens_per_second)
+
+
+def run(args) -> dict:
+    """Play the scripted turns and return the stage summary."""
+    app = BankBotApp(llm=build_model(args))
+    if args.record:
+        app.assistant.llm = CassetteChatModel(path=args.record, mode="record", model=app.assistant.llm)
+    app.router = None
+    app.assistant.cache = None
+    profiler = app.profiler
+    
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        for turn in range(args.warmup + args.turns):
+            if turn == args.warmup:
+                profiler.reset()
+                profiler.enabled = True
+                profiler.keep_samples = True
+            with profiler.stage("turn"):
+                app.process_user_input(INPUTS[turn % len(INPUTS)])
+    
+    stages = profiler.summary()
+    turn_seconds = stages["turn"]["total"]
+    if "llm" in stages:
+        overhead_seconds = turn_seconds - stages["llm"]["total"]
+    else:
+        # Streamed model time is interleaved with parsing, so only count our own stages
+        overhead_seconds = sum(stage["total"] for name, stage in stages.items() if name not in MODEL_STAGES)
+    return {
+        "turns": args.turns,
+        "streaming": llm_config.streaming,
+        "action_mode": llm_config.action_mode,
+        "turns_per_second": args.turns / turn_seconds,
+        "overhead_per_turn_us": overhead_seconds / args.turns * 1e6,
+        "stages": {
+            name: {
+                "count": stage["count"],
+                "total_ms": stage["total"] * 1e3,
+                "mean_us": stage["mean"] * 1e6,
+                "p50_us": stage["p50"] * 1e6,
+                "p95_us": stage["p95"] * 1e6,
+                "max_us": stage["max"] * 1e6,
+            }
+            for name, stage in stages.items()
+        },
+    }
+
+
+def compare(results: dict, baseline_path: str, tolerance: float) -> list:
+    """Return the stages that got slower than the baseline by more than the tolerance."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    regressions = []
+    for name, stage in results["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if name in MODEL_STAGES or before is None:
+            continue
+        if stage["mean_us"] > before["mean_us"] * (1 + tolerance):
+            regressions.append(f"{name}: {before['mean_us']:.1f} -> {stage['mean_us']:.1f} us")
+    return regressions
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000, help="Measured turns")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured turns played first")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Simulated generation speed, 0 for instant")
+    parser.add_argument("--streaming", action="store_true", help="Use the streaming path")
+    parser.add_argument("--action-mode", default="text", choices=["text", "tools", "json"], help="How actions are returned")
+    parser.add_argument("--no-telemetry", action="store_true", help="Measure with telemetry disabled")
+    parser.add_argument("--record", help="Record replies of the configured model to this cassette")
+    parser.add_argument("--replay", help="Replay replies from this cassette")
+    parser.add_argument("--replay-latency", action="store_true", help="Sleep the recorded response times when replaying")
+    parser.add_argument("--baseline", help="Fail if a stage is slower than in this earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    llm_config.streaming = args.streaming
+    llm_config.action_mode = args.action_mode
+    app_config.fast_path_enabled = False
+    app_config.telemetry_enabled = not args.no_telemetry
+    results = run(args)
+    
+    print(f"{results['turns']} turns, {results['turns_per_second']:.0f} turns/s, "
+          f"{results['overhead_per_turn_us']:.0f} us overhead per turn")
+    print(f"{'stage':<14} {'count':>7} {'mean us':>9} {'p50 us':>9} {'p95 us':>9} {'total ms':>10}")
+    for name, stage in results["stages"].items():
+        print(f"{name:<14} {stage['count']:>7} {stage['mean_us']:>9.1f} {stage['p50_us']:>9.1f} "
+              f"{stage['p95_us']:>9.1f} {stage['total_ms']:>10.1f}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
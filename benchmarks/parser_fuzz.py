@@ -0,0 +1,112 @@
+"""
+Fuzz the response parsers with mutated model outputs.
+
+    python benchmarks/parser_fuzz.py --iterations 20000 --seed 1
+
+Every corpus entry is parsed as is and must yield exactly its expected
+actions. Mutated entries (random insertions, deletions, truncation and
+stray braces, quotes and backticks) must never raise, and feeding any
+output to the streaming parser in random chunks must give the same text
+and actions as parsing it in one piece.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.utils.parser import ResponseParser, StreamingResponseParser
+from parser_throughput import load_corpus
+
+
+NOISE = ["{", "}", "'", '"', "`", "```", "```json\n", ",", ":", "\\", "[", "]", " ", "\n", "action", "True"]
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    """Apply a few random edits to a model output."""
+    for _ in range(rng.randint(1, 4)):
+        choice = rng.random()
+        position = rng.randint(0, len(text))
+        if choice < 0.4:
+            text = text[:position] + rng.choice(NOISE) + text[position:]
+        elif choice < 0.7 and text:
+            end = min(len(text), position + rng.randint(1, 3))
+            text = text[:position] + text[end:]
+        elif choice < 0.85:
+            text = text[:position]
+        else:
+            text = text + rng.choice(NOISE)
+    return text
+
+
+def parse_in_chunks(text: str, rng: random.Random) -> tuple:
+    """Feed text to the streaming parser in random chunks."""
+    parser = StreamingResponseParser()
+    released = []
+    actions = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 8)
+        chunk_text, chunk_actions = parser.feed(text[position:position + size])
+        released.append(chunk_text)
+        actions.extend(chunk_actions)
+        position += size
+    remainder, recovered = parser.close()
+    released.append(remainder)
+    actions.extend(recovered)
+    return "".join(released), actions, parser.result
+
+
+def check(text: str, rng: random.Random) -> list:
+    """Return the problems found when parsing one output."""
+    problems = []
+    parsed = ResponseParser.parse(text)
+    released, actions, streamed = parse_in_chunks(text, rng)
+    if actions != parsed.actions:
+        problems.append("streaming actions differ")
+    if streamed.text != parsed.text:
+        problems.append("streaming text differs")
+    if released.strip() != parsed.text:
+        problems.append("released text differs from result text")
+    return problems
+
+
+def main():
+    """Run the fuzzer and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000, help="Mutated outputs to try")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    corpus = load_corpus()
+    failures = []
+    
+    for row in corpus:
+        actions = ResponseParser.parse(row["output"]).actions
+        if actions != row["actions"]:
+            failures.append({"output": row["output"], "problems": ["expected actions not recovered"]})
+        problems = check(row["output"], rng)
+        if problems:
+            failures.append({"output": row["output"], "problems": problems})
+    
+    for _ in range(args.iterations):
+        text = mutate(rng.choice(corpus)["output"], rng)
+        try:
+            problems = check(text, rng)
+        except Exception as e:
+            problems = [f"raised {type(e).__name__}: {e}"]
+        if problems:
+            failures.append({"output": text, "problems": problems})
+    
+    print(f"{len(corpus)} corpus entries, {args.iterations} mutations, {len(failures)} failures")
+    for failure in failures[:10]:
+        print(json.dumps(failure, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
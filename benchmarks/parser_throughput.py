@@ -0,0 +1,101 @@
+"""
+Microbenchmark the response parser against the original two-pass regex parser.
+
+    python benchmarks/parser_throughput.py --repeat 200
+
+Both parsers run over the corpus in benchmarks/data/model_outputs.jsonl.
+Besides time per response, the number of expected actions each parser
+recovers is reported.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.utils.parser import ResponseParser
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "model_outputs.jsonl")
+
+
+def load_corpus(path: str = CORPUS) -> list:
+    """Load the model output corpus."""
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def legacy_parse(text: str) -> tuple:
+    """The original parser: one regex pass for the action, another for the text."""
+    action = None
+    match = re.search(r'\{[^}]+\}', text)
+    if match:
+        try:
+            action = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            action = None
+    conversational_text = re.sub(r'\{[^}]+\}', '', text).strip()
+    return conversational_text, [action] if action else []
+
+
+def current_parse(text: str) -> tuple:
+    """The single-pass parser."""
+    parsed = ResponseParser.parse(text)
+    return parsed.text, parsed.actions
+
+
+def measure(parse, corpus: list, repeat: int) -> dict:
+    """Time a parser over the corpus and count recovered actions."""
+    outputs = [row["output"] for row in corpus]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for output in outputs:
+            parse(output)
+    elapsed = time.perf_counter() - started
+    
+    recovered = 0
+    exact = 0
+    for row in corpus:
+        actions = parse(row["output"])[1]
+        recovered += sum(1 for action in row["actions"] if action in actions)
+        exact += actions == row["actions"]
+    return {
+        "us_per_response": elapsed / (repeat * len(outputs)) * 1e6,
+        "actions_recovered": recovered,
+        "responses_exact": exact,
+    }
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the corpus")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    corpus = load_corpus()
+    expected = sum(len(row["actions"]) for row in corpus)
+    results = {
+        "responses": len(corpus),
+        "expected_actions": expected,
+        "legacy": measure(legacy_parse, corpus, args.repeat),
+        "current": measure(current_parse, corpus, args.repeat),
+    }
+    
+    print(f"{len(corpus)} responses, {expected} expected actions")
+    print(f"{'parser':<8} {'us/response':>12} {'actions':>8} {'exact':>6}")
+    for name in ("legacy", "current"):
+        row = results[name]
+        print(f"{name:<8} {row['us_per_response']:>12.1f} {row['actions_recovered']:>8} {row['responses_exact']:>6}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Report the token count of every compiled prompt template and enforce the budgets.
+
+    python benchmarks/prompt_budget.py
+    python benchmarks/prompt_budget.py --measure --output prompts.json
+
+Counts use the configured model's tokenizer (LLM_TOKENIZER) and fall back
+to the length estimate of the chat history budget when none is set. The
+system prompt is also compared with its former layout, which was built from
+an indented f-string and sent about twenty spaces of indentation on every
+line. With --measure, every template is also sent to the configured Ollama
+model as a system message, the prompt_eval_count it reports is printed next
+to the count and the budgets are checked against it as well. The run fails
+if a template grew past its budget.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.prompts.templates import PROMPTS
+from src.bankbot.utils.tokens import get_token_counter
+
+
+def legacy_system_prompt(currency: str) -> str:
+    """Rebuild the system prompt with the indentation it used to carry."""
+    first, *rest = PROMPTS.render("system", currency=currency).split("\n")
+    lines = [first] + [" " * 20 + line if line else line for line in rest]
+    return "\n".join(lines) + "\n" + " " * 16
+
+
+def measure(texts: dict) -> dict:
+    """Ask the configured Ollama model how many prompt tokens each text takes."""
+    from langchain_core.messages import SystemMessage
+    from langchain_ollama import ChatOllama
+    
+    from src.bankbot.config.settings import llm_config
+    from src.bankbot.llm.backend import parse_keep_alive
+    
+    # Generate a single token; only the prompt evaluation is of interest
+    llm = ChatOllama(
+        model=llm_config.model_name,
+        base_url=llm_config.base_url or None,
+        keep_alive=parse_keep_alive(llm_config.keep_alive),
+        num_predict=1,
+    )
+    return {
+        name: llm.invoke([SystemMessage(content=text)]).response_metadata.get("prompt_eval_count")
+        for name, text in texts.items()
+    }
+
+
+def main():
+    """Print the token counts and fail when a template is over budget."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--currency", default="EUR", help="Currency filled into the templates")
+    parser.add_argument("--measure", action="store_true", help="Also count tokens with the configured Ollama model")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    counter = get_token_counter(llm_config)
+    results = {
+        template.name: {
+            "tokens": counter(template.static_text),
+            "budget": template.budget,
+            "chars": len(template.static_text),
+            "slots": template.slots,
+        }
+        for template in PROMPTS
+    }
+    legacy = legacy_system_prompt(args.currency)
+    results["system_legacy"] = {"tokens": counter(legacy), "budget": None, "chars": len(legacy), "slots": []}
+    
+    if args.measure:
+        texts = {template.name: template.static_text for template in PROMPTS}
+        texts["system_legacy"] = legacy
+        for name, tokens in measure(texts).items():
+            results[name]["measured"] = tokens
+    
+    print(f"counting with {llm_config.tokenizer or 'the length estimate (LLM_TOKENIZER unset)'}")
+    print(f"{'template':<18} {'tokens':>6} {'budget':>6} {'chars':>6}" + (f" {'model':>6}" if args.measure else ""))
+    for name, result in results.items():
+        budget = result["budget"] if result["budget"] is not None else "-"
+        line = f"{name:<18} {result['tokens']:>6} {budget:>6} {result['chars']:>6}"
+        if args.measure:
+            line += f" {result['measured'] or 0:>6}"
+        print(line)
+    saved = results["system_legacy"]["tokens"] - results["system"]["tokens"]
+    print(f"system prompt: {saved} tokens fewer per request than the indented layout "
+          f"({saved / results['system_legacy']['tokens']:.0%})")
+    
+    failures = []
+    checks = [counter]
+    if args.measure:
+        measured = {template.static_text: results[template.name]["measured"] or 0 for template in PROMPTS}
+        checks.append(measured.__getitem__)
+    for check_counter in checks:
+        try:
+            PROMPTS.check(check_counter)
+        except ValueError as exc:
+            failures.append(str(exc))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
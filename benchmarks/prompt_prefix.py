@@ -0,0 +1,114 @@
+"""
+Measure prompt-eval time per turn for the legacy and the cache-friendly prompt layout.
+
+The legacy layout puts the balance near the top of the system prompt, so the
+prefix changes every time the balance does. The current layout keeps the
+system prompt byte-stable and injects the balance after the chat history.
+
+Requires a running Ollama server:
+
+    python benchmarks/prompt_prefix.py --turns 10
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_ollama import ChatOllama
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.backend import parse_keep_alive
+from src.bankbot.prompts.templates import PromptTemplates
+
+
+def legacy_messages(history: list, user_input: str, balance: float, currency: str) -> list:
+    """Build the prompt as it was laid out before, with the balance in the system prompt."""
+    system_prompt = PromptTemplates.get_system_prompt(currency)
+    intro, rest = system_prompt.split("\n\n", 1)
+    state = PromptTemplates.get_account_state_prompt().format(balance=f"{balance:.2f}", currency=currency)
+    return [SystemMessage(content=f"{intro}\n\n{state}\n\n{rest}"), *history, HumanMessage(content=user_input)]
+
+
+def current_messages(assistant: BankingAssistant, history: list, user_input: str, balance: float, currency: str) -> list:
+    """Build the prompt with the current cache-friendly layout."""
+    assistant.chat_history.messages = list(history)
+    inputs = assistant._prompt_inputs(user_input, balance, currency)
+    return assistant.prompt.format_messages(**inputs)
+
+
+def run(layout: str, turns: int, llm: ChatOllama, assistant: BankingAssistant) -> list:
+    """Replay a scripted conversation and collect prompt-eval metadata per turn."""
+    history = []
+    balance = 0.0
+    currency = "EUR"
+    results = []
+    
+    for turn in range(turns):
+        user_input = f"Please deposit {10 + turn} euros"
+        if layout == "legacy":
+            messages = legacy_messages(history, user_input, balance, currency)
+        else:
+            messages = current_messages(assistant, history, user_input, balance, currency)
+        
+        response = llm.invoke(messages)
+        metadata = response.response_metadata
+        results.append({
+            "layout": layout,
+            "turn": turn,
+            "prompt_eval_count": metadata.get("prompt_eval_count"),
+            "prompt_eval_ms": (metadata.get("prompt_eval_duration") or 0) / 1e6,
+        })
+        
+        # Scripted reply keeps both layouts on an identical conversation
+        reply = f'Sure! I\'ll add {10 + turn} {currency} to your account. {{"action": "add", "amount": {10 + turn}}}'
+        history += [HumanMessage(content=user_input), AIMessage(content=reply)]
+        balance += 10 + turn
+    
+    return results
+
+
+def main():
+    """Run both layouts and print per-turn and average prompt-eval times."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10, help="Turns per layout")
+    parser.add_argument("--output", help="Write per-turn results as JSON to this file")
+    args = parser.parse_args()
+    
+    # Generate a single token so the measurement is dominated by prompt evaluation
+    llm = ChatOllama(
+        model=llm_config.model_name,
+        base_url=llm_config.base_url or None,
+        keep_alive=parse_keep_alive(llm_config.keep_alive),
+        num_predict=1,
+    )
+    assistant = BankingAssistant(config=llm_config)
+    
+    results = []
+    for layout in ("legacy", "current"):
+        # A throwaway request resets the server-side cache between layouts
+        llm.invoke([HumanMessage(content="ok")])
+        results += run(layout, args.turns, llm, assistant)
+    
+    print(f"{'layout':<8} {'turn':>4} {'tokens':>7} {'eval ms':>9}")
+    for row in results:
+        print(f"{row['layout']:<8} {row['turn']:>4} {row['prompt_eval_count'] or 0:>7} {row['prompt_eval_ms']:>9.1f}")
+    
+    for layout in ("legacy", "current"):
+        rows = [r for r in results if r["layout"] == layout and r["turn"] > 0]
+        if rows:
+            avg_ms = sum(r["prompt_eval_ms"] for r in rows) / len(rows)
+            avg_tokens = sum(r["prompt_eval_count"] or 0 for r in rows) / len(rows)
+            print(f"{layout}: {avg_ms:.1f} ms / {avg_tokens:.0f} tokens evaluated per turn (excluding first turn)")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Stress the account registry with one hot account and many cold ones from a thread pool.
+
+    python benchmarks/registry_stress.py --threads 16 --operations 200000
+
+Every worker mixes deposits and withdrawals. Half of the operations hit a single
+hot account whose balance hovers near zero, so withdrawals constantly race
+the funds check. Afterwards every account is checked for overdrafts and
+for a history that adds up to its balance.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.banking.registry import AccountRegistry
+
+
+HOT_ACCOUNT = "hot"
+
+
+def worker(registry: AccountRegistry, operations: int, cold_accounts: int, hot_share: float, seed: int) -> dict:
+    """Run random operations and count the successful ones per account."""
+    rng = random.Random(seed)
+    succeeded = {}
+    rejected = 0
+    for _ in range(operations):
+        if rng.random() < hot_share:
+            account_id = HOT_ACCOUNT
+        else:
+            account_id = f"cold-{rng.randrange(cold_accounts)}"
+        account = registry.get_or_create(account_id)
+        
+        if rng.random() < 0.5:
+            transaction = account.deposit(float(rng.randint(1, 10)))
+        else:
+            transaction = account.withdraw(float(rng.randint(1, 10)))
+        if transaction.success:
+            succeeded[account_id] = succeeded.get(account_id, 0) + 1
+        else:
+            rejected += 1
+    return {"succeeded": succeeded, "rejected": rejected}
+
+
+def check_invariants(registry: AccountRegistry, initial_balance: float, succeeded: dict) -> list:
+    """Return a description of every violated invariant."""
+    violations = []
+    for account_id in registry.ids():
+        account = registry.get(account_id)
+        history = account.history
+        if len(history) != succeeded.get(account_id, 0):
+            violations.append(f"{account_id}: {len(history)} history entries, {succeeded.get(account_id, 0)} successes")
+        
+        expected = initial_balance + history.total("deposit") - history.total("withdraw")
+        if abs(expected - account.balance) > 1e-6:
+            violations.append(f"{account_id}: balance {account.balance} != {expected}")
+        
+        previous = initial_balance
+        for position in range(len(history)):
+            if history.balances_before[position] != previous or history.balances_after[position] < 0:
+                violations.append(f"{account_id}: inconsistent entry {position}")
+                break
+            previous = history.balances_after[position]
+    return violations
+
+
+def main():
+    """Run the stress test and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16, help="Worker threads")
+    parser.add_argument("--operations", type=int, default=200000, help="Total operations")
+    parser.add_argument("--cold-accounts", type=int, default=1000, help="Number of cold accounts")
+    parser.add_argument("--hot-share", type=float, default=0.5, help="Fraction of operations on the hot account")
+    parser.add_argument("--shards", type=int, default=16, help="Registry shards")
+    parser.add_argument("--initial-balance", type=float, default=20.0, help="Starting balance of every account")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    registry = AccountRegistry(shards=args.shards, initial_balance=args.initial_balance)
+    per_thread = args.operations // args.threads
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [
+            pool.submit(worker, registry, per_thread, args.cold_accounts, args.hot_share, seed)
+            for seed in range(args.threads)
+        ]
+        outcomes = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    
+    succeeded = {}
+    for outcome in outcomes:
+        for account_id, count in outcome["succeeded"].items():
+            succeeded[account_id] = succeeded.get(account_id, 0) + count
+    violations = check_invariants(registry, args.initial_balance, succeeded)
+    
+    results = {
+        "threads": args.threads,
+        "operations": per_thread * args.threads,
+        "accounts": len(registry),
+        "seconds": elapsed,
+        "ops_per_second": per_thread * args.threads / elapsed,
+        "rejected_withdrawals": sum(outcome["rejected"] for outcome in outcomes),
+        "hot_account_transactions": succeeded.get(HOT_ACCOUNT, 0),
+        "violations": violations,
+    }
+    
+    print(f"{results['operations']} operations on {results['accounts']} accounts with {args.threads} threads")
+    print(f"{results['ops_per_second']:.0f} ops/s, {results['rejected_withdrawals']} withdrawals rejected")
+    print(f"hot account: {results['hot_account_transactions']} transactions")
+    print("invariants: OK" if not violations else "invariants: FAILED")
+    for violation in violations[:20]:
+        print(f"  {violation}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
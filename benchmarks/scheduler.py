@@ -0,0 +1,121 @@
+"""
+Measure request coalescing and per-tenant fairness of the request scheduler.
+
+    python benchmarks/scheduler.py
+    python benchmarks/scheduler.py --burst 80 --num-parallel 2
+
+Both scenarios run against a stand-in Ollama server (see standin_ollama.py)
+that generates --num-parallel replies at a time and queues the rest in
+arrival order, like OLLAMA_NUM_PARALLEL. Each is run with the model called
+directly and through a RequestScheduler:
+
+    greeting  --sessions sessions send the same greeting at the same time;
+              reports model calls and latency
+    burst     one tenant sends --burst requests at once and another sends
+              --small requests just after; reports each tenant's latency
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.backend import OllamaBackend
+from src.bankbot.llm.scheduler import RequestScheduler
+import standin_ollama
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile of a list of latencies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run(args, scheduled: bool, requests) -> dict:
+    """Send (tenant, delay, text) requests concurrently and collect latencies per tenant."""
+    with standin_ollama.BackgroundServer([
+        "--model", llm_config.model_name, "--load-seconds", "0", "--ttft", str(args.ttft),
+        "--tokens-per-second", str(args.tokens_per_second), "--num-parallel", str(args.num_parallel),
+    ]) as url:
+        backend = OllamaBackend(llm_config.model_copy(update={"base_url": url}))
+        backend.warm_up()
+        model = backend.chat_model()
+        scheduler = RequestScheduler(max_concurrency=args.num_parallel)
+        served_before = backend.stats.requests
+        latencies = {}
+        lock = threading.Lock()
+        
+        def send(request):
+            tenant, delay, text = request
+            time.sleep(delay)
+            chat = scheduler.chat_model(model, tenant=tenant) if scheduled else model
+            started = time.perf_counter()
+            chat.invoke([SystemMessage(content="You are a banking assistant."), HumanMessage(content=text)])
+            with lock:
+                latencies.setdefault(tenant, []).append(time.perf_counter() - started)
+        
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            list(pool.map(send, requests))
+        calls = backend.stats.requests - served_before
+        scheduler.close()
+        backend.close()
+    
+    return {
+        "model_calls": calls,
+        "tenants": {
+            tenant: {"p50": percentile(values, 0.5), "max": max(values)}
+            for tenant, values in sorted(latencies.items())
+        },
+    }
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=32, help="Sessions sending the same greeting")
+    parser.add_argument("--burst", type=int, default=40, help="Requests the bursting tenant sends at once")
+    parser.add_argument("--small", type=int, default=4, help="Requests of the other tenant")
+    parser.add_argument("--num-parallel", type=int, default=4, help="Replies the stand-in generates at a time")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Stand-in prompt evaluation time")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="Stand-in generation speed")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    logging.getLogger("aiohttp").setLevel(logging.CRITICAL)
+    
+    greeting = [(f"session-{i}", 0.0, "Hi there!") for i in range(args.sessions)]
+    burst = [("bulk", 0.0, f"Summarize statement {i}") for i in range(args.burst)]
+    burst += [("interactive", 0.02, f"What's my balance? ({i})") for i in range(args.small)]
+    
+    results = {}
+    for scenario, requests in (("greeting", greeting), ("burst", burst)):
+        for scheduled in (False, True):
+            results[f"{scenario}_{'scheduled' if scheduled else 'direct'}"] = run(args, scheduled, requests)
+    
+    for name, result in results.items():
+        if name.startswith("greeting"):
+            latency = max(tenant["max"] for tenant in result["tenants"].values())
+            print(f"{name:<20} {result['model_calls']:>3} model calls, slowest session {latency:.3f}s")
+        else:
+            tenants = ", ".join(
+                f"{tenant} p50 {values['p50']:.3f}s max {values['max']:.3f}s"
+                for tenant, values in result["tenants"].items()
+            )
+            print(f"{name:<20} {result['model_calls']:>3} model calls, {tenants}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Drive many simulated customers at once and watch latency and memory over time.
+
+    python benchmarks/soak.py
+    python benchmarks/soak.py --users 200 --turns 20 --think-time 1.0
+    python benchmarks/soak.py --users 1 --turns 2000 --output soak.json
+    python benchmarks/soak.py --target server --users 100
+
+Every user runs a dialog of --turns messages: the scripted conversation of
+offline_turns.py, or random deposits, withdrawals, balance checks,
+conversions, history questions and small talk (--dialog mixes both). Users
+wait an exponentially distributed --think-time between messages, 0 for
+back-to-back turns. Model calls go to a stand-in Ollama server (see
+standin_ollama.py) whose prompt evaluation time varies log-normally and
+occasionally stalls, so the whole client path is exercised: fast path,
+scheduler, backend, parsing and actions.
+
+    app     one BankBotApp per user, driven by process_user_input from a
+            thread per user, as the CLI does
+    server  the HTTP server started in-process; users create a session,
+            post their messages and delete the session again
+
+It reports throughput, p50/p95/p99 turn latency overall and per route
+(fast path or model), the success rate of every action, LLM errors and
+parse failures, and RSS and traced Python allocations sampled every
+--sample-interval seconds, with their growth per 1000 turns after the first
+--warmup-share of turns and the source lines that allocated the most since.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.config.settings import app_config, llm_config
+from src.bankbot.prompts.templates import PromptTemplates
+from offline_turns import INPUTS as SCRIPTED_INPUTS
+import standin_ollama
+
+
+SMALL_TALK = [
+    "Hi there!",
+    "How are you today?",
+    "Thanks a lot!",
+    "Can you tell me what you can do?",
+    "My name is Sam, nice to meet you",
+]
+
+PARSE_ERROR = PromptTemplates.get_error_messages()["parse_error"]
+
+
+def random_message(rng: random.Random) -> str:
+    """One random customer message."""
+    amount = rng.choice([5, 10, 20, 25, 40, 50, 75, 100, 150, 200, 500])
+    kind = rng.random()
+    if kind < 0.25:
+        return rng.choice([f"deposit {amount}", f"Please add {amount} euros to my account", f"Put {amount} in"])
+    if kind < 0.45:
+        return rng.choice([f"withdraw {amount}", f"Take out {amount} euros please", f"I need {amount} in cash"])
+    if kind < 0.60:
+        return rng.choice(["balance", "What's my balance?", "How much money do I have?"])
+    if kind < 0.70:
+        return f"How much is {amount} euros in {rng.choice(['dollars', 'pounds', 'yen'])}?"
+    if kind < 0.80:
+        return rng.choice([
+            f"Show my last {rng.randint(2, 5)} transactions",
+            f"How much did I {rng.choice(['deposit', 'withdraw'])} this {rng.choice(['week', 'month'])}?",
+        ])
+    return rng.choice(SMALL_TALK)
+
+
+def dialog(user: int, turns: int, kind: str, seed: int) -> List[str]:
+    """The messages one user sends."""
+    if kind == "mixed":
+        kind = "scripted" if user % 2 == 0 else "random"
+    if kind == "scripted":
+        return [SCRIPTED_INPUTS[turn % len(SCRIPTED_INPUTS)] for turn in range(turns)]
+    rng = random.Random(seed * 100003 + user)
+    return [random_message(rng) for _ in range(turns)]
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process; the peak where the current value is not available."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values, q: float) -> float:
+    """Nearest-rank percentile of a list of latencies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Recorder:
+    """Turn outcomes and periodic memory samples, shared by every user."""
+    
+    def __init__(self, users: int, turns: int, warmup_share: float, trace: bool):
+        """
+        Initialize the recorder.
+        
+        Args:
+            users: Simultaneous users
+            turns: Turns per user
+            warmup_share: Share of the turns after which memory growth is measured
+            trace: Whether tracemalloc is running
+        """
+        self.turns: List[Dict] = []
+        self.samples: List[Dict] = []
+        self.trace = trace
+        # At least one turn per user, so lazy imports and first-turn setup count as warm-up
+        self.warmup_turns = max(int(users * turns * warmup_share), users)
+        self.warm_snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+    
+    def record(self, latency: float, route: str, actions, error: bool, parse_failed: bool):
+        """Add one finished turn."""
+        with self._lock:
+            self.turns.append({
+                "latency": latency, "route": route, "actions": actions, "error": error, "parse_failed": parse_failed,
+            })
+            warm = len(self.turns) == self.warmup_turns
+        if warm:
+            self.sample()
+            if self.trace:
+                self.warm_snapshot = tracemalloc.take_snapshot()
+    
+    def sample(self):
+        """Record memory and progress now."""
+        traced, peak = tracemalloc.get_traced_memory() if self.trace else (0, 0)
+        with self._lock:
+            self.samples.append({
+                "seconds": time.perf_counter() - self._started,
+                "turns": len(self.turns),
+                "rss_bytes": rss_bytes(),
+                "traced_bytes": traced,
+                "traced_peak_bytes": peak,
+            })
+    
+    def _sample_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.sample()
+    
+    @contextlib.contextmanager
+    def sampling(self, interval: float):
+        """Sample memory on a background thread while the block runs."""
+        self.sample()
+        thread = threading.Thread(target=self._sample_loop, args=(interval,), daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            self._stop.set()
+            thread.join()
+            self.sample()
+
+
+def run_app(args, recorder: Recorder):
+    """One BankBotApp per user, each driven from its own thread."""
+    from src.bankbot.app import BankBotApp
+    
+    def user(index: int):
+        rng = random.Random(args.seed * 7919 + index)
+        app = BankBotApp(session_id=f"soak-{index}")
+        try:
+            for message in dialog(index, args.turns, args.dialog, args.seed):
+                if args.think_time > 0:
+                    time.sleep(rng.expovariate(1.0 / args.think_time))
+                started = time.perf_counter()
+                app.process_user_input(message)
+                turn = app.turn
+                recorder.record(time.perf_counter() - started, turn.route, list(turn.actions),
+                                turn.error, turn.parse_failed)
+        finally:
+            app.close()
+    
+    # The app prints replies and confirmations like the CLI does
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            list(pool.map(user, range(args.users)))
+
+
+async def _run_server(args, recorder: Recorder, url: str):
+    """Users talking to the server over HTTP from one event loop."""
+    from aiohttp import ClientSession, TCPConnector
+    
+    async def user(client: "ClientSession", index: int):
+        rng = random.Random(args.seed * 7919 + index)
+        async with client.post(f"{url}/sessions") as response:
+            session_id = (await response.json())["session_id"]
+        for message in dialog(index, args.turns, args.dialog, args.seed):
+            if args.think_time > 0:
+                await asyncio.sleep(rng.expovariate(1.0 / args.think_time))
+            started = time.perf_counter()
+            async with client.post(f"{url}/sessions/{session_id}/messages", json={"message": message}) as response:
+                result = await response.json()
+            recorder.record(
+                time.perf_counter() - started,
+                result.get("route", "llm"),
+                [(str(event["action"].get("action")), event["success"]) for event in result.get("actions", [])],
+                # Failed model calls end the turn before its timings are reported
+                response.status != 200 or (bool(result.get("error")) and "total_time" not in result),
+                result.get("error") == PARSE_ERROR,
+            )
+        async with client.delete(f"{url}/sessions/{session_id}"):
+            pass
+    
+    async with ClientSession(connector=TCPConnector(limit=0)) as client:
+        await asyncio.gather(*(user(client, index) for index in range(args.users)))
+
+
+def run_server(args, recorder: Recorder):
+    """Start the server in-process on a free port and drive it over HTTP."""
+    from aiohttp import web
+    from src.bankbot import server
+    
+    async def main():
+        runner = web.AppRunner(server.create_app(max_sessions=args.users))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            await _run_server(args, recorder, f"http://127.0.0.1:{port}")
+        finally:
+            await runner.cleanup()
+    
+    asyncio.run(main())
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    """Aggregate the recorded turns and memory samples."""
+    turns = recorder.turns
+    latencies = {"all": [turn["latency"] for turn in turns]}
+    for turn in turns:
+        latencies.setdefault(turn["route"], []).append(turn["latency"])
+    
+    actions = {}
+    for turn in turns:
+        for name, success in turn["actions"]:
+            counts = actions.setdefault(name, {"count": 0, "succeeded": 0})
+            counts["count"] += 1
+            counts["succeeded"] += bool(success)
+    
+    warm = next((sample for sample in recorder.samples if sample["turns"] >= recorder.warmup_turns), None)
+    last = recorder.samples[-1]
+    measured = last["turns"] - warm["turns"] if warm else 0
+    growth = {
+        key: (last[key] - warm[key]) / measured * 1000 if measured else 0.0
+        for key in ("rss_bytes", "traced_bytes")
+    }
+    
+    top = []
+    if recorder.warm_snapshot is not None:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+                  # The recorder's own turn list
+                  tracemalloc.Filter(False, __file__)]
+        final = tracemalloc.take_snapshot().filter_traces(ignore)
+        grown = [stat for stat in final.compare_to(recorder.warm_snapshot.filter_traces(ignore), "lineno")
+                 if stat.size_diff > 0]
+        for stat in grown[:5]:
+            frame = stat.traceback[0]
+            top.append({"where": f"{frame.filename}:{frame.lineno}", "size_diff": stat.size_diff,
+                        "count_diff": stat.count_diff})
+    
+    return {
+        "turns": len(turns),
+        "seconds": elapsed,
+        "turns_per_second": len(turns) / elapsed if elapsed else 0.0,
+        "latency": {
+            route: {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": max(values),
+            }
+            for route, values in latencies.items() if values
+        },
+        "actions": actions,
+        "llm_errors": sum(turn["error"] for turn in turns),
+        "parse_failures": sum(turn["parse_failed"] for turn in turns),
+        "memory": {
+            "samples": recorder.samples,
+            "warmup_turns": recorder.warmup_turns,
+            "growth_per_1000_turns": growth,
+            "top_growth": top,
+        },
+    }
+
+
+def report(results: dict):
+    """Print the summary."""
+    print(f"{results['turns']} turns in {results['seconds']:.1f}s: {results['turns_per_second']:.1f} turns/s")
+    print(f"{'latency':<10} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, stats in results["latency"].items():
+        print(f"{route:<10} {stats['count']:>6} {stats['p50'] * 1000:>8.1f} {stats['p95'] * 1000:>8.1f} "
+              f"{stats['p99'] * 1000:>8.1f} {stats['max'] * 1000:>8.1f}")
+    
+    actions = ", ".join(
+        f"{name} {counts['succeeded']}/{counts['count']} ({counts['succeeded'] / counts['count']:.0%})"
+        for name, counts in sorted(results["actions"].items())
+    )
+    print(f"actions    {actions or 'none'}")
+    print(f"errors     {results['llm_errors']} LLM errors, {results['parse_failures']} parse failures")
+    
+    memory = results["memory"]
+    samples = memory["samples"]
+    print(f"{'memory':<10} {'seconds':>8} {'turns':>7} {'turns/s':>8} {'RSS MiB':>8} {'traced MiB':>11}")
+    step = max(1, len(samples) // 10)
+    shown = samples[::step] if samples[-1] in samples[::step] else samples[::step] + [samples[-1]]
+    previous = None
+    for sample in shown:
+        rate = ""
+        if previous is not None and sample["seconds"] > previous["seconds"]:
+            rate = f"{(sample['turns'] - previous['turns']) / (sample['seconds'] - previous['seconds']):.1f}"
+        print(f"{'':<10} {sample['seconds']:>8.1f} {sample['turns']:>7} {rate:>8} "
+              f"{sample['rss_bytes'] / 2 ** 20:>8.1f} {sample['traced_bytes'] / 2 ** 20:>11.2f}")
+        previous = sample
+    growth = memory["growth_per_1000_turns"]
+    print(f"growth     after {memory['warmup_turns']} warm-up turns: RSS {growth['rss_bytes'] / 1024:+.1f} KiB, "
+          f"traced {growth['traced_bytes'] / 1024:+.1f} KiB per 1000 turns")
+    for entry in memory["top_growth"]:
+        print(f"           {entry['size_diff'] / 1024:+9.1f} KiB {entry['count_diff']:+7} blocks  {entry['where']}")
+
+
+def main():
+    """Run the load test and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", default="app", choices=["app", "server"], help="What the users talk to")
+    parser.add_argument("--users", type=int, default=50, help="Simultaneous users")
+    parser.add_argument("--turns", type=int, default=20, help="Messages per user")
+    parser.add_argument("--dialog", default="mixed", choices=["scripted", "random", "mixed"], help="What users say")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds a user waits between messages")
+    parser.add_argument("--no-fast-path", action="store_true", help="Send every message to the model")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Median stand-in prompt evaluation seconds")
+    parser.add_argument("--ttft-jitter", type=float, default=0.5, help="Log-normal spread of the prompt evaluation time")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Stand-in generation speed")
+    parser.add_argument("--tail-probability", type=float, default=0.01, help="Fraction of model calls that stall")
+    parser.add_argument("--tail-seconds", type=float, default=1.0, help="Extra seconds a stalled call takes")
+    parser.add_argument("--num-parallel", type=int, default=8, help="Replies the stand-in generates at a time")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between memory samples")
+    parser.add_argument("--warmup-share", type=float, default=0.1, help="Share of turns before memory growth is measured")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Only sample RSS; tracing slows every allocation")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for dialogs, think times and the stand-in")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    app_config.fast_path_enabled = not args.no_fast_path
+    trace = not args.no_tracemalloc
+    recorder = Recorder(args.users, args.turns, args.warmup_share, trace)
+    with standin_ollama.BackgroundServer([
+        "--model", llm_config.model_name, "--load-seconds", "0", "--ttft", str(args.ttft),
+        "--ttft-jitter", str(args.ttft_jitter), "--tokens-per-second", str(args.tokens_per_second),
+        "--tail-probability", str(args.tail_probability), "--tail-seconds", str(args.tail_seconds),
+        "--num-parallel", str(args.num_parallel), "--seed", str(args.seed),
+    ]) as url:
+        llm_config.provider = "ollama"
+        llm_config.base_url = url
+        llm_config.endpoints = ""
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with recorder.sampling(args.sample_interval):
+            if args.target == "app":
+                run_app(args, recorder)
+            else:
+                run_server(args, recorder)
+        elapsed = time.perf_counter() - started
+        results = summarize(recorder, elapsed)
+        if trace:
+            tracemalloc.stop()
+    
+    results["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark sustained transactions per second of SQL-backed accounts against in-memory ones.
+
+    python benchmarks/sql_storage.py --sessions 32 --operations 200
+    python benchmarks/sql_storage.py --url postgresql+psycopg://localhost/bankbot
+
+Each session runs in its own thread on its own account and alternates
+deposits and withdrawals, like concurrent users of the server.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.storage import SQLStorage, SQLBankAccount
+
+
+def run_session(account: BankAccount, operations: int) -> int:
+    """Alternate deposits and withdrawals and return the successful count."""
+    succeeded = 0
+    for i in range(operations):
+        transaction = account.deposit(10.0) if i % 2 == 0 else account.withdraw(5.0)
+        succeeded += transaction.success
+    return succeeded
+
+
+def measure(accounts: list, operations: int) -> float:
+    """Run every session concurrently and return transactions per second."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(accounts)) as pool:
+        total = sum(pool.map(lambda account: run_session(account, operations), accounts))
+    return total / (time.perf_counter() - started)
+
+
+def main():
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent sessions")
+    parser.add_argument("--operations", type=int, default=200, help="Transactions per session")
+    parser.add_argument("--pool-size", type=int, default=8, help="Database connection pool size")
+    parser.add_argument("--url", action="append", default=[], help="Extra SQLAlchemy URLs to benchmark")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix="bankbot-sql-")
+    backends = {
+        "memory": None,
+        "sqlite-memory": "sqlite:///:memory:",
+        "sqlite-file": f"sqlite:///{os.path.join(root, 'bankbot.db')}",
+    }
+    backends.update({url: url for url in args.url})
+    
+    results = {"sessions": args.sessions, "operations": args.operations, "tx_per_second": {}}
+    try:
+        print(f"{'backend':<16} {'tx/s':>10}")
+        for name, url in backends.items():
+            if url is None:
+                accounts = [BankAccount(initial_balance=100.0) for _ in range(args.sessions)]
+                storage = None
+            else:
+                storage = SQLStorage(url, pool_size=args.pool_size, max_overflow=args.sessions)
+                accounts = [
+                    SQLBankAccount(storage, f"session-{i}", initial_balance=100.0)
+                    for i in range(args.sessions)
+                ]
+            rate = measure(accounts, args.operations)
+            if storage is not None:
+                storage.close()
+            results["tx_per_second"][name] = rate
+            print(f"{name:<16} {rate:>10.0f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Stand-in Ollama server for measuring the client side without a GPU.
+
+    python benchmarks/standin_ollama.py --port 11500 --load-seconds 3 --tokens-per-second 40
+
+Implements the parts of the Ollama API BankBot uses (/api/chat, /api/generate,
+/api/ps, /api/tags, /api/version). The model has to be loaded first, which
+takes --load-seconds, and is unloaded again when its keep-alive expires, so
+cold starts and warm-ups behave like the real server. Replies are taken in
+order from benchmarks/data/model_outputs.jsonl and generated at
+--tokens-per-second after --ttft seconds of prompt evaluation, scaled by a
+log-normal factor with spread --ttft-jitter; a fraction --tail-probability
+of requests stalls another --tail-seconds first, like a server that is
+briefly swapping or preempted. With --num-parallel, requests
+beyond that many wait in arrival order, as with OLLAMA_NUM_PARALLEL.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from aiohttp import web
+
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "model_outputs.jsonl")
+_TOKEN = re.compile(r"\S+\s*|\s+")
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h)?$")
+
+
+def parse_keep_alive(value, default: float) -> float:
+    """Convert an Ollama keep_alive value to seconds; negative means forever."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value.startswith("-"):
+        return -1.0
+    match = _DURATION.match(value)
+    if not match:
+        return default
+    number, unit = float(match.group(1)), match.group(2) or "s"
+    return number * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+
+
+class StandinModel:
+    """Load state and generation timing of the simulated model."""
+    
+    def __init__(self, args):
+        """Initialize from the command line options."""
+        self.args = args
+        with open(CORPUS, encoding="utf-8") as fh:
+            self.replies = itertools.cycle([json.loads(line)["output"] for line in fh if line.strip()])
+        self.loaded_until = None
+        self.loading = None
+        self.active = 0
+        self.served = 0
+        self.random = random.Random(args.seed)
+        self.slots = asyncio.Semaphore(args.num_parallel) if args.num_parallel > 0 else None
+    
+    def is_loaded(self) -> bool:
+        """Whether the model is in memory."""
+        return self.loaded_until is not None and (self.loaded_until < 0 or time.monotonic() < self.loaded_until)
+    
+    async def ensure_loaded(self, keep_alive) -> float:
+        """Load the model if needed and extend its keep-alive; return the load time in seconds."""
+        started = time.perf_counter()
+        if not self.is_loaded():
+            if self.loading is None:
+                self.loading = asyncio.ensure_future(asyncio.sleep(self.args.load_seconds))
+            await self.loading
+            self.loading = None
+        seconds = parse_keep_alive(keep_alive, self.args.keep_alive)
+        self.loaded_until = -1.0 if seconds < 0 else time.monotonic() + seconds
+        return time.perf_counter() - started
+    
+    def metadata(self, load: float, prompt_eval: float, eval_count: int, eval_seconds: float, prompt_tokens: int) -> dict:
+        """Timing fields Ollama adds to the final response."""
+        return {
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((load + prompt_eval + eval_seconds) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_seconds * 1e9),
+        }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def handle_chat(request: web.Request) -> web.StreamResponse:
+    """Answer /api/chat, streamed as NDJSON unless "stream" is false."""
+    model: StandinModel = request.app["model"]
+    if model.slots is None:
+        return await _chat(request, model)
+    async with model.slots:
+        return await _chat(request, model)
+
+
+async def _chat(request: web.Request, model: StandinModel) -> web.StreamResponse:
+    """Generate one /api/chat reply."""
+    body = await request.json()
+    load = await model.ensure_loaded(body.get("keep_alive"))
+    prompt_tokens = sum(len(str(message.get("content", ""))) // 4 + 4 for message in body.get("messages", []))
+    
+    model.active += 1
+    try:
+        ttft = model.args.ttft * (1 + model.args.queue_penalty * (model.active - 1))
+        if model.args.ttft_jitter > 0:
+            ttft *= model.random.lognormvariate(0.0, model.args.ttft_jitter)
+        if model.random.random() < model.args.tail_probability:
+            ttft += model.args.tail_seconds
+        await asyncio.sleep(ttft)
+        reply = next(model.replies)
+        pieces = _TOKEN.findall(reply)
+        delay = 1.0 / model.args.tokens_per_second if model.args.tokens_per_second > 0 else 0.0
+        base = {"model": body.get("model"), "created_at": _now()}
+        
+        if body.get("stream", True) is False:
+            await asyncio.sleep(delay * len(pieces))
+            model.served += 1
+            return web.json_response({
+                **base,
+                "message": {"role": "assistant", "content": reply},
+                **model.metadata(load, ttft, len(pieces), delay * len(pieces), prompt_tokens),
+            })
+        
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        for piece in pieces:
+            if delay:
+                await asyncio.sleep(delay)
+            line = {**base, "message": {"role": "assistant", "content": piece}, "done": False}
+            await response.write((json.dumps(line) + "\n").encode("utf-8"))
+        final = {
+            **base,
+            "message": {"role": "assistant", "content": ""},
+            **model.metadata(load, ttft, len(pieces), delay * len(pieces), prompt_tokens),
+        }
+        await response.write((json.dumps(final) + "\n").encode("utf-8"))
+        await response.write_eof()
+        model.served += 1
+        return response
+    finally:
+        model.active -= 1
+
+
+async def handle_generate(request: web.Request) -> web.Response:
+    """Answer /api/generate; an empty prompt only loads the model, as in Ollama."""
+    model: StandinModel = request.app["model"]
+    body = await request.json()
+    load = await model.ensure_loaded(body.get("keep_alive"))
+    response = {"model": body.get("model"), "created_at": _now(), "response": ""}
+    if body.get("prompt"):
+        response["response"] = next(model.replies)
+    return web.json_response({**response, **model.metadata(load, 0.0, 0, 0.0, 0)})
+
+
+async def handle_ps(request: web.Request) -> web.Response:
+    """List the loaded model, like /api/ps."""
+    model: StandinModel = request.app["model"]
+    models = []
+    if model.is_loaded():
+        expires = "0001-01-01T00:00:00Z" if model.loaded_until < 0 else _now()
+        models.append({"name": model.args.model, "model": model.args.model, "size": 0, "digest": "", "expires_at": expires})
+    return web.json_response({"models": models})
+
+
+async def handle_tags(request: web.Request) -> web.Response:
+    """List the available model, like /api/tags."""
+    name = request.app["model"].args.model
+    return web.json_response({"models": [{"name": name, "model": name, "size": 0, "digest": ""}]})
+
+
+async def handle_version(request: web.Request) -> web.Response:
+    return web.json_response({"version": "0.0.0-standin"})
+
+
+async def handle_root(request: web.Request) -> web.Response:
+    return web.Response(text="Ollama is running")
+
+
+def create_app(args) -> web.Application:
+    """Create the stand-in server application."""
+    app = web.Application()
+    app["model"] = StandinModel(args)
+    app.router.add_get("/", handle_root)
+    app.router.add_post("/api/chat", handle_chat)
+    app.router.add_post("/api/generate", handle_generate)
+    app.router.add_get("/api/ps", handle_ps)
+    app.router.add_get("/api/tags", handle_tags)
+    app.router.add_get("/api/version", handle_version)
+    return app
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options, shared with benchmarks that start the server in-process."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=11500, help="Port to listen on")
+    parser.add_argument("--model", default="gemma2:2b", help="Model name to report")
+    parser.add_argument("--load-seconds", type=float, default=3.0, help="Time to load the model")
+    parser.add_argument("--keep-alive", type=float, default=300.0, help="Default seconds the model stays loaded")
+    parser.add_argument("--ttft", type=float, default=0.05, help="Prompt evaluation seconds before the first token")
+    parser.add_argument("--ttft-jitter", type=float, default=0.0,
+                        help="Spread (sigma) of the log-normal factor applied to --ttft, 0 for constant")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation speed, 0 for instant")
+    parser.add_argument("--queue-penalty", type=float, default=0.0,
+                        help="Extra fraction of --ttft per concurrent request, to model a busy server")
+    parser.add_argument("--tail-probability", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--tail-seconds", type=float, default=1.0, help="Extra seconds a stalled request waits")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for choosing stalled requests and jitter")
+    parser.add_argument("--num-parallel", type=int, default=0, help="Requests generated at the same time, 0 for no limit")
+    return parser
+
+
+class BackgroundServer:
+    """
+    A stand-in server on a free port, served from a thread of the calling process.
+    
+        with BackgroundServer(["--load-seconds", "0"]) as url:
+            ...
+    """
+    
+    def __init__(self, argv: Optional[List[str]] = None):
+        """
+        Parse the server options; --port is chosen automatically.
+        
+        Args:
+            argv: Command line options as for this script
+        """
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.args = build_parser().parse_args(list(argv or []) + ["--port", str(self.port)])
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._loop = None
+        self._runner = None
+        self._thread = None
+    
+    def start(self) -> str:
+        """Start serving and return the base URL."""
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(create_app(self.args))
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.TCPSite(self._runner, "127.0.0.1", self.port).start())
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return self.url
+    
+    def stop(self):
+        """Stop serving, dropping open connections, as a crashed server would."""
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+    
+    def __enter__(self) -> str:
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    """Run the stand-in server."""
+    args = build_parser().parse_args()
+    web.run_app(create_app(args), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure CLI startup and enforce an import-time budget.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --budget-ms 250 --output startup.json
+
+Every run is a fresh interpreter, so nothing is cached in sys.modules. It
+reports how long importing bankbot.app takes, how long until the welcome
+banner is printed and how long until the LLM stack finished loading in the
+background. The run fails if the median import exceeds --budget-ms or if
+importing the app pulled in one of the modules that are meant to load
+lazily (LangChain, the Ollama client, SQLAlchemy, aiohttp, NumPy, the
+checkpoint codecs).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+LAZY_MODULES = (
+    "langchain_core", "langchain_ollama", "langchain_community", "ollama", "httpx", "sqlalchemy", "aiohttp", "numpy",
+    "ormsgpack", "zstandard",
+)
+
+# Runs in the child interpreter; prints one JSON line with its timings
+CHILD = """
+import contextlib, io, json, sys, time
+started = time.perf_counter()
+from src.bankbot.app import BankBotApp
+imported = time.perf_counter()
+lazy = [name for name in LAZY_MODULES if name in sys.modules]
+app = BankBotApp()
+app.preload()
+with contextlib.redirect_stdout(io.StringIO()):
+    print(app.templates.get_welcome_message())
+welcome = time.perf_counter()
+app.assistant
+ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "welcome_ms": (welcome - started) * 1000,
+    "llm_ready_ms": (ready - started) * 1000,
+    "eager_modules": lazy,
+}))
+"""
+
+
+def run_once() -> dict:
+    """Start a fresh interpreter and collect its timings."""
+    env = dict(os.environ, LLM_WARMUP="false", PYTHONDONTWRITEBYTECODE="1")
+    code = f"LAZY_MODULES = {LAZY_MODULES!r}\n{CHILD}"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """Run the benchmark, print the results and fail when over budget."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="Maximum median import time of bankbot.app")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    runs = [run_once() for _ in range(args.runs)]
+    results = {
+        key: {"median": statistics.median(run[key] for run in runs), "max": max(run[key] for run in runs)}
+        for key in ("import_ms", "welcome_ms", "llm_ready_ms")
+    }
+    eager = sorted({name for run in runs for name in run["eager_modules"]})
+    results["eager_modules"] = eager
+    
+    for key, label in (("import_ms", "import bankbot.app"), ("welcome_ms", "welcome banner"),
+                       ("llm_ready_ms", "LLM stack ready")):
+        print(f"{label:<20} median {results[key]['median']:7.1f} ms, max {results[key]['max']:7.1f} ms")
+    
+    failures = []
+    if results["import_ms"]["median"] > args.budget_ms:
+        failures.append(f"import took {results['import_ms']['median']:.1f} ms, budget {args.budget_ms:.0f} ms")
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
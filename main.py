@@ -4,11 +4,31 @@ BankBot - A Conversational Banking Assistant
 Entry point for the BankBot application.
 """
 
-from src.bankbot.app import BankBotApp
+import argparse
+import sys
 
 
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="BankBot - A Conversational Banking Assistant")
+    parser.add_argument("--serve", action="store_true", help="Run the multi-session HTTP/WebSocket server")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="Process a JSONL file of {\"session_id\", \"utterance\"} lines instead of chatting")
+    parser.add_argument("--output", help="JSONL file for the batch results (default: INPUT.out.jsonl)")
+    parser.add_argument("--parallelism", type=int, help="Sessions the batch mode processes at the same time")
+    args = parser.parse_args()
+    
+    if args.batch:
+        from src.bankbot.batch import run_batch
+        summary = run_batch(args.batch, args.output, args.parallelism)
+        sys.exit(1 if summary["failed"] else 0)
+    
+    if args.serve:
+        from src.bankbot.server import main as serve
+        serve()
+        return
+    
+    from src.bankbot.app import BankBotApp
     app = BankBotApp()
     app.run()
 
@@ -36,6 +36,8 @@ setup(
     entry_points={
         "console_scripts": [
             "bankbot=bankbot.app:main",
+            "bankbot-server=bankbot.server:main",
+            "bankbot-batch=bankbot.batch:main",
         ],
     },
 )
@@ -1,78 +1,440 @@
 """Main application controller for BankBot."""
 
-from typing import Optional
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Tuple, Dict, List, AsyncIterator
 
-from .config.settings import llm_config, banking_config, app_config
+from .config.settings import LLMConfig, llm_config, banking_config, app_config
 from .banking.account import BankAccount
-from .llm.assistant import BankingAssistant
+from .banking.ledger import TransactionLedger
+from .llm.fast_path import FastPathRouter
 from .prompts.templates import PromptTemplates
-from .utils.parser import ResponseParser
+from .utils.parser import ResponseParser, StreamingResponseParser
+from .utils.metrics import TurnMetrics, LatencyStats, StageProfiler
+from .utils.telemetry import TurnRecord, get_telemetry
+from .utils.ids import safe_file_name
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from .llm.assistant import BankingAssistant
+    from .banking.currency import CurrencyConverter
+    from .utils.checkpoint import SessionCheckpoint, SessionState
 
 
 class BankBotApp:
     """Main application controller."""
     
-    def __init__(self):
-        """Initialize the BankBot application."""
-        self.account = BankAccount(
-            initial_balance=banking_config.initial_balance,
-            currency=banking_config.currency
-        )
-        self.assistant = BankingAssistant(
-            config=llm_config,
-            max_history=banking_config.max_history_messages
-        )
+    def __init__(self, session_id: Optional[str] = None, account: Optional[BankAccount] = None,
+                 llm: Optional["BaseChatModel"] = None, tenant: Optional[str] = None,
+                 config: Optional[LLMConfig] = None):
+        """
+        Initialize the BankBot application.
+        
+        Args:
+            session_id: Session identifier, used to keep per-session ledgers apart
+            account: Existing account to operate on, e.g. one shared through an
+                AccountRegistry; the app creates and owns its own if omitted
+            llm: Chat model to use instead of the configured provider
+            tenant: Who the session's model calls are made for, e.g. the account
+                id of a server session; defaults to the session id
+            config: LLM configuration of the session; the global llm_config if omitted
+        """
+        self.session_id = session_id
+        self.llm_config = config or llm_config
+        self.tenant = tenant or session_id
+        self._owns_account = account is None
+        self.account = account or self._open_account(session_id)
+        # The assistant, and with it LangChain, is created on first use or by preload()
+        self._llm = llm
+        self._assistant: Optional["BankingAssistant"] = None
+        self._loader: Optional[Future] = None
+        self._pending_exchanges: List[Tuple[str, str]] = []
+        self._converter: Optional["CurrencyConverter"] = None
+        self.profiler = StageProfiler()
+        self.telemetry = get_telemetry(app_config.telemetry_jsonl_path) if app_config.telemetry_enabled else None
+        if self.telemetry:
+            # Only the spans of the current turn are needed, not every sample
+            self.profiler.enabled = True
+            self.profiler.keep_samples = False
+        self.turn = TurnRecord(session_id=session_id)
+        self.router = FastPathRouter() if app_config.fast_path_enabled else None
         self.parser = ResponseParser()
+        self.latency_stats = LatencyStats()
         self.templates = PromptTemplates()
         self.action_messages = self.templates.get_action_messages()
+        self.history_labels = self.templates.get_history_labels()
         self.error_messages = self.templates.get_error_messages()
+        
+        # The account is restored now; the chat history when the assistant is created
+        self._checkpoint: Optional["SessionCheckpoint"] = None
+        self._restored: Optional["SessionState"] = None
+        if app_config.checkpoint_path:
+            self._resume()
     
-    def execute_action(self, action_dict: dict) -> bool:
+    @staticmethod
+    def _checkpoint_file(session_id: Optional[str]) -> str:
+        """Path of a session's checkpoint; ids that are not plain file names are hashed."""
+        return os.path.join(app_config.checkpoint_path, f"{safe_file_name(session_id or 'default')}.ckpt")
+    
+    def _resume(self):
+        """Open the session's checkpoint and restore the account from it."""
+        # zstandard and ormsgpack are only imported when checkpoints are enabled
+        from .utils.checkpoint import SessionCheckpoint
+        self._checkpoint = SessionCheckpoint(self._checkpoint_file(self.session_id))
+        self._restored = self._checkpoint.load()
+        if self._restored is not None and self._restored.has_account and self._checkpoints_account():
+            self.account.restore(self._restored.balance, self._restored.history)
+    
+    @staticmethod
+    def _checkpoints_account() -> bool:
+        """Whether account state belongs in checkpoints; ledgers and databases persist it themselves."""
+        return not (banking_config.ledger_path or banking_config.database_url)
+    
+    def _session_state(self) -> "SessionState":
+        """Collect the state to checkpoint."""
+        from .utils.checkpoint import SessionState
+        if self._assistant is not None:
+            messages, summary = self._assistant.chat_history.dump()
+        else:
+            # The assistant is not loaded yet: the restored history plus turns answered meanwhile
+            messages = list(self._restored.messages) if self._restored else []
+            summary = self._restored.summary if self._restored else ""
+            for user_input, reply in self._pending_exchanges:
+                messages += [("human", user_input), ("ai", reply)]
+        state = SessionState(messages=messages, summary=summary)
+        if self._checkpoints_account():
+            state.balance, state.history = self.account.balance, self.account.history
+        return state
+    
+    def checkpoint(self) -> int:
+        """
+        Append the changes since the last checkpoint to the session's checkpoint file.
+        
+        Returns:
+            Bytes written, 0 if checkpoints are disabled or nothing changed
+        """
+        if self._checkpoint is None:
+            return 0
+        with self.profiler.stage("checkpoint"):
+            return self._checkpoint.save(self._session_state())
+    
+    def discard_checkpoint(self):
+        """Delete the session's checkpoint, e.g. when the user ends the session for good."""
+        if self._checkpoint is not None:
+            self._checkpoint.delete()
+    
+    @staticmethod
+    def _open_account(session_id: Optional[str] = None) -> BankAccount:
+        """
+        Open the account of a session in the configured storage.
+        
+        Args:
+            session_id: Session identifier, also used as the account id
+            
+        Returns:
+            Database-backed account if BANKING_DATABASE_URL is set,
+            otherwise an in-memory account with an optional ledger
+        """
+        if banking_config.database_url:
+            # SQLAlchemy is only imported when a database is configured
+            from .banking.storage import SQLBankAccount, get_shared_storage
+            return SQLBankAccount(
+                storage=get_shared_storage(banking_config),
+                account_id=session_id or "default",
+                initial_balance=banking_config.initial_balance,
+                currency=banking_config.currency
+            )
+        
+        return BankAccount(
+            initial_balance=banking_config.initial_balance,
+            currency=banking_config.currency,
+            ledger=BankBotApp._open_ledger(session_id)
+        )
+    
+    @staticmethod
+    def _open_ledger(session_id: Optional[str] = None) -> Optional[TransactionLedger]:
+        """
+        Open the durable ledger if one is configured.
+        
+        Args:
+            session_id: Session identifier, stored in its own subdirectory;
+                ids that are not plain names are hashed, so every ledger
+                stays under BANKING_LEDGER_PATH
+                
+        Returns:
+            TransactionLedger or None
+        """
+        if not banking_config.ledger_path:
+            return None
+        
+        directory = banking_config.ledger_path
+        if session_id:
+            directory = os.path.join(directory, safe_file_name(session_id))
+        return TransactionLedger(
+            directory=directory,
+            fsync_policy=banking_config.ledger_fsync,
+            group_commit_size=banking_config.ledger_group_commit_size,
+            group_commit_interval=banking_config.ledger_group_commit_interval,
+            snapshot_interval=banking_config.ledger_snapshot_interval
+        )
+    
+    @property
+    def assistant(self) -> "BankingAssistant":
+        """The LLM assistant, waiting for preload() if it is still loading."""
+        if self._assistant is None:
+            self._assistant = self._loader.result() if self._loader else self._create_assistant()
+            if self._restored is not None:
+                self._assistant.chat_history.restore(self._restored.messages, self._restored.summary)
+                self._restored = None
+            # Fast-path turns answered while loading still belong in the chat history
+            for user_input, reply in self._pending_exchanges:
+                self._assistant.record_exchange(user_input, reply)
+            self._pending_exchanges.clear()
+        return self._assistant
+    
+    @property
+    def converter(self) -> "CurrencyConverter":
+        """The shared currency converter, created on the first conversion."""
+        if self._converter is None:
+            # NumPy is only imported when something is converted
+            from .banking.currency import get_converter
+            self._converter = get_converter(banking_config)
+        return self._converter
+    
+    def _create_assistant(self) -> "BankingAssistant":
+        """Create the assistant, importing the LLM stack."""
+        # LangChain and the model client take most of the startup time, so they are imported here
+        from .llm.assistant import BankingAssistant
+        return BankingAssistant(
+            config=self.llm_config,
+            max_history=banking_config.max_history_messages,
+            max_history_tokens=banking_config.max_history_tokens,
+            summary_tokens=banking_config.history_summary_tokens,
+            summarizer=banking_config.history_summarizer,
+            llm=self._llm,
+            profiler=self.profiler,
+            tenant=self.tenant
+        )
+    
+    def preload(self):
         """
-        Execute a banking action.
+        Create the assistant and start its backend on a background thread.
+        
+        Turns that need the model wait for it; fast-path turns do not.
+        """
+        if self._assistant is not None or self._loader is not None:
+            return
+        self._loader = Future()
+        threading.Thread(target=self._preload, name="bankbot-preload", daemon=True).start()
+    
+    def _preload(self):
+        """Body of the preload thread."""
+        try:
+            assistant = self._create_assistant()
+            self._start_backend(assistant)
+        except BaseException as e:
+            self._loader.set_exception(e)
+        else:
+            self._loader.set_result(assistant)
+    
+    def _record_exchange(self, user_input: str, reply: str):
+        """Add a turn answered without the model to the chat history."""
+        # Loading the LLM stack just to record a fast-path turn is not worth it;
+        # the assistant adds pending exchanges to its history when it is created
+        if self._assistant is None:
+            self._pending_exchanges.append((user_input, reply))
+        else:
+            self.assistant.record_exchange(user_input, reply)
+    
+    def close(self):
+        """Release resources held by the session."""
+        if self._owns_account:
+            self.account.close()
+    
+    def perform_action(self, action_dict: dict) -> Tuple[bool, Optional[str]]:
+        """
+        Execute a banking action and return its confirmation message.
         
         Args:
             action_dict: Dictionary containing action and parameters
             
         Returns:
-            True if action was executed, False otherwise
+            Tuple of (success, message to show the user)
         """
         if not self.parser.validate_action(action_dict):
-            return False
+            return False, None
         
         action = action_dict.get("action")
         amount = action_dict.get("amount", 0)
         
         if action == "check_balance":
-            print(f"\n{self.action_messages['balance_check'].format(balance=self.account.balance, currency=self.account.currency)}")
-            return True
+            return True, self.action_messages['balance_check'].format(balance=self.account.balance, currency=self.account.currency)
         
         elif action == "add":
             transaction = self.account.deposit(amount)
             if transaction.success:
-                print(f"\n{self.action_messages['deposit'].format(amount=amount, balance=self.account.balance, currency=self.account.currency)}")
-            else:
-                print(f"\n{transaction.message}")
-            return transaction.success
+                return True, self.action_messages['deposit'].format(amount=amount, balance=self.account.balance, currency=self.account.currency)
+            return False, transaction.message
         
         elif action == "withdraw":
             transaction = self.account.withdraw(amount)
             if transaction.success:
-                print(f"\n{self.action_messages['withdraw'].format(amount=amount, balance=self.account.balance, currency=self.account.currency)}")
-            else:
-                print(f"\n{self.error_messages['insufficient_funds'].format(balance=self.account.balance, currency=self.account.currency)}")
-            return transaction.success
-        
-        elif action == "convert_usd":
-            conversion = self.account.convert_currency(
-                amount=amount,
-                to_currency="USD",
-                exchange_rate=banking_config.eur_to_usd_rate
+                return True, self.action_messages['withdraw'].format(amount=amount, balance=self.account.balance, currency=self.account.currency)
+            return False, self.error_messages['insufficient_funds'].format(balance=self.account.balance, currency=self.account.currency)
+        
+        elif action in ("convert", "convert_usd"):
+            # convert_usd is the older, USD-only form of the action
+            target = "USD" if action == "convert_usd" else str(action_dict.get("currency") or "USD").upper()
+            try:
+                rate = self.converter.rate(self.account.currency, target)
+            except ValueError:
+                supported = ", ".join(self.converter.table().codes)
+                return False, self.error_messages['unknown_currency'].format(currency=target, supported=supported)
+            except Exception as e:
+                return False, self.error_messages['rates_unavailable'].format(error=e)
+            conversion = self.account.convert_currency(amount=amount, to_currency=target, exchange_rate=rate)
+            return True, self.action_messages['convert'].format(amount=amount, from_currency=conversion['from_currency'], converted=conversion['to_amount'], to_currency=conversion['to_currency'])
+        
+        elif action == "transaction_total":
+            history_action = self._history_action(action_dict.get("type"))
+            if history_action is None:
+                return False, None
+            summary = self.account.get_total(history_action, period=action_dict.get("period", "all"))
+            return True, self.action_messages['transaction_total'].format(
+                label=self.history_labels[history_action],
+                period_label=self.history_labels.get(summary['period'], self.history_labels['all']),
+                total=summary['total'],
+                count=summary['count'],
+                currency=self.account.currency
             )
-            print(f"\n{self.action_messages['convert'].format(amount=amount, from_currency=conversion['from_currency'], converted=conversion['to_amount'], to_currency=conversion['to_currency'])}")
-            return True
         
-        return False
+        elif action == "recent_transactions":
+            history_action = self._history_action(action_dict.get("type"))
+            count = self._transaction_count(action_dict.get("count"), amount)
+            transactions = self.account.get_recent(min(count, 50), history_action)
+            label = self.history_labels[f"{history_action or 'all'}s"]
+            if not transactions:
+                return True, self.action_messages['no_transactions'].format(label=label)
+            lines = [self.action_messages['recent_transactions'].format(count=len(transactions), label=label)]
+            for transaction in transactions:
+                lines.append(self.action_messages['transaction_line'].format(
+                    when=datetime.fromtimestamp(transaction.timestamp).strftime("%Y-%m-%d %H:%M"),
+                    label=self.history_labels[transaction.action],
+                    amount=transaction.amount,
+                    balance=transaction.balance_after,
+                    currency=self.account.currency
+                ))
+            return True, "\n".join(lines)
+        
+        elif action == "batch":
+            steps = action_dict.get("steps")
+            if not isinstance(steps, list) or not steps:
+                return False, None
+            try:
+                operations = [(step["action"], float(step["amount"])) for step in steps]
+            except (KeyError, TypeError, ValueError):
+                return False, self.error_messages['invalid_amount']
+            result = self.account.apply_batch(operations)
+            if result.success:
+                return True, self.action_messages['batch'].format(count=result.count, balance=self.account.balance, currency=self.account.currency)
+            return False, self.error_messages['batch_rejected'].format(message=result.message)
+        
+        return False, None
+    
+    @staticmethod
+    def _transaction_count(*values, default: int = 5) -> int:
+        """Get the first positive count of a history request; the prompt has the model send "amount": 0 as filler."""
+        for value in values:
+            try:
+                count = int(value)
+            except (TypeError, ValueError, OverflowError):
+                continue
+            if count > 0:
+                return count
+        return default
+    
+    @staticmethod
+    def _history_action(value: Optional[str]) -> Optional[str]:
+        """Map the "type" of a history request onto a transaction action."""
+        value = (value or "").lower()
+        if value.startswith(("deposit", "add")):
+            return "deposit"
+        if value.startswith("withdraw"):
+            return "withdraw"
+        return None
+    
+    def execute_action(self, action_dict: dict) -> bool:
+        """
+        Execute a banking action and print its confirmation.
+        
+        Args:
+            action_dict: Dictionary containing action and parameters
+            
+        Returns:
+            True if action was executed, False otherwise
+        """
+        with self.profiler.stage("execute"):
+            success, message = self.perform_action(action_dict)
+            if message:
+                print(f"\n{message}")
+        self.turn.actions.append((str(action_dict.get("action")), success))
+        return success
+    
+    def _begin_turn(self):
+        """Start recording telemetry for a new turn."""
+        self.turn = TurnRecord(session_id=self.session_id)
+        self.profiler.begin_turn()
+    
+    def start_backend(self):
+        """
+        Warm up the shared model backend and start its health checks.
+        
+        Does nothing for injected models or providers without a backend,
+        and only the first call per backend has an effect.
+        """
+        self._start_backend(self.assistant)
+    
+    def _start_backend(self, assistant: "BankingAssistant"):
+        """Start the backend of the given assistant; see start_backend."""
+        backend = assistant.backend
+        if backend is None:
+            return
+        if self.telemetry:
+            self.telemetry.add_collector(backend.gauges)
+            if assistant.scheduler:
+                self.telemetry.add_collector(assistant.scheduler.gauges)
+            if assistant.cascade:
+                self.telemetry.add_collector(assistant.cascade.gauges)
+        if self.llm_config.warmup:
+            for tier_backend in (backend, assistant.small_backend):
+                if tier_backend is not None:
+                    tier_backend.start(background=self.llm_config.warmup_background,
+                                       health_check_interval=self.llm_config.health_check_interval)
+    
+    def _end_turn(self):
+        """Checkpoint the session and report the finished turn to the telemetry and the backend."""
+        try:
+            self.checkpoint()
+        except OSError as e:
+            # Losing a checkpoint must not lose the turn
+            if app_config.debug:
+                print(f"\n⚠️ Checkpoint failed: {e}")
+        # A turn whose assistant failed to load has nothing to report about the model
+        called_model = self.turn.route == "llm" and self._assistant is not None
+        if called_model and not self.turn.error and self.assistant.backend is not None:
+            self.assistant.backend.record_first_turn(time.perf_counter() - self.turn.started)
+        if self.telemetry is None:
+            return
+        self.telemetry.record_turn(
+            self.turn,
+            self.profiler.spans,
+            model_metadata=self.assistant.last_model_metadata if called_model else None,
+            usage=self.assistant.last_usage if called_model else None
+        )
     
     def process_user_input(self, user_input: str) -> bool:
         """
@@ -84,31 +446,270 @@ class BankBotApp:
         Returns:
             True if processing was successful, False otherwise
         """
-        # Get LLM response
-        reply = self.assistant.chat(
+        self._begin_turn()
+        try:
+            return self._process_turn(user_input)
+        finally:
+            self._end_turn()
+    
+    def _process_turn(self, user_input: str) -> bool:
+        """Process one turn; see process_user_input."""
+        # Resolve unambiguous commands without the LLM
+        if self.router:
+            route = self.router.route(user_input, currency=self.account.currency)
+            if route:
+                self.turn.route = "fast_path"
+                self._record_exchange(user_input, route.reply)
+                self.execute_action(route.action_dict)
+                return True
+        
+        if self._streams():
+            return self._process_streaming(user_input)
+        
+        # Get LLM response, split into text and actions
+        started = time.perf_counter()
+        parsed = self.assistant.chat_turn(
             user_input=user_input,
             current_balance=self.account.balance,
             currency=self.account.currency
         )
         
-        if reply is None:
+        if parsed is None:
+            self.turn.error = True
             return False
         
-        # Parse response
-        conversational_text, action_dict = self.parser.parse_response(reply)
+        if self.router:
+            self.router.record_llm_latency(time.perf_counter() - started)
         
         # Print conversational response
-        if conversational_text:
-            print(f"\nBankBot: {conversational_text}")
+        if parsed.text:
+            print(f"\nBankBot: {parsed.text}")
         
-        # Execute action if present
-        if action_dict:
+        # Execute actions in the order the model gave them
+        for action_dict in parsed.actions:
             self.execute_action(action_dict)
+        if parsed.invalid and not parsed.actions:
+            self.turn.parse_failed = True
+            print(f"\n{self.error_messages['parse_error']}")
         
         return True
     
+    def _streams(self) -> bool:
+        """Whether replies are streamed; structured action modes need the whole response."""
+        return self.llm_config.streaming and self.assistant.action_mode == "text"
+    
+    def _process_streaming(self, user_input: str) -> bool:
+        """
+        Stream the LLM response, printing text and executing actions as they arrive.
+        
+        Args:
+            user_input: User's message
+            
+        Returns:
+            True if processing was successful, False otherwise
+        """
+        parser = StreamingResponseParser()
+        metrics = TurnMetrics()
+        line_open = False
+        
+        def show(text: str):
+            nonlocal line_open
+            if not line_open:
+                text = text.lstrip()
+                if not text:
+                    return
+                print("\nBankBot: ", end="")
+                line_open = True
+            metrics.mark_output()
+            print(text, end="", flush=True)
+        
+        for chunk in self.assistant.stream_chat(
+            user_input=user_input,
+            current_balance=self.account.balance,
+            currency=self.account.currency
+        ):
+            with self.profiler.stage("parse"):
+                text, actions = parser.feed(chunk)
+            if text:
+                show(text)
+            for action_dict in actions:
+                if line_open:
+                    print()
+                    line_open = False
+                metrics.mark_action()
+                self.execute_action(action_dict)
+        
+        remainder, actions = parser.close()
+        if remainder:
+            show(remainder)
+        if line_open:
+            print()
+        for action_dict in actions:
+            metrics.mark_action()
+            self.execute_action(action_dict)
+        if parser.invalid and not parser.result.actions:
+            self.turn.parse_failed = True
+            print(f"\n{self.error_messages['parse_error']}")
+        
+        if not parser.full_text:
+            self.turn.error = True
+            return False
+        
+        metrics.prompt_tokens = self.assistant.last_prompt_tokens
+        metrics.finish()
+        self.latency_stats.record(metrics)
+        if self.router:
+            self.router.record_llm_latency(metrics.total_time)
+        return True
+    
+    async def astream_turn(self, user_input: str) -> AsyncIterator[Dict]:
+        """
+        Process user input without blocking the event loop.
+        
+        Events are yielded instead of printed so that callers such as the
+        server can forward them to their client. Blocking work, i.e. loading
+        the assistant, executing actions against a ledger or database and
+        checkpointing, runs on worker threads so one slow disk or database
+        call does not stall other sessions.
+        
+        Args:
+            user_input: User's message
+            
+        Yields:
+            Event dictionaries of type "text", "action", "error" and finally "done"
+        """
+        self._begin_turn()
+        try:
+            async for event in self._astream_events(user_input):
+                yield event
+        finally:
+            await asyncio.to_thread(self._end_turn)
+    
+    async def _aload_assistant(self) -> "BankingAssistant":
+        """Get the assistant, creating it or waiting for preload() on a worker thread."""
+        if self._assistant is not None:
+            return self._assistant
+        return await asyncio.to_thread(lambda: self.assistant)
+    
+    async def _astream_events(self, user_input: str) -> AsyncIterator[Dict]:
+        """Produce the events of one turn; see astream_turn."""
+        metrics = TurnMetrics()
+        
+        if self.router:
+            route = self.router.route(user_input, currency=self.account.currency)
+            if route:
+                self.turn.route = "fast_path"
+                self._record_exchange(user_input, route.reply)
+                metrics.mark_action()
+                yield await self._aaction_event(route.action_dict)
+                metrics.finish()
+                yield self._done_event(metrics)
+                return
+        
+        parser = StreamingResponseParser()
+        try:
+            assistant = await self._aload_assistant()
+            if self._streams():
+                async for chunk in assistant.astream_chat(
+                    user_input=user_input,
+                    current_balance=self.account.balance,
+                    currency=self.account.currency
+                ):
+                    with self.profiler.stage("parse"):
+                        text, actions = parser.feed(chunk)
+                    if text:
+                        metrics.mark_output()
+                        yield {"type": "text", "text": text}
+                    for action_dict in actions:
+                        metrics.mark_action()
+                        yield await self._aaction_event(action_dict)
+            else:
+                parsed = await assistant.achat_turn(
+                    user_input=user_input,
+                    current_balance=self.account.balance,
+                    currency=self.account.currency
+                )
+                parser.result = parsed
+                if parsed.text:
+                    metrics.mark_output()
+                    yield {"type": "text", "text": parsed.text}
+                for action_dict in parsed.actions:
+                    metrics.mark_action()
+                    yield await self._aaction_event(action_dict)
+        except Exception as e:
+            self.turn.error = True
+            yield {"type": "error", "message": self.error_messages["llm_connection"].format(error=str(e))}
+            return
+        
+        remainder, actions = parser.close()
+        if remainder:
+            yield {"type": "text", "text": remainder}
+        for action_dict in actions:
+            metrics.mark_action()
+            yield await self._aaction_event(action_dict)
+        if parser.invalid and not parser.result.actions:
+            self.turn.parse_failed = True
+            yield {"type": "error", "message": self.error_messages["parse_error"]}
+        
+        metrics.prompt_tokens = self.assistant.last_prompt_tokens
+        metrics.finish()
+        self.latency_stats.record(metrics)
+        if self.router:
+            self.router.record_llm_latency(metrics.total_time)
+        yield self._done_event(metrics)
+    
+    async def aprocess_user_input(self, user_input: str) -> Dict:
+        """
+        Process user input and collect the whole turn into one result.
+        
+        Args:
+            user_input: User's message
+            
+        Returns:
+            Dictionary with the reply text, executed actions, balance and timings
+        """
+        result = {"reply": "", "actions": [], "error": None}
+        async for event in self.astream_turn(user_input):
+            if event["type"] == "text":
+                result["reply"] += event["text"]
+            elif event["type"] == "action":
+                result["actions"].append(event)
+            elif event["type"] == "error":
+                result["error"] = event["message"]
+            else:
+                result.update({k: v for k, v in event.items() if k != "type"})
+        result["reply"] = result["reply"].strip()
+        result.setdefault("balance", self.account.balance)
+        result.setdefault("currency", self.account.currency)
+        return result
+    
+    async def _aaction_event(self, action_dict: Dict) -> Dict:
+        """Execute an action on a worker thread and describe the outcome as an event."""
+        # Ledger appends fsync and database accounts run SQL, so keep them off the event loop
+        with self.profiler.stage("execute"):
+            success, message = await asyncio.to_thread(self.perform_action, action_dict)
+        self.turn.actions.append((str(action_dict.get("action")), success))
+        return {"type": "action", "action": action_dict, "success": success, "message": message}
+    
+    def _done_event(self, metrics: TurnMetrics) -> Dict:
+        """Describe the end of a turn as an event."""
+        return {
+            "type": "done",
+            "route": self.turn.route,
+            "tier": self._assistant.last_tier if self.turn.route == "llm" and self._assistant else None,
+            "balance": self.account.balance,
+            "currency": self.account.currency,
+            "time_to_first_output": metrics.time_to_first_output,
+            "time_to_action": metrics.time_to_action,
+            "total_time": metrics.total_time,
+            "prompt_tokens": metrics.prompt_tokens
+        }
+    
     def run(self):
         """Run the main application loop."""
+        # Load LangChain and the model while the user reads the welcome message and types
+        self.preload()
+        
         # Print welcome message
         print(self.templates.get_welcome_message())
         
@@ -126,19 +727,44 @@ class BankBotApp:
                         balance=self.account.balance,
                         currency=self.account.currency
                     ))
+                    self._print_stats()
+                    self.close()
                     break
                 
                 # Process input
                 self.process_user_input(user_input)
             
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print(self.templates.get_goodbye_message(
                     balance=self.account.balance,
                     currency=self.account.currency
                 ))
+                self._print_stats()
+                self.close()
                 break
             except Exception as e:
                 if app_config.debug:
                     print(f"\n⚠️ Unexpected error: {e}")
                 else:
                     print(f"\n{self.error_messages['parse_error']}")
+    
+    def _print_stats(self):
+        """Print session statistics in debug mode."""
+        if not app_config.debug:
+            return
+        if self.router:
+            print(self.router.stats.summary())
+        if self.latency_stats.turns:
+            print(self.latency_stats.summary())
+        if self._converter:
+            print(self._converter.stats.summary())
+        if self._assistant is None:
+            return
+        if self._assistant.cache:
+            print(self._assistant.cache.stats.summary())
+        if self._assistant.scheduler:
+            print(self._assistant.scheduler.stats.summary())
+        if self._assistant.cascade:
+            print(self._assistant.cascade.stats.summary())
+        if self._assistant.backend:
+            print(self._assistant.backend.stats.summary())
@@ -1,35 +1,68 @@
 """Banking account operations."""
 
-from typing import Optional
-from dataclasses import dataclass
+import threading
+import time
+from itertools import accumulate
+from typing import Optional, List, Iterable, Tuple, TYPE_CHECKING
 
+from .transaction import Transaction, BatchResult
+from .history import TransactionHistory, HistoryView, ACTIONS, ACTION_CODES
 
-@dataclass
-class Transaction:
-    """Represents a banking transaction."""
-    
-    action: str
-    amount: float
-    balance_before: float
-    balance_after: float
-    success: bool
-    message: str
+if TYPE_CHECKING:
+    from .ledger import TransactionLedger
+
+
+# Rolling windows for history queries, in seconds
+PERIODS = {
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+}
+
+# Aliases accepted for batch operations, mapped onto history actions
+BATCH_ACTIONS = {
+    "deposit": "deposit",
+    "add": "deposit",
+    "withdraw": "withdraw",
+}
 
 
 class BankAccount:
-    """Manages banking account operations."""
+    """
+    Manages banking account operations.
     
-    def __init__(self, initial_balance: float = 0.0, currency: str = "EUR"):
+    Every operation that reads and then changes the balance runs under a
+    per-account lock, so concurrent withdrawals can never overdraw and
+    operations on different accounts never contend.
+    """
+    
+    def __init__(self, initial_balance: float = 0.0, currency: str = "EUR",
+                 ledger: Optional["TransactionLedger"] = None):
         """
         Initialize a bank account.
         
+        If a ledger is given, the balance and history are recovered from it
+        and every successful transaction is persisted to it.
+        
         Args:
-            initial_balance: Starting balance
+            initial_balance: Starting balance, used when the ledger is empty
             currency: Account currency
+            ledger: Optional durable transaction ledger
         """
         self._balance = initial_balance
         self._currency = currency
-        self._transaction_history = []
+        self._history = TransactionHistory(currency)
+        self._ledger = ledger
+        self._lock = threading.RLock()
+        
+        if ledger is not None:
+            state = ledger.replay(currency)
+            if state is None:
+                # Record the starting balance so recovery has a base to replay onto
+                ledger.snapshot(self._balance, self._history)
+            else:
+                self._balance = state.balance
+                self._history = state.history
     
     @property
     def balance(self) -> float:
@@ -42,9 +75,14 @@ class BankAccount:
         return self._currency
     
     @property
-    def transaction_history(self) -> list:
-        """Get transaction history."""
-        return self._transaction_history.copy()
+    def transaction_history(self) -> HistoryView:
+        """Get a read-only, zero-copy view of the transaction history."""
+        return self._history.view()
+    
+    @property
+    def history(self) -> TransactionHistory:
+        """Get the underlying columnar transaction history."""
+        return self._history
     
     def deposit(self, amount: float) -> Transaction:
         """
@@ -66,19 +104,18 @@ class BankAccount:
                 message="Amount must be positive"
             )
         
-        balance_before = self._balance
-        self._balance += amount
-        
-        transaction = Transaction(
-            action="deposit",
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=self._balance,
-            success=True,
-            message=f"Deposited {amount:.2f} {self._currency}"
-        )
-        
-        self._transaction_history.append(transaction)
+        with self._lock:
+            transaction = Transaction(
+                action="deposit",
+                amount=amount,
+                balance_before=self._balance,
+                balance_after=self._balance + amount,
+                success=True,
+                message=f"Deposited {amount:.2f} {self._currency}"
+            )
+            
+            self._record(transaction)
+        self._commit()
         return transaction
     
     def withdraw(self, amount: float) -> Transaction:
@@ -101,30 +138,240 @@ class BankAccount:
                 message="Amount must be positive"
             )
         
-        if amount > self._balance:
-            return Transaction(
+        # The funds check and the update must happen atomically
+        with self._lock:
+            if amount > self._balance:
+                return Transaction(
+                    action="withdraw",
+                    amount=amount,
+                    balance_before=self._balance,
+                    balance_after=self._balance,
+                    success=False,
+                    message=f"Insufficient funds. Available: {self._balance:.2f} {self._currency}"
+                )
+            
+            transaction = Transaction(
                 action="withdraw",
                 amount=amount,
                 balance_before=self._balance,
-                balance_after=self._balance,
-                success=False,
-                message=f"Insufficient funds. Available: {self._balance:.2f} {self._currency}"
+                balance_after=self._balance - amount,
+                success=True,
+                message=f"Withdrew {amount:.2f} {self._currency}"
             )
+            
+            self._record(transaction)
+        self._commit()
+        return transaction
+    
+    def apply_batch(self, operations: Iterable[Tuple]) -> BatchResult:
+        """
+        Apply many deposits and withdrawals atomically.
+        
+        Every operation is validated against the running balance in integer
+        cents before anything is changed; if one fails, none are applied.
+        Successful batches are appended to the history column by column and
+        written to the ledger as one atomic group.
+        
+        Args:
+            operations: (action, amount) or (action, amount, timestamp) tuples,
+                where action is "deposit", "add" or "withdraw"
+                
+        Returns:
+            BatchResult describing the outcome
+        """
+        with self._lock:
+            planned = self._plan_batch(operations)
+            if isinstance(planned, BatchResult):
+                return planned
+            result = self._commit_batch(*planned)
+        self._commit()
+        return result
+    
+    def _plan_batch(self, operations: Iterable[Tuple]):
+        """
+        Validate a batch against the current balance without changing anything.
+        
+        The caller holds the account lock.
+        
+        Returns:
+            (codes, amounts, balances, timestamps) in cents, or a rejected BatchResult
+        """
+        balance = round(self._balance * 100)
+        now = time.time()
+        codes, amounts, balances, timestamps = [], [], [], []
+        add_code, add_amount, add_balance, add_timestamp = (
+            codes.append, amounts.append, balances.append, timestamps.append
+        )
+        codes_by_alias = {alias: ACTION_CODES[action] for alias, action in BATCH_ACTIONS.items()}
+        withdraw_code = ACTION_CODES["withdraw"]
+        
+        for index, operation in enumerate(operations):
+            code = codes_by_alias.get(operation[0])
+            if code is None:
+                return self._reject_batch(index, "unsupported_action", operation[0])
+            
+            cents = round(operation[1] * 100)
+            if cents <= 0:
+                return self._reject_batch(index, "non_positive_amount")
+            
+            if code == withdraw_code:
+                if cents > balance:
+                    return self._reject_batch(index, "insufficient_funds", balance / 100)
+                balance -= cents
+            else:
+                balance += cents
+            
+            add_code(code)
+            add_amount(cents)
+            add_balance(balance)
+            add_timestamp(operation[2] if len(operation) > 2 else now)
+        
+        return codes, amounts, balances, timestamps
+    
+    def _commit_batch(self, codes: List[int], amounts: List[int], balances: List[int],
+                      timestamps: List[float]) -> BatchResult:
+        """
+        Apply a validated batch to the history and the ledger.
+        
+        The caller holds the account lock.
         
+        Args:
+            codes: Action codes
+            amounts: Amounts in cents
+            balances: Balances after each operation in cents
+            timestamps: Unix times
+            
+        Returns:
+            Successful BatchResult
+        """
         balance_before = self._balance
-        self._balance -= amount
-        
-        transaction = Transaction(
-            action="withdraw",
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=self._balance,
-            success=True,
-            message=f"Withdrew {amount:.2f} {self._currency}"
+        count = len(codes)
+        if not count:
+            return BatchResult(True, 0, balance_before, balance_before, self._currency)
+        
+        amount_column = [cents / 100 for cents in amounts]
+        after_column = [cents / 100 for cents in balances]
+        before_column = [balance_before] + after_column[:-1]
+        start = len(self._history)
+        
+        if self._ledger is not None:
+            # Clamp timestamps that went backwards like the history does, so replay matches memory
+            last = self._history.timestamps[-1] if start else float("-inf")
+            timestamps = list(accumulate(timestamps, max, initial=last))[1:]
+            # Written before memory changes, so a failed append leaves the account as it was
+            self._ledger.append_records([
+                (ACTIONS[codes[i]], amount_column[i], before_column[i], after_column[i], timestamps[i])
+                for i in range(count)
+            ], atomic=True, wait=False)
+        
+        self._history.extend(codes, amount_column, before_column, after_column, timestamps)
+        self._balance = after_column[-1]
+        if self._ledger is not None and self._ledger.needs_snapshot:
+            self._ledger.snapshot(self._balance, self._history)
+        
+        return BatchResult(
+            True, count, balance_before, self._balance, self._currency,
+            _history=self._history, _start=start
         )
+    
+    def _reject_batch(self, index: int, reason: str, detail=None) -> BatchResult:
+        """Build the result of a batch that failed validation."""
+        return BatchResult(
+            False, 0, self._balance, self._balance, self._currency,
+            failed_index=index, reason=reason, detail=detail
+        )
+    
+    def _record(self, transaction: Transaction):
+        """
+        Write a successful transaction to the ledger, then apply it to the balance and history.
         
-        self._transaction_history.append(transaction)
-        return transaction
+        The ledger record is written first, so if the append fails (disk
+        full, ledger closed) the error reaches the caller and the account
+        keeps the balance the ledger has. The caller holds the account lock
+        and calls _commit after releasing it.
+        
+        Args:
+            transaction: Completed transaction
+        """
+        if self._ledger is not None:
+            self._ledger.append(transaction, wait=False)
+        self._balance = transaction.balance_after
+        self._history.append_transaction(transaction)
+        if self._ledger is not None and self._ledger.needs_snapshot:
+            self._ledger.snapshot(self._balance, self._history)
+    
+    def _commit(self):
+        """
+        Wait until the ledger has synced every record written so far.
+        
+        Called after releasing the account lock, so concurrent transactions
+        on the account share a group commit. A transaction is only reported
+        once it is durable, and records are synced in order, so it never
+        depends on an earlier transaction that could still be lost.
+        """
+        if self._ledger is not None:
+            self._ledger.commit(self._ledger.seq)
+    
+    def restore(self, balance: float, history: TransactionHistory) -> bool:
+        """
+        Load a checkpointed balance and history into an account without transactions.
+        
+        Accounts backed by a ledger recover from it instead, and accounts
+        that already have transactions are left alone.
+        
+        Args:
+            balance: Checkpointed balance
+            history: Checkpointed transaction history
+            
+        Returns:
+            True if the state was loaded
+        """
+        with self._lock:
+            if self._ledger is not None or len(self._history) or history.currency != self._currency:
+                return False
+            self._balance = balance
+            self._history = history
+            return True
+    
+    def close(self):
+        """Flush and close the ledger, if any."""
+        if self._ledger is not None:
+            with self._lock:
+                self._ledger.close()
+    
+    def get_total(self, action: str, period: str = "all") -> dict:
+        """
+        Sum deposits or withdrawals over a rolling period.
+        
+        Args:
+            action: "deposit" or "withdraw"
+            period: "day", "week", "month" or "all"
+            
+        Returns:
+            Dictionary with the total and the number of transactions
+        """
+        start = time.time() - PERIODS[period] if period in PERIODS else None
+        with self._lock:
+            return {
+                "action": action,
+                "period": period,
+                "total": self._history.total(action, start=start),
+                "count": self._history.count(action, start=start)
+            }
+    
+    def get_recent(self, count: int = 5, action: Optional[str] = None) -> List[Transaction]:
+        """
+        Get the most recent transactions, newest first.
+        
+        Args:
+            count: Maximum number of transactions
+            action: "deposit", "withdraw" or None for both
+            
+        Returns:
+            List of transactions
+        """
+        with self._lock:
+            return self._history.last(count, action)
     
     def get_balance(self) -> float:
         """Get current balance."""
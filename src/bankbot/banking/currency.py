@@ -0,0 +1,356 @@
+"""Exchange rates from pluggable providers, with a cached cross-rate matrix and batch conversion."""
+
+import json
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+from ..config.settings import BankingConfig
+from .history import TransactionHistory
+
+
+def _normalize(code: str) -> str:
+    """Upper-case a currency code."""
+    return str(code).strip().upper()
+
+
+def _parse_rates(payload: Dict) -> Tuple[str, Dict[str, float]]:
+    """
+    Read a {"base": ..., "rates": {...}} document, as served by Frankfurter-style rate APIs.
+    
+    Args:
+        payload: Decoded JSON document
+        
+    Returns:
+        Tuple of (base currency, units of each currency per one unit of the base)
+    """
+    base = _normalize(payload["base"])
+    rates = {_normalize(code): float(rate) for code, rate in payload["rates"].items()}
+    rates[base] = 1.0
+    for code, rate in rates.items():
+        if not rate > 0:
+            raise ValueError(f"Invalid exchange rate for {code}: {rate}")
+    return base, rates
+
+
+class RateProvider:
+    """Source of exchange rates; subclasses implement fetch()."""
+    
+    name = "provider"
+    
+    def fetch(self) -> Tuple[str, Dict[str, float]]:
+        """
+        Get the current rates.
+        
+        Returns:
+            Tuple of (base currency, units of each currency per one unit of the base)
+        """
+        raise NotImplementedError
+
+
+class StaticRateProvider(RateProvider):
+    """Fixed rates, e.g. the single EUR/USD rate from the configuration."""
+    
+    name = "static"
+    
+    def __init__(self, base: str, rates: Dict[str, float]):
+        """
+        Initialize with fixed rates.
+        
+        Args:
+            base: Base currency
+            rates: Units of each currency per one unit of the base
+        """
+        self.base, self.rates = _parse_rates({"base": base, "rates": rates})
+    
+    def fetch(self) -> Tuple[str, Dict[str, float]]:
+        return self.base, dict(self.rates)
+
+
+class FileRateProvider(RateProvider):
+    """Rates read from a local JSON file, re-read whenever the cache expires."""
+    
+    name = "file"
+    
+    def __init__(self, path: str):
+        """
+        Initialize the provider.
+        
+        Args:
+            path: JSON file with "base" and "rates"
+        """
+        self.path = path
+    
+    def fetch(self) -> Tuple[str, Dict[str, float]]:
+        with open(self.path, encoding="utf-8") as fh:
+            return _parse_rates(json.load(fh))
+
+
+class HttpRateProvider(RateProvider):
+    """Rates fetched from an HTTP service returning "base" and "rates" as JSON."""
+    
+    name = "http"
+    
+    def __init__(self, url: str, timeout: float = 5.0):
+        """
+        Initialize the provider.
+        
+        Args:
+            url: URL of the rates document
+            timeout: Seconds to wait for the service
+        """
+        self.url = url
+        self.timeout = timeout
+    
+    def fetch(self) -> Tuple[str, Dict[str, float]]:
+        # urllib keeps the HTTP client out of the CLI's startup path
+        request = urllib.request.Request(self.url, headers={"Accept": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return _parse_rates(json.loads(response.read().decode("utf-8")))
+
+
+class RateTable:
+    """
+    Immutable snapshot of exchange rates with every cross rate precomputed.
+    
+    matrix[i, j] is the number of units of currency j one unit of currency
+    i buys. The same rates are kept as nested dictionaries of floats, so a
+    single pair is two dictionary lookups, while batch conversions index
+    the matrix.
+    """
+    
+    def __init__(self, base: str, rates: Dict[str, float], fetched_at: Optional[float] = None):
+        """
+        Build the cross-rate matrix.
+        
+        Args:
+            base: Base currency of the rates
+            rates: Units of each currency per one unit of the base
+            fetched_at: Monotonic time the rates were fetched
+        """
+        self.base, rates = _parse_rates({"base": base, "rates": rates})
+        self.codes = tuple(sorted(rates))
+        self.index = {code: position for position, code in enumerate(self.codes)}
+        per_base = np.array([rates[code] for code in self.codes], dtype=np.float64)
+        self.matrix = per_base[np.newaxis, :] / per_base[:, np.newaxis]
+        self._cross = {code: dict(zip(self.codes, row)) for code, row in zip(self.codes, self.matrix.tolist())}
+        self.fetched_at = time.monotonic() if fetched_at is None else fetched_at
+    
+    def __contains__(self, code: str) -> bool:
+        return _normalize(code) in self.index
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def position(self, code: str) -> int:
+        """
+        Get the matrix index of a currency.
+        
+        Args:
+            code: Currency code
+            
+        Returns:
+            Row/column of the currency in the matrix
+        """
+        position = self.index.get(_normalize(code))
+        if position is None:
+            raise ValueError(f"Unsupported currency: {code}")
+        return position
+    
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """Get the units of to_currency that one unit of from_currency buys."""
+        try:
+            return self._cross[from_currency][to_currency]
+        except KeyError:
+            return self._cross[self.codes[self.position(from_currency)]][self.codes[self.position(to_currency)]]
+    
+    def convert_many(self, amounts: Union[np.ndarray, Iterable[float]], from_currencies: Union[str, Iterable[str]],
+                     to_currency: str) -> np.ndarray:
+        """
+        Convert many amounts in one vectorized operation.
+        
+        Args:
+            amounts: Amounts to convert
+            from_currencies: One currency for all amounts, or one per amount
+            to_currency: Target currency
+            
+        Returns:
+            Converted amounts as a float64 array
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        column = self.matrix[:, self.position(to_currency)]
+        if isinstance(from_currencies, str):
+            return amounts * column[self.position(from_currencies)]
+        try:
+            positions = np.fromiter(map(self.index.__getitem__, from_currencies), dtype=np.intp, count=len(amounts))
+        except KeyError:
+            # Lower-case or unknown codes; position() normalizes them or names the unsupported one
+            positions = np.fromiter((self.position(code) for code in from_currencies), dtype=np.intp, count=len(amounts))
+        return amounts * column[positions]
+
+
+@dataclass
+class RateStats:
+    """Fetch and cache counters of a converter."""
+    
+    fetches: int = 0
+    fetch_failures: int = 0
+    stale_serves: int = 0
+    lookups: int = 0
+    last_error: Optional[str] = None
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        return (
+            f"Exchange rates: {self.fetches} fetches ({self.fetch_failures} failed), "
+            f"{self.lookups} lookups, {self.stale_serves} served from a stale table"
+        )
+
+
+class CurrencyConverter:
+    """
+    Convert between currencies with rates cached for a TTL.
+    
+    The rate table is fetched from the provider on first use and again
+    once it is older than the TTL. If a refresh fails, the previous table
+    keeps being served and the fetch is retried on the next lookup after
+    a short back-off, so a flaky rate service does not break conversions.
+    """
+    
+    def __init__(self, provider: RateProvider, ttl: float = 3600.0, retry_interval: float = 30.0):
+        """
+        Initialize the converter; nothing is fetched yet.
+        
+        Args:
+            provider: Source of the rates
+            ttl: Seconds a fetched table stays valid
+            retry_interval: Seconds between fetch attempts while serving a stale table
+        """
+        self.provider = provider
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.stats = RateStats()
+        self._table: Optional[RateTable] = None
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+    
+    def table(self) -> RateTable:
+        """
+        Get the current rate table, fetching it if it expired.
+        
+        Returns:
+            RateTable snapshot
+        """
+        self.stats.lookups += 1
+        table = self._table
+        now = time.monotonic()
+        if table is not None and now - table.fetched_at < self.ttl:
+            return table
+        
+        with self._lock:
+            table = self._table
+            if table is not None and now - table.fetched_at < self.ttl:
+                return table
+            if table is not None and now < self._next_attempt:
+                self.stats.stale_serves += 1
+                return table
+            try:
+                base, rates = self.provider.fetch()
+            except Exception as e:
+                self.stats.fetch_failures += 1
+                self.stats.last_error = str(e)
+                if table is None:
+                    raise
+                self._next_attempt = now + self.retry_interval
+                self.stats.stale_serves += 1
+                return table
+            self.stats.fetches += 1
+            self._table = RateTable(base, rates)
+            return self._table
+    
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        """
+        Get the exchange rate of a currency pair.
+        
+        Args:
+            from_currency: Currency converted from
+            to_currency: Currency converted to
+            
+        Returns:
+            Units of to_currency per unit of from_currency
+        """
+        return self.table().rate(from_currency, to_currency)
+    
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Convert one amount."""
+        return amount * self.rate(from_currency, to_currency)
+    
+    def convert_history(self, history: TransactionHistory, to_currency: str) -> Dict[str, np.ndarray]:
+        """
+        Convert every amount of a transaction history at the current rate.
+        
+        The history's columns are read as zero-copy buffers and scaled in
+        one vectorized operation per column.
+        
+        Args:
+            history: Columnar transaction history
+            to_currency: Target currency
+            
+        Returns:
+            Dictionary with "amounts", "balances_before" and "balances_after" arrays in the target currency
+        """
+        rate = self.rate(history.currency, to_currency)
+        columns = history.columns()
+        return {
+            name: np.frombuffer(columns[name], dtype=np.float64) * rate
+            for name in ("amounts", "balances_before", "balances_after")
+        }
+
+
+def create_provider(config: BankingConfig) -> RateProvider:
+    """
+    Create the rate provider selected in the configuration.
+    
+    Args:
+        config: Banking configuration
+        
+    Returns:
+        RateProvider instance
+    """
+    provider = config.rates_provider.lower()
+    if provider == "static":
+        return StaticRateProvider("EUR", {"USD": config.eur_to_usd_rate})
+    if provider == "file":
+        if not config.rates_path:
+            raise ValueError("The file rate provider needs BANKING_RATES_PATH")
+        return FileRateProvider(config.rates_path)
+    if provider == "http":
+        if not config.rates_url:
+            raise ValueError("The http rate provider needs BANKING_RATES_URL")
+        return HttpRateProvider(config.rates_url)
+    raise ValueError(f"Unsupported rate provider: {config.rates_provider}")
+
+
+_converters = {}
+_converters_lock = threading.Lock()
+
+
+def get_converter(config: BankingConfig) -> CurrencyConverter:
+    """
+    Get the process-wide converter for a configuration, so sessions share one rate table.
+    
+    Args:
+        config: Banking configuration
+        
+    Returns:
+        Shared CurrencyConverter instance
+    """
+    key = (config.rates_provider, config.rates_path, config.rates_url, config.rates_ttl, config.eur_to_usd_rate)
+    with _converters_lock:
+        if key not in _converters:
+            _converters[key] = CurrencyConverter(create_provider(config), ttl=config.rates_ttl)
+        return _converters[key]
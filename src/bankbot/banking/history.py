@@ -0,0 +1,353 @@
+"""Compact columnar storage for transaction history."""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from itertools import accumulate
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple
+
+from .transaction import Transaction
+
+
+ACTIONS = ("deposit", "withdraw")
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+_MESSAGE_VERBS = {"deposit": "Deposited", "withdraw": "Withdrew"}
+
+
+class _ActionIndex:
+    """Positions, timestamps and running totals of one action type."""
+    
+    __slots__ = ("positions", "timestamps", "cumulative")
+    
+    def __init__(self):
+        self.positions = array("q")
+        self.timestamps = array("d")
+        # cumulative[k] is the sum of the first k amounts, so cumulative[0] == 0
+        self.cumulative = array("d", [0.0])
+    
+    def add(self, position: int, amount: float, timestamp: float):
+        self.positions.append(position)
+        self.timestamps.append(timestamp)
+        self.cumulative.append(self.cumulative[-1] + amount)
+
+
+class TransactionHistory:
+    """
+    Append-only transaction history stored as typed array columns.
+    
+    Each transaction costs a few dozen bytes instead of a Python object.
+    Transaction objects are only built when an entry is read. Per-action
+    indexes with running totals answer range and aggregate queries with
+    binary searches over the timestamp column.
+    """
+    
+    def __init__(self, currency: str = "EUR"):
+        """
+        Initialize an empty history.
+        
+        Args:
+            currency: Account currency, used to build transaction messages
+        """
+        self.currency = currency
+        self.codes = array("b")
+        self.amounts = array("d")
+        self.balances_before = array("d")
+        self.balances_after = array("d")
+        self.timestamps = array("d")
+        self._indexes: Dict[str, _ActionIndex] = {action: _ActionIndex() for action in ACTIONS}
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    def append(self, action: str, amount: float, balance_before: float, balance_after: float,
+               timestamp: Optional[float] = None):
+        """
+        Append a successful transaction.
+        
+        Args:
+            action: "deposit" or "withdraw"
+            amount: Transaction amount
+            balance_before: Balance before the transaction
+            balance_after: Balance after the transaction
+            timestamp: Unix time, defaults to now
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        # Keep the timestamp column sorted even if the clock steps back
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            timestamp = self.timestamps[-1]
+        
+        position = len(self.codes)
+        self.codes.append(ACTION_CODES[action])
+        self.amounts.append(amount)
+        self.balances_before.append(balance_before)
+        self.balances_after.append(balance_after)
+        self.timestamps.append(timestamp)
+        self._indexes[action].add(position, amount, timestamp)
+    
+    def append_transaction(self, transaction: Transaction):
+        """
+        Append a Transaction object.
+        
+        Args:
+            transaction: Successful transaction
+        """
+        self.append(
+            transaction.action,
+            transaction.amount,
+            transaction.balance_before,
+            transaction.balance_after,
+            transaction.timestamp
+        )
+    
+    def extend(self, codes: Iterable[int], amounts: Iterable[float], balances_before: Iterable[float],
+               balances_after: Iterable[float], timestamps: Iterable[float]):
+        """
+        Append many successful transactions given as columns.
+        
+        The columns are copied with one bulk extend each, and the action
+        indexes are updated in a single pass.
+        
+        Args:
+            codes: Action codes, see ACTION_CODES
+            amounts: Transaction amounts
+            balances_before: Balances before each transaction
+            balances_after: Balances after each transaction
+            timestamps: Non-decreasing Unix times
+        """
+        start = len(self.codes)
+        last = self.timestamps[-1] if self.timestamps else float("-inf")
+        self.codes.extend(codes)
+        self.amounts.extend(amounts)
+        self.balances_before.extend(balances_before)
+        self.balances_after.extend(balances_after)
+        # Keep the timestamp column sorted even if the clock steps back
+        self.timestamps.extend(accumulate(timestamps, max, initial=last))
+        self.timestamps.pop(start)
+        self._index_from(start)
+    
+    def _index_from(self, start: int):
+        """Add the entries from a position onwards to the action indexes."""
+        codes = self.codes
+        for code, action in enumerate(ACTIONS):
+            index = self._indexes[action]
+            positions = [p for p in range(start, len(codes)) if codes[p] == code]
+            index.positions.extend(positions)
+            index.timestamps.extend([self.timestamps[p] for p in positions])
+            running = accumulate([self.amounts[p] for p in positions], initial=index.cumulative[-1])
+            next(running)
+            index.cumulative.extend(running)
+    
+    def get(self, position: int) -> Transaction:
+        """
+        Build the Transaction stored at a position.
+        
+        Args:
+            position: Index into the history, negative values count from the end
+            
+        Returns:
+            Transaction object
+        """
+        if position < 0:
+            position += len(self.codes)
+        if not 0 <= position < len(self.codes):
+            raise IndexError("transaction index out of range")
+        
+        action = ACTIONS[self.codes[position]]
+        amount = self.amounts[position]
+        return Transaction(
+            action=action,
+            amount=amount,
+            balance_before=self.balances_before[position],
+            balance_after=self.balances_after[position],
+            success=True,
+            message=f"{_MESSAGE_VERBS[action]} {amount:.2f} {self.currency}",
+            timestamp=self.timestamps[position]
+        )
+    
+    def view(self) -> "HistoryView":
+        """
+        Get a read-only view of the history as it is now.
+        
+        The view shares the underlying columns, so creating it is O(1).
+        
+        Returns:
+            HistoryView over the current entries
+        """
+        return HistoryView(self, 0, len(self.codes))
+    
+    def page(self, offset: int = 0, limit: int = 20) -> List[Transaction]:
+        """
+        Get a page of transactions in chronological order.
+        
+        Args:
+            offset: Index of the first transaction
+            limit: Maximum number of transactions
+            
+        Returns:
+            List of transactions
+        """
+        end = min(len(self.codes), offset + limit)
+        return [self.get(position) for position in range(max(0, offset), end)]
+    
+    def iter_pages(self, page_size: int = 100) -> Iterator[List[Transaction]]:
+        """
+        Iterate over the history one page at a time.
+        
+        Args:
+            page_size: Transactions per page
+            
+        Yields:
+            Lists of at most page_size transactions
+        """
+        for offset in range(0, len(self.codes), page_size):
+            yield self.page(offset, page_size)
+    
+    def _range(self, action: str, start: Optional[float], end: Optional[float]) -> Tuple[_ActionIndex, int, int]:
+        """Find the slice of an action index whose timestamps fall in [start, end]."""
+        index = self._indexes[action]
+        lo = 0 if start is None else bisect_left(index.timestamps, start)
+        hi = len(index.timestamps) if end is None else bisect_right(index.timestamps, end)
+        return index, lo, max(lo, hi)
+    
+    def total(self, action: str, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """
+        Sum the amounts of one action type within a time range in O(log n).
+        
+        Args:
+            action: "deposit" or "withdraw"
+            start: Earliest Unix time, unbounded if None
+            end: Latest Unix time, unbounded if None
+            
+        Returns:
+            Total amount
+        """
+        index, lo, hi = self._range(action, start, end)
+        return index.cumulative[hi] - index.cumulative[lo]
+    
+    def count(self, action: str, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        """
+        Count transactions of one action type within a time range in O(log n).
+        
+        Args:
+            action: "deposit" or "withdraw"
+            start: Earliest Unix time, unbounded if None
+            end: Latest Unix time, unbounded if None
+            
+        Returns:
+            Number of transactions
+        """
+        _, lo, hi = self._range(action, start, end)
+        return hi - lo
+    
+    def last(self, count: int, action: Optional[str] = None) -> List[Transaction]:
+        """
+        Get the most recent transactions, newest first.
+        
+        Args:
+            count: Maximum number of transactions
+            action: Restrict to "deposit" or "withdraw", or None for all
+            
+        Returns:
+            List of transactions
+        """
+        if count <= 0:
+            return []
+        if action is None:
+            positions = range(len(self.codes) - 1, max(-1, len(self.codes) - 1 - count), -1)
+        else:
+            positions = reversed(self._indexes[action].positions[-count:])
+        return [self.get(position) for position in positions]
+    
+    def columns(self) -> Dict[str, memoryview]:
+        """
+        Get zero-copy read-only views of the raw columns.
+        
+        Returns:
+            Dictionary of column name to memoryview
+        """
+        return {
+            "codes": memoryview(self.codes).toreadonly(),
+            "amounts": memoryview(self.amounts).toreadonly(),
+            "balances_before": memoryview(self.balances_before).toreadonly(),
+            "balances_after": memoryview(self.balances_after).toreadonly(),
+            "timestamps": memoryview(self.timestamps).toreadonly(),
+        }
+    
+    def to_bytes(self, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """
+        Serialize the columns into a compact binary blob.
+        
+        Args:
+            start: First transaction to include
+            stop: Transaction to stop before, defaults to the end
+            
+        Returns:
+            Bytes readable by from_bytes with count stop - start
+        """
+        if start == 0 and stop is None:
+            return b"".join(column.tobytes() for column in (
+                self.codes, self.amounts, self.balances_before, self.balances_after, self.timestamps
+            ))
+        return b"".join(column[start:stop].tobytes() for column in (
+            self.codes, self.amounts, self.balances_before, self.balances_after, self.timestamps
+        ))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, count: int, currency: str = "EUR") -> "TransactionHistory":
+        """
+        Rebuild a history serialized with to_bytes.
+        
+        Args:
+            data: Serialized columns
+            count: Number of transactions
+            currency: Account currency
+            
+        Returns:
+            TransactionHistory instance
+        """
+        history = cls(currency)
+        offset = 0
+        for column in (history.codes, history.amounts, history.balances_before,
+                       history.balances_after, history.timestamps):
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        
+        history._index_from(0)
+        return history
+
+
+class HistoryView(Sequence):
+    """Read-only sequence of transactions backed by a TransactionHistory."""
+    
+    __slots__ = ("_history", "_start", "_stop")
+    
+    def __init__(self, history: TransactionHistory, start: int, stop: int):
+        self._history = history
+        self._start = start
+        self._stop = stop
+    
+    def __len__(self) -> int:
+        return self._stop - self._start
+    
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step == 1:
+                return HistoryView(self._history, self._start + start, self._start + max(start, stop))
+            return [self._history.get(self._start + i) for i in range(start, stop, step)]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("transaction index out of range")
+        return self._history.get(self._start + item)
+    
+    def __iter__(self) -> Iterator[Transaction]:
+        for position in range(self._start, self._stop):
+            yield self._history.get(position)
+    
+    def __repr__(self) -> str:
+        return f"HistoryView({len(self)} transactions)"
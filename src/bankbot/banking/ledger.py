@@ -0,0 +1,458 @@
+"""Durable append-only transaction ledger with write-ahead log and snapshots."""
+
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional, List, Iterable, Sequence, Tuple
+
+from .transaction import Transaction
+from .history import TransactionHistory, ACTION_CODES
+
+
+FSYNC_POLICIES = ("always", "group", "never")
+
+_SNAPSHOT_FILE = "snapshot.bin"
+_SEGMENT_PREFIX = "wal-"
+_SEGMENT_SUFFIX = ".log"
+
+
+@dataclass
+class LedgerState:
+    """Account state recovered from a ledger."""
+    
+    balance: float
+    seq: int
+    history: TransactionHistory
+    recovered_records: int = 0
+
+
+# (action, amount, balance_before, balance_after, timestamp)
+Record = Tuple[str, float, float, float, float]
+
+
+_RECORD_FORMAT = '[%d,"%s",%r,%r,%r,%r]'
+
+
+def _frame(payload: bytes) -> bytes:
+    """Prefix a payload with its checksum and terminate the line."""
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def _encode(seq: int, record: Record) -> bytes:
+    """Encode a record as a checksummed log line."""
+    # repr() of a finite float is valid JSON and much cheaper than json.dumps
+    return _frame((_RECORD_FORMAT % (seq, *record)).encode("ascii"))
+
+
+def _encode_batch(first_seq: int, records: Sequence[Record]) -> bytes:
+    """Encode records as one checksummed line, so they are recovered together or not at all."""
+    payload = ",".join([_RECORD_FORMAT % (seq, *record) for seq, record in enumerate(records, first_seq)])
+    return _frame(("[" + payload + "]").encode("ascii"))
+
+
+def _decode(line: bytes) -> Optional[List[list]]:
+    """Decode a log line into its records, returning None if it is torn or corrupt."""
+    if len(line) < 10 or not line.endswith(b"\n"):
+        return None
+    checksum, payload = line[:8], line[9:-1]
+    try:
+        if int(checksum, 16) != zlib.crc32(payload):
+            return None
+        if payload.startswith(b"[["):
+            return json.loads(payload)
+        # Single records are flat lists written by _encode, so split them instead of running a JSON parser
+        fields = payload[1:-1].split(b",")
+        return [[
+            int(fields[0]), fields[1][1:-1].decode("ascii"),
+            float(fields[2]), float(fields[3]), float(fields[4]), float(fields[5])
+        ]]
+    except (ValueError, IndexError):
+        return None
+
+
+class TransactionLedger:
+    """
+    Persist successful transactions to an append-only write-ahead log.
+    
+    Each record is written to the current log segment as soon as it is
+    appended. When it is forced to stable storage depends on the fsync
+    policy:
+    
+    - "always": fsync every append on its own
+    - "group": group commit; appenders wait until an fsync covers their
+      record, and one of them, the leader, fsyncs for every record
+      written so far, so concurrent appenders share one fsync
+    - "never": leave syncing to the operating system
+    
+    Under "always" and "group" an append is durable once append_records
+    or commit returns. A failed write or fsync fails the ledger: every
+    later append and commit raises, since the state of the unsynced
+    records is unknown. A restart recovers whatever reached the disk.
+    
+    Snapshots capture the full account state and start a new log segment,
+    so recovery reads the snapshot plus the log tail written after it.
+    """
+    
+    def __init__(self, directory: str, fsync_policy: str = "group", group_commit_size: int = 64,
+                 group_commit_interval: float = 0.0, snapshot_interval: int = 10000):
+        """
+        Open or create a ledger.
+        
+        Args:
+            directory: Directory holding the snapshot and log segments
+            fsync_policy: One of "always", "group" or "never"
+            group_commit_size: Pending records after which a group commit leader stops waiting for more
+            group_commit_interval: Seconds a group commit leader waits for more records
+                before it fsyncs; 0 to fsync at once, records written meanwhile share the next fsync
+            snapshot_interval: Records between automatic snapshots
+        """
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unsupported fsync policy: {fsync_policy}")
+        
+        self.directory = directory
+        self.fsync_policy = fsync_policy
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self.snapshot_interval = snapshot_interval
+        
+        self._lock = threading.Lock()
+        # Signalled when an fsync finishes or, for a waiting leader, a record is written
+        self._synced = threading.Condition(self._lock)
+        self._file = None
+        self._seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+        self._error: Optional[BaseException] = None
+        self._since_snapshot = 0
+        self._closed = False
+        
+        os.makedirs(directory, exist_ok=True)
+    
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last appended record."""
+        return self._seq
+    
+    @property
+    def needs_snapshot(self) -> bool:
+        """Whether enough records were appended to warrant a snapshot."""
+        return self._since_snapshot >= self.snapshot_interval
+    
+    def replay(self, currency: str = "EUR") -> Optional[LedgerState]:
+        """
+        Recover account state from the latest snapshot and the log tail.
+        
+        A torn record at the end of the log, left by a crash during a write,
+        is discarded together with any atomic batch it belongs to. A corrupt
+        record followed by valid ones is not a torn write, and skipping it
+        would leave a gap in the history, so replay refuses it. Must be
+        called before the first append.
+        
+        Args:
+            currency: Account currency, used to rebuild transaction messages
+            
+        Returns:
+            Recovered state, or None if the ledger is empty
+            
+        Raises:
+            ValueError: If a corrupt record is not at the end of the log
+        """
+        snapshot_path = os.path.join(self.directory, _SNAPSHOT_FILE)
+        state = None
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as fh:
+                header = json.loads(fh.readline())
+                columns = fh.read()
+            state = LedgerState(
+                balance=header["balance"],
+                seq=header["seq"],
+                history=TransactionHistory.from_bytes(columns, header["count"], currency)
+            )
+        
+        base_seq = state.seq if state is not None else 0
+        codes, amounts, balances_before, balances_after, timestamps = [], [], [], [], []
+        segments = self._segments()
+        for index, path in enumerate(segments):
+            valid_size = 0
+            with open(path, "rb") as fh:
+                for line in fh:
+                    records = _decode(line)
+                    if records is None:
+                        if index < len(segments) - 1 or any(_decode(rest) is not None for rest in fh):
+                            raise ValueError(f"Corrupt ledger record at byte {valid_size} of {path}")
+                        break
+                    valid_size += len(line)
+                    for seq, action, amount, balance_before, balance_after, timestamp in records:
+                        if seq <= base_seq:
+                            continue
+                        if state is None:
+                            state = LedgerState(balance=balance_before, seq=0, history=TransactionHistory(currency))
+                        codes.append(ACTION_CODES[action])
+                        amounts.append(amount)
+                        balances_before.append(balance_before)
+                        balances_after.append(balance_after)
+                        timestamps.append(timestamp)
+                        state.balance = balance_after
+                        state.seq = seq
+                        state.recovered_records += 1
+            
+            # Drop a torn tail so new records are appended after valid data
+            if valid_size != os.path.getsize(path):
+                with open(path, "r+b") as fh:
+                    fh.truncate(valid_size)
+        
+        if codes:
+            state.history.extend(codes, amounts, balances_before, balances_after, timestamps)
+        if state is not None:
+            self._seq = self._synced_seq = state.seq
+            self._since_snapshot = state.recovered_records
+        return state
+    
+    def append(self, transaction: Transaction, wait: bool = True) -> int:
+        """
+        Append a successful transaction to the log.
+        
+        Args:
+            transaction: Transaction to persist
+            wait: Whether to wait until the record is durable, see append_records
+            
+        Returns:
+            Sequence number of the record
+        """
+        return self.append_many((transaction,), wait=wait)
+    
+    def append_many(self, transactions: Iterable[Transaction], wait: bool = True) -> int:
+        """
+        Append several transactions with a single write.
+        
+        Args:
+            transactions: Transactions to persist
+            wait: Whether to wait until the records are durable, see append_records
+            
+        Returns:
+            Sequence number of the last record
+        """
+        return self.append_records([
+            (t.action, t.amount, t.balance_before, t.balance_after, t.timestamp) for t in transactions
+        ], wait=wait)
+    
+    def append_records(self, records: Sequence[Record], atomic: bool = False, wait: bool = True) -> int:
+        """
+        Append raw records with a single write.
+        
+        Atomic records are written as a single checksummed line, so replay
+        recovers either all of them or, after a torn write, none.
+        
+        Args:
+            records: (action, amount, balance_before, balance_after, timestamp) tuples
+            atomic: Whether the records must be recovered all together or not at all
+            wait: Whether to wait for the group commit covering the records;
+                callers holding a lock pass False and call commit() after releasing it,
+                so concurrent appenders can share an fsync
+                
+        Returns:
+            Sequence number of the last record
+        """
+        if not records:
+            return self._seq
+        
+        with self._lock:
+            self._check()
+            self._ensure_open()
+            first = self._seq + 1
+            try:
+                if atomic and len(records) > 1:
+                    self._file.write(_encode_batch(first, records))
+                else:
+                    self._file.write(b"".join(
+                        _encode(seq, record) for seq, record in enumerate(records, first)
+                    ))
+                self._file.flush()
+            except OSError as e:
+                # A partly written line would sit between valid records and stop replay
+                self._error = e
+                raise
+            self._seq += len(records)
+            self._since_snapshot += len(records)
+            seq = self._seq
+            
+            if self.fsync_policy == "always":
+                self._sync()
+            elif self.fsync_policy == "group" and self._syncing:
+                # A leader may be waiting for more records before it fsyncs
+                self._synced.notify_all()
+        
+        if wait:
+            self.commit(seq)
+        return seq
+    
+    def commit(self, seq: int):
+        """
+        Wait until the record with a sequence number is durable.
+        
+        Under "group" the first waiter becomes the leader and fsyncs every
+        record written so far, outside the lock, while later appenders keep
+        writing; they are covered by the next fsync, led by one of them.
+        
+        Args:
+            seq: Sequence number returned by an append
+            
+        Raises:
+            OSError: If the ledger failed a write or fsync
+        """
+        if self.fsync_policy == "never":
+            return
+        
+        with self._lock:
+            while True:
+                self._check_synced()
+                if self._synced_seq >= seq:
+                    return
+                if not self._syncing:
+                    break
+                self._synced.wait()
+            
+            self._syncing = True
+            if self.group_commit_interval > 0:
+                deadline = time.monotonic() + self.group_commit_interval
+                while self._seq - self._synced_seq < self.group_commit_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._synced.wait(remaining)
+            target, fd = self._seq, self._file.fileno()
+        
+        error = None
+        try:
+            os.fsync(fd)
+        except OSError as e:
+            error = e
+        
+        with self._lock:
+            self._syncing = False
+            if error is None:
+                self._synced_seq = max(self._synced_seq, target)
+            else:
+                self._error = error
+            self._synced.notify_all()
+        self._check_synced()
+    
+    def snapshot(self, balance: float, history: TransactionHistory):
+        """
+        Write a snapshot of the account and start a new log segment.
+        
+        The snapshot is a JSON header line followed by the raw history
+        columns, so loading it does not parse individual records.
+        
+        Args:
+            balance: Current balance
+            history: Full transaction history
+        """
+        with self._lock:
+            self._check()
+            self._wait_for_leader()
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            
+            header = json.dumps({"seq": self._seq, "balance": balance, "count": len(history)})
+            path = os.path.join(self.directory, _SNAPSHOT_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(header.encode("utf-8") + b"\n")
+                fh.write(history.to_bytes())
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, path)
+            self._fsync_directory()
+            
+            # Segments fully covered by the snapshot are no longer needed
+            for segment in self._segments():
+                os.remove(segment)
+            self._since_snapshot = 0
+    
+    def flush(self):
+        """Force all appended records to stable storage."""
+        with self._lock:
+            self._wait_for_leader()
+            if self._file is not None:
+                self._sync()
+    
+    def close(self):
+        """Flush pending records and close the log."""
+        with self._lock:
+            self._closed = True
+            self._wait_for_leader()
+            if self._file is not None:
+                try:
+                    if self._error is None:
+                        self._sync()
+                finally:
+                    self._file.close()
+                    self._file = None
+    
+    def _segments(self) -> List[str]:
+        """Log segments ordered by their first sequence number."""
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)
+        ]
+        names.sort(key=lambda name: int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+        return [os.path.join(self.directory, name) for name in names]
+    
+    def _ensure_open(self):
+        """Open the active log segment and start the group-commit flusher."""
+        if self._file is not None:
+            return
+        if self._closed:
+            raise ValueError("Ledger is closed")
+        
+        segments = self._segments()
+        if segments and self._since_snapshot > 0:
+            path = segments[-1]
+        else:
+            path = os.path.join(self.directory, f"{_SEGMENT_PREFIX}{self._seq + 1:020d}{_SEGMENT_SUFFIX}")
+        self._file = open(path, "ab")
+        self._fsync_directory()
+    
+    def _sync(self):
+        """Flush and fsync the active segment. Caller holds the lock and no leader is syncing."""
+        self._file.flush()
+        if self.fsync_policy != "never" and self._synced_seq < self._seq:
+            try:
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                self._error = e
+                self._synced.notify_all()
+                raise
+        self._synced_seq = self._seq
+        self._synced.notify_all()
+    
+    def _wait_for_leader(self):
+        """Wait for a group commit fsync running outside the lock. Caller holds the lock."""
+        while self._syncing:
+            self._synced.wait()
+    
+    def _check(self):
+        """Refuse new records after a failed write or fsync. Caller holds the lock."""
+        if self._error is not None:
+            raise OSError(f"Ledger {self.directory} failed a write or fsync and accepts no more records") from self._error
+    
+    def _check_synced(self):
+        """Raise if records may have been lost to a failed write or fsync."""
+        if self._error is not None:
+            raise OSError(f"Ledger {self.directory} failed a write or fsync; unsynced records may be lost") from self._error
+    
+    def _fsync_directory(self):
+        """Persist directory entries after creating or renaming files."""
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,168 @@
+"""Thread-safe registry of many accounts, sharded by account id."""
+
+import threading
+from typing import Optional, Dict, List, Callable, Set
+
+from .account import BankAccount
+
+
+class _Shard:
+    """One partition of the registry with its own lock."""
+    
+    __slots__ = ("lock", "accounts", "holders", "shared")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.accounts: Dict[str, BankAccount] = {}
+        # Acquired accounts: holder counts, and which were ever acquired as shared
+        self.holders: Dict[str, int] = {}
+        self.shared: Set[str] = set()
+
+
+class AccountRegistry:
+    """
+    Hold many accounts, sharded by id.
+    
+    Shard locks only guard lookups, creation and removal. Balance changes
+    are serialized by each account's own lock, so operations on different
+    accounts never wait for each other.
+    
+    Holders such as server sessions acquire and release accounts. A
+    private account is closed when its last holder releases it; an
+    account anyone acquired as shared stays until close_all.
+    """
+    
+    def __init__(self, shards: int = 16, initial_balance: float = 0.0, currency: str = "EUR",
+                 account_factory: Optional[Callable[[str], BankAccount]] = None):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            shards: Number of shards
+            initial_balance: Starting balance of new accounts
+            currency: Currency of new accounts
+            account_factory: Optional function opening the account of an id, e.g.
+                with a ledger or database storage; plain in-memory accounts if omitted
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        
+        self.initial_balance = initial_balance
+        self.currency = currency
+        self.account_factory = account_factory
+        self._shards = [_Shard() for _ in range(shards)]
+    
+    def __len__(self) -> int:
+        return sum(len(shard.accounts) for shard in self._shards)
+    
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._shard(account_id).accounts
+    
+    def _shard(self, account_id: str) -> _Shard:
+        """Get the shard an account id belongs to."""
+        return self._shards[hash(account_id) % len(self._shards)]
+    
+    def get(self, account_id: str) -> Optional[BankAccount]:
+        """Get an existing account."""
+        return self._shard(account_id).accounts.get(account_id)
+    
+    def get_or_create(self, account_id: str) -> BankAccount:
+        """
+        Get an account, creating it if it does not exist.
+        
+        Args:
+            account_id: Account identifier
+            
+        Returns:
+            BankAccount instance
+        """
+        shard = self._shard(account_id)
+        account = shard.accounts.get(account_id)
+        if account is not None:
+            return account
+        
+        with shard.lock:
+            # Another thread may have created it while we waited
+            return self._get_or_open(shard, account_id)
+    
+    def _get_or_open(self, shard: _Shard, account_id: str) -> BankAccount:
+        """Get an account, opening it if needed; call with the shard lock held."""
+        account = shard.accounts.get(account_id)
+        if account is None:
+            if self.account_factory is not None:
+                account = self.account_factory(account_id)
+            else:
+                account = BankAccount(initial_balance=self.initial_balance, currency=self.currency)
+            shard.accounts[account_id] = account
+        return account
+    
+    def acquire(self, account_id: str, shared: bool = True) -> BankAccount:
+        """
+        Get an account for a new holder, creating it if it does not exist.
+        
+        Args:
+            account_id: Account identifier
+            shared: Whether the account is meant to outlive its holders, like
+                an account several sessions join; False for a session's own
+                
+        Returns:
+            BankAccount instance
+        """
+        shard = self._shard(account_id)
+        with shard.lock:
+            account = self._get_or_open(shard, account_id)
+            shard.holders[account_id] = shard.holders.get(account_id, 0) + 1
+            if shared:
+                shard.shared.add(account_id)
+        return account
+    
+    def release(self, account_id: str) -> bool:
+        """
+        Give up one holder's claim on an account.
+        
+        Args:
+            account_id: Account identifier
+            
+        Returns:
+            Whether the account was closed, i.e. it was private and this was its last holder
+        """
+        shard = self._shard(account_id)
+        with shard.lock:
+            holders = shard.holders.get(account_id, 0) - 1
+            if holders > 0:
+                shard.holders[account_id] = holders
+                return False
+            shard.holders.pop(account_id, None)
+            if account_id in shard.shared:
+                return False
+            account = shard.accounts.pop(account_id, None)
+            if account is None:
+                return False
+            # Closed under the lock, so a new holder cannot open its storage before it is flushed
+            account.close()
+        return True
+    
+    def remove(self, account_id: str) -> bool:
+        """Close and drop an account, returning whether it existed."""
+        shard = self._shard(account_id)
+        with shard.lock:
+            account = shard.accounts.pop(account_id, None)
+            shard.holders.pop(account_id, None)
+            shard.shared.discard(account_id)
+        if account is None:
+            return False
+        account.close()
+        return True
+    
+    def ids(self) -> List[str]:
+        """Get the ids of all accounts."""
+        ids = []
+        for shard in self._shards:
+            with shard.lock:
+                ids.extend(shard.accounts)
+        return ids
+    
+    def close_all(self):
+        """Close and drop every account, flushing their ledgers."""
+        for account_id in self.ids():
+            self.remove(account_id)
@@ -0,0 +1,443 @@
+"""SQL storage for accounts and transactions on any SQLAlchemy database."""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Optional, List, Dict, Iterable, Tuple
+
+from sqlalchemy import (
+    MetaData, Table, Column, String, Integer, BigInteger, SmallInteger, Float, Index,
+    create_engine, event, select, insert, update, bindparam
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from ..config.settings import BankingConfig
+from .account import BankAccount
+from .history import TransactionHistory, ACTION_CODES
+from .transaction import Transaction
+
+
+metadata = MetaData()
+
+accounts_table = Table(
+    "accounts",
+    metadata,
+    Column("id", String(64), primary_key=True),
+    Column("currency", String(8), nullable=False),
+    Column("balance_cents", BigInteger, nullable=False),
+    Column("version", BigInteger, nullable=False, default=0),
+)
+
+transactions_table = Table(
+    "transactions",
+    metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("account_id", String(64), nullable=False),
+    Column("action", SmallInteger, nullable=False),
+    Column("amount_cents", BigInteger, nullable=False),
+    Column("balance_before_cents", BigInteger, nullable=False),
+    Column("balance_after_cents", BigInteger, nullable=False),
+    Column("timestamp", Float, nullable=False),
+    Index("ix_transactions_account_id", "account_id", "id"),
+)
+
+
+def _to_cents(amount: float) -> int:
+    """Convert an amount to integer cents."""
+    return round(amount * 100)
+
+
+class SQLStorage:
+    """
+    Store account balances and transactions in a SQL database.
+    
+    Balances are kept in integer cents and changed with a single
+    conditional UPDATE per operation, so the database itself rejects a
+    withdrawal that would overdraw, even with several processes writing.
+    Statements are built once; SQLAlchemy caches their compiled form and
+    the connection pool keeps the driver's prepared statements warm.
+    """
+    
+    def __init__(self, url: str = "sqlite:///bankbot.db", pool_size: int = 5, max_overflow: int = 10,
+                 echo: bool = False):
+        """
+        Connect to the database and create the tables if needed.
+        
+        Args:
+            url: SQLAlchemy database URL
+            pool_size: Connections kept open in the pool
+            max_overflow: Extra connections allowed under load
+            echo: Log every SQL statement
+        """
+        self.url = url
+        self.engine = self._create_engine(url, pool_size, max_overflow, echo)
+        # A single shared in-memory connection must not interleave transactions
+        self._serialize = threading.Lock() if isinstance(self.engine.pool, StaticPool) else nullcontext()
+        metadata.create_all(self.engine)
+        
+        accounts = accounts_table.c
+        self._returning = self.engine.dialect.update_returning
+        deposit = update(accounts_table).where(accounts.id == bindparam("account_id")).values(
+            balance_cents=accounts.balance_cents + bindparam("cents"),
+            version=accounts.version + 1
+        )
+        withdraw = update(accounts_table).where(
+            accounts.id == bindparam("account_id"),
+            accounts.balance_cents >= bindparam("cents")
+        ).values(
+            balance_cents=accounts.balance_cents - bindparam("cents"),
+            version=accounts.version + 1
+        )
+        if self._returning:
+            deposit = deposit.returning(accounts.balance_cents)
+            withdraw = withdraw.returning(accounts.balance_cents)
+        self._deposit = deposit
+        self._withdraw = withdraw
+        self._swap_balance = update(accounts_table).where(
+            accounts.id == bindparam("account_id"),
+            accounts.balance_cents == bindparam("expected_cents")
+        ).values(
+            balance_cents=bindparam("new_cents"),
+            version=accounts.version + 1
+        )
+        self._select_balance = select(accounts.balance_cents).where(accounts.id == bindparam("account_id"))
+        self._insert_account = insert(accounts_table)
+        self._insert_transaction = insert(transactions_table)
+        
+        transactions = transactions_table.c
+        self._select_history = select(
+            transactions.action, transactions.amount_cents, transactions.balance_before_cents,
+            transactions.balance_after_cents, transactions.timestamp
+        ).where(transactions.account_id == bindparam("account_id")).order_by(transactions.id)
+    
+    @classmethod
+    def from_config(cls, config: BankingConfig) -> "SQLStorage":
+        """
+        Create storage from banking configuration.
+        
+        Args:
+            config: Banking configuration with a database_url
+            
+        Returns:
+            SQLStorage instance
+        """
+        return cls(
+            url=config.database_url,
+            pool_size=config.database_pool_size,
+            max_overflow=config.database_max_overflow,
+            echo=config.database_echo
+        )
+    
+    @staticmethod
+    def _create_engine(url: str, pool_size: int, max_overflow: int, echo: bool) -> Engine:
+        """Create a pooled engine, tuned for SQLite when the URL points at it."""
+        if not url.startswith("sqlite"):
+            return create_engine(
+                url, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True, echo=echo
+            )
+        
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            return create_engine(
+                url, poolclass=StaticPool, connect_args={"check_same_thread": False}, echo=echo
+            )
+        
+        engine = create_engine(
+            url, pool_size=pool_size, max_overflow=max_overflow,
+            connect_args={"check_same_thread": False, "timeout": 30}, echo=echo
+        )
+        
+        @event.listens_for(engine, "connect")
+        def _configure_sqlite(dbapi_connection, _):
+            # WAL lets readers proceed during writes; NORMAL sync is durable at checkpoints
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+        
+        return engine
+    
+    def open_account(self, account_id: str, initial_balance: float = 0.0, currency: str = "EUR") -> float:
+        """
+        Get the balance of an account, creating the account if needed.
+        
+        Args:
+            account_id: Account identifier
+            initial_balance: Starting balance of a new account
+            currency: Currency of a new account
+            
+        Returns:
+            Current balance
+        """
+        balance = self.get_balance(account_id)
+        if balance is not None:
+            return balance
+        
+        try:
+            with self._serialize, self.engine.begin() as conn:
+                conn.execute(self._insert_account, {
+                    "id": account_id, "currency": currency,
+                    "balance_cents": _to_cents(initial_balance), "version": 0
+                })
+        except IntegrityError:
+            # Another process created it first
+            pass
+        return self.get_balance(account_id)
+    
+    def get_balance(self, account_id: str) -> Optional[float]:
+        """Get the balance of an account, or None if it does not exist."""
+        with self._serialize, self.engine.connect() as conn:
+            cents = conn.execute(self._select_balance, {"account_id": account_id}).scalar()
+        return None if cents is None else cents / 100
+    
+    def load_history(self, account_id: str, currency: str = "EUR") -> TransactionHistory:
+        """
+        Load the transaction history of an account.
+        
+        Args:
+            account_id: Account identifier
+            currency: Account currency
+            
+        Returns:
+            TransactionHistory with every stored transaction
+        """
+        with self._serialize, self.engine.connect() as conn:
+            rows = conn.execute(self._select_history, {"account_id": account_id}).all()
+        
+        history = TransactionHistory(currency)
+        if rows:
+            codes, amounts, before, after, timestamps = zip(*rows)
+            history.extend(
+                codes,
+                [cents / 100 for cents in amounts],
+                [cents / 100 for cents in before],
+                [cents / 100 for cents in after],
+                timestamps
+            )
+        return history
+    
+    def deposit(self, account_id: str, amount: float, timestamp: float) -> float:
+        """
+        Add to a balance and record the transaction in one database transaction.
+        
+        Returns:
+            Balance after the deposit
+        """
+        cents = _to_cents(amount)
+        with self._serialize, self.engine.begin() as conn:
+            balance = self._change_balance(conn, self._deposit, account_id, cents)
+            self._insert(conn, account_id, "deposit", cents, balance - cents, balance, timestamp)
+        return balance / 100
+    
+    def withdraw(self, account_id: str, amount: float, timestamp: float) -> Optional[float]:
+        """
+        Subtract from a balance if it covers the amount and record the transaction.
+        
+        Returns:
+            Balance after the withdrawal, or None if funds were insufficient
+        """
+        cents = _to_cents(amount)
+        with self._serialize, self.engine.begin() as conn:
+            balance = self._change_balance(conn, self._withdraw, account_id, cents)
+            if balance is None:
+                return None
+            self._insert(conn, account_id, "withdraw", cents, balance + cents, balance, timestamp)
+        return balance / 100
+    
+    def apply_batch(self, account_id: str, expected_cents: int, codes: List[int], amounts: List[int],
+                    balances: List[int], timestamps: List[float]) -> bool:
+        """
+        Store a validated batch if the balance is still what it was validated against.
+        
+        Args:
+            account_id: Account identifier
+            expected_cents: Balance the batch was validated against
+            codes: Action codes
+            amounts: Amounts in cents
+            balances: Balances after each operation in cents
+            timestamps: Unix times
+            
+        Returns:
+            True if stored, False if the balance changed in the meantime
+        """
+        with self._serialize, self.engine.begin() as conn:
+            swapped = conn.execute(self._swap_balance, {
+                "account_id": account_id, "expected_cents": expected_cents, "new_cents": balances[-1]
+            })
+            if swapped.rowcount != 1:
+                return False
+            
+            before = [expected_cents] + balances[:-1]
+            conn.execute(self._insert_transaction, [
+                {
+                    "account_id": account_id, "action": codes[i], "amount_cents": amounts[i],
+                    "balance_before_cents": before[i], "balance_after_cents": balances[i],
+                    "timestamp": timestamps[i]
+                }
+                for i in range(len(codes))
+            ])
+        return True
+    
+    def close(self):
+        """Close all pooled connections."""
+        self.engine.dispose()
+    
+    def _change_balance(self, conn, statement, account_id: str, cents: int) -> Optional[int]:
+        """Run a conditional balance UPDATE and return the new balance in cents."""
+        params = {"account_id": account_id, "cents": cents}
+        if self._returning:
+            return conn.execute(statement, params).scalar()
+        if conn.execute(statement, params).rowcount != 1:
+            return None
+        return conn.execute(self._select_balance, {"account_id": account_id}).scalar()
+    
+    def _insert(self, conn, account_id: str, action: str, cents: int, before: int, after: int, timestamp: float):
+        """Insert one transaction row."""
+        conn.execute(self._insert_transaction, {
+            "account_id": account_id, "action": ACTION_CODES[action], "amount_cents": cents,
+            "balance_before_cents": before, "balance_after_cents": after, "timestamp": timestamp
+        })
+
+
+class _StaleBalance(Exception):
+    """The stored balance changed after a batch was validated."""
+
+
+class SQLBankAccount(BankAccount):
+    """
+    Bank account whose balance and transactions live in a SQLStorage.
+    
+    The database decides every balance change, so several processes can
+    share an account. The in-memory history holds what was stored when the
+    account was opened plus the transactions made through this instance.
+    """
+    
+    def __init__(self, storage: SQLStorage, account_id: str, initial_balance: float = 0.0, currency: str = "EUR"):
+        """
+        Open or create an account.
+        
+        Args:
+            storage: Database storage
+            account_id: Account identifier
+            initial_balance: Starting balance of a new account
+            currency: Account currency
+        """
+        super().__init__(initial_balance=initial_balance, currency=currency)
+        self._storage = storage
+        self.account_id = account_id
+        self._balance = storage.open_account(account_id, initial_balance, currency)
+        self._history = storage.load_history(account_id, currency)
+    
+    def deposit(self, amount: float) -> Transaction:
+        """
+        Deposit money into the account.
+        
+        Args:
+            amount: Amount to deposit
+            
+        Returns:
+            Transaction object with result
+        """
+        if amount <= 0:
+            return super().deposit(amount)
+        
+        with self._lock:
+            timestamp = time.time()
+            balance = self._storage.deposit(self.account_id, amount, timestamp)
+            return self._applied("deposit", amount, balance, timestamp, f"Deposited {amount:.2f} {self._currency}")
+    
+    def withdraw(self, amount: float) -> Transaction:
+        """
+        Withdraw money from the account.
+        
+        Args:
+            amount: Amount to withdraw
+            
+        Returns:
+            Transaction object with result
+        """
+        if amount <= 0:
+            return super().withdraw(amount)
+        
+        with self._lock:
+            timestamp = time.time()
+            balance = self._storage.withdraw(self.account_id, amount, timestamp)
+            if balance is None:
+                # Another process may have moved the balance since we last saw it
+                self._balance = self._storage.get_balance(self.account_id)
+                return Transaction(
+                    action="withdraw",
+                    amount=amount,
+                    balance_before=self._balance,
+                    balance_after=self._balance,
+                    success=False,
+                    message=f"Insufficient funds. Available: {self._balance:.2f} {self._currency}"
+                )
+            return self._applied("withdraw", amount, balance, timestamp, f"Withdrew {amount:.2f} {self._currency}")
+    
+    def apply_batch(self, operations: Iterable[Tuple]):
+        """
+        Apply many deposits and withdrawals atomically.
+        
+        The batch is validated against the stored balance, read first since
+        another process may have changed it, and stored only if the
+        database still holds that balance; otherwise the balance is
+        refreshed and the batch validated again.
+        
+        Args:
+            operations: (action, amount) or (action, amount, timestamp) tuples
+            
+        Returns:
+            BatchResult describing the outcome
+        """
+        operations = list(operations)
+        with self._lock:
+            self._balance = self._storage.get_balance(self.account_id)
+            while True:
+                try:
+                    return super().apply_batch(operations)
+                except _StaleBalance:
+                    self._balance = self._storage.get_balance(self.account_id)
+    
+    def _commit_batch(self, codes, amounts, balances, timestamps):
+        """Store the batch before applying it in memory."""
+        if codes and not self._storage.apply_batch(
+            self.account_id, _to_cents(self._balance), codes, amounts, balances, timestamps
+        ):
+            raise _StaleBalance()
+        return super()._commit_batch(codes, amounts, balances, timestamps)
+    
+    def _applied(self, action: str, amount: float, balance: float, timestamp: float, message: str) -> Transaction:
+        """Mirror a stored transaction in memory. The caller holds the lock."""
+        cents = _to_cents(amount)
+        balance_before = (_to_cents(balance) + (cents if action == "withdraw" else -cents)) / 100
+        self._balance = balance
+        self._history.append(action, amount, balance_before, balance, timestamp)
+        return Transaction(
+            action=action,
+            amount=amount,
+            balance_before=balance_before,
+            balance_after=balance,
+            success=True,
+            message=message,
+            timestamp=timestamp
+        )
+
+
+_shared_storages: Dict[str, SQLStorage] = {}
+
+
+def get_shared_storage(config: BankingConfig) -> SQLStorage:
+    """
+    Get the process-wide storage for a configuration, so sessions share one pool.
+    
+    Args:
+        config: Banking configuration with a database_url
+        
+    Returns:
+        Shared SQLStorage instance
+    """
+    if config.database_url not in _shared_storages:
+        _shared_storages[config.database_url] = SQLStorage.from_config(config)
+    return _shared_storages[config.database_url]
@@ -0,0 +1,59 @@
+"""Transaction record."""
+
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Any, Sequence
+
+
+@dataclass
+class Transaction:
+    """Represents a banking transaction."""
+    
+    action: str
+    amount: float
+    balance_before: float
+    balance_after: float
+    success: bool
+    message: str
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of an atomic batch of operations.
+    
+    Messages and Transaction objects are only built when they are read,
+    so applying a large batch does not format a string per entry.
+    """
+    
+    success: bool
+    count: int
+    balance_before: float
+    balance_after: float
+    currency: str = "EUR"
+    failed_index: Optional[int] = None
+    reason: Optional[str] = None
+    detail: Any = None
+    _history: Any = field(default=None, repr=False)
+    _start: int = field(default=0, repr=False)
+    
+    @property
+    def transactions(self) -> Sequence[Transaction]:
+        """Get the applied transactions as a lazy view of the account history."""
+        if not self.success or self._history is None:
+            return []
+        return self._history.view()[self._start:self._start + self.count]
+    
+    @property
+    def message(self) -> str:
+        """Describe the outcome of the batch."""
+        if self.success:
+            return f"Applied {self.count} operations. Balance: {self.balance_after:.2f} {self.currency}"
+        if self.reason == "unsupported_action":
+            error = f"Unsupported action: {self.detail}"
+        elif self.reason == "insufficient_funds":
+            error = f"Insufficient funds. Available: {self.detail:.2f} {self.currency}"
+        else:
+            error = "Amount must be positive"
+        return f"Operation {self.failed_index + 1} rejected: {error}. No changes were made"
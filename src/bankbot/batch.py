@@ -0,0 +1,265 @@
+"""Non-interactive batch mode: replay a JSONL file of utterances through many sessions at once."""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, TextIO, Tuple
+
+from .config.settings import app_config, llm_config
+from .app import BankBotApp
+from .utils.ids import is_valid_session_id
+from .utils.telemetry import get_telemetry
+
+
+class _BatchSession:
+    """Utterances of one session waiting to be processed, and its app once opened."""
+    
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.queue: Deque[Tuple[int, str]] = deque()
+        self.app: Optional[BankBotApp] = None
+        self.turns = 0
+        self.running = False
+
+
+class BatchRunner:
+    """
+    Process utterances of many sessions concurrently, in order within each session.
+    
+    Input is read line by line and at most max_pending utterances are held
+    at a time, so memory does not grow with the size of the input. Up to
+    parallelism sessions run turns at once. A session whose queue runs
+    empty gives up its slot and stays open, so later utterances continue
+    the same conversation; once more than max_idle_sessions are idle, the
+    least recently used one is closed. If it appears again it is reopened
+    like any session, from its checkpoint or ledger when those are enabled.
+    """
+    
+    def __init__(self, output: TextIO, parallelism: int = 8, max_pending: Optional[int] = None,
+                 max_idle_sessions: int = 256):
+        """
+        Initialize the runner.
+        
+        Args:
+            output: Receives one JSON line per processed utterance
+            parallelism: Sessions processed at the same time
+            max_pending: Utterances read ahead of processing; 16 per slot if omitted
+            max_idle_sessions: Idle sessions kept open for further utterances
+        """
+        if parallelism < 1:
+            raise ValueError(f"Unsupported parallelism: {parallelism}")
+        self.output = output
+        self.parallelism = parallelism
+        self.max_pending = max_pending or parallelism * 16
+        self.max_idle_sessions = max_idle_sessions
+        self.turns = 0
+        self.errors = 0
+        self.failed = 0
+        self.sessions_opened = 0
+        self._sessions: Dict[str, _BatchSession] = {}
+        self._idle: "OrderedDict[str, _BatchSession]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._tasks = set()
+    
+    @staticmethod
+    def _parse(line: str) -> Tuple[str, str]:
+        """Get the session id and utterance of an input line."""
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("Expected a JSON object")
+        session_id, utterance = record.get("session_id"), record.get("utterance")
+        if isinstance(session_id, int) and not isinstance(session_id, bool):
+            session_id = str(session_id)
+        if not is_valid_session_id(session_id):
+            # The id names the session's checkpoint and ledger files
+            raise ValueError("Expected a \"session_id\" of 1-128 letters, digits, underscores or hyphens")
+        if not isinstance(utterance, str) or not utterance.strip():
+            raise ValueError("Expected a non-empty \"utterance\" string")
+        return session_id, utterance.strip()
+    
+    def _write(self, record: Dict):
+        """Write one output line."""
+        self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    async def run(self, lines) -> Dict:
+        """
+        Process every input line and wait for the last turn.
+        
+        Args:
+            lines: Iterable of JSONL lines with "session_id" and "utterance"
+            
+        Returns:
+            Processed turns, turns that reported an error, lines that could not
+            be processed, sessions opened and the elapsed time
+        """
+        self._slots = asyncio.Semaphore(self.parallelism)
+        self._pending = asyncio.Semaphore(self.max_pending)
+        started = time.perf_counter()
+        try:
+            for line_number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    session_id, utterance = self._parse(line)
+                except ValueError as e:
+                    self.failed += 1
+                    self._write({"line": line_number, "error": f"Invalid input: {e}"})
+                    continue
+                
+                await self._pending.acquire()
+                session = self._sessions.get(session_id)
+                if session is None:
+                    session = self._sessions[session_id] = _BatchSession(session_id)
+                session.queue.append((line_number, utterance))
+                if not session.running:
+                    self._idle.pop(session_id, None)
+                    session.running = True
+                    task = asyncio.ensure_future(self._drain(session))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            while self._tasks:
+                await asyncio.gather(*list(self._tasks))
+        finally:
+            for session in self._sessions.values():
+                if session.app is not None:
+                    session.app.close()
+            self._sessions.clear()
+            self._idle.clear()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "turns": self.turns,
+            "errors": self.errors,
+            "failed": self.failed,
+            "sessions": self.sessions_opened,
+            "seconds": elapsed,
+        }
+    
+    async def _drain(self, session: _BatchSession):
+        """Process a session's queued utterances in order while holding a slot."""
+        async with self._slots:
+            if session.app is None:
+                session.app = BankBotApp(session_id=session.session_id)
+                session.turns = 0
+                self.sessions_opened += 1
+            while session.queue:
+                line_number, utterance = session.queue.popleft()
+                try:
+                    await self._turn(session, line_number, utterance)
+                finally:
+                    self._pending.release()
+            # No await since the queue was found empty, so no utterance can slip in unnoticed
+            session.running = False
+        self._park(session)
+    
+    async def _turn(self, session: _BatchSession, line_number: int, utterance: str):
+        """Process one utterance and write its result."""
+        session.turns += 1
+        record = {"line": line_number, "session_id": session.session_id, "turn": session.turns,
+                  "utterance": utterance}
+        try:
+            result = await session.app.aprocess_user_input(utterance)
+        except Exception as e:
+            # One broken turn must not stop a run over thousands of conversations
+            self.failed += 1
+            record["error"] = str(e)
+            self._write(record)
+            return
+        
+        self.turns += 1
+        if result.get("error"):
+            self.errors += 1
+        record.update(result)
+        record["actions"] = [
+            {"action": event["action"], "success": event["success"], "message": event["message"]}
+            for event in result["actions"]
+        ]
+        self._write(record)
+    
+    def _park(self, session: _BatchSession):
+        """Keep an idle session open, closing the least recently used beyond the limit."""
+        if session.running:
+            return
+        self._idle[session.session_id] = session
+        while len(self._idle) > self.max_idle_sessions:
+            _, evicted = self._idle.popitem(last=False)
+            del self._sessions[evicted.session_id]
+            evicted.app.close()
+
+
+async def _aclose_shared():
+    """Release the process-wide backends, scheduler and telemetry on the loop that used them."""
+    # The backend only exists if a turn reached the model
+    if llm_config.provider.lower() == "ollama" and f"{__package__}.llm.backend" in sys.modules:
+        from .llm.backend import get_backend
+        from .llm.pool import get_pool
+        from .llm.scheduler import get_scheduler
+        if llm_config.scheduler_enabled:
+            get_scheduler(llm_config).close()
+        await (get_pool(llm_config) if llm_config.endpoints else get_backend(llm_config)).aclose()
+        if llm_config.cascade_small_model:
+            small_config = llm_config.model_copy(update={"model_name": llm_config.cascade_small_model})
+            await (get_pool(small_config) if small_config.endpoints else get_backend(small_config)).aclose()
+    if app_config.telemetry_enabled:
+        get_telemetry().close()
+
+
+async def _run(runner: BatchRunner, lines) -> Dict:
+    """Run the batch, then release the shared resources before the loop closes."""
+    try:
+        return await runner.run(lines)
+    finally:
+        await _aclose_shared()
+
+
+def run_batch(input_path: str, output_path: Optional[str] = None, parallelism: Optional[int] = None,
+              max_idle_sessions: int = 256) -> Dict:
+    """
+    Process a JSONL file of utterances and print a summary.
+    
+    Args:
+        input_path: JSONL file with one {"session_id", "utterance"} object per line, - for stdin
+        output_path: JSONL file that receives one result per utterance
+            (default: the input path with .out.jsonl appended)
+        parallelism: Sessions processed at the same time (default: BATCH_PARALLELISM)
+        max_idle_sessions: Idle sessions kept open for later utterances
+        
+    Returns:
+        Summary as returned by BatchRunner.run
+    """
+    output_path = output_path or f"{'batch' if input_path == '-' else input_path}.out.jsonl"
+    lines = sys.stdin if input_path == "-" else open(input_path, encoding="utf-8")
+    try:
+        with open(output_path, "w", encoding="utf-8") as output:
+            runner = BatchRunner(output, parallelism=parallelism or app_config.batch_parallelism,
+                                 max_idle_sessions=max_idle_sessions)
+            summary = asyncio.run(_run(runner, lines))
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+    
+    rate = summary["turns"] / summary["seconds"] if summary["seconds"] else 0.0
+    print(f"Processed {summary['turns']} turns of {summary['sessions']} sessions in {summary['seconds']:.1f}s "
+          f"({rate:.1f} turns/s), {summary['errors']} with errors, {summary['failed']} failed → {output_path}")
+    return summary
+
+
+def main():
+    """Run the batch CLI; exits non-zero if a line could not be processed."""
+    parser = argparse.ArgumentParser(description="BankBot batch mode - process a JSONL file of utterances")
+    parser.add_argument("input", help="JSONL file with one {\"session_id\", \"utterance\"} object per line, - for stdin")
+    parser.add_argument("--output", "-o", help="JSONL file that receives one result per utterance (default: INPUT.out.jsonl)")
+    parser.add_argument("--parallelism", "-p", type=int, help="Sessions processed at the same time")
+    parser.add_argument("--max-idle-sessions", type=int, default=256, help="Idle sessions kept open for later utterances")
+    args = parser.parse_args()
+    
+    summary = run_batch(args.input, args.output, args.parallelism, args.max_idle_sessions)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,160 @@
 """Configuration settings for BankBot."""
 
 import os
-from typing import Optional
-from pydantic_settings import BaseSettings
+import threading
+from functools import lru_cache
+from typing import Optional, Dict
+from dotenv import dotenv_values
+from pydantic_settings import BaseSettings, InitSettingsSource
 from pydantic import Field
 
 
-class LLMConfig(BaseSettings):
+ENV_FILE = ".env"
+ENV_FILE_ENCODING = "utf-8"
+
+
+@lru_cache(maxsize=None)
+def _read_env_file(path: str, encoding: str) -> Dict[str, str]:
+    """Parse a dotenv file once per process; every settings class shares the result."""
+    if not os.path.isfile(path):
+        return {}
+    # Keys without a value parse as None; like empty values they mean the default
+    return {key.lower(): value for key, value in dotenv_values(path, encoding=encoding).items() if value}
+
+
+class SharedEnvSettings(BaseSettings):
+    """
+    Settings read from the environment and the shared .env file.
+    
+    Each subclass only picks the variables with its env_prefix, so the file
+    is parsed once for all of them; the other classes' variables are ignored
+    and empty values such as "LLM_MAX_TOKENS=" mean the default.
+    """
+    
+    class Config:
+        extra = "ignore"
+        env_ignore_empty = True
+    
+    @classmethod
+    def settings_customise_sources(cls, settings_cls, init_settings, env_settings, dotenv_settings, file_secret_settings):
+        # The .env values of this class are passed in like keyword arguments, ranked below the environment
+        prefix = settings_cls.model_config.get("env_prefix", "").lower()
+        values = _read_env_file(ENV_FILE, ENV_FILE_ENCODING)
+        dotenv_kwargs = {
+            name: values[prefix + name.lower()]
+            for name in settings_cls.model_fields
+            if prefix + name.lower() in values
+        }
+        return init_settings, env_settings, InitSettingsSource(settings_cls, dotenv_kwargs), file_secret_settings
+
+
+class LLMConfig(SharedEnvSettings):
     """LLM configuration settings."""
     
     provider: str = Field(default="ollama", description="LLM provider (ollama, openai, etc.)")
     model_name: str = Field(default="gemma2:2b", description="Model name to use")
+    tokenizer: Optional[str] = Field(default=None, description="Hugging Face tokenizer of the model (name or tokenizer.json path) for exact prompt budgets; estimated from length if unset")
     temperature: float = Field(default=0.7, description="Temperature for generation")
     max_tokens: Optional[int] = Field(default=None, description="Maximum tokens to generate")
     base_url: Optional[str] = Field(default=None, description="Base URL for API")
     api_key: Optional[str] = Field(default=None, description="API key if required")
+    keep_alive: Optional[str] = Field(default=None, description="How long Ollama keeps the model loaded (e.g. 30m, -1 for forever)")
+    warmup: bool = Field(default=True, description="Load the model at startup instead of on the first turn")
+    warmup_background: bool = Field(default=True, description="Warm up on a background thread so the prompt shows immediately")
+    health_check_interval: float = Field(default=30.0, description="Seconds between backend health checks, 0 to disable")
+    pool_max_connections: int = Field(default=32, description="Connections to the model server shared by all sessions")
+    endpoints: Optional[str] = Field(default=None, description="Comma-separated base URLs of several servers for the same model")
+    hedge_enabled: bool = Field(default=True, description="Send a duplicate request to a second endpoint when the first is slow")
+    hedge_quantile: float = Field(default=0.95, description="Latency quantile of an endpoint after which a request is hedged")
+    hedge_min_samples: int = Field(default=20, description="Requests an endpoint must have served before it is hedged")
+    hedge_min_delay: float = Field(default=0.05, description="Minimum seconds before a request is hedged")
+    endpoint_cooldown: float = Field(default=10.0, description="Seconds a failed endpoint is skipped")
+    scheduler_enabled: Optional[bool] = Field(default=None, description="Queue model calls fairly per tenant and share identical ones (unset: on in the server only)")
+    scheduler_max_concurrency: int = Field(default=4, description="Model calls in flight per endpoint")
+    cascade_small_model: Optional[str] = Field(default=None, description="Smaller model for simple turns; model_name serves the rest")
+    cascade_classifier_path: Optional[str] = Field(default=None, description="Intent classifier trained from logged turns (.npz)")
+    cascade_min_margin: float = Field(default=0.02, description="Classifier margin below which a turn goes to the large model")
+    streaming: bool = Field(default=True, description="Stream responses and run actions as soon as they are generated")
+    action_mode: str = Field(default="text", description="How the model returns actions (text, tools, json)")
+    response_cache_enabled: bool = Field(default=True, description="Serve repeated conversational replies from a cache")
+    response_cache_size: int = Field(default=256, description="Maximum number of cached replies in memory")
+    response_cache_ttl: float = Field(default=3600.0, description="Seconds a cached reply stays valid")
+    response_cache_history: int = Field(default=2, description="Recent history messages included in the cache key")
+    response_cache_path: Optional[str] = Field(default=None, description="SQLite file for the on-disk cache tier")
     
     class Config:
         env_prefix = "LLM_"
-        env_file = ".env"
-        env_file_encoding = "utf-8"
 
 
-class BankingConfig(BaseSettings):
+class BankingConfig(SharedEnvSettings):
     """Banking configuration settings."""
     
     initial_balance: float = Field(default=0.0, description="Initial account balance")
     currency: str = Field(default="EUR", description="Base currency")
-    eur_to_usd_rate: float = Field(default=1.1, description="EUR to USD exchange rate")
+    eur_to_usd_rate: float = Field(default=1.1, description="EUR to USD exchange rate of the static rate provider")
+    rates_provider: str = Field(default="static", description="Source of exchange rates (static, file, http)")
+    rates_path: Optional[str] = Field(default=None, description="JSON file with \"base\" and \"rates\" for the file provider")
+    rates_url: Optional[str] = Field(default=None, description="URL returning \"base\" and \"rates\" as JSON for the http provider")
+    rates_ttl: float = Field(default=3600.0, description="Seconds exchange rates are cached before they are fetched again")
     max_history_messages: int = Field(default=10, description="Maximum chat history messages")
+    max_history_tokens: int = Field(default=1024, description="Token budget for chat history sent to the model")
+    history_summary_tokens: int = Field(default=256, description="Token budget for the summary of evicted turns")
+    history_summarizer: str = Field(default="extractive", description="How evicted turns are summarized (extractive, llm)")
+    ledger_path: Optional[str] = Field(default=None, description="Directory of the durable transaction ledger")
+    ledger_fsync: str = Field(default="group", description="Ledger fsync policy (always, group, never); always and group only acknowledge synced transactions")
+    ledger_group_commit_size: int = Field(default=64, description="Pending ledger records after which a group commit stops waiting for more")
+    ledger_group_commit_interval: float = Field(default=0.0, description="Seconds a group commit waits for more ledger records before fsync, 0 to sync at once")
+    ledger_snapshot_interval: int = Field(default=10000, description="Ledger records between snapshots")
+    registry_shards: int = Field(default=16, description="Shards of the server's account registry")
+    database_url: Optional[str] = Field(default=None, description="SQLAlchemy URL of the account database, e.g. sqlite:///bankbot.db")
+    database_pool_size: int = Field(default=5, description="Connections kept open in the database pool")
+    database_max_overflow: int = Field(default=10, description="Extra database connections allowed under load")
+    database_echo: bool = Field(default=False, description="Log every SQL statement")
     
     class Config:
         env_prefix = "BANKING_"
-        env_file = ".env"
-        env_file_encoding = "utf-8"
 
 
-class AppConfig(BaseSettings):
+class AppConfig(SharedEnvSettings):
     """Application configuration."""
     
     app_name: str = Field(default="BankBot", description="Application name")
     version: str = Field(default="1.0.0", description="Application version")
     debug: bool = Field(default=False, description="Debug mode")
+    fast_path_enabled: bool = Field(default=True, description="Resolve unambiguous commands without the LLM")
+    telemetry_enabled: bool = Field(default=True, description="Record per-stage timings, token usage and action counters")
+    telemetry_jsonl_path: Optional[str] = Field(default=None, description="Append one JSON line per turn to this file")
+    checkpoint_path: Optional[str] = Field(default=None, description="Directory of session checkpoints, resumed on restart")
+    batch_parallelism: int = Field(default=8, description="Sessions the batch mode processes at the same time")
+
+
+class ServerConfig(SharedEnvSettings):
+    """Multi-session server configuration."""
+    
+    host: str = Field(default="127.0.0.1", description="Interface to bind")
+    port: int = Field(default=8080, description="Port to listen on")
+    max_sessions: int = Field(default=1000, description="Maximum number of concurrent sessions")
+    session_idle_timeout: float = Field(default=1800.0, description="Seconds before an idle session is dropped")
     
     class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+        env_prefix = "SERVER_"
+
+
+# Global configuration instances, created on first use and then cached in the module
+_INSTANCES = {
+    "llm_config": LLMConfig,
+    "banking_config": BankingConfig,
+    "app_config": AppConfig,
+    "server_config": ServerConfig,
+}
+_instances_lock = threading.Lock()
 
 
-# Global configuration instances
-llm_config = LLMConfig()
-banking_config = BankingConfig()
-app_config = AppConfig()
+def __getattr__(name: str):
+    """Create a global configuration instance the first time it is imported."""
+    if name not in _INSTANCES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _instances_lock:
+        if name not in globals():
+            globals()[name] = _INSTANCES[name]()
+    return globals()[name]
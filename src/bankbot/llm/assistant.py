@@ -1,54 +1,172 @@
 """LLM-powered banking assistant."""
 
-from typing import Optional
-from langchain_ollama import ChatOllama
+import json
+import time
+from typing import TYPE_CHECKING, Optional, Union, Tuple, Iterator, AsyncIterator
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_community.chat_message_histories import ChatMessageHistory
 
 from ..config.settings import LLMConfig
-from ..prompts.templates import PromptTemplates
+from ..prompts.templates import PROMPTS, PromptTemplates
+from ..utils.parser import ParsedResponse, ResponseParser
+from ..utils.metrics import StageProfiler
+from ..utils.tokens import count_message_tokens, count_tokens
+from .tools import ACTION_MODES, ACTION_TOOLS, RESPONSE_SCHEMA, parse_tool_response, parse_structured_response, history_text
+from .cache import ResponseCache, get_shared_cache
+from .memory import ConversationMemory, extractive_summarizer, llm_summarizer
+
+if TYPE_CHECKING:
+    from .backend import OllamaBackend
+    from .pool import BackendPool
+    from .scheduler import RequestScheduler
+    from .cascade import ModelCascade
 
 
 class BankingAssistant:
     """LangChain-powered conversational banking assistant."""
     
-    def __init__(self, config: LLMConfig, max_history: int = 10):
+    def __init__(self, config: LLMConfig, max_history: int = 10, cache: Optional[ResponseCache] = None,
+                 max_history_tokens: int = 1024, summary_tokens: int = 256, summarizer: str = "extractive",
+                 llm: Optional[BaseChatModel] = None, profiler: Optional[StageProfiler] = None,
+                 tenant: Optional[str] = None, small_llm: Optional[BaseChatModel] = None):
         """
         Initialize the banking assistant.
         
         Args:
             config: LLM configuration
             max_history: Maximum number of messages to keep in history
+            cache: Response cache, defaults to the shared cache if enabled in config
+            max_history_tokens: Token budget for the history sent to the model
+            summary_tokens: Token budget for the summary of evicted turns
+            summarizer: How evicted turns are summarized ("extractive" or "llm")
+            llm: Chat model to use instead of the configured provider, e.g. a
+                SimulatedChatModel for offline benchmarks
+            profiler: Stage profiler to record into, e.g. the app's; a disabled one if omitted
+            tenant: Who the model calls are made for, e.g. an account id; the
+                scheduler shares model capacity fairly between tenants
+            small_llm: Chat model for the cascade's small tier instead of
+                config.cascade_small_model; enables the cascade
         """
         self.config = config
         self.max_history = max_history
+        self.action_mode = config.action_mode.lower()
+        if self.action_mode not in ACTION_MODES:
+            raise ValueError(f"Unsupported action mode: {config.action_mode}")
+        
+        # Cache for repeated conversational replies
+        if cache is None and config.response_cache_enabled:
+            cache = get_shared_cache(config)
+        self.cache = cache
         
         # Initialize LLM based on provider
-        self.llm = self._initialize_llm()
+        self.tenant = tenant
+        self.backend: Optional[Union["OllamaBackend", "BackendPool"]] = None
+        self.scheduler: Optional["RequestScheduler"] = None
+        self.llm = llm if llm is not None else self._initialize_llm()
         
-        # Initialize chat message history
-        self.chat_history = ChatMessageHistory()
+        # Simple turns go to a smaller model when a cascade is configured
+        self.cascade: Optional["ModelCascade"] = None
+        self.small_llm: Optional[BaseChatModel] = None
+        self.small_backend: Optional[Union["OllamaBackend", "BackendPool"]] = None
+        self.last_tier: Optional[str] = None
+        if small_llm is not None or (llm is None and config.cascade_small_model):
+            # NumPy is only imported when the cascade is enabled
+            from .cascade import get_cascade
+            self.cascade = get_cascade(config)
+            self.small_llm = small_llm if small_llm is not None else self._initialize_small_llm()
+        self.profiler = profiler if profiler is not None else StageProfiler()
         
-        # Create prompt template
+        # Initialize token-budgeted chat history
+        if summarizer == "llm":
+            summarize = llm_summarizer(self._summary_llm(), summary_tokens)
+        else:
+            summarize = extractive_summarizer(summary_tokens)
+        self.chat_history = ConversationMemory(
+            max_tokens=max_history_tokens,
+            max_messages=max_history,
+            summary_max_tokens=summary_tokens,
+            summarizer=summarize,
+            # A model call must not delay the turn that evicted the messages
+            background=summarizer == "llm"
+        )
+        self.last_prompt_tokens = 0
+        self.last_usage = {}
+        self.last_model_metadata = {}
+        
+        # Prompt template and chain, built once per currency
         self.prompt = None
         self.chain = None
+        self.small_chain = None
+        self._chain_currency = None
+        self._system_prompt_tokens = 0
+        self._prompt_fingerprint = ""
     
     def _initialize_llm(self):
         """Initialize the LLM based on configuration."""
-        if self.config.provider.lower() == "ollama":
-            return ChatOllama(
-                model=self.config.model_name,
-                temperature=self.config.temperature,
-                base_url=self.config.base_url if self.config.base_url else None
-            )
+        llm, self.backend, self.scheduler = self._connect(self.config)
+        return llm
+    
+    def _initialize_small_llm(self):
+        """Initialize the cascade's small model, served like the main one."""
+        llm, self.small_backend, _ = self._connect(
+            self.config.model_copy(update={"model_name": self.config.cascade_small_model})
+        )
+        return llm
+    
+    def _summary_llm(self) -> BaseChatModel:
+        """Get a chat model for summaries, without the response format of the json action mode."""
+        if self.backend is None:
+            # Injected models are bound to tools per chain, never in place
+            return self.llm
+        llm = self.backend.chat_model()
+        if self.scheduler is not None:
+            llm = self.scheduler.chat_model(llm, tenant=self.tenant)
+        return llm
+    
+    def _connect(self, config: LLMConfig) -> Tuple[BaseChatModel, Union["OllamaBackend", "BackendPool"], Optional["RequestScheduler"]]:
+        """
+        Create the chat model of a configuration on its shared backend.
+        
+        Args:
+            config: LLM configuration
+            
+        Returns:
+            Tuple of (chat model, backend, scheduler or None)
+        """
+        if config.provider.lower() == "ollama":
+            # The Ollama client is only imported when no model was injected
+            from .backend import get_backend
+            from .pool import get_pool
+            
+            # Every session shares the backend's warmed-up model and connection pool
+            if config.endpoints:
+                # Several servers: route each call to the fastest and fail over between them
+                backend = get_pool(config)
+            else:
+                backend = get_backend(config)
+            llm = backend.chat_model(format=RESPONSE_SCHEMA if self.action_mode == "json" else None)
+            scheduler = None
+            if config.scheduler_enabled:
+                # Sessions asking the same thing at the same time share one call
+                from .scheduler import get_scheduler
+                scheduler = get_scheduler(config)
+                llm = scheduler.chat_model(llm, tenant=self.tenant)
+            return llm, backend, scheduler
         # Add other providers here (OpenAI, Anthropic, etc.)
         else:
-            raise ValueError(f"Unsupported LLM provider: {self.config.provider}")
+            raise ValueError(f"Unsupported LLM provider: {config.provider}")
     
     def _create_prompt_template(self, system_prompt: str) -> ChatPromptTemplate:
         """
         Create a prompt template with the given system prompt.
         
+        The system prompt is added as a literal message so it is sent
+        byte-for-byte identical on every turn. The summary of evicted turns
+        follows it in a system message of its own, then the chat history;
+        the account state follows the history so that changes to it only
+        affect the prompt tail.
+        
         Args:
             system_prompt: System prompt text
             
@@ -56,22 +174,71 @@ class BankingAssistant:
             ChatPromptTemplate instance
         """
         return ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
+            SystemMessage(content=system_prompt),
+            MessagesPlaceholder(variable_name="summary"),
             MessagesPlaceholder(variable_name="chat_history"),
+            ("system", PromptTemplates.get_account_state_prompt()),
             ("human", "{input}")
         ])
     
-    def update_system_prompt(self, balance: float, currency: str = "EUR"):
+    def _ensure_chain(self, currency: str = "EUR"):
         """
-        Update the system prompt with current balance.
+        Build the prompt and chain, reusing them while the currency is unchanged.
         
         Args:
-            balance: Current account balance
             currency: Currency code
         """
-        system_prompt = PromptTemplates.get_system_prompt(balance, currency)
+        if self.chain is not None and self._chain_currency == currency:
+            return
+        
+        llm, small_llm = self.llm, self.small_llm
+        if self.action_mode == "text":
+            system_prompt = PromptTemplates.get_system_prompt(currency)
+            self._system_prompt_tokens = count_message_tokens(system_prompt)
+        else:
+            system_prompt = PromptTemplates.get_structured_system_prompt(self.action_mode, currency)
+            self._system_prompt_tokens = count_message_tokens(system_prompt) + self.schema_tokens()
+            if self.action_mode == "tools":
+                llm = llm.bind_tools(ACTION_TOOLS)
+                if small_llm is not None:
+                    small_llm = small_llm.bind_tools(ACTION_TOOLS)
         self.prompt = self._create_prompt_template(system_prompt)
-        self.chain = self.prompt | self.llm
+        self.chain = self.prompt | llm
+        # Both tiers get the same prompt, so either can continue the conversation
+        self.small_chain = self.prompt | small_llm if small_llm is not None else None
+        self._chain_currency = currency
+        self._prompt_fingerprint = ResponseCache.prompt_fingerprint(self.config.model_name, self.action_mode, system_prompt)
+    
+    def _prompt_inputs(self, user_input: str, balance: float, currency: str = "EUR") -> dict:
+        """
+        Prepare the chain and the variables for one turn.
+        
+        Args:
+            user_input: User's message
+            balance: Current account balance
+            currency: Currency code
+            
+        Returns:
+            Input dictionary for the chain
+        """
+        with self.profiler.stage("prompt_build"):
+            self._ensure_chain(currency)
+            inputs = {
+                "input": user_input,
+                "summary": self.chat_history.summary_messages,
+                "chat_history": self.chat_history.messages,
+                "balance": f"{balance:.2f}",
+                "currency": currency
+            }
+            
+            state_prompt = PROMPTS.render("account_state", balance=inputs["balance"], currency=currency)
+            self.last_prompt_tokens = (
+                self._system_prompt_tokens
+                + self.chat_history.token_count
+                + count_message_tokens(state_prompt)
+                + count_message_tokens(user_input)
+            )
+        return inputs
     
     def chat(self, user_input: str, current_balance: float, currency: str = "EUR") -> Optional[str]:
         """
@@ -86,25 +253,23 @@ class BankingAssistant:
             Assistant's response or None if error
         """
         try:
-            # Update system prompt with current balance
-            self.update_system_prompt(current_balance, currency)
+            key, cached = self._cache_lookup(user_input, currency)
+            if cached is not None:
+                self.record_exchange(user_input, cached)
+                return cached
             
-            # Get current chat history messages
-            messages = self.chat_history.messages
-            
-            # Invoke the chain
-            response = self.chain.invoke({
-                "input": user_input,
-                "chat_history": messages
-            })
+            # Invoke the chain with the current balance and history
+            inputs = self._prompt_inputs(user_input, current_balance, currency)
+            tier = self._route(user_input)
+            started = time.perf_counter()
+            with self.profiler.stage("llm"):
+                response = self._tier_chain(tier).invoke(inputs)
+            self._record_tier(tier, started)
             
             # Add messages to history
-            self.chat_history.add_user_message(user_input)
-            self.chat_history.add_ai_message(response.content)
-            
-            # Keep only last N messages (window)
-            if len(self.chat_history.messages) > self.max_history:
-                self.chat_history.messages = self.chat_history.messages[-self.max_history:]
+            self._record_usage(response)
+            self._cache_store(key, response.content)
+            self.record_exchange(user_input, response.content)
             
             return response.content
         
@@ -113,10 +278,346 @@ class BankingAssistant:
             print(error_messages["llm_connection"].format(error=str(e)))
             return None
     
+    def schema_tokens(self) -> int:
+        """Estimate the tokens the tool definitions or response schema add to every prompt."""
+        if self.action_mode == "tools":
+            return count_tokens(json.dumps(ACTION_TOOLS))
+        if self.action_mode == "json":
+            return count_tokens(json.dumps(RESPONSE_SCHEMA))
+        return 0
+    
+    def chat_turn(self, user_input: str, current_balance: float, currency: str = "EUR") -> Optional[ParsedResponse]:
+        """
+        Send a message and get the response split into text and actions.
+        
+        In "tools" mode actions come from the model's tool calls and in
+        "json" mode from its schema-constrained reply; text that still
+        embeds JSON actions falls back to the regular parser. The history
+        always records the reply as text followed by its actions, so the
+        model sees the same format whichever mode produced a turn.
+        
+        With a cascade, turns the classifier finds simple go to the small
+        model; if it raises or returns a reply that cannot be parsed, the
+        turn is retried on the large model.
+        
+        Args:
+            user_input: User's message
+            current_balance: Current account balance
+            currency: Currency code
+            
+        Returns:
+            Parsed response or None if error
+        """
+        try:
+            key, cached = self._cache_lookup(user_input, currency)
+            if cached is not None:
+                self.record_exchange(user_input, cached)
+                return ResponseParser.parse(cached)
+            
+            inputs = self._prompt_inputs(user_input, current_balance, currency)
+            if self._route(user_input) == "small":
+                try:
+                    response, parsed = self._call_tier("small", inputs)
+                    if not (parsed.invalid and not parsed.actions):
+                        return self._finish_turn(key, user_input, response, parsed)
+                except Exception:
+                    pass
+                # The small model failed the turn, so the large one answers it
+                response, parsed = self._call_tier("large", inputs, escalated=True)
+            else:
+                response, parsed = self._call_tier("large", inputs)
+            return self._finish_turn(key, user_input, response, parsed)
+        
+        except Exception as e:
+            error_messages = PromptTemplates.get_error_messages()
+            print(error_messages["llm_connection"].format(error=str(e)))
+            return None
+    
+    async def achat_turn(self, user_input: str, current_balance: float, currency: str = "EUR") -> ParsedResponse:
+        """
+        Async variant of chat_turn using the chain's ainvoke.
+        
+        Errors are raised, as in achat.
+        
+        Args:
+            user_input: User's message
+            current_balance: Current account balance
+            currency: Currency code
+            
+        Returns:
+            Parsed response
+        """
+        key, cached = self._cache_lookup(user_input, currency)
+        if cached is not None:
+            self.record_exchange(user_input, cached)
+            return ResponseParser.parse(cached)
+        
+        inputs = self._prompt_inputs(user_input, current_balance, currency)
+        if self._route(user_input) == "small":
+            try:
+                response, parsed = await self._acall_tier("small", inputs)
+                if not (parsed.invalid and not parsed.actions):
+                    return self._finish_turn(key, user_input, response, parsed)
+            except Exception:
+                pass
+            # The small model failed the turn, so the large one answers it
+            response, parsed = await self._acall_tier("large", inputs, escalated=True)
+        else:
+            response, parsed = await self._acall_tier("large", inputs)
+        return self._finish_turn(key, user_input, response, parsed)
+    
+    def _route(self, user_input: str) -> str:
+        """Pick the tier for a message; always "large" without a cascade."""
+        self.last_tier = self.cascade.route(user_input) if self.cascade is not None else "large"
+        return self.last_tier
+    
+    def _record_tier(self, tier: str, started: float, escalated: bool = False):
+        """Report a finished model call to the cascade's statistics."""
+        if self.cascade is not None:
+            self.cascade.record(tier, time.perf_counter() - started, escalated)
+    
+    def _tier_chain(self, tier: str):
+        """Get the chain of a tier."""
+        return self.small_chain if tier == "small" else self.chain
+    
+    def _call_tier(self, tier: str, inputs: dict, escalated: bool = False) -> Tuple[object, ParsedResponse]:
+        """
+        Invoke a tier's chain and parse its response.
+        
+        Args:
+            tier: "small" or "large"
+            inputs: Prompt inputs of the turn
+            escalated: Whether the call retries a failed small-tier turn
+            
+        Returns:
+            Tuple of (AIMessage, parsed response)
+        """
+        self.last_tier = tier
+        started = time.perf_counter()
+        with self.profiler.stage("llm"):
+            response = self._tier_chain(tier).invoke(inputs)
+        self._record_tier(tier, started, escalated)
+        self._record_usage(response)
+        return response, self._parse_response(response)
+    
+    async def _acall_tier(self, tier: str, inputs: dict, escalated: bool = False) -> Tuple[object, ParsedResponse]:
+        """Async variant of _call_tier using the chain's ainvoke."""
+        self.last_tier = tier
+        started = time.perf_counter()
+        with self.profiler.stage("llm"):
+            response = await self._tier_chain(tier).ainvoke(inputs)
+        self._record_tier(tier, started, escalated)
+        self._record_usage(response)
+        return response, self._parse_response(response)
+    
+    def _parse_response(self, response) -> ParsedResponse:
+        """Parse a model response according to the action mode."""
+        with self.profiler.stage("parse"):
+            if self.action_mode == "tools":
+                return parse_tool_response(response.content, response.tool_calls)
+            if self.action_mode == "json":
+                return parse_structured_response(response.content)
+            return ResponseParser.parse(response.content)
+    
+    def _finish_turn(self, key: Optional[str], user_input: str, response, parsed: ParsedResponse) -> ParsedResponse:
+        """
+        Record a parsed model response in the cache and history.
+        
+        Args:
+            key: Cache key of the turn
+            user_input: User's message
+            response: AIMessage returned by the chain
+            parsed: The response parsed by _parse_response
+            
+        Returns:
+            Parsed response
+        """
+        reply = response.content if self.action_mode == "text" else history_text(parsed)
+        self._cache_store(key, reply)
+        self.record_exchange(user_input, reply)
+        return parsed
+    
+    def stream_chat(self, user_input: str, current_balance: float, currency: str = "EUR") -> Iterator[str]:
+        """
+        Send a message and stream the response as it is generated.
+        
+        The exchange is added to the history once the stream completes.
+        
+        Args:
+            user_input: User's message
+            current_balance: Current account balance
+            currency: Currency code
+            
+        Yields:
+            Chunks of the assistant's response
+        """
+        key, cached = self._cache_lookup(user_input, currency)
+        if cached is not None:
+            self.record_exchange(user_input, cached)
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            inputs = self._prompt_inputs(user_input, current_balance, currency)
+            
+            # Chunks are already shown as they arrive, so a streamed turn is never escalated
+            tier = self._route(user_input)
+            started = time.perf_counter()
+            for chunk in self._tier_chain(tier).stream(inputs):
+                self._record_usage(chunk)
+                if chunk.content:
+                    chunks.append(chunk.content)
+                    yield chunk.content
+            self._record_tier(tier, started)
+        
+        except Exception as e:
+            error_messages = PromptTemplates.get_error_messages()
+            print(error_messages["llm_connection"].format(error=str(e)))
+            return
+        
+        reply = "".join(chunks)
+        self._cache_store(key, reply)
+        self.record_exchange(user_input, reply)
+    
+    async def achat(self, user_input: str, current_balance: float, currency: str = "EUR") -> str:
+        """
+        Async variant of chat using the chain's ainvoke.
+        
+        Unlike chat, errors are raised so that async callers can report
+        them to their own client instead of the console.
+        
+        Args:
+            user_input: User's message
+            current_balance: Current account balance
+            currency: Currency code
+            
+        Returns:
+            Assistant's response
+        """
+        key, cached = self._cache_lookup(user_input, currency)
+        if cached is not None:
+            self.record_exchange(user_input, cached)
+            return cached
+        
+        inputs = self._prompt_inputs(user_input, current_balance, currency)
+        tier = self._route(user_input)
+        started = time.perf_counter()
+        with self.profiler.stage("llm"):
+            response = await self._tier_chain(tier).ainvoke(inputs)
+        self._record_tier(tier, started)
+        
+        self._record_usage(response)
+        self._cache_store(key, response.content)
+        self.record_exchange(user_input, response.content)
+        return response.content
+    
+    async def astream_chat(self, user_input: str, current_balance: float, currency: str = "EUR") -> AsyncIterator[str]:
+        """
+        Async variant of stream_chat using the chain's astream.
+        
+        Errors are raised, as in achat.
+        
+        Args:
+            user_input: User's message
+            current_balance: Current account balance
+            currency: Currency code
+            
+        Yields:
+            Chunks of the assistant's response
+        """
+        key, cached = self._cache_lookup(user_input, currency)
+        if cached is not None:
+            self.record_exchange(user_input, cached)
+            yield cached
+            return
+        
+        inputs = self._prompt_inputs(user_input, current_balance, currency)
+        
+        chunks = []
+        # Chunks are already sent as they arrive, so a streamed turn is never escalated
+        tier = self._route(user_input)
+        started = time.perf_counter()
+        async for chunk in self._tier_chain(tier).astream(inputs):
+            self._record_usage(chunk)
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+        self._record_tier(tier, started)
+        
+        reply = "".join(chunks)
+        self._cache_store(key, reply)
+        self.record_exchange(user_input, reply)
+    
+    def _cache_lookup(self, user_input: str, currency: str = "EUR") -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached reply for the next turn.
+        
+        Args:
+            user_input: User's message
+            currency: Currency code the system prompt is rendered with
+            
+        Returns:
+            Tuple of (cache key, cached reply), both None without a cache
+        """
+        self.last_usage = {}
+        self.last_model_metadata = {}
+        self.last_tier = None
+        if self.cache is None:
+            return None, None
+        self._ensure_chain(currency)
+        key = self.cache.make_key(user_input, self.chat_history.messages, self._prompt_fingerprint)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.last_prompt_tokens = 0
+        return key, cached
+    
+    def _record_usage(self, message):
+        """
+        Keep the token usage and backend timings reported with a response.
+        
+        Streams report them on their final chunk only, so messages without
+        any leave the earlier values in place.
+        
+        Args:
+            message: AIMessage or AIMessageChunk from the chain
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            self.last_usage = dict(usage)
+        metadata = getattr(message, "response_metadata", None)
+        if metadata and metadata.get("done", True):
+            self.last_model_metadata = dict(metadata)
+    
+    def _cache_store(self, key: Optional[str], reply: str):
+        """Offer a generated reply to the cache."""
+        if self.cache is not None and key is not None:
+            self.cache.put(key, reply)
+    
+    def record_exchange(self, user_input: str, reply: str):
+        """
+        Add a user/assistant exchange to the chat history.
+        
+        Used for turns answered without calling the LLM so the
+        conversation stays coherent for later turns.
+        
+        Args:
+            user_input: User's message
+            reply: Assistant's reply
+        """
+        # The memory evicts and summarizes old turns itself
+        with self.profiler.stage("history"):
+            self.chat_history.add_user_message(user_input)
+            self.chat_history.add_ai_message(reply)
+    
     def clear_history(self):
         """Clear the chat history."""
         self.chat_history.clear()
     
     def get_history_length(self) -> int:
         """Get the number of messages in history."""
-        return len(self.chat_history.messages)
+        return len(self.chat_history)
+    
+    def get_prompt_token_count(self) -> int:
+        """Get the estimated prompt tokens of the most recent LLM turn."""
+        return self.last_prompt_tokens
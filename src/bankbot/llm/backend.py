@@ -0,0 +1,343 @@
+"""Shared Ollama backend: model warm-up, keep-alive, pooled connections and health checks."""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Union, Dict, List, Tuple
+
+import httpx
+import ollama
+from langchain_ollama import ChatOllama
+
+from ..config.settings import LLMConfig
+
+
+def parse_keep_alive(keep_alive: Optional[str]) -> Optional[Union[int, str]]:
+    """
+    Convert the configured keep-alive into the form Ollama expects.
+    
+    Args:
+        keep_alive: Duration such as "30m", or a number of seconds ("-1" keeps the model loaded)
+        
+    Returns:
+        Keep-alive value, or None to use the server default
+    """
+    if not keep_alive:
+        return None
+    try:
+        return int(keep_alive)
+    except ValueError:
+        return keep_alive
+
+
+def _same_model(configured: str, running: str) -> bool:
+    """Compare model names the way Ollama resolves them, with ":latest" implied."""
+    def normalize(name: str) -> str:
+        return name if ":" in name else f"{name}:latest"
+    return normalize(configured) == normalize(running)
+
+
+@dataclass
+class BackendStats:
+    """Warm-up, health and connection counters of a backend."""
+    
+    warmup_seconds: Optional[float] = None
+    warmup_error: Optional[str] = None
+    first_turn_seconds: Optional[float] = None
+    requests: int = 0
+    connections_opened: int = 0
+    health_checks: int = 0
+    health_failures: int = 0
+    reloads: int = 0
+    healthy: Optional[bool] = None
+    
+    @property
+    def connection_reuse(self) -> Optional[float]:
+        """Fraction of requests that were sent over an already open connection."""
+        if not self.requests:
+            return None
+        return max(0.0, 1.0 - self.connections_opened / self.requests)
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        def fmt(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "n/a"
+        
+        reuse = self.connection_reuse
+        return (
+            f"Backend: warm-up {fmt(self.warmup_seconds)}, first turn {fmt(self.first_turn_seconds)}, "
+            f"{self.requests} requests over {self.connections_opened} connections "
+            f"({reuse * 100 if reuse is not None else 0:.0f}% reused), "
+            f"{self.health_failures}/{self.health_checks} health checks failed"
+        )
+
+
+class OllamaBackend:
+    """
+    One Ollama model shared by every session of the process.
+    
+    The backend owns one sync and one async HTTP transport, i.e. the
+    connection pools, and every client it creates runs on them: its own
+    Ollama client for warm-up and health checks as well as the clients of
+    all chat models it hands out. Sessions therefore reuse keep-alive
+    connections instead of opening their own, and close() releases them.
+    The model can be loaded ahead of the first turn and is kept loaded
+    with the configured keep-alive; a periodic health check reloads it if
+    the server dropped it.
+    """
+    
+    def __init__(self, config: LLMConfig):
+        """
+        Create the backend and its HTTP clients; nothing is sent yet.
+        
+        Args:
+            config: LLM configuration
+        """
+        self.config = config
+        self.keep_alive = parse_keep_alive(config.keep_alive)
+        self.stats = BackendStats()
+        # Request hooks run on many threads and event loops at once
+        self._stats_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._started = False
+        self._health_thread = None
+        self._models: Dict[str, ChatOllama] = {}
+        
+        limits = httpx.Limits(
+            max_connections=config.pool_max_connections,
+            max_keepalive_connections=config.pool_max_connections
+        )
+        self._transport = httpx.HTTPTransport(limits=limits)
+        self._async_transport = httpx.AsyncHTTPTransport(limits=limits)
+        sync_kwargs = {"transport": self._transport, "event_hooks": {"request": [self._on_request]}}
+        async_kwargs = {"transport": self._async_transport, "event_hooks": {"request": [self._on_async_request]}}
+        self.client = ollama.Client(host=config.base_url or None, **sync_kwargs)
+        self._base = ChatOllama(
+            model=config.model_name,
+            temperature=config.temperature,
+            base_url=config.base_url if config.base_url else None,
+            keep_alive=self.keep_alive,
+            sync_client_kwargs=sync_kwargs,
+            async_client_kwargs=async_kwargs
+        )
+    
+    def chat_model(self, format: Optional[Union[str, Dict]] = None) -> ChatOllama:
+        """
+        Get a chat model on the shared clients.
+        
+        Args:
+            format: Ollama output format, e.g. "json" or a JSON schema
+            
+        Returns:
+            ChatOllama sharing this backend's connection pool
+        """
+        key = json.dumps(format, sort_keys=True)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                # The copy's clients run on the same transports, so the pool is shared
+                model = self._models[key] = self._base.model_copy(update={"format": format})
+        return model
+    
+    def _on_request(self, request: httpx.Request):
+        """Count a request and trace whether it opens a new connection."""
+        with self._stats_lock:
+            self.stats.requests += 1
+        request.extensions["trace"] = self._trace
+    
+    async def _on_async_request(self, request: httpx.Request):
+        """Async variant of _on_request."""
+        with self._stats_lock:
+            self.stats.requests += 1
+        request.extensions["trace"] = self._async_trace
+    
+    def _trace(self, event: str, info: Dict):
+        """Count new TCP connections reported by the connection pool."""
+        if event == "connection.connect_tcp.complete":
+            with self._stats_lock:
+                self.stats.connections_opened += 1
+    
+    async def _async_trace(self, event: str, info: Dict):
+        """Async variant of _trace."""
+        self._trace(event, info)
+    
+    def warm_up(self) -> bool:
+        """
+        Load the model and pin it with the keep-alive.
+        
+        An empty generate request makes Ollama load the model without
+        producing tokens.
+        
+        Returns:
+            True if the model is loaded
+        """
+        started = time.perf_counter()
+        try:
+            self.client.generate(model=self.config.model_name, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            self.stats.warmup_error = str(e)
+            self.stats.healthy = False
+            return False
+        finally:
+            self._ready.set()
+        
+        if self.stats.warmup_seconds is None:
+            self.stats.warmup_seconds = time.perf_counter() - started
+        self.stats.warmup_error = None
+        self.stats.healthy = True
+        return True
+    
+    def start(self, background: bool = True, health_check_interval: float = 0.0):
+        """
+        Warm up the model and start health checks, once per backend.
+        
+        Args:
+            background: Warm up on a daemon thread instead of blocking
+            health_check_interval: Seconds between health checks, 0 to disable
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            if background:
+                threading.Thread(target=self.warm_up, name="ollama-warmup", daemon=True).start()
+            if health_check_interval > 0:
+                self._health_thread = threading.Thread(
+                    target=self._health_loop, args=(health_check_interval,), name="ollama-health", daemon=True
+                )
+                self._health_thread.start()
+        if not background:
+            self.warm_up()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the warm-up to finish.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the warm-up finished, successfully or not
+        """
+        return self._ready.wait(timeout)
+    
+    def health_check(self) -> bool:
+        """
+        Check that the server answers and the model is loaded, reloading it if not.
+        
+        Returns:
+            True if the backend is healthy
+        """
+        self.stats.health_checks += 1
+        try:
+            running = self.client.ps().models
+        except Exception:
+            self.stats.health_failures += 1
+            self.stats.healthy = False
+            return False
+        
+        if not any(_same_model(self.config.model_name, model.model or model.name or "") for model in running):
+            # The server unloaded the model, e.g. after a restart; load it before a user has to wait
+            self.stats.reloads += 1
+            if not self.warm_up():
+                self.stats.health_failures += 1
+                return False
+        self.stats.healthy = True
+        return True
+    
+    def _health_loop(self, interval: float):
+        """Run health checks until the backend is closed."""
+        self._ready.wait()
+        while not self._stop.wait(interval):
+            self.health_check()
+    
+    def record_first_turn(self, seconds: float):
+        """Remember the latency of the first model turn served by this backend."""
+        if self.stats.first_turn_seconds is None:
+            self.stats.first_turn_seconds = seconds
+    
+    def gauges(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """
+        Current backend state as (name, labels, value) gauges for telemetry.
+        
+        Returns:
+            List of gauges
+        """
+        labels = (("model", self.config.model_name),)
+        values = [
+            ("bankbot_backend_requests", labels, self.stats.requests),
+            ("bankbot_backend_connections_opened", labels, self.stats.connections_opened),
+            ("bankbot_backend_healthy", labels, 1 if self.stats.healthy else 0),
+            ("bankbot_backend_health_failures", labels, self.stats.health_failures),
+            ("bankbot_backend_reloads", labels, self.stats.reloads),
+        ]
+        if self.stats.warmup_seconds is not None:
+            values.append(("bankbot_backend_warmup_seconds", labels, self.stats.warmup_seconds))
+        if self.stats.first_turn_seconds is not None:
+            values.append(("bankbot_backend_first_turn_seconds", labels, self.stats.first_turn_seconds))
+        return values
+    
+    def close(self):
+        """
+        Stop health checks and close both connection pools.
+        
+        Async connections belong to the event loop that opened them; inside
+        a running loop they are closed by a task on it, otherwise on a new
+        loop, and prefer aclose() from async code. The backend is dropped
+        from the get_backend cache, which creates a new one on the next call.
+        """
+        _forget_backend(self)
+        self._stop.set()
+        self._transport.close()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            loop.create_task(self._async_transport.aclose())
+            return
+        try:
+            asyncio.run(self._async_transport.aclose())
+        except RuntimeError:
+            # Connections of a loop that is already closed cannot be shut down politely
+            pass
+    
+    async def aclose(self):
+        """Stop health checks and close both connection pools from the event loop that used them."""
+        _forget_backend(self)
+        self._stop.set()
+        self._transport.close()
+        await self._async_transport.aclose()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(config: LLMConfig) -> OllamaBackend:
+    """
+    Get the process-wide backend for a configuration, so sessions share one pool.
+    
+    Args:
+        config: LLM configuration
+        
+    Returns:
+        Shared OllamaBackend instance
+    """
+    key = (config.model_name, config.base_url, config.temperature, config.keep_alive)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = OllamaBackend(config)
+        return _backends[key]
+
+
+def _forget_backend(backend: OllamaBackend):
+    """Drop a closed backend from the get_backend cache."""
+    with _backends_lock:
+        for key, cached in list(_backends.items()):
+            if cached is backend:
+                del _backends[key]
@@ -0,0 +1,287 @@
+"""Response cache for LLM replies that do not depend on account state."""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+
+from ..config.settings import LLMConfig
+
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_WHITESPACE = re.compile(r"\s+")
+_ACTION_HINT = re.compile(r"\d|\b(?:balance|deposit|add|withdraw|convert|transfer|usd|eur)\b")
+_DIGIT = re.compile(r"\d")
+
+
+@dataclass
+class CacheStats:
+    """Counters describing cache effectiveness."""
+    
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejected: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        return (
+            f"Response cache: {self.hits} hits ({self.disk_hits} from disk), {self.misses} misses "
+            f"({self.hit_rate:.0%}), {self.evictions} evicted, {self.expirations} expired"
+        )
+
+
+class DiskCache:
+    """SQLite-backed second cache tier that survives restarts."""
+    
+    def __init__(self, path: str):
+        """
+        Open or create the on-disk cache.
+        
+        Args:
+            path: SQLite database file
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, reply TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Get a stored reply and its creation time."""
+        row = self._conn.execute("SELECT reply, created FROM responses WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+    
+    def put(self, key: str, reply: str, created: float):
+        """Store a reply."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, reply, created) VALUES (?, ?, ?)",
+            (key, reply, created)
+        )
+        self._conn.commit()
+    
+    def delete(self, key: str):
+        """Remove a reply."""
+        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._conn.commit()
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache with TTL eviction for conversational replies.
+    
+    Keys combine a fingerprint of the prompt the reply was generated with,
+    the normalized user input, the most recent history messages and whether
+    the input hints at a banking action. Replies
+    that carry an action or mention amounts are never stored because they
+    depend on account state.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0,
+                 history_window: int = 2, disk: Optional[DiskCache] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of replies kept in memory
+            ttl_seconds: Seconds a reply stays valid
+            history_window: Number of recent history messages included in the key
+            disk: Optional on-disk tier consulted on memory misses
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.history_window = history_window
+        self.disk = disk
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: LLMConfig) -> "ResponseCache":
+        """
+        Create a cache from LLM configuration.
+        
+        Args:
+            config: LLM configuration
+            
+        Returns:
+            ResponseCache instance
+        """
+        disk = DiskCache(config.response_cache_path) if config.response_cache_path else None
+        return cls(
+            max_entries=config.response_cache_size,
+            ttl_seconds=config.response_cache_ttl,
+            history_window=config.response_cache_history,
+            disk=disk
+        )
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lower-case the input and strip punctuation and extra whitespace."""
+        text = _PUNCTUATION.sub(" ", text.lower())
+        return _WHITESPACE.sub(" ", text).strip()
+    
+    @staticmethod
+    def is_cacheable(reply: str) -> bool:
+        """
+        Check whether a reply may be cached.
+        
+        Args:
+            reply: Assistant's reply
+            
+        Returns:
+            False for replies containing an action or any amount
+        """
+        return '"action"' not in reply and "{" not in reply and not _DIGIT.search(reply)
+    
+    @staticmethod
+    def prompt_fingerprint(model_name: str, action_mode: str, system_prompt: str) -> str:
+        """
+        Identify the model and static prompt a reply is generated with.
+        
+        The system prompt is rendered, so it covers the currency; sessions
+        with a different model, action mode or prompt never share replies,
+        including through the disk tier.
+        
+        Args:
+            model_name: Model serving the turn
+            action_mode: How the model returns actions
+            system_prompt: Rendered system prompt
+            
+        Returns:
+            Hex digest to pass to make_key
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (model_name, action_mode, system_prompt):
+            digest.update(part.encode("utf-8") + b"\x00")
+        return digest.hexdigest()
+    
+    def make_key(self, user_input: str, history: List, prompt: str = "") -> str:
+        """
+        Build the cache key for a turn.
+        
+        Args:
+            user_input: User's message
+            history: Chat history messages preceding the turn
+            prompt: Fingerprint of the model and static prompt from prompt_fingerprint
+            
+        Returns:
+            Hex digest identifying the turn
+        """
+        normalized = self.normalize(user_input)
+        action_hint = "1" if _ACTION_HINT.search(normalized) else "0"
+        
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(prompt.encode("ascii") + b"\x00")
+        digest.update(normalized.encode("utf-8"))
+        digest.update(b"\x00" + action_hint.encode("ascii"))
+        recent = history[-self.history_window:] if self.history_window else []
+        for message in recent:
+            digest.update(b"\x00" + message.type.encode("utf-8") + b"\x01" + str(message.content).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a reply.
+        
+        Args:
+            key: Cache key from make_key
+            
+        Returns:
+            Cached reply or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reply, created = entry
+                if now - created <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return reply
+                del self._entries[key]
+                self.stats.expirations += 1
+            
+            if self.disk is not None:
+                stored = self.disk.get(key)
+                if stored is not None:
+                    reply, created = stored
+                    if now - created <= self.ttl_seconds:
+                        self._store(key, reply, created)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return reply
+                    self.disk.delete(key)
+                    self.stats.expirations += 1
+            
+            self.stats.misses += 1
+            return None
+    
+    def put(self, key: str, reply: str) -> bool:
+        """
+        Store a reply if it is cacheable.
+        
+        Args:
+            key: Cache key from make_key
+            reply: Assistant's reply
+            
+        Returns:
+            True if the reply was stored
+        """
+        if not reply or not self.is_cacheable(reply):
+            self.stats.rejected += 1
+            return False
+        
+        created = time.time()
+        with self._lock:
+            self._store(key, reply, created)
+            if self.disk is not None:
+                self.disk.put(key, reply, created)
+        return True
+    
+    def clear(self):
+        """Drop all in-memory entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _store(self, key: str, reply: str, created: float):
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._entries[key] = (reply, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+
+_shared_caches = {}
+
+
+def get_shared_cache(config: LLMConfig) -> ResponseCache:
+    """
+    Get the process-wide cache for a configuration, so sessions share replies.
+    
+    Args:
+        config: LLM configuration
+        
+    Returns:
+        Shared ResponseCache instance
+    """
+    key = (config.model_name, config.response_cache_path)
+    if key not in _shared_caches:
+        _shared_caches[key] = ResponseCache.from_config(config)
+    return _shared_caches[key]
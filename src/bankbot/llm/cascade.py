@@ -0,0 +1,371 @@
+"""Model cascade: a local intent classifier sends simple turns to a small model and the rest to the large one."""
+
+import argparse
+import json
+import random
+import re
+import threading
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.settings import LLMConfig
+
+
+SMALL = "small"
+LARGE = "large"
+TIERS = (SMALL, LARGE)
+
+# Hashed feature dimensions; collisions barely matter for two well separated classes
+FEATURE_DIM = 4096
+
+_WORD = re.compile(r"[a-z]+|\d+|[^\sa-z\d]")
+_DIGITS = re.compile(r"\d+")
+
+# Turns the classifier starts from when no trained model is configured
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Hi!", SMALL),
+    ("Hello there", SMALL),
+    ("Good morning", SMALL),
+    ("Hey, good evening", SMALL),
+    ("How are you?", SMALL),
+    ("Thanks, that's all", SMALL),
+    ("Thank you so much", SMALL),
+    ("Bye!", SMALL),
+    ("See you later", SMALL),
+    ("My name is Ana", SMALL),
+    ("What can you do?", SMALL),
+    ("What's my balance?", SMALL),
+    ("How much money do I have?", SMALL),
+    ("Check my balance please", SMALL),
+    ("Please deposit 120 euros", SMALL),
+    ("Add 50 to my account", SMALL),
+    ("Put 30 in", SMALL),
+    ("Take out 35", SMALL),
+    ("Withdraw 20 euros", SMALL),
+    ("Withdraw 15 eur", SMALL),
+    ("I'd like to take out 70", SMALL),
+    ("I need 40 in cash", SMALL),
+    ("How much is 50 euros in dollars?", SMALL),
+    ("Convert 80 to pounds", SMALL),
+    ("Show my last 3 transactions", SMALL),
+    ("How much did I deposit this week?", SMALL),
+    ("How much did I withdraw this month?", SMALL),
+    ("Withdraw 10 and then deposit 60, all or nothing", LARGE),
+    ("Move 50 out, then deposit 200", LARGE),
+    ("If my balance is above 500, withdraw 100, otherwise deposit 50", LARGE),
+    ("Deposit 30 every day this week but skip Wednesday", LARGE),
+    ("I think the withdrawal I made yesterday was wrong, can you undo it and put the money back?", LARGE),
+    ("Split 300 into three deposits and then convert what is left to yen", LARGE),
+    ("Why is my balance lower than I expected after last week's transactions?", LARGE),
+    ("Can you compare what I deposited this week with last month and tell me if I'm saving more?", LARGE),
+    ("Take out half of my balance, but keep at least 100 in the account", LARGE),
+    ("Do the same as before but with double the amount", LARGE),
+    ("Withdraw 40, deposit 25, withdraw 10 and show me the balance after each step", LARGE),
+    ("I want to transfer money to my sister, how does that work and what are the fees?", LARGE),
+    ("Can you explain why my last batch failed and retry it without the withdrawal?", LARGE),
+    ("How much would I have in dollars if I deposited 200 and withdrew 75?", LARGE),
+    ("Undo everything I did today except the first deposit", LARGE),
+    ("What should I do if I don't recognize a transaction?", LARGE),
+    ("Deposit whatever I withdrew last week", LARGE),
+    ("Please withdraw 60 unless that leaves me with less than 20", LARGE),
+    ("I'm confused, did my salary arrive or not?", LARGE),
+]
+
+
+def features(text: str, dim: int = FEATURE_DIM) -> np.ndarray:
+    """
+    Hash word unigrams, word bigrams and character trigrams of a text into a unit vector.
+    
+    Numbers are collapsed into one token, so "deposit 50" and "deposit 75"
+    look the same to the classifier.
+    
+    Args:
+        text: User message
+        dim: Number of hashed dimensions
+        
+    Returns:
+        L2-normalized float32 vector
+    """
+    words = _WORD.findall(_DIGITS.sub("0", text.lower()))
+    grams = [f"w:{word}" for word in words]
+    grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    # crc32 is stable across processes, unlike hash() of a str
+    indices = [zlib.crc32(gram.encode("utf-8")) % dim for gram in grams]
+    vector = np.bincount(indices, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier over hashed n-gram features."""
+    
+    def __init__(self, labels: Sequence[str], centroids: np.ndarray):
+        """
+        Initialize from trained centroids.
+        
+        Args:
+            labels: Label of each centroid row
+            centroids: Unit-length centroid per label, shape (labels, dim)
+        """
+        self.labels = list(labels)
+        self.centroids = centroids
+        self.dim = centroids.shape[1]
+    
+    @classmethod
+    def fit(cls, examples: Iterable[Tuple[str, str]], dim: int = FEATURE_DIM) -> "IntentClassifier":
+        """
+        Train on (text, label) examples.
+        
+        Args:
+            examples: Labelled messages
+            dim: Number of hashed dimensions
+            
+        Returns:
+            Trained classifier
+        """
+        sums: Dict[str, np.ndarray] = {}
+        for text, label in examples:
+            if label not in sums:
+                sums[label] = np.zeros(dim, dtype=np.float32)
+            sums[label] += features(text, dim)
+        if len(sums) < 2:
+            raise ValueError("Unsupported training set: examples of at least two labels are needed")
+        labels = sorted(sums)
+        centroids = np.stack([sums[label] for label in labels])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        return cls(labels, centroids)
+    
+    def scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of a text to every centroid."""
+        return self.centroids @ features(text, self.dim)
+    
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a text.
+        
+        Args:
+            text: User message
+            
+        Returns:
+            Tuple of (label, margin over the runner-up label)
+        """
+        scores = self.scores(text)
+        order = np.argsort(scores)
+        best, second = order[-1], order[-2]
+        return self.labels[best], float(scores[best] - scores[second])
+    
+    def save(self, path: str):
+        """Write the classifier to an .npz file."""
+        np.savez(path, labels=np.array(self.labels), centroids=self.centroids)
+    
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        """Read a classifier written by save."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls([str(label) for label in data["labels"]], data["centroids"].astype(np.float32))
+
+
+@dataclass
+class CascadeStats:
+    """Traffic and latency per tier of a model cascade."""
+    
+    turns: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(TIERS, 0))
+    seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(TIERS, 0.0))
+    recent: Dict[str, Deque[float]] = field(default_factory=lambda: {tier: deque(maxlen=1024) for tier in TIERS})
+    ambiguous: int = 0
+    escalations: int = 0
+    
+    def record(self, tier: str, seconds: float):
+        """Count one model call of a tier."""
+        self.turns[tier] += 1
+        self.seconds[tier] += seconds
+        self.recent[tier].append(seconds)
+    
+    def share(self, tier: str) -> float:
+        """Fraction of model calls that went to a tier."""
+        total = sum(self.turns.values())
+        return self.turns[tier] / total if total else 0.0
+    
+    def percentile(self, tier: str, q: float) -> float:
+        """Latency percentile of a tier over its recent calls."""
+        recent = sorted(self.recent[tier])
+        return recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        tiers = ", ".join(
+            f"{tier} {self.turns[tier]} ({self.share(tier):.0%}, p50 {self.percentile(tier, 0.5) * 1000:.0f}ms "
+            f"p95 {self.percentile(tier, 0.95) * 1000:.0f}ms)"
+            for tier in TIERS
+        )
+        return f"Cascade: {tiers}, {self.ambiguous} ambiguous, {self.escalations} escalated"
+
+
+class ModelCascade:
+    """
+    Choose the model tier of each turn.
+    
+    Messages the classifier labels small go to the small model unless the
+    margin over the other label is below min_margin; everything else goes
+    to the large model. Callers escalate a small-tier turn to the large
+    model when its reply cannot be parsed.
+    """
+    
+    def __init__(self, classifier: IntentClassifier, min_margin: float = 0.02):
+        """
+        Initialize the cascade.
+        
+        Args:
+            classifier: Trained intent classifier with a "small" label
+            min_margin: Smallest score margin for which a small label is trusted
+        """
+        if SMALL not in classifier.labels:
+            raise ValueError(f"Unsupported classifier labels: {classifier.labels}")
+        self.classifier = classifier
+        self.min_margin = min_margin
+        self.stats = CascadeStats()
+        self._lock = threading.Lock()
+    
+    def route(self, user_input: str) -> str:
+        """
+        Get the tier for a message.
+        
+        Args:
+            user_input: User's message
+            
+        Returns:
+            "small" or "large"
+        """
+        label, margin = self.classifier.predict(user_input)
+        if label != SMALL:
+            return LARGE
+        if margin < self.min_margin:
+            with self._lock:
+                self.stats.ambiguous += 1
+            return LARGE
+        return SMALL
+    
+    def record(self, tier: str, seconds: float, escalated: bool = False):
+        """
+        Report a finished model call.
+        
+        Args:
+            tier: Tier that served the call
+            seconds: Call latency
+            escalated: Whether the call retried a failed small-tier turn
+        """
+        with self._lock:
+            self.stats.record(tier, seconds)
+            if escalated:
+                self.stats.escalations += 1
+    
+    def gauges(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """
+        Current per-tier counters as (name, labels, value) gauges for telemetry.
+        
+        Returns:
+            List of gauges
+        """
+        with self._lock:
+            gauges = []
+            for tier in TIERS:
+                gauges.append(("bankbot_cascade_turns", (("tier", tier),), self.stats.turns[tier]))
+                gauges.append(("bankbot_cascade_seconds", (("tier", tier),), self.stats.seconds[tier]))
+            gauges.append(("bankbot_cascade_ambiguous", (), self.stats.ambiguous))
+            gauges.append(("bankbot_cascade_escalations", (), self.stats.escalations))
+        return gauges
+
+
+_cascades = {}
+_cascades_lock = threading.Lock()
+
+
+def get_cascade(config: LLMConfig) -> ModelCascade:
+    """
+    Get the process-wide cascade for a configuration, so sessions share its classifier and statistics.
+    
+    Args:
+        config: LLM configuration
+        
+    Returns:
+        Shared ModelCascade instance
+    """
+    key = (config.cascade_classifier_path, config.cascade_min_margin)
+    with _cascades_lock:
+        if key not in _cascades:
+            if config.cascade_classifier_path:
+                classifier = IntentClassifier.load(config.cascade_classifier_path)
+            else:
+                classifier = IntentClassifier.fit(SEED_EXAMPLES)
+            _cascades[key] = ModelCascade(classifier, min_margin=config.cascade_min_margin)
+        return _cascades[key]
+
+
+def label_turn(record: Dict) -> Optional[Tuple[str, str]]:
+    """
+    Turn a logged turn into a training example.
+    
+    Records with a "label" of "small" or "large" keep it. Otherwise a turn
+    counts as large if it failed, ran a batch or more than one action, and
+    small if not; the "tier" that served it is ignored, so retraining
+    learns from outcomes rather than from the previous routing. Turns
+    without an utterance, such as batch output of invalid lines, are
+    skipped.
+    
+    Args:
+        record: One line of batch output, or any object with "utterance"
+        
+    Returns:
+        (utterance, tier), or None
+    """
+    utterance = record.get("utterance")
+    if not isinstance(utterance, str) or not utterance.strip():
+        return None
+    if record.get("label") in TIERS:
+        return utterance, record["label"]
+    actions = record.get("actions") or []
+    names = [action.get("action", {}).get("action") if isinstance(action, dict) else None for action in actions]
+    complex_turn = bool(record.get("error")) or len(actions) > 1 or "batch" in names
+    return utterance, LARGE if complex_turn else SMALL
+
+
+def main():
+    """Train a classifier from logged turns and save it for LLM_CASCADE_CLASSIFIER_PATH."""
+    parser = argparse.ArgumentParser(description="Train the model cascade's intent classifier from logged turns")
+    parser.add_argument("logs", nargs="+", help="JSONL files of turns, e.g. batch mode output")
+    parser.add_argument("--output", "-o", required=True, help="Classifier file to write (.npz)")
+    parser.add_argument("--no-seed", action="store_true", help="Train on the logs only, without the built-in examples")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples used to report accuracy")
+    args = parser.parse_args()
+    
+    examples = [] if args.no_seed else list(SEED_EXAMPLES)
+    for path in args.logs:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    example = label_turn(json.loads(line))
+                    if example:
+                        examples.append(example)
+    
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    if 0 < split < len(examples):
+        trained = IntentClassifier.fit(examples[:split])
+        correct = sum(trained.predict(text)[0] == label for text, label in examples[split:])
+        print(f"Held-out accuracy: {correct}/{len(examples) - split} ({correct / (len(examples) - split):.0%})")
+    
+    classifier = IntentClassifier.fit(examples)
+    classifier.save(args.output)
+    counts = ", ".join(f"{label} {sum(1 for _, l in examples if l == label)}" for label in classifier.labels)
+    print(f"Trained on {len(examples)} turns ({counts}) → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Deterministic fast-path routing for unambiguous banking commands."""
+
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple, Pattern
+
+from ..prompts.templates import PromptTemplates
+
+
+# Currency spellings the router understands, mapped to ISO codes
+CURRENCY_ALIASES = {
+    "eur": "EUR",
+    "euro": "EUR",
+    "euros": "EUR",
+    "€": "EUR",
+    "usd": "USD",
+    "dollar": "USD",
+    "dollars": "USD",
+    "$": "USD",
+}
+
+# Names of conversion targets beyond the account currencies above
+TARGET_ALIASES = {
+    **CURRENCY_ALIASES,
+    "pound": "GBP",
+    "pounds": "GBP",
+    "£": "GBP",
+    "yen": "JPY",
+    "franc": "CHF",
+    "francs": "CHF",
+}
+
+_AMOUNT = r"(?P<prefix>[€$])?\s*(?P<amount>\d+(?:[.,]\d{1,2})?)"
+_CURRENCY = r"(?:\s*(?P<currency>eur|euros?|usd|dollars?|€|\$))?"
+_ACCOUNT = r"(?:\s+(?:to|into|from|in)\s+(?:my\s+|the\s+)?(?:account|balance))?"
+# A known name or any three-letter code; unsupported codes are reported when the action runs
+_TARGET = r"(?P<target>" + "|".join(re.escape(name) for name in sorted(TARGET_ALIASES, key=len, reverse=True)) + r"|[a-z]{3})"
+
+# (rule name, action, pattern) - patterns must match the whole normalized input
+_RULES = [
+    (
+        "balance",
+        "check_balance",
+        r"(?:(?:check|show|get|see|what'?s|what\s+is)\s+)?(?:(?:my|the)\s+)?(?:account\s+)?balance",
+    ),
+    (
+        "deposit",
+        "add",
+        r"(?:deposit|add|put\s+in)\s+" + _AMOUNT + _CURRENCY + _ACCOUNT,
+    ),
+    (
+        "withdraw",
+        "withdraw",
+        r"(?:withdraw|take\s+out)\s+" + _AMOUNT + _CURRENCY + _ACCOUNT,
+    ),
+    (
+        "convert",
+        "convert",
+        r"convert\s+" + _AMOUNT + _CURRENCY + r"\s+(?:to|into|in)\s+" + _TARGET,
+    ),
+    (
+        "recent_transactions",
+        "recent_transactions",
+        r"(?:show\s+(?:me\s+)?)?(?:my\s+)?(?:last|recent)\s+(?P<count>\d{1,2})\s+(?P<type>deposits|withdrawals|transactions)",
+    ),
+    (
+        "transaction_total",
+        "transaction_total",
+        r"how\s+much\s+(?:did|have)\s+i\s+(?P<type>deposit(?:ed)?|withdrawn?|withdrew)"
+        r"(?:\s+(?:this|in\s+the\s+last|over\s+the\s+last|in\s+the\s+past|the\s+past|the\s+last)\s+(?P<period>day|week|month))?",
+    ),
+]
+
+_POLITE_PREFIX = re.compile(r"^(?:please|pls|can you|could you)\s+")
+_POLITE_SUFFIX = re.compile(r"\s+(?:please|pls)$")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class RouteMatch:
+    """A command resolved without calling the LLM."""
+    
+    rule: str
+    action_dict: Dict
+    reply: str
+
+
+@dataclass
+class RouterStats:
+    """Hit/miss counters and latency accounting for the fast path."""
+    
+    hits: int = 0
+    misses: int = 0
+    router_seconds: float = 0.0
+    llm_turns: int = 0
+    llm_seconds: float = 0.0
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of routed inputs that skipped the LLM."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    @property
+    def avg_llm_latency(self) -> float:
+        """Average latency of turns that went through the LLM."""
+        return self.llm_seconds / self.llm_turns if self.llm_turns else 0.0
+    
+    @property
+    def estimated_seconds_saved(self) -> float:
+        """LLM time avoided by fast-path hits, minus time spent routing."""
+        return max(0.0, self.hits * self.avg_llm_latency - self.router_seconds)
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        return (
+            f"Fast path: {self.hits}/{self.hits + self.misses} hits "
+            f"({self.hit_rate:.0%}), ~{self.estimated_seconds_saved:.1f}s of LLM time saved"
+        )
+
+
+class FastPathRouter:
+    """Resolve high-confidence banking commands into action dicts without the LLM."""
+    
+    def __init__(self):
+        """Compile the routing rules."""
+        self._rules: List[Tuple[str, str, Pattern]] = [
+            (name, action, re.compile(pattern))
+            for name, action, pattern in _RULES
+        ]
+        self._replies = PromptTemplates.get_fast_path_replies()
+        self.stats = RouterStats()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize user input for matching.
+        
+        Args:
+            text: Raw user input
+            
+        Returns:
+            Lower-cased input without politeness markers or trailing punctuation
+        """
+        text = _WHITESPACE.sub(" ", text.strip().lower())
+        text = _TRAILING_PUNCTUATION.sub("", text)
+        text = _POLITE_PREFIX.sub("", text)
+        return _POLITE_SUFFIX.sub("", text)
+    
+    def route(self, user_input: str, currency: str = "EUR") -> Optional[RouteMatch]:
+        """
+        Try to resolve user input without the LLM.
+        
+        Args:
+            user_input: User's message
+            currency: Account currency
+            
+        Returns:
+            RouteMatch if the input is unambiguous, None to fall back to the LLM
+        """
+        started = time.perf_counter()
+        match = self._match(self.normalize(user_input), currency)
+        self.stats.router_seconds += time.perf_counter() - started
+        
+        if match is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return match
+    
+    def record_llm_latency(self, seconds: float):
+        """
+        Record the latency of a turn that fell back to the LLM.
+        
+        Args:
+            seconds: Wall-clock duration of the LLM call
+        """
+        self.stats.llm_turns += 1
+        self.stats.llm_seconds += seconds
+    
+    def _match(self, text: str, currency: str) -> Optional[RouteMatch]:
+        """Match normalized text against the compiled rules."""
+        for name, action, pattern in self._rules:
+            found = pattern.fullmatch(text)
+            if not found:
+                continue
+            
+            if action == "check_balance":
+                action_dict = {"action": action, "amount": 0}
+                return RouteMatch(name, action_dict, self._build_reply(name, action_dict, currency))
+            
+            groups = found.groupdict()
+            if action == "recent_transactions":
+                kind = groups["type"]
+                action_dict = {
+                    "action": action,
+                    "amount": int(groups["count"]),
+                    "type": "all" if kind == "transactions" else kind.rstrip("s").replace("withdrawal", "withdraw")
+                }
+                return RouteMatch(name, action_dict, self._build_reply(name, action_dict, currency))
+            
+            if action == "transaction_total":
+                action_dict = {
+                    "action": action,
+                    "amount": 0,
+                    "type": "deposit" if groups["type"].startswith("deposit") else "withdraw",
+                    "period": groups.get("period") or "all"
+                }
+                return RouteMatch(name, action_dict, self._build_reply(name, action_dict, currency))
+            
+            # Anything mentioning another currency is ambiguous, let the LLM handle it
+            for token in (groups.get("prefix"), groups.get("currency")):
+                if token and CURRENCY_ALIASES.get(token) != currency:
+                    return None
+            
+            amount = float(groups["amount"].replace(",", "."))
+            if amount <= 0:
+                return None
+            
+            action_dict = {"action": action, "amount": int(amount) if amount.is_integer() else amount}
+            if action == "convert":
+                target = groups["target"]
+                action_dict["currency"] = TARGET_ALIASES.get(target, target.upper())
+            return RouteMatch(name, action_dict, self._build_reply(name, action_dict, currency))
+        
+        return None
+    
+    def _build_reply(self, rule: str, action_dict: Dict, currency: str) -> str:
+        """Build an assistant reply in the same shape the LLM is prompted to produce."""
+        text = self._replies[rule].format(amount=action_dict["amount"], currency=currency, target=action_dict.get("currency"))
+        return f"{text} {json.dumps(action_dict)}"
@@ -0,0 +1,312 @@
+"""Token-budgeted conversation memory with a rolling summary of evicted turns."""
+
+import re
+import threading
+from collections import deque
+from typing import Optional, List, Callable, Deque, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+
+from ..prompts.templates import PROMPTS
+from ..utils.tokens import count_tokens, count_message_tokens
+
+
+# Summarizer signature: (previous summary, evicted messages) -> new summary
+Summarizer = Callable[[str, List[BaseMessage]], str]
+
+_JSON_OBJECT = re.compile(r"\{[^{}]*\}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_MAX_LINE_CHARS = 160
+
+# Message classes by LangChain message type, for restoring dumped memories
+_MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+
+
+def _first_sentence(text: str) -> str:
+    """Get the first sentence of a message without any embedded JSON."""
+    # Strip innermost objects first so nested actions disappear completely
+    stripped = _JSON_OBJECT.sub("", text)
+    while stripped != text:
+        text, stripped = stripped, _JSON_OBJECT.sub("", stripped)
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    if len(sentence) > _MAX_LINE_CHARS:
+        sentence = sentence[:_MAX_LINE_CHARS - 3].rstrip() + "..."
+    return sentence
+
+
+def extractive_summarizer(max_tokens: int) -> Summarizer:
+    """
+    Create a summarizer that keeps the first sentence of each evicted message.
+    
+    It does not call the LLM, so eviction never adds latency to a turn.
+    When the summary exceeds its budget the oldest lines are dropped.
+    
+    Args:
+        max_tokens: Token budget of the summary
+        
+    Returns:
+        Summarizer function
+    """
+    def summarize(previous: str, evicted: List[BaseMessage]) -> str:
+        lines = previous.splitlines() if previous else []
+        for message in evicted:
+            sentence = _first_sentence(str(message.content))
+            if sentence:
+                speaker = "User" if message.type == "human" else "Assistant"
+                lines.append(f"{speaker}: {sentence}")
+        
+        total = sum(count_tokens(line) + 1 for line in lines)
+        while lines and total > max_tokens:
+            total -= count_tokens(lines.pop(0)) + 1
+        return "\n".join(lines)
+    
+    return summarize
+
+
+def llm_summarizer(llm, max_tokens: int) -> Summarizer:
+    """
+    Create a summarizer that asks the LLM to fold evicted turns into the summary.
+    
+    The call takes as long as a turn, so ConversationMemory should run it
+    in the background. Replies that are too long or contain JSON, e.g. an
+    action from a model bound to a response format, fall back to the
+    extractive summary.
+    
+    Args:
+        llm: Chat model used for summarization, without tools or a response format
+        max_tokens: Token budget of the summary
+        
+    Returns:
+        Summarizer function
+    """
+    fallback = extractive_summarizer(max_tokens)
+    instructions = PROMPTS.get("summary_prompt")
+    
+    def summarize(previous: str, evicted: List[BaseMessage]) -> str:
+        transcript = "\n".join(
+            f"{'User' if m.type == 'human' else 'Assistant'}: {m.content}" for m in evicted
+        )
+        try:
+            response = llm.invoke([
+                SystemMessage(content=instructions.render(max_words=max_tokens * 3 // 4)),
+                HumanMessage(content=f"Summary so far:\n{previous or '(none)'}\n\nNew messages:\n{transcript}")
+            ])
+            summary = str(response.content).strip()
+        except Exception:
+            return fallback(previous, evicted)
+        if not summary or _JSON_OBJECT.search(summary) or count_tokens(summary) > max_tokens:
+            return fallback(previous, evicted)
+        return summary
+    
+    return summarize
+
+
+class ConversationMemory:
+    """
+    Chat history bounded by a token budget.
+    
+    Messages live in a deque with their token counts, so adding and evicting
+    never re-slices the history. Whole turns that no longer fit are folded
+    into a rolling summary, presented to the model as a system message of
+    its own (summary_messages) between the static system prompt and the
+    remaining history. The interface mirrors ChatMessageHistory.
+    
+    With background=True evicted turns are folded on a daemon thread, so a
+    slow summarizer never delays the turn that evicted them; the previous
+    summary is used until the new one is ready.
+    """
+    
+    def __init__(self, max_tokens: int = 1024, max_messages: Optional[int] = None,
+                 summary_max_tokens: int = 256, summarizer: Optional[Summarizer] = None,
+                 background: bool = False):
+        """
+        Initialize the memory.
+        
+        Args:
+            max_tokens: Token budget for the retained messages
+            max_messages: Optional hard cap on the number of retained messages
+            summary_max_tokens: Token budget for the rolling summary
+            summarizer: Function folding evicted messages into the summary
+            background: Run the summarizer on a background thread
+        """
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.summarizer = summarizer or extractive_summarizer(summary_max_tokens)
+        self.background = background
+        self.summary = ""
+        self._entries: Deque[Tuple[BaseMessage, int]] = deque()
+        self._tokens = 0
+        self._summary_message: Optional[SystemMessage] = None
+        # Evicted messages waiting for, and being folded by, the background summarizer
+        self._pending: List[BaseMessage] = []
+        self._folding: List[BaseMessage] = []
+        self._summary_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._generation = 0
+    
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Get the retained messages, without the summary."""
+        return [message for message, _ in self._entries]
+    
+    @property
+    def summary_messages(self) -> List[BaseMessage]:
+        """Get the summary as a list of at most one system message."""
+        message = self._summary_message
+        return [message] if message is not None else []
+    
+    @messages.setter
+    def messages(self, messages: List[BaseMessage]):
+        """Replace the retained messages, keeping the summary."""
+        self._entries.clear()
+        self._tokens = 0
+        for message in messages:
+            self.add_message(message)
+    
+    @property
+    def token_count(self) -> int:
+        """Estimated tokens of the retained messages plus the summary."""
+        summary_tokens = count_message_tokens(self._summary_message.content) if self._summary_message else 0
+        return self._tokens + summary_tokens
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def add_message(self, message: BaseMessage):
+        """
+        Add a message and evict old turns that exceed the budget.
+        
+        Args:
+            message: Message to add
+        """
+        tokens = count_message_tokens(str(message.content))
+        self._entries.append((message, tokens))
+        self._tokens += tokens
+        self._evict()
+    
+    def add_user_message(self, content: str):
+        """Add a user message."""
+        self.add_message(HumanMessage(content=content))
+    
+    def add_ai_message(self, content: str):
+        """Add an assistant message."""
+        self.add_message(AIMessage(content=content))
+    
+    def dump(self) -> Tuple[List[Tuple[str, str]], str]:
+        """
+        Get the memory as plain data, e.g. for a session checkpoint.
+        
+        Turns still waiting for the background summarizer are folded in
+        extractively, so they are not lost with the process.
+        
+        Returns:
+            Tuple of (retained messages as (type, content) pairs, rolling summary)
+        """
+        with self._summary_lock:
+            summary, pending = self.summary, self._folding + self._pending
+        if pending:
+            summary = extractive_summarizer(self.summary_max_tokens)(summary, pending)
+        return [(message.type, str(message.content)) for message, _ in self._entries], summary
+    
+    def restore(self, messages: List[Tuple[str, str]], summary: str = ""):
+        """
+        Replace the memory with dumped messages and summary.
+        
+        The summary is taken as is; messages only fold into it again if
+        they exceed the current budget.
+        
+        Args:
+            messages: (type, content) pairs as returned by dump
+            summary: Rolling summary as returned by dump
+        """
+        self.clear()
+        self._set_summary(summary)
+        for message_type, content in messages:
+            self.add_message(_MESSAGE_TYPES[message_type](content=content))
+    
+    def clear(self):
+        """Forget all messages and the summary."""
+        self._entries.clear()
+        self._tokens = 0
+        with self._summary_lock:
+            # A background summary still running belongs to the old conversation
+            self._generation += 1
+            self._pending = []
+            self._folding = []
+            self.summary = ""
+            self._summary_message = None
+    
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the background summarizer has folded every evicted turn.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if no summary is pending
+        """
+        return self._idle.wait(timeout)
+    
+    def _set_summary(self, summary: str):
+        """Replace the summary and its system message."""
+        self.summary = summary
+        self._summary_message = SystemMessage(
+            content=PROMPTS.render("summary_context", summary=summary)
+        ) if summary else None
+    
+    def _over_budget(self) -> bool:
+        """Check whether the retained messages exceed a limit."""
+        if self.max_messages is not None and len(self._entries) > self.max_messages:
+            return True
+        return self._tokens > self.max_tokens
+    
+    def _evict(self):
+        """Move whole turns from the front of the history into the summary."""
+        evicted = []
+        # Always keep the newest message, even if it alone exceeds the budget
+        while len(self._entries) > 1 and self._over_budget():
+            message, tokens = self._entries.popleft()
+            self._tokens -= tokens
+            evicted.append(message)
+            
+            # Keep user/assistant pairs together
+            if message.type == "human" and len(self._entries) > 1 and self._entries[0][0].type == "ai":
+                message, tokens = self._entries.popleft()
+                self._tokens -= tokens
+                evicted.append(message)
+        
+        if not evicted:
+            return
+        if not self.background:
+            self._set_summary(self.summarizer(self.summary, evicted))
+            return
+        with self._summary_lock:
+            self._pending.extend(evicted)
+            if not self._idle.is_set():
+                # The running summarizer picks these up when it is done
+                return
+            self._idle.clear()
+        threading.Thread(target=self._summarize_pending, name="bankbot-summary", daemon=True).start()
+    
+    def _summarize_pending(self):
+        """Fold pending evicted messages into the summary until none are left."""
+        while True:
+            with self._summary_lock:
+                evicted, self._pending = self._pending, []
+                self._folding = evicted
+                if not evicted:
+                    self._idle.set()
+                    return
+                previous, generation = self.summary, self._generation
+            try:
+                summary = self.summarizer(previous, evicted)
+            except Exception:
+                summary = extractive_summarizer(self.summary_max_tokens)(previous, evicted)
+            with self._summary_lock:
+                if generation == self._generation:
+                    self._set_summary(summary)
+                    self._folding = []
@@ -0,0 +1,778 @@
+"""Latency-aware routing over several model endpoints, with hedged requests and failover."""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from ..config.settings import LLMConfig
+from .backend import OllamaBackend
+
+
+# Latency samples kept per endpoint for the hedge threshold
+WINDOW = 128
+
+# Routing weight of an endpoint that has not answered yet, so new endpoints get tried
+UNKNOWN_LATENCY = 0.0
+
+# Seconds after which an endpoint's latency estimate counts half, so one slow reply does not starve it
+DECAY_HALF_LIFE = 5.0
+
+
+def parse_endpoints(value: Optional[str]) -> List[str]:
+    """
+    Split a comma-separated list of base URLs.
+    
+    Args:
+        value: URLs such as "http://gpu-1:11434,http://gpu-2:11434"
+        
+    Returns:
+        List of base URLs, without duplicates
+    """
+    urls = []
+    for url in (value or "").split(","):
+        url = url.strip().rstrip("/")
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+class LatencyWindow:
+    """Moving average and recent quantiles of one kind of latency."""
+    
+    def __init__(self, size: int = WINDOW, alpha: float = 0.2):
+        """
+        Initialize an empty window.
+        
+        Args:
+            size: Number of recent samples kept for quantiles
+            alpha: Weight of the newest sample in the moving average
+        """
+        self.samples = deque(maxlen=size)
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.updated = 0.0
+    
+    def add(self, seconds: float):
+        """Add one sample."""
+        self.samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+        self.updated = time.monotonic()
+    
+    def estimate(self, now: float) -> float:
+        """Moving average, decayed by the time since the last sample."""
+        if self.ewma is None:
+            return UNKNOWN_LATENCY
+        return self.ewma * 0.5 ** ((now - self.updated) / DECAY_HALF_LIFE)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Get a quantile of the recent samples, or None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Endpoint:
+    """One model server in the pool and what has been observed about it."""
+    
+    url: str
+    backend: OllamaBackend
+    latency: LatencyWindow = field(default_factory=LatencyWindow)
+    first_chunk: LatencyWindow = field(default_factory=LatencyWindow)
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    wins: int = 0
+    down_until: float = 0.0
+    last_error: Optional[str] = None
+    
+    def window(self, streaming: bool) -> LatencyWindow:
+        """Latency that matters for a call: time to the first chunk when streaming."""
+        return self.first_chunk if streaming else self.latency
+    
+    def available(self, now: float) -> bool:
+        """Whether the endpoint is outside its failure cooldown and not known to be unhealthy."""
+        return now >= self.down_until and self.backend.stats.healthy is not False
+    
+    def expected_wait(self, streaming: bool, now: float) -> float:
+        """Expected latency of one more request, queued behind the ones in flight."""
+        return self.window(streaming).estimate(now) * (1 + self.in_flight)
+
+
+@dataclass
+class PoolStats:
+    """Routing, hedging and failover counters of a pool."""
+    
+    endpoints: List[Endpoint]
+    requests: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    errors: int = 0
+    first_turn_seconds: Optional[float] = None
+    
+    @property
+    def healthy(self) -> bool:
+        """Whether at least one endpoint can take requests."""
+        now = time.monotonic()
+        return any(endpoint.available(now) for endpoint in self.endpoints)
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        def fmt(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "n/a"
+        
+        endpoints = ", ".join(
+            f"{endpoint.url} {endpoint.requests} req/{endpoint.failures} failed p95 {fmt(endpoint.latency.quantile(0.95))}"
+            for endpoint in self.endpoints
+        )
+        return (
+            f"Backend pool: {self.requests} requests, {self.hedges} hedged ({self.hedge_wins} won by the hedge), "
+            f"{self.failovers} failovers, {self.errors} errors; {endpoints}"
+        )
+
+
+class _Attempt:
+    """A call in progress on one endpoint, as seen by the router."""
+    
+    def __init__(self, pool: "BackendPool", endpoint: Endpoint, hedge: bool = False):
+        self.pool = pool
+        self.endpoint = endpoint
+        self.hedge = hedge
+        self.started = time.perf_counter()
+        with pool._lock:
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+    
+    def first_chunk(self):
+        """Record the time to the first chunk of a stream."""
+        with self.pool._lock:
+            self.endpoint.first_chunk.add(time.perf_counter() - self.started)
+    
+    def succeeded(self):
+        """Record a completed call."""
+        with self.pool._lock:
+            self.endpoint.latency.add(time.perf_counter() - self.started)
+            self.endpoint.down_until = 0.0
+    
+    def failed(self, error: BaseException):
+        """Take the endpoint out of rotation for the cooldown."""
+        with self.pool._lock:
+            self.endpoint.failures += 1
+            self.endpoint.last_error = str(error)
+            self.endpoint.down_until = time.monotonic() + self.pool.cooldown
+    
+    def finished(self):
+        """Release the in-flight slot, whatever the outcome."""
+        with self.pool._lock:
+            self.endpoint.in_flight -= 1
+
+
+class BackendPool:
+    """
+    Several Ollama servers for the same model, used as one.
+    
+    Each request goes to the endpoint with the lowest expected wait: its
+    moving-average latency times the requests already in flight on it.
+    If the reply takes longer than that endpoint's recent p95, a duplicate
+    is sent to the next best endpoint and whichever answers first wins.
+    Failed endpoints are skipped for a cooldown and the request is retried
+    on the next one, so a server going down costs at most one retry.
+    """
+    
+    def __init__(self, config: LLMConfig, urls: Sequence[str]):
+        """
+        Create one backend per endpoint; nothing is sent yet.
+        
+        Args:
+            config: LLM configuration shared by the endpoints
+            urls: Base URLs of the endpoints
+        """
+        if not urls:
+            raise ValueError("A backend pool needs at least one endpoint")
+        self.config = config
+        self.hedging = config.hedge_enabled and len(urls) > 1
+        self.hedge_quantile = config.hedge_quantile
+        self.hedge_min_samples = config.hedge_min_samples
+        self.hedge_min_delay = config.hedge_min_delay
+        self.cooldown = config.endpoint_cooldown
+        self.endpoints = [
+            Endpoint(url=url, backend=OllamaBackend(config.model_copy(update={"base_url": url})))
+            for url in urls
+        ]
+        self.stats = PoolStats(endpoints=self.endpoints)
+        self._lock = threading.Lock()
+        # Sync calls run here so the router can wait on them with a deadline
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.pool_max_connections * len(urls), thread_name_prefix="bankbot-pool"
+        )
+    
+    def chat_model(self, format: Optional[Union[str, Dict]] = None) -> "RoutedChatModel":
+        """
+        Get a chat model that routes every call through the pool.
+        
+        Args:
+            format: Ollama output format, e.g. "json" or a JSON schema
+            
+        Returns:
+            RoutedChatModel on this pool
+        """
+        return RoutedChatModel(pool=self, format=format)
+    
+    def pick(self, streaming: bool, exclude: Sequence[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Choose the endpoint for the next attempt.
+        
+        Args:
+            streaming: Route on time to first chunk instead of total latency
+            exclude: Endpoints already tried for this request
+            
+        Returns:
+            Endpoint with the lowest expected wait, or None if all were tried
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not candidates:
+                return None
+            available = [endpoint for endpoint in candidates if endpoint.available(now)]
+            if not available:
+                # Everything is cooling down; try the one that failed longest ago rather than giving up
+                return min(candidates, key=lambda endpoint: endpoint.down_until)
+            # Ties, e.g. between endpoints without history yet, go to the least busy
+            return min(available, key=lambda endpoint: (endpoint.expected_wait(streaming, now), endpoint.in_flight))
+    
+    def hedge_delay(self, endpoint: Endpoint, streaming: bool) -> Optional[float]:
+        """
+        Seconds to wait for an endpoint before sending a duplicate elsewhere.
+        
+        Args:
+            endpoint: Endpoint of the first attempt
+            streaming: Whether the wait is for the first chunk
+            
+        Returns:
+            Hedge delay, or None if hedging is off or there is no latency history yet
+        """
+        if not self.hedging:
+            return None
+        with self._lock:
+            window = endpoint.window(streaming)
+            if len(window.samples) >= self.hedge_min_samples:
+                threshold = window.quantile(self.hedge_quantile)
+            else:
+                # Rarely used endpoints borrow the quantile of the whole pool
+                samples = sorted(sample for other in self.endpoints for sample in other.window(streaming).samples)
+                if len(samples) < self.hedge_min_samples:
+                    return None
+                threshold = samples[min(len(samples) - 1, int(self.hedge_quantile * len(samples)))]
+            return max(self.hedge_min_delay, threshold)
+    
+    def _won(self, attempt: _Attempt):
+        """Count the attempt that produced the reply."""
+        with self._lock:
+            attempt.endpoint.wins += 1
+            if attempt.hedge:
+                self.stats.hedge_wins += 1
+    
+    def _next(self, streaming: bool, tried: List[Endpoint], hedge: bool) -> Optional[Endpoint]:
+        """Pick and count the endpoint of a hedge or failover attempt."""
+        endpoint = self.pick(streaming, exclude=tried)
+        if endpoint is not None:
+            tried.append(endpoint)
+            with self._lock:
+                if hedge:
+                    self.stats.hedges += 1
+                else:
+                    self.stats.failovers += 1
+        return endpoint
+    
+    def invoke(self, call: Callable[[Endpoint], Any]) -> Any:
+        """
+        Run a blocking call with hedging and failover.
+        
+        Args:
+            call: Makes the request on the given endpoint
+            
+        Returns:
+            Result of the first attempt to succeed
+        """
+        with self._lock:
+            self.stats.requests += 1
+        first_endpoint = self.pick(streaming=False)
+        tried = [first_endpoint]
+        
+        def run(endpoint: Endpoint, hedge: bool = False) -> Tuple[_Attempt, Any]:
+            attempt = _Attempt(self, endpoint, hedge)
+            try:
+                result = call(endpoint)
+            except BaseException as e:
+                attempt.failed(e)
+                raise
+            else:
+                attempt.succeeded()
+                return attempt, result
+            finally:
+                attempt.finished()
+        
+        pending = {self._executor.submit(run, first_endpoint): first_endpoint}
+        hedge_at = self.hedge_delay(first_endpoint, streaming=False)
+        started = time.perf_counter()
+        error = None
+        while pending:
+            timeout = None if hedge_at is None else max(0.0, started + hedge_at - time.perf_counter())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The first attempt passed its p95; race a duplicate against it
+                hedge_at = None
+                endpoint = self._next(False, tried, hedge=True)
+                if endpoint is not None:
+                    pending[self._executor.submit(run, endpoint, True)] = endpoint
+                continue
+            for future in done:
+                pending.pop(future)
+                try:
+                    attempt, result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                # The losers keep running to completion on the pool; their replies are dropped
+                self._won(attempt)
+                return result
+            if not pending:
+                endpoint = self._next(False, tried, hedge=False)
+                if endpoint is not None:
+                    pending[self._executor.submit(run, endpoint)] = endpoint
+        with self._lock:
+            self.stats.errors += 1
+        raise error
+    
+    async def ainvoke(self, call: Callable[[Endpoint], Any]) -> Any:
+        """
+        Async variant of invoke; losing attempts are cancelled.
+        
+        Args:
+            call: Returns the request coroutine for the given endpoint
+            
+        Returns:
+            Result of the first attempt to succeed
+        """
+        with self._lock:
+            self.stats.requests += 1
+        first_endpoint = self.pick(streaming=False)
+        tried = [first_endpoint]
+        
+        async def run(endpoint: Endpoint, hedge: bool = False) -> Tuple[_Attempt, Any]:
+            attempt = _Attempt(self, endpoint, hedge)
+            try:
+                result = await call(endpoint)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                attempt.failed(e)
+                raise
+            else:
+                attempt.succeeded()
+                return attempt, result
+            finally:
+                attempt.finished()
+        
+        pending = {asyncio.ensure_future(run(first_endpoint))}
+        hedge_at = self.hedge_delay(first_endpoint, streaming=False)
+        started = time.perf_counter()
+        error = None
+        try:
+            while pending:
+                timeout = None if hedge_at is None else max(0.0, started + hedge_at - time.perf_counter())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    endpoint = self._next(False, tried, hedge=True)
+                    if endpoint is not None:
+                        pending.add(asyncio.ensure_future(run(endpoint, True)))
+                    continue
+                for task in done:
+                    try:
+                        attempt, result = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    self._won(attempt)
+                    return result
+                if not pending:
+                    endpoint = self._next(False, tried, hedge=False)
+                    if endpoint is not None:
+                        pending.add(asyncio.ensure_future(run(endpoint)))
+        finally:
+            for task in pending:
+                task.cancel()
+        with self._lock:
+            self.stats.errors += 1
+        raise error
+    
+    def stream(self, call: Callable[[Endpoint], Iterator[Any]]) -> Iterator[Any]:
+        """
+        Stream from the endpoint that produces the first chunk, with hedging and failover.
+        
+        Hedging and failover only happen before the first chunk; once text
+        has been passed on, switching endpoints would repeat it.
+        
+        Args:
+            call: Opens the stream on the given endpoint
+            
+        Yields:
+            Chunks of the winning stream
+        """
+        with self._lock:
+            self.stats.requests += 1
+        first_endpoint = self.pick(streaming=True)
+        tried = [first_endpoint]
+        events = queue.Queue()
+        attempts: Dict[int, _Attempt] = {}
+        cancelled: Dict[int, threading.Event] = {}
+        
+        def run(key: int, attempt: _Attempt, cancel: threading.Event):
+            stream = None
+            try:
+                stream = call(attempt.endpoint)
+                for chunk in stream:
+                    if cancel.is_set():
+                        break
+                    events.put((key, "chunk", chunk))
+            except BaseException as e:
+                attempt.failed(e)
+                events.put((key, "error", e))
+            else:
+                events.put((key, "end", None))
+            finally:
+                # Closing the generator closes its HTTP response
+                if hasattr(stream, "close"):
+                    stream.close()
+                attempt.finished()
+        
+        def launch(endpoint: Endpoint, hedge: bool = False):
+            key = len(attempts)
+            attempts[key] = _Attempt(self, endpoint, hedge)
+            cancelled[key] = threading.Event()
+            self._executor.submit(run, key, attempts[key], cancelled[key])
+        
+        launch(first_endpoint)
+        hedge_at = self.hedge_delay(first_endpoint, streaming=True)
+        started = time.perf_counter()
+        live = {0}
+        winner = None
+        error = None
+        try:
+            while winner is None:
+                if not live:
+                    endpoint = self._next(True, tried, hedge=False)
+                    if endpoint is None:
+                        with self._lock:
+                            self.stats.errors += 1
+                        raise error
+                    launch(endpoint)
+                    live.add(len(attempts) - 1)
+                timeout = None if hedge_at is None else max(0.0, started + hedge_at - time.perf_counter())
+                try:
+                    key, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_at = None
+                    endpoint = self._next(True, tried, hedge=True)
+                    if endpoint is not None:
+                        launch(endpoint, hedge=True)
+                        live.add(len(attempts) - 1)
+                    continue
+                if kind == "error":
+                    live.discard(key)
+                    error = value
+                    continue
+                winner = key
+                attempts[key].first_chunk()
+                self._won(attempts[key])
+                for other in live - {key}:
+                    cancelled[other].set()
+                if kind == "end":
+                    attempts[key].succeeded()
+                    return
+                yield value
+            
+            while True:
+                key, kind, value = events.get()
+                if key != winner:
+                    continue
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    attempts[winner].succeeded()
+                    return
+        finally:
+            # Stops the winner too if the consumer stopped reading
+            for event in cancelled.values():
+                event.set()
+    
+    async def astream(self, call: Callable[[Endpoint], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Async variant of stream; losing attempts are cancelled.
+        
+        Args:
+            call: Opens the async stream on the given endpoint
+            
+        Yields:
+            Chunks of the winning stream
+        """
+        with self._lock:
+            self.stats.requests += 1
+        first_endpoint = self.pick(streaming=True)
+        tried = [first_endpoint]
+        
+        async def first(attempt: _Attempt):
+            # Hold the stream open until it produced its first chunk, or ended
+            stream = call(attempt.endpoint).__aiter__()
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                return attempt, stream, None, True
+            except asyncio.CancelledError:
+                await stream.aclose()
+                raise
+            except BaseException as e:
+                attempt.failed(e)
+                raise
+            attempt.first_chunk()
+            return attempt, stream, chunk, False
+        
+        def launch(endpoint: Endpoint, hedge: bool = False) -> asyncio.Future:
+            attempt = _Attempt(self, endpoint, hedge)
+            task = asyncio.ensure_future(first(attempt))
+            tasks[task] = attempt
+            return task
+        
+        tasks: Dict[asyncio.Future, _Attempt] = {}
+        pending = {launch(first_endpoint)}
+        hedge_at = self.hedge_delay(first_endpoint, streaming=True)
+        started = time.perf_counter()
+        error = None
+        won = None
+        try:
+            while won is None:
+                if not pending:
+                    endpoint = self._next(True, tried, hedge=False)
+                    if endpoint is None:
+                        with self._lock:
+                            self.stats.errors += 1
+                        raise error
+                    pending.add(launch(endpoint))
+                timeout = None if hedge_at is None else max(0.0, started + hedge_at - time.perf_counter())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedge_at = None
+                    endpoint = self._next(True, tried, hedge=True)
+                    if endpoint is not None:
+                        pending.add(launch(endpoint, hedge=True))
+                    continue
+                for task in done:
+                    if won is None and task.exception() is None:
+                        won = task.result()
+                    elif task.exception() is not None:
+                        error = task.exception()
+                        tasks.pop(task).finished()
+                    else:
+                        # A second stream that started in the same instant; drop it
+                        await task.result()[1].aclose()
+                        tasks.pop(task).finished()
+        finally:
+            for task in pending:
+                task.cancel()
+                tasks.pop(task).finished()
+        
+        attempt, stream, chunk, ended = won
+        self._won(attempt)
+        try:
+            if ended:
+                attempt.succeeded()
+                return
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+            attempt.succeeded()
+        finally:
+            await stream.aclose()
+            attempt.finished()
+    
+    def start(self, background: bool = True, health_check_interval: float = 0.0):
+        """
+        Warm up every endpoint and start their health checks.
+        
+        Args:
+            background: Warm up on daemon threads instead of blocking
+            health_check_interval: Seconds between health checks, 0 to disable
+        """
+        for endpoint in self.endpoints:
+            endpoint.backend.start(background=True, health_check_interval=health_check_interval)
+        if not background:
+            for endpoint in self.endpoints:
+                endpoint.backend.wait_until_ready()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for every endpoint's warm-up to finish.
+        
+        Args:
+            timeout: Maximum seconds to wait in total
+            
+        Returns:
+            True if every warm-up finished, successfully or not
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for endpoint in self.endpoints:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not endpoint.backend.wait_until_ready(remaining):
+                return False
+        return True
+    
+    def record_first_turn(self, seconds: float):
+        """Remember the latency of the first model turn served by the pool."""
+        if self.stats.first_turn_seconds is None:
+            self.stats.first_turn_seconds = seconds
+    
+    def gauges(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """
+        Current pool state as (name, labels, value) gauges for telemetry.
+        
+        Returns:
+            List of gauges
+        """
+        now = time.monotonic()
+        model = ("model", self.config.model_name)
+        values = [
+            ("bankbot_pool_requests", (model,), self.stats.requests),
+            ("bankbot_pool_hedges", (model,), self.stats.hedges),
+            ("bankbot_pool_hedge_wins", (model,), self.stats.hedge_wins),
+            ("bankbot_pool_failovers", (model,), self.stats.failovers),
+            ("bankbot_pool_errors", (model,), self.stats.errors),
+        ]
+        with self._lock:
+            for endpoint in self.endpoints:
+                labels = (model, ("endpoint", endpoint.url))
+                values.extend([
+                    ("bankbot_endpoint_requests", labels, endpoint.requests),
+                    ("bankbot_endpoint_failures", labels, endpoint.failures),
+                    ("bankbot_endpoint_wins", labels, endpoint.wins),
+                    ("bankbot_endpoint_in_flight", labels, endpoint.in_flight),
+                    ("bankbot_endpoint_available", labels, 1 if endpoint.available(now) else 0),
+                ])
+                if endpoint.latency.ewma is not None:
+                    values.append(("bankbot_endpoint_latency_seconds", labels, endpoint.latency.ewma))
+                if endpoint.first_chunk.ewma is not None:
+                    values.append(("bankbot_endpoint_first_chunk_seconds", labels, endpoint.first_chunk.ewma))
+        return values
+    
+    def close(self):
+        """Stop health checks and close every endpoint's connection pool; get_pool then creates a new pool."""
+        _forget_pool(self)
+        for endpoint in self.endpoints:
+            endpoint.backend.close()
+        self._executor.shutdown(wait=False)
+    
+    async def aclose(self):
+        """Async variant of close, for the event loop that used the pool."""
+        _forget_pool(self)
+        for endpoint in self.endpoints:
+            await endpoint.backend.aclose()
+        self._executor.shutdown(wait=False)
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    Chat model that sends each call to the best endpoint of a BackendPool.
+    
+    Per endpoint it uses the backend's shared ChatOllama, so connection
+    pooling and keep-alive work as with a single backend.
+    """
+    
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    pool: BackendPool
+    format: Optional[Union[str, Dict]] = None
+    tools: Optional[List[Dict]] = None
+    
+    @property
+    def _llm_type(self) -> str:
+        return "bankbot-routed-ollama"
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "RoutedChatModel":
+        """Bind tools on whichever endpoint serves each call."""
+        return self.model_copy(update={"tools": list(tools)})
+    
+    def _model(self, endpoint: Endpoint):
+        """The endpoint's chat model with this model's format and tools."""
+        model = endpoint.backend.chat_model(format=self.format)
+        return model.bind_tools(self.tools) if self.tools else model
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        message = self.pool.invoke(lambda endpoint: self._model(endpoint).invoke(messages, stop=stop, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        message = await self.pool.ainvoke(lambda endpoint: self._model(endpoint).ainvoke(messages, stop=stop, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for chunk in self.pool.stream(lambda endpoint: self._model(endpoint).stream(messages, stop=stop, **kwargs)):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+    
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.pool.astream(lambda endpoint: self._model(endpoint).astream(messages, stop=stop, **kwargs)):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: LLMConfig) -> BackendPool:
+    """
+    Get the process-wide pool for a configuration, so sessions share its routing state.
+    
+    Args:
+        config: LLM configuration with endpoints set
+        
+    Returns:
+        Shared BackendPool instance
+    """
+    urls = tuple(parse_endpoints(config.endpoints))
+    key = (config.model_name, urls, config.temperature, config.keep_alive)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BackendPool(config, urls)
+        return _pools[key]
+
+
+def _forget_pool(pool: BackendPool):
+    """Drop a closed pool from the get_pool cache."""
+    with _pools_lock:
+        for key, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[key]
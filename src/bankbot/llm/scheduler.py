@@ -0,0 +1,425 @@
+"""Request scheduling in front of a model backend: a fair per-tenant queue with single-flight."""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from ..config.settings import LLMConfig
+from .pool import parse_endpoints
+
+
+# Tenant of requests that do not name one, e.g. the single CLI session
+DEFAULT_TENANT = "default"
+
+
+def prompt_key(messages: Sequence[BaseMessage], *parts: Any) -> str:
+    """
+    Hash a prompt for single-flight deduplication.
+    
+    Whitespace and case are normalized, so prompts that only differ in
+    them share one model call.
+    
+    Args:
+        messages: Prompt messages
+        *parts: Anything else the reply depends on, e.g. stop words or tools
+        
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = [(message.type, " ".join(str(message.content).split()).casefold()) for message in messages]
+    return hashlib.sha256(json.dumps([payload, parts], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SchedulerStats:
+    """Counters of a request scheduler."""
+    
+    requests: int = 0
+    coalesced: int = 0
+    calls: int = 0
+    failures: int = 0
+    queue_seconds: float = 0.0
+    max_queue_seconds: float = 0.0
+    
+    @property
+    def coalesce_rate(self) -> float:
+        """Fraction of requests answered by another request's model call."""
+        return self.coalesced / self.requests if self.requests else 0.0
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        mean_wait = self.queue_seconds / self.calls if self.calls else 0.0
+        return (
+            f"Scheduler: {self.requests} requests, {self.calls} model calls "
+            f"({self.coalesce_rate * 100:.0f}% coalesced), "
+            f"queue wait mean {mean_wait * 1000:.1f}ms max {self.max_queue_seconds * 1000:.1f}ms"
+        )
+
+
+class _Flight:
+    """
+    One model call and everyone waiting for its output.
+    
+    The call runs on the scheduler's executor; its chunks are kept so that
+    requests joining late replay them before following the live output.
+    """
+    
+    def __init__(self, key: str, tenant: str, run: Callable[[], Iterator[Any]]):
+        self.key = key
+        self.tenant = tenant
+        self.run = run
+        self.queued_at = time.monotonic()
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+    
+    def _notify(self):
+        """Wake sync and async followers; call with the condition held."""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The follower's event loop is closed; nobody is listening anymore
+                pass
+    
+    def publish(self, chunk: Any):
+        """Add an output chunk."""
+        with self._cond:
+            self.chunks.append(chunk)
+            self._notify()
+    
+    def finish(self, error: Optional[BaseException] = None):
+        """Mark the call as complete, successfully or with an error."""
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._notify()
+    
+    def follow(self) -> Iterator[Any]:
+        """Yield every chunk of the call, blocking until the next one arrives."""
+        position = 0
+        while True:
+            with self._cond:
+                while position == len(self.chunks) and not self.done:
+                    self._cond.wait()
+                available = self.chunks[position:]
+                done, error = self.done, self.error
+            position += len(available)
+            yield from available
+            if done and position == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+    
+    async def afollow(self) -> AsyncIterator[Any]:
+        """Async variant of follow; waits without blocking the event loop."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            self._async_waiters.append(waiter)
+        try:
+            position = 0
+            while True:
+                with self._cond:
+                    available = self.chunks[position:]
+                    done, error = self.done, self.error
+                    if not available and not done:
+                        event.clear()
+                position += len(available)
+                for chunk in available:
+                    yield chunk
+                if done and position == len(self.chunks):
+                    if error is not None:
+                        raise error
+                    return
+                if not available:
+                    await event.wait()
+        finally:
+            with self._cond:
+                self._async_waiters.remove(waiter)
+
+
+class RequestScheduler:
+    """
+    Fair queue with single-flight in front of one backend.
+    
+    Identical prompts in flight, or still waiting for a slot, share one
+    model call. Calls run on an executor with one thread per concurrency
+    slot and are sent to the model server one request each; a free slot
+    is filled at once. Waiting calls are admitted round-robin over
+    tenants, so a burst from one tenant cannot starve the others.
+    """
+    
+    def __init__(self, max_concurrency: int = 4):
+        """
+        Initialize the scheduler and start its dispatcher thread.
+        
+        Args:
+            max_concurrency: Model calls in flight at the same time
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.stats = SchedulerStats()
+        self._flights: Dict[str, _Flight] = {}
+        self._waiting: Dict[str, deque] = {}
+        self._tenants: deque = deque()
+        self._active = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bankbot-scheduler")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="bankbot-dispatcher", daemon=True)
+        self._dispatcher.start()
+    
+    def submit(self, key: str, tenant: Optional[str], run: Callable[[], Iterator[Any]]) -> Tuple[_Flight, bool]:
+        """
+        Join the call for a key, or queue a new one.
+        
+        Args:
+            key: Request identity, see prompt_key
+            tenant: Who the request is for, e.g. an account id
+            run: Produces the call's output chunks; only called for new flights
+            
+        Returns:
+            Tuple of (flight to follow, whether this request started it)
+        """
+        tenant = tenant or DEFAULT_TENANT
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Request scheduler is closed")
+            self.stats.requests += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.coalesced += 1
+                return flight, False
+            
+            flight = self._flights[key] = _Flight(key, tenant, run)
+            queue = self._waiting.get(tenant)
+            if queue is None:
+                queue = self._waiting[tenant] = deque()
+                self._tenants.append(tenant)
+            queue.append(flight)
+            self._cond.notify_all()
+        return flight, True
+    
+    def _admit(self) -> List[_Flight]:
+        """Take waiting flights for the free slots, one tenant at a time; call with the condition held."""
+        admitted = []
+        while self._tenants and self._active + len(admitted) < self.max_concurrency:
+            tenant = self._tenants.popleft()
+            queue = self._waiting[tenant]
+            admitted.append(queue.popleft())
+            if queue:
+                self._tenants.append(tenant)
+            else:
+                del self._waiting[tenant]
+        return admitted
+    
+    def _dispatch_loop(self):
+        """Admit waiting flights whenever slots are free."""
+        while True:
+            with self._cond:
+                while not self._closed and (not self._tenants or self._active >= self.max_concurrency):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                for flight in self._admit():
+                    self._active += 1
+                    waited = now - flight.queued_at
+                    self.stats.queue_seconds += waited
+                    self.stats.max_queue_seconds = max(self.stats.max_queue_seconds, waited)
+                    self._executor.submit(self._run, flight)
+    
+    def _run(self, flight: _Flight):
+        """Run one flight on an executor thread and free its slot."""
+        error = None
+        try:
+            for chunk in flight.run():
+                flight.publish(chunk)
+        except BaseException as e:
+            error = e
+        with self._cond:
+            # Later requests start a new call; repeated replies are the response cache's job
+            self._flights.pop(flight.key, None)
+            self._active -= 1
+            self.stats.calls += 1
+            if error is not None:
+                self.stats.failures += 1
+            self._cond.notify_all()
+        flight.finish(error)
+    
+    def chat_model(self, model: BaseChatModel, tenant: Optional[str] = None) -> "ScheduledChatModel":
+        """
+        Wrap a chat model so its calls go through this scheduler.
+        
+        Args:
+            model: Chat model of the backend
+            tenant: Tenant of every call made through the wrapper
+            
+        Returns:
+            ScheduledChatModel instance
+        """
+        return ScheduledChatModel(scheduler=self, model=model, tenant=tenant)
+    
+    def gauges(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """
+        Current scheduler state as (name, labels, value) gauges for telemetry.
+        
+        Returns:
+            List of gauges
+        """
+        with self._cond:
+            waiting = sum(len(queue) for queue in self._waiting.values())
+            active = self._active
+        return [
+            ("bankbot_scheduler_requests", (), self.stats.requests),
+            ("bankbot_scheduler_coalesced", (), self.stats.coalesced),
+            ("bankbot_scheduler_calls", (), self.stats.calls),
+            ("bankbot_scheduler_active", (), active),
+            ("bankbot_scheduler_waiting", (), waiting),
+        ]
+    
+    @property
+    def closed(self) -> bool:
+        """Whether the scheduler was closed."""
+        return self._closed
+    
+    def close(self):
+        """
+        Stop admitting calls.
+        
+        Calls already running finish; calls still waiting for a slot fail
+        with a RuntimeError, so neither the request that queued them nor
+        the requests that joined them wait forever.
+        """
+        with self._cond:
+            self._closed = True
+            pending = [flight for queue in self._waiting.values() for flight in queue]
+            self._waiting.clear()
+            self._tenants.clear()
+            for flight in pending:
+                self._flights.pop(flight.key, None)
+            self._cond.notify_all()
+        self._executor.shutdown(wait=False)
+        for flight in pending:
+            flight.finish(RuntimeError("Request scheduler closed before the call ran"))
+
+
+class ScheduledChatModel(BaseChatModel):
+    """
+    Chat model whose calls are coalesced and admitted by a RequestScheduler.
+    
+    Requests that joined another request's call get its reply without
+    usage metadata, since they did not spend any tokens.
+    """
+    
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
+    scheduler: RequestScheduler
+    model: BaseChatModel
+    tenant: Optional[str] = None
+    tools: Optional[List[Dict]] = None
+    
+    @property
+    def _llm_type(self) -> str:
+        return "bankbot-scheduled"
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScheduledChatModel":
+        """Bind tools on the wrapped model for every call."""
+        return self.model_copy(update={"tools": list(tools)})
+    
+    def _bound(self):
+        """The wrapped model with this model's tools."""
+        return self.model.bind_tools(self.tools) if self.tools else self.model
+    
+    def _submit(self, mode: str, messages: List[BaseMessage], stop: Optional[List[str]],
+                run: Callable[[], Iterator[Any]], kwargs: Dict) -> Tuple[_Flight, bool]:
+        """Join or queue the call for these messages."""
+        key = prompt_key(messages, mode, id(self.model), self.tools, stop, kwargs)
+        return self.scheduler.submit(key, self.tenant, run)
+    
+    @staticmethod
+    def _own(message, started: bool):
+        """Drop usage metadata from a reply this request did not pay for."""
+        if started or not getattr(message, "usage_metadata", None):
+            return message
+        return message.model_copy(update={"usage_metadata": None})
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        flight, started = self._submit(
+            "invoke", messages, stop, lambda: iter([self._bound().invoke(messages, stop=stop, **kwargs)]), kwargs
+        )
+        message = list(flight.follow())[-1]
+        return ChatResult(generations=[ChatGeneration(message=self._own(message, started))])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        flight, started = self._submit(
+            "invoke", messages, stop, lambda: iter([self._bound().invoke(messages, stop=stop, **kwargs)]), kwargs
+        )
+        message = [chunk async for chunk in flight.afollow()][-1]
+        return ChatResult(generations=[ChatGeneration(message=self._own(message, started))])
+    
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        flight, started = self._submit(
+            "stream", messages, stop, lambda: self._bound().stream(messages, stop=stop, **kwargs), kwargs
+        )
+        for chunk in flight.follow():
+            chunk = self._own(chunk, started)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+    
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        flight, started = self._submit(
+            "stream", messages, stop, lambda: self._bound().stream(messages, stop=stop, **kwargs), kwargs
+        )
+        async for chunk in flight.afollow():
+            chunk = self._own(chunk, started)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=chunk)
+            yield ChatGenerationChunk(message=chunk)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(config: LLMConfig) -> RequestScheduler:
+    """
+    Get the process-wide scheduler of a backend, so every session shares its queue and limits.
+    
+    The concurrency limit applies per endpoint, so a pool of several
+    endpoints admits that many more calls. A closed scheduler is replaced
+    by a new one.
+    
+    Args:
+        config: LLM configuration
+        
+    Returns:
+        Shared RequestScheduler instance
+    """
+    urls = tuple(parse_endpoints(config.endpoints)) or (config.base_url,)
+    key = (config.model_name, urls, config.scheduler_max_concurrency)
+    with _schedulers_lock:
+        if key not in _schedulers or _schedulers[key].closed:
+            _schedulers[key] = RequestScheduler(max_concurrency=config.scheduler_max_concurrency * len(urls))
+        return _schedulers[key]
@@ -0,0 +1,249 @@
+"""Deterministic stand-in chat models for benchmarking without a live LLM."""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from ..utils.tokens import count_tokens
+
+
+_TOKEN_CHUNK = re.compile(r"\S+\s*|\s+")
+
+
+def _last_human_text(messages: Sequence[BaseMessage]) -> str:
+    """Get the most recent user message of a prompt."""
+    for message in reversed(messages):
+        if message.type == "human":
+            return message.content
+    return ""
+
+
+def _usage(messages: Sequence[BaseMessage], reply: str) -> Dict[str, int]:
+    """Estimate usage metadata the way Ollama reports it."""
+    input_tokens = sum(count_tokens(str(message.content)) for message in messages)
+    output_tokens = count_tokens(reply)
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class SimulatedChatModel(BaseChatModel):
+    """
+    Chat model that returns scripted replies with a simulated generation speed.
+    
+    Replies come from respond(user_input) if given, otherwise from the
+    responses list in order, starting over when it runs out. Each reply
+    takes latency seconds before the first token and then streams word
+    by word at tokens_per_second (0 for no delay), so the Python-side
+    overhead of a turn can be measured with realistic or zero model time.
+    """
+    
+    responses: List[Union[str, AIMessage]] = []
+    respond: Optional[Callable[[str], Union[str, AIMessage]]] = None
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    
+    _index: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "SimulatedChatModel":
+        """Accept tool definitions; scripted AIMessages carry their own tool calls."""
+        return self
+    
+    def _next_reply(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        """Pick the reply to the given prompt."""
+        if self.respond is not None:
+            reply = self.respond(_last_human_text(messages))
+        else:
+            if not self.responses:
+                raise ValueError("SimulatedChatModel needs responses or respond")
+            with self._lock:
+                reply = self.responses[self._index % len(self.responses)]
+                self._index += 1
+        if isinstance(reply, str):
+            reply = AIMessage(content=reply)
+        return reply.model_copy(update={"usage_metadata": _usage(messages, reply.content)})
+    
+    def _token_delay(self) -> float:
+        """Seconds spent generating each token."""
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        reply = self._next_reply(messages)
+        delay = self.latency + self._token_delay() * reply.usage_metadata["output_tokens"]
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        reply = self._next_reply(messages)
+        delay = self.latency + self._token_delay() * reply.usage_metadata["output_tokens"]
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+    
+    def _chunks(self, reply: AIMessage) -> Iterator[ChatGenerationChunk]:
+        """Split a reply into word-sized chunks; usage and tool calls ride on the last one."""
+        pieces = _TOKEN_CHUNK.findall(reply.content) or [""]
+        for position, piece in enumerate(pieces):
+            last = position == len(pieces) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=piece,
+                usage_metadata=reply.usage_metadata if last else None,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call.get("id"), "index": i}
+                    for i, call in enumerate(reply.tool_calls)
+                ] if last else []
+            ))
+    
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        reply = self._next_reply(messages)
+        delay = self._token_delay()
+        if self.latency:
+            time.sleep(self.latency)
+        for chunk in self._chunks(reply):
+            if delay:
+                time.sleep(delay)
+            yield chunk
+    
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        reply = self._next_reply(messages)
+        delay = self._token_delay()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for chunk in self._chunks(reply):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Record real model responses to a JSONL cassette and replay them offline.
+    
+    In "record" mode every prompt is sent to the wrapped model and the
+    reply is appended to the cassette, keyed on a hash of the prompt. In
+    "replay" mode replies are served from the cassette; identical prompts
+    get their recorded replies in order. With replay_latency the recorded
+    response time is slept as well, otherwise replies return immediately.
+    """
+    
+    path: str
+    mode: str = "replay"
+    model: Optional[BaseChatModel] = None
+    tools: Optional[List[Any]] = None
+    replay_latency: bool = False
+    
+    _entries: Dict[str, List[Dict]] = PrivateAttr(default_factory=dict)
+    _served: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    
+    def model_post_init(self, context: Any):
+        if self.mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {self.mode}")
+        if self.mode == "record" and self.model is None:
+            raise ValueError("Recording a cassette needs a model")
+        if self.mode == "replay":
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(f"Cassette not found: {self.path}")
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+    
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "CassetteChatModel":
+        """Record with the tools bound to the wrapped model; they are part of the key."""
+        return self.model_copy(update={"tools": list(tools)})
+    
+    def _key(self, messages: Sequence[BaseMessage]) -> str:
+        """Hash the prompt and bound tools into a cassette key."""
+        payload = [[message.type, message.content] for message in messages]
+        if self.tools:
+            payload.append(["tools", self.tools])
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    
+    def _record(self, key: str, messages: Sequence[BaseMessage], reply: AIMessage, elapsed: float):
+        """Append a reply to the cassette."""
+        entry = {
+            "key": key,
+            "input": _last_human_text(messages),
+            "content": reply.content,
+            "tool_calls": [{"name": call["name"], "args": call["args"]} for call in reply.tool_calls],
+            "usage_metadata": dict(reply.usage_metadata or {}),
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(entry) + "\n")
+    
+    def _replay(self, messages: Sequence[BaseMessage]) -> Dict:
+        """Find the recorded reply to a prompt."""
+        key = self._key(messages)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise LookupError(f"No recorded reply for input {_last_human_text(messages)!r} in {self.path}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        return entries[min(served, len(entries) - 1)]
+    
+    @staticmethod
+    def _message(entry: Dict) -> AIMessage:
+        """Rebuild the AIMessage of a cassette entry."""
+        return AIMessage(
+            content=entry["content"],
+            tool_calls=[
+                {"name": call["name"], "args": call["args"], "id": f"call_{i}"}
+                for i, call in enumerate(entry["tool_calls"])
+            ],
+            usage_metadata=entry["usage_metadata"] or None
+        )
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            model = self.model.bind_tools(self.tools) if self.tools else self.model
+            started = time.perf_counter()
+            reply = model.invoke(messages, stop=stop)
+            self._record(self._key(messages), messages, reply, time.perf_counter() - started)
+            return ChatResult(generations=[ChatGeneration(message=reply)])
+        
+        entry = self._replay(messages)
+        if self.replay_latency:
+            time.sleep(entry["elapsed"])
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.mode == "record":
+            model = self.model.bind_tools(self.tools) if self.tools else self.model
+            started = time.perf_counter()
+            reply = await model.ainvoke(messages, stop=stop)
+            self._record(self._key(messages), messages, reply, time.perf_counter() - started)
+            return ChatResult(generations=[ChatGeneration(message=reply)])
+        
+        entry = self._replay(messages)
+        if self.replay_latency:
+            await asyncio.sleep(entry["elapsed"])
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
@@ -0,0 +1,168 @@
+"""Banking actions declared as tools and as a JSON schema for structured output."""
+
+import json
+from typing import Optional, Dict, List, Any
+
+from ..utils.parser import ParsedResponse, Segment, ResponseParser
+
+
+ACTION_MODES = ("text", "tools", "json")
+
+_AMOUNT = {"type": "number", "description": "Amount of money, must be positive"}
+_HISTORY_TYPE = {"type": "string", "enum": ["deposit", "withdraw", "all"]}
+_PERIOD = {"type": "string", "enum": ["day", "week", "month", "all"]}
+
+
+def _tool(name: str, description: str, properties: Optional[Dict] = None, required: Optional[List[str]] = None) -> Dict:
+    """Build an OpenAI-style function tool definition."""
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": properties or {},
+                "required": required or [],
+            },
+        },
+    }
+
+
+# Tool names map onto the actions BankBotApp.perform_action executes
+ACTION_TOOLS: List[Dict] = [
+    _tool("check_balance", "Show the current account balance"),
+    _tool("add", "Deposit money into the account", {"amount": _AMOUNT}, ["amount"]),
+    _tool("withdraw", "Withdraw money from the account", {"amount": _AMOUNT}, ["amount"]),
+    _tool(
+        "convert", "Convert an amount of the account currency to another currency",
+        {"amount": _AMOUNT, "currency": {"type": "string", "description": "Target currency code, e.g. USD"}},
+        ["amount", "currency"]
+    ),
+    _tool(
+        "transaction_total", "Total deposited or withdrawn over a period",
+        {"type": {"type": "string", "enum": ["deposit", "withdraw"]}, "period": _PERIOD}, ["type"]
+    ),
+    _tool(
+        "recent_transactions", "List the most recent transactions",
+        {"type": _HISTORY_TYPE, "count": {"type": "integer", "minimum": 1, "maximum": 50}}
+    ),
+    _tool(
+        "batch", "Apply several deposits and withdrawals together or not at all",
+        {"steps": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"action": {"type": "string", "enum": ["add", "withdraw"]}, "amount": _AMOUNT},
+                "required": ["action", "amount"],
+            },
+        }},
+        ["steps"]
+    ),
+]
+
+# Schema passed as Ollama's "format" parameter in json mode
+RESPONSE_SCHEMA: Dict = {
+    "type": "object",
+    "properties": {
+        "reply": {"type": "string"},
+        "actions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "action": {"type": "string", "enum": [tool["function"]["name"] for tool in ACTION_TOOLS]},
+                    "amount": {"type": "number"},
+                    "type": _HISTORY_TYPE,
+                    "period": _PERIOD,
+                    "count": {"type": "integer"},
+                    "currency": {"type": "string"},
+                    "steps": ACTION_TOOLS[-1]["function"]["parameters"]["properties"]["steps"],
+                },
+                "required": ["action"],
+            },
+        },
+    },
+    "required": ["reply", "actions"],
+}
+
+
+def tool_call_to_action(tool_call: Dict[str, Any]) -> Dict:
+    """
+    Convert a LangChain tool call into an action dictionary.
+    
+    Args:
+        tool_call: Tool call with "name" and "args"
+        
+    Returns:
+        Action dictionary in the format perform_action expects
+    """
+    args = tool_call.get("args") or {}
+    return {"action": tool_call["name"], "amount": 0, **args}
+
+
+def parse_tool_response(content: str, tool_calls: List[Dict[str, Any]]) -> ParsedResponse:
+    """
+    Build a parsed response from a tool-calling reply.
+    
+    Text that still embeds JSON actions, e.g. from a model that ignores
+    the tools, is handled by the regular parser.
+    
+    Args:
+        content: Text content of the reply
+        tool_calls: Tool calls of the reply
+        
+    Returns:
+        ParsedResponse with the text followed by the tool calls in order
+    """
+    parsed = ResponseParser.parse(content or "")
+    parsed.segments.extend(Segment("action", tool_call_to_action(call)) for call in tool_calls)
+    return parsed
+
+
+def parse_structured_response(content: str) -> ParsedResponse:
+    """
+    Decode a reply produced under RESPONSE_SCHEMA.
+    
+    Falls back to the regular parser if the reply is not valid JSON of the
+    expected shape.
+    
+    Args:
+        content: Raw reply
+        
+    Returns:
+        ParsedResponse
+    """
+    try:
+        decoded = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return ResponseParser.parse(content or "")
+    if not isinstance(decoded, dict) or not isinstance(decoded.get("actions", []), list):
+        return ResponseParser.parse(content)
+    
+    parsed = ParsedResponse()
+    reply = decoded.get("reply")
+    if isinstance(reply, str) and reply:
+        parsed.segments.append(Segment("text", reply))
+    for action in decoded.get("actions", []):
+        if isinstance(action, dict) and ResponseParser.validate_action(action):
+            parsed.segments.append(Segment("action", action))
+    return parsed
+
+
+def history_text(parsed: ParsedResponse) -> str:
+    """
+    Render a structured reply the way text mode replies appear in the history.
+    
+    Keeping one history format means switching modes does not confuse the
+    model about what it did in earlier turns.
+    
+    Args:
+        parsed: Parsed reply
+        
+    Returns:
+        Reply text followed by its actions as compact JSON
+    """
+    parts = [parsed.text] if parsed.text else []
+    parts.extend(json.dumps(action, separators=(", ", ": ")) for action in parsed.actions)
+    return " ".join(parts)
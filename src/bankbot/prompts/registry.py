@@ -0,0 +1,190 @@
+"""Registry of prompt templates compiled once: whitespace minified, static text frozen, slots filled per call."""
+
+import re
+from string import Formatter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config.settings import llm_config
+from ..utils.tokens import count_message_tokens, get_token_counter
+
+
+# Runs of spaces and tabs inside a line
+_SPACES = re.compile(r"[ \t]+")
+
+# Two or more line breaks, possibly with blank lines in between
+_PARAGRAPH_BREAK = re.compile(r"\n{2,}")
+
+
+def minify(text: str) -> str:
+    """
+    Normalize the whitespace of a template.
+    
+    Indentation and trailing spaces are removed, runs of spaces become
+    one, and blank lines between paragraphs collapse into a single blank
+    line. Line breaks themselves are kept, since the model reads lists
+    and examples line by line.
+    
+    Args:
+        text: Template source
+        
+    Returns:
+        Minified template
+    """
+    lines = [_SPACES.sub(" ", line).strip() for line in text.strip().splitlines()]
+    return _PARAGRAPH_BREAK.sub("\n\n", "\n".join(lines))
+
+
+class CompiledTemplate:
+    """
+    A minified template split into frozen text and variable slots.
+    
+    Rendering only formats the slot values and joins them with the
+    frozen text; templates without slots return the same string object
+    on every call.
+    
+    token_count is a cheap estimate taken at compile time (about four
+    characters per token, see utils.tokens); budgets are enforced by
+    PromptRegistry.check with the model's tokenizer, so an over-budget
+    template still compiles and fails the test and benchmark run instead
+    of the import.
+    """
+    
+    def __init__(self, name: str, source: str, budget: Optional[int] = None,
+                 counter: Callable[[str], int] = count_message_tokens):
+        """
+        Compile a template.
+        
+        Args:
+            name: Template name
+            source: Template in str.format syntax; "{{" and "}}" are literal braces
+            budget: Maximum tokens of the frozen text, None for no limit
+            counter: Token estimate reported as token_count
+            
+        Raises:
+            ValueError: If a slot is not a plain name
+        """
+        self.name = name
+        self.text = minify(source)
+        self.budget = budget
+        
+        self._literals: List[str] = []
+        self._slots: List[Tuple[str, str]] = []
+        literal = []
+        for text, field, spec, conversion in Formatter().parse(self.text):
+            literal.append(text)
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion:
+                raise ValueError(f"Unsupported template slot in {name}: {{{field}}}")
+            self._literals.append("".join(literal))
+            self._slots.append((field, spec))
+            literal = []
+        self._literals.append("".join(literal))
+        
+        self.static_text = "".join(self._literals)
+        self.token_count = counter(self.static_text)
+    
+    @property
+    def slots(self) -> List[str]:
+        """Names of the variable slots, in order."""
+        return [field for field, _ in self._slots]
+    
+    @property
+    def over_budget(self) -> bool:
+        """Whether the estimated tokens of the frozen text exceed the budget."""
+        return self.budget is not None and self.token_count > self.budget
+    
+    def render(self, **values) -> str:
+        """
+        Fill the slots.
+        
+        Args:
+            **values: Value for every slot
+            
+        Returns:
+            Rendered prompt
+        """
+        if not self._slots:
+            return self._literals[0]
+        parts = [self._literals[0]]
+        for (field, spec), literal in zip(self._slots, self._literals[1:]):
+            parts.append(format(values[field], spec))
+            parts.append(literal)
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """Named compiled templates with their token counts and budgets."""
+    
+    def __init__(self, counter: Callable[[str], int] = count_message_tokens):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            counter: Token estimate reported by every template
+        """
+        self.counter = counter
+        self._templates: Dict[str, CompiledTemplate] = {}
+    
+    def register(self, name: str, source: str, budget: Optional[int] = None) -> CompiledTemplate:
+        """
+        Compile a template and add it under a name.
+        
+        Args:
+            name: Template name
+            source: Template source
+            budget: Maximum tokens of the frozen text, None for no limit
+            
+        Returns:
+            Compiled template
+            
+        Raises:
+            ValueError: If the name is taken or a slot is not a plain name
+        """
+        if name in self._templates:
+            raise ValueError(f"Template already registered: {name}")
+        template = CompiledTemplate(name, source, budget, self.counter)
+        self._templates[name] = template
+        return template
+    
+    def get(self, name: str) -> CompiledTemplate:
+        """Get a compiled template by name."""
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise ValueError(f"Unsupported prompt template: {name}") from None
+    
+    def render(self, name: str, **values) -> str:
+        """Render a template by name."""
+        return self.get(name).render(**values)
+    
+    def __iter__(self) -> Iterator[CompiledTemplate]:
+        """Iterate over the compiled templates in registration order."""
+        return iter(self._templates.values())
+    
+    def check(self, counter: Optional[Callable[[str], int]] = None) -> Dict[str, int]:
+        """
+        Fail if any template grew past its token budget.
+        
+        Called by the tests and benchmarks/prompt_budget.py rather than at
+        import, so a template that grew too long fails CI instead of
+        stopping the application.
+        
+        Args:
+            counter: Token counter of the frozen text; defaults to the
+                configured model's tokenizer, or the length estimate when
+                none is configured (see utils.tokens.get_token_counter)
+                
+        Returns:
+            Token count of every template by name
+            
+        Raises:
+            ValueError: Listing every template over budget
+        """
+        counter = counter or get_token_counter(llm_config)
+        counts = {template.name: counter(template.static_text) for template in self}
+        over = [t for t in self if t.budget is not None and counts[t.name] > t.budget]
+        if over:
+            details = ", ".join(f"{t.name} ({counts[t.name]} > {t.budget} tokens)" for t in over)
+            raise ValueError(f"Prompt templates over their token budget: {details}")
+        return counts
@@ -2,48 +2,136 @@
 
 from typing import Dict
 
+from .registry import PromptRegistry
+
+
+_SYSTEM_PROMPT = """You are a friendly banking assistant named BankBot. You can have natural conversations with users while helping them manage their bank account.
+
+When the user wants to perform a banking action, include a JSON object in your response using this EXACT format:
+{{"action": "ACTION_NAME", "amount": NUMBER}}
+
+Available actions:
+- check_balance: Check account balance (no amount needed, use 0)
+- add: Deposit money to account
+- withdraw: Withdraw money from account  
+- convert: Convert {currency} to another currency, add "currency" with the target currency code (e.g. "USD", "GBP", "JPY")
+- transaction_total: Total deposited or withdrawn, add "type" ("deposit" or "withdraw") and "period" ("day", "week", "month" or "all")
+- recent_transactions: List recent transactions, add "type" ("deposit", "withdraw" or "all") and use "amount" for how many
+- batch: Several deposits/withdrawals applied together or not at all, put them in "steps" and use 0 for "amount"
+
+IMPORTANT: 
+- Always respond conversationally first
+- If a banking action is requested, include the JSON in your response
+- For greetings, small talk, or questions, just respond naturally without JSON
+- Be friendly, helpful, and professional
+- Remember the user's name if they tell you
+
+Examples:
+- User: "Hi!" → "Hello! I'm BankBot, your banking assistant. How can I help you today?"
+- User: "Add 100 euros" → "Sure! I'll add 100 {currency} to your account. {{"action": "add", "amount": 100}}"
+- User: "What's 80 in pounds?" → "Let me convert that. {{"action": "convert", "amount": 80, "currency": "GBP"}}"
+- User: "How much did I withdraw this week?" → "Let me check. {{"action": "transaction_total", "amount": 0, "type": "withdraw", "period": "week"}}"
+- User: "Move 50 out, then deposit 200" → "Done in one go. {{"action": "batch", "amount": 0, "steps": [{{"action": "withdraw", "amount": 50}}, {{"action": "add", "amount": 200}}]}}"
+- User: "How are you?" → "I'm doing great, thank you for asking! How can I assist you with your banking needs today?"
+"""
+
+_STRUCTURED_PROMPT = """You are a friendly banking assistant named BankBot. You help users manage their {{currency}} bank account in natural conversation.
+{actions}
+Amounts are in {{currency}}. Several deposits/withdrawals that must succeed together go in one batch.
+Be friendly, helpful, and professional, and remember the user's name if they tell you.
+"""
+
+_TOOLS_ACTIONS = "When the user wants a banking action, call the matching tool. Never call a tool for greetings, small talk, or questions."
+
+_JSON_ACTIONS = 'Reply with a JSON object: "reply" holds your message, "actions" lists the banking actions the user asked for (empty for greetings, small talk, or questions).'
+
+# Templates sent to the model, compiled once at import. Budgets cap the
+# tokens of the frozen text; PROMPTS.check(), run by the tests and
+# benchmarks/prompt_budget.py, fails when a template grows past its budget.
+PROMPTS = PromptRegistry()
+PROMPTS.register("system", _SYSTEM_PROMPT, budget=560)
+PROMPTS.register("structured_tools", _STRUCTURED_PROMPT.format(actions=_TOOLS_ACTIONS), budget=140)
+PROMPTS.register("structured_json", _STRUCTURED_PROMPT.format(actions=_JSON_ACTIONS), budget=140)
+PROMPTS.register("account_state", "Current account balance: {balance} {currency}", budget=16)
+PROMPTS.register("summary_context", "Summary of the earlier conversation:\n{summary}", budget=16)
+PROMPTS.register("summary_prompt", (
+    "Update the summary of a conversation between a user and a banking assistant. "
+    "Keep facts that matter later, such as the user's name, preferences and completed "
+    "transactions. Reply with the updated summary only, in at most {max_words} words."
+), budget=80)
+
 
 class PromptTemplates:
     """Collection of prompt templates for different LLM interactions."""
     
     @staticmethod
-    def get_system_prompt(balance: float, currency: str = "EUR") -> str:
+    def get_system_prompt(currency: str = "EUR") -> str:
         """
         Get the system prompt for the banking assistant.
         
+        The prompt only contains static instructions so that it forms a
+        byte-stable prefix the backend can cache across turns. Volatile
+        state is injected later via get_account_state_prompt().
+        
         Args:
-            balance: Current account balance
             currency: Currency code (default: EUR)
             
         Returns:
             Formatted system prompt string
         """
-        return f"""You are a friendly banking assistant named BankBot. You can have natural conversations with users while helping them manage their bank account.
-
-                    Current account balance: {balance:.2f} {currency}
-
-                    When the user wants to perform a banking action, include a JSON object in your response using this EXACT format:
-                    {{{{"action": "ACTION_NAME", "amount": NUMBER}}}}
-
-                    Available actions:
-                    - check_balance: Check account balance (no amount needed, use 0)
-                    - add: Deposit money to account
-                    - withdraw: Withdraw money from account  
-                    - convert_usd: Convert {currency} to USD
-
-                    IMPORTANT: 
-                    - Always respond conversationally first
-                    - If a banking action is requested, include the JSON in your response
-                    - For greetings, small talk, or questions, just respond naturally without JSON
-                    - Be friendly, helpful, and professional
-                    - Remember the user's name if they tell you
-
-                    Examples:
-                    - User: "Hi!" → "Hello! I'm BankBot, your banking assistant. How can I help you today?"
-                    - User: "Add 100 euros" → "Sure! I'll add 100 {currency} to your account. {{{{"action": "add", "amount": 100}}}}"
-                    - User: "How are you?" → "I'm doing great, thank you for asking! How can I assist you with your banking needs today?"
-                """
-
+        return PROMPTS.render("system", currency=currency)
+    
+    @staticmethod
+    def get_structured_system_prompt(mode: str, currency: str = "EUR") -> str:
+        """
+        Get the system prompt used when actions are returned as structured output.
+        
+        The action formats are described by the tool definitions or the
+        response schema sent with the request, so this prompt leaves out
+        the JSON instructions and examples of get_system_prompt().
+        
+        Args:
+            mode: Action mode ("tools" or "json")
+            currency: Currency code (default: EUR)
+            
+        Returns:
+            Formatted system prompt string
+        """
+        return PROMPTS.render("structured_tools" if mode == "tools" else "structured_json", currency=currency)
+    
+    @staticmethod
+    def get_account_state_prompt() -> str:
+        """
+        Get the prompt template carrying the current account state.
+        
+        It is placed after the chat history, right before the user's
+        message, so balance changes do not invalidate the cached prefix.
+        
+        Returns:
+            Prompt template with {balance} and {currency} variables
+        """
+        return PROMPTS.get("account_state").text
+    
+    @staticmethod
+    def get_summary_context() -> str:
+        """
+        Get the template presenting the summary of earlier turns to the model.
+        
+        Returns:
+            Prompt template with a {summary} variable
+        """
+        return PROMPTS.get("summary_context").text
+    
+    @staticmethod
+    def get_summary_prompt() -> str:
+        """
+        Get the instructions for folding evicted turns into the rolling summary.
+        
+        Returns:
+            Prompt template with a {max_words} variable
+        """
+        return PROMPTS.get("summary_prompt").text
+    
     @staticmethod
     def get_welcome_message() -> str:
         """Get the welcome message for the application."""
@@ -51,7 +139,7 @@ class PromptTemplates:
                 💬 Chat naturally with me! I can help with deposits, withdrawals, balance checks, and currency conversion.
                 Type 'exit' or 'quit' to end the conversation.
                 """
-
+    
     @staticmethod
     def get_goodbye_message(balance: float, currency: str = "EUR") -> str:
         """
@@ -65,7 +153,7 @@ class PromptTemplates:
             Formatted goodbye message
         """
         return f"\nBankBot: Goodbye! It was nice talking to you. Your final balance is {balance:.2f} {currency}. Have a great day! 👋"
-
+    
     @staticmethod
     def get_error_messages() -> Dict[str, str]:
         """Get error message templates."""
@@ -73,9 +161,12 @@ class PromptTemplates:
             "llm_connection": "⚠️ Error communicating with LLM: {error}\n👉 Make sure 'ollama serve' is running in another terminal.",
             "insufficient_funds": "❌ Insufficient funds! Available: {balance:.2f} {currency}",
             "invalid_amount": "❌ Invalid amount. Please provide a positive number.",
+            "batch_rejected": "❌ {message}.",
+            "unknown_currency": "❌ I can't convert to {currency}. Supported currencies: {supported}",
+            "rates_unavailable": "⚠️ Exchange rates are unavailable right now: {error}",
             "parse_error": "⚠️ Couldn't parse the response. Please try again."
         }
-
+    
     @staticmethod
     def get_action_messages() -> Dict[str, str]:
         """Get action confirmation message templates."""
@@ -83,5 +174,37 @@ class PromptTemplates:
             "balance_check": "💰 Current Balance: {balance:.2f} {currency}",
             "deposit": "✅ Deposited {amount:.2f} {currency} → New balance: {balance:.2f} {currency}",
             "withdraw": "✅ Withdrew {amount:.2f} {currency} → New balance: {balance:.2f} {currency}",
-            "convert": "💱 {amount:.2f} {from_currency} = {converted:.2f} {to_currency}"
+            "convert": "💱 {amount:.2f} {from_currency} = {converted:.2f} {to_currency}",
+            "transaction_total": "📊 {label} {period_label}: {total:.2f} {currency} across {count} transaction(s)",
+            "recent_transactions": "🧾 Last {count} {label}:",
+            "transaction_line": "  • {when} {label} {amount:.2f} {currency} → {balance:.2f} {currency}",
+            "no_transactions": "🧾 No {label} yet.",
+            "batch": "✅ Applied {count} operations → New balance: {balance:.2f} {currency}"
+        }
+    
+    @staticmethod
+    def get_history_labels() -> Dict[str, str]:
+        """Get labels used when describing transaction history."""
+        return {
+            "deposit": "Deposited",
+            "withdraw": "Withdrawn",
+            "deposits": "deposits",
+            "withdraws": "withdrawals",
+            "alls": "transactions",
+            "day": "in the last 24 hours",
+            "week": "in the last 7 days",
+            "month": "in the last 30 days",
+            "all": "in total"
+        }
+    
+    @staticmethod
+    def get_fast_path_replies() -> Dict[str, str]:
+        """Get reply templates recorded in history for commands resolved without the LLM."""
+        return {
+            "balance": "Let me check your balance.",
+            "deposit": "Sure! I'll add {amount} {currency} to your account.",
+            "withdraw": "Sure! I'll withdraw {amount} {currency} from your account.",
+            "convert": "Sure! Let me convert {amount} {currency} to {target}.",
+            "transaction_total": "Let me add that up for you.",
+            "recent_transactions": "Here are your recent transactions."
         }
@@ -0,0 +1,387 @@
+"""Asyncio HTTP and WebSocket server hosting many BankBot sessions."""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Optional, Dict
+
+from aiohttp import web, WSMsgType
+
+from .config.settings import LLMConfig, server_config, banking_config, app_config, llm_config
+from .app import BankBotApp
+from .banking.account import BankAccount
+from .banking.registry import AccountRegistry
+from .llm.backend import get_backend
+from .llm.pool import get_pool
+from .llm.scheduler import get_scheduler
+from .utils.telemetry import get_telemetry
+from .utils.ids import is_valid_session_id
+
+
+class Session:
+    """A single conversation with its own assistant, on a possibly shared account."""
+    
+    def __init__(self, session_id: str, account_id: str, account: BankAccount,
+                 config: Optional[LLMConfig] = None):
+        """
+        Initialize a session.
+        
+        Args:
+            session_id: Unique session identifier
+            account_id: Registry id of the account the session operates on
+            account: The account itself
+            config: LLM configuration of the server; the global llm_config if omitted
+        """
+        self.session_id = session_id
+        self.account_id = account_id
+        # Sessions on the same account share one tenant in the request scheduler
+        self.app = BankBotApp(session_id=session_id, account=account, tenant=account_id, config=config)
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        # Open WebSockets; a session with a connected client is never expired
+        self.sockets = 0
+    
+    def touch(self):
+        """Mark the session as active."""
+        self.last_active = time.monotonic()
+
+
+class SessionManager:
+    """Create, look up and expire sessions."""
+    
+    def __init__(self, max_sessions: int, idle_timeout: float, accounts: AccountRegistry,
+                 config: Optional[LLMConfig] = None):
+        """
+        Initialize the session manager.
+        
+        Args:
+            max_sessions: Maximum number of concurrent sessions
+            idle_timeout: Seconds before an idle session is dropped
+            accounts: Registry holding the accounts of all sessions
+            config: LLM configuration of every session; the global llm_config if omitted
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.accounts = accounts
+        self.config = config or llm_config
+        self._sessions: Dict[str, Session] = {}
+        self._opening: Dict[str, asyncio.Future] = {}
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def get(self, session_id: str) -> Optional[Session]:
+        """Get an existing session."""
+        return self._sessions.get(session_id)
+    
+    async def get_or_create(self, session_id: Optional[str] = None,
+                            account_id: Optional[str] = None) -> Optional[Session]:
+        """
+        Get a session, creating it if it does not exist.
+        
+        Opening the account (ledger replay, database) and resuming the
+        checkpoint run on a worker thread. Concurrent requests for a session
+        that is still opening wait for it instead of opening it again.
+        
+        Args:
+            session_id: Requested session id, generated if omitted
+            account_id: Account to open the session on; sessions get a private
+                account named after themselves if omitted
+                
+        Returns:
+            Session, or None if the session limit has been reached
+        """
+        session_id = session_id or uuid.uuid4().hex
+        session = self._sessions.get(session_id)
+        if session is None:
+            opening = self._opening.get(session_id)
+            if opening is None:
+                if len(self._sessions) + len(self._opening) >= self.max_sessions:
+                    return None
+                opening = self._opening[session_id] = asyncio.ensure_future(self._open(session_id, account_id))
+                opening.add_done_callback(lambda _: self._opening.pop(session_id, None))
+            # A cancelled request must not cancel the opening other requests wait for
+            session = await asyncio.shield(opening)
+        session.touch()
+        return session
+    
+    async def _open(self, session_id: str, account_id: Optional[str]) -> Session:
+        """Open a session and its account on worker threads and register it."""
+        # Without an account id the session gets a private account; a shared one with the
+        # same id stays shared, since the registry counts every holder
+        shared = account_id is not None
+        account_id = account_id or session_id
+        account = await asyncio.to_thread(self.accounts.acquire, account_id, shared)
+        try:
+            session = await asyncio.to_thread(Session, session_id, account_id, account, self.config)
+        except BaseException:
+            await asyncio.to_thread(self.accounts.release, account_id)
+            raise
+        self._sessions[session_id] = session
+        return session
+    
+    def remove(self, session_id: str, discard: bool = False) -> bool:
+        """
+        Drop a session, returning whether it existed.
+        
+        Args:
+            session_id: Session to drop
+            discard: Also delete its checkpoint; otherwise the session resumes
+                from it when its id is used again
+        """
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        if discard:
+            session.app.discard_checkpoint()
+        session.app.close()
+        # Private accounts go away with their last session, shared ones stay in the registry
+        self.accounts.release(session.account_id)
+        return True
+    
+    def expire_idle(self) -> int:
+        """
+        Drop sessions that have been idle for too long.
+        
+        Sessions with a turn in progress or an open WebSocket are kept, so a
+        quiet client does not find its session closed under it.
+        
+        Returns:
+            Number of sessions dropped
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [
+            session_id for session_id, session in self._sessions.items()
+            if session.last_active < cutoff and not session.lock.locked() and not session.sockets
+        ]
+        for session_id in expired:
+            self.remove(session_id)
+        return len(expired)
+    
+    def close_all(self):
+        """Drop every session and account, flushing their ledgers."""
+        for session_id in list(self._sessions):
+            self.remove(session_id)
+        self.accounts.close_all()
+
+
+def _read_message(payload) -> Optional[str]:
+    """Extract the user message from a request payload."""
+    if isinstance(payload, dict):
+        payload = payload.get("message")
+    if isinstance(payload, str) and payload.strip():
+        return payload.strip()
+    return None
+
+
+def _invalid_id(name: str) -> web.Response:
+    """Reject a session or account id that is not a plain name."""
+    return web.json_response(
+        {"error": f"Invalid {name}: expected 1-128 letters, digits, \"_\" or \"-\""}, status=400
+    )
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """Report liveness and the number of active sessions."""
+    return web.json_response({"status": "ok", "sessions": len(request.app["sessions"])})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """Export telemetry in the Prometheus text format, or as JSON with ?format=json."""
+    if not app_config.telemetry_enabled:
+        return web.json_response({"error": "Telemetry is disabled"}, status=404)
+    telemetry = get_telemetry(app_config.telemetry_jsonl_path)
+    if request.query.get("format") == "json":
+        return web.json_response(telemetry.snapshot())
+    return web.Response(text=telemetry.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+async def handle_create_session(request: web.Request) -> web.Response:
+    """Create a new session, optionally on a shared account."""
+    account_id = None
+    if request.can_read_body:
+        try:
+            payload = await request.json()
+        except json.JSONDecodeError:
+            payload = None
+        if isinstance(payload, dict):
+            account_id = payload.get("account_id")
+    # Account ids name ledger directories and database rows, so only plain names are accepted
+    if account_id is not None and not is_valid_session_id(account_id):
+        return _invalid_id("account_id")
+    
+    session = await request.app["sessions"].get_or_create(account_id=account_id)
+    if session is None:
+        return web.json_response({"error": "Too many sessions"}, status=503)
+    return web.json_response({"session_id": session.session_id, "account_id": session.account_id}, status=201)
+
+
+async def handle_delete_session(request: web.Request) -> web.Response:
+    """Delete a session."""
+    if not is_valid_session_id(request.match_info["session_id"]):
+        return _invalid_id("session_id")
+    if not request.app["sessions"].remove(request.match_info["session_id"], discard=True):
+        return web.json_response({"error": "Unknown session"}, status=404)
+    return web.json_response({"deleted": True})
+
+
+async def handle_message(request: web.Request) -> web.Response:
+    """Process one user message and return the complete turn."""
+    if not is_valid_session_id(request.match_info["session_id"]):
+        return _invalid_id("session_id")
+    try:
+        user_input = _read_message(await request.json())
+    except json.JSONDecodeError:
+        user_input = None
+    if user_input is None:
+        return web.json_response({"error": "Expected {\"message\": \"...\"}"}, status=400)
+    
+    session = await request.app["sessions"].get_or_create(request.match_info["session_id"])
+    if session is None:
+        return web.json_response({"error": "Too many sessions"}, status=503)
+    
+    async with session.lock:
+        # DELETE /sessions/<id> may have closed the app while this turn waited
+        if request.app["sessions"].get(session.session_id) is not session:
+            return web.json_response({"error": "Session ended"}, status=410)
+        result = await session.app.aprocess_user_input(user_input)
+        session.touch()
+    return web.json_response(result)
+
+
+async def handle_websocket(request: web.Request) -> web.WebSocketResponse:
+    """Stream turn events for each message received on the socket."""
+    if not is_valid_session_id(request.match_info["session_id"]):
+        return _invalid_id("session_id")
+    session = await request.app["sessions"].get_or_create(request.match_info["session_id"])
+    if session is None:
+        return web.json_response({"error": "Too many sessions"}, status=503)
+    
+    sessions = request.app["sessions"]
+    ws = web.WebSocketResponse(heartbeat=30.0)
+    session.sockets += 1
+    try:
+        await ws.prepare(request)
+        await ws.send_json({"type": "session", "session_id": session.session_id})
+        
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                user_input = _read_message(json.loads(msg.data))
+            except json.JSONDecodeError:
+                user_input = _read_message(msg.data)
+            if user_input is None:
+                continue
+            
+            async with session.lock:
+                # DELETE /sessions/<id> closes the app; never run a turn on it
+                if sessions.get(session.session_id) is not session:
+                    await ws.send_json({"type": "error", "message": "Session ended"})
+                    await ws.close()
+                    break
+                async for event in session.app.astream_turn(user_input):
+                    await ws.send_json(event)
+                session.touch()
+    finally:
+        session.sockets -= 1
+        # The idle timeout starts when the client disconnects
+        session.touch()
+    
+    return ws
+
+
+async def _expire_sessions(app: web.Application):
+    """Periodically drop idle sessions."""
+    sessions = app["sessions"]
+    interval = max(1.0, min(60.0, sessions.idle_timeout / 2))
+    while True:
+        await asyncio.sleep(interval)
+        sessions.expire_idle()
+
+
+def _shared_backend(config: LLMConfig):
+    """The backend or endpoint pool every session's assistant uses, if any."""
+    if config.provider.lower() != "ollama":
+        return None
+    return get_pool(config) if config.endpoints else get_backend(config)
+
+
+async def _start_background_tasks(app: web.Application):
+    config = app["sessions"].config
+    backend = _shared_backend(config)
+    if backend is not None:
+        # Load the model before the first session arrives; never block the event loop
+        if app_config.telemetry_enabled:
+            get_telemetry(app_config.telemetry_jsonl_path).add_collector(backend.gauges)
+            if config.scheduler_enabled:
+                get_telemetry(app_config.telemetry_jsonl_path).add_collector(get_scheduler(config).gauges)
+        if config.warmup:
+            backend.start(background=True, health_check_interval=config.health_check_interval)
+    app["expiry_task"] = asyncio.create_task(_expire_sessions(app))
+
+
+async def _stop_background_tasks(app: web.Application):
+    app["expiry_task"].cancel()
+    app["sessions"].close_all()
+    config = app["sessions"].config
+    backend = _shared_backend(config)
+    if backend is not None:
+        if config.scheduler_enabled:
+            get_scheduler(config).close()
+        # Async connections are closed on the loop that opened them
+        await backend.aclose()
+        if config.cascade_small_model:
+            small_config = config.model_copy(update={"model_name": config.cascade_small_model})
+            await (get_pool(small_config) if small_config.endpoints else get_backend(small_config)).aclose()
+    if app_config.telemetry_enabled:
+        get_telemetry().close()
+
+
+def create_app(max_sessions: Optional[int] = None, idle_timeout: Optional[float] = None) -> web.Application:
+    """
+    Create the aiohttp application.
+    
+    Args:
+        max_sessions: Maximum number of concurrent sessions
+        idle_timeout: Seconds before an idle session is dropped
+        
+    Returns:
+        Configured aiohttp application
+    """
+    config = llm_config
+    if config.scheduler_enabled is None:
+        # Only the server has sessions competing for the model; the CLI calls it directly
+        config = config.model_copy(update={"scheduler_enabled": True})
+    app = web.Application()
+    accounts = AccountRegistry(
+        shards=banking_config.registry_shards,
+        initial_balance=banking_config.initial_balance,
+        currency=banking_config.currency,
+        account_factory=BankBotApp._open_account
+    )
+    app["sessions"] = SessionManager(
+        max_sessions=max_sessions or server_config.max_sessions,
+        idle_timeout=idle_timeout or server_config.session_idle_timeout,
+        accounts=accounts,
+        config=config
+    )
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_post("/sessions", handle_create_session)
+    app.router.add_delete("/sessions/{session_id}", handle_delete_session)
+    app.router.add_post("/sessions/{session_id}/messages", handle_message)
+    app.router.add_get("/sessions/{session_id}/ws", handle_websocket)
+    app.on_startup.append(_start_background_tasks)
+    app.on_cleanup.append(_stop_background_tasks)
+    return app
+
+
+def main():
+    """Run the server."""
+    web.run_app(create_app(), host=server_config.host, port=server_config.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Incremental session checkpoints: a compressed base frame followed by small per-turn delta frames."""
+
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import ormsgpack
+import zstandard
+
+from ..banking.history import TransactionHistory
+
+
+FORMAT_VERSION = 1
+
+# Every frame is its payload length and CRC32 followed by a zstd-compressed msgpack map
+_HEADER = struct.Struct("<II")
+
+# Deltas may grow to this multiple of the base frame before the file is rewritten as one base
+COMPACT_RATIO = 1.0
+
+# Smallest base size used for that comparison, so short sessions are not rewritten every turn
+_MIN_COMPACT_BYTES = 4096
+
+
+@dataclass
+class SessionState:
+    """What a session checkpoint holds."""
+    
+    messages: List[Tuple[str, str]] = field(default_factory=list)
+    summary: str = ""
+    balance: Optional[float] = None
+    history: Optional[TransactionHistory] = None
+    
+    @property
+    def has_account(self) -> bool:
+        """Whether the checkpoint includes account state."""
+        return self.balance is not None and self.history is not None
+
+
+class SessionCheckpoint:
+    """
+    Checkpoint file of one session.
+    
+    The first save writes a base frame with the whole state. Later saves
+    append a delta frame with only what changed: messages evicted from the
+    front of the history, messages added at its end, the summary if it
+    changed, and the transactions recorded since. Once the deltas outgrow
+    the base, the file is rewritten as a single base frame. A torn frame
+    at the end, left by a crash, is dropped when the file is loaded.
+    """
+    
+    def __init__(self, path: str, level: int = 3, compact_ratio: float = COMPACT_RATIO):
+        """
+        Initialize the checkpoint; the file is not touched until load or save.
+        
+        Args:
+            path: Checkpoint file
+            level: zstd compression level
+            compact_ratio: Delta bytes per base byte that trigger a rewrite
+        """
+        self.path = path
+        self.level = level
+        self.compact_ratio = compact_ratio
+        self.bytes_written = 0
+        self._compressor: Optional[zstandard.ZstdCompressor] = None
+        self._loaded = False
+        self._saved_messages: List[Tuple[str, str]] = []
+        self._saved_summary = ""
+        self._saved_balance: Optional[float] = None
+        self._saved_rows = 0
+        self._base_bytes = 0
+        self._delta_bytes = 0
+    
+    def exists(self) -> bool:
+        """Whether a checkpoint has been written."""
+        return os.path.exists(self.path)
+    
+    def load(self) -> Optional[SessionState]:
+        """
+        Read the base frame and apply every delta after it.
+        
+        Returns:
+            Checkpointed state, or None if there is no checkpoint
+        """
+        self._loaded = True
+        try:
+            with open(self.path, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return None
+        
+        decompressor = zstandard.ZstdDecompressor()
+        state = None
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            length, checksum = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            frame = ormsgpack.unpackb(decompressor.decompress(payload))
+            if frame["v"] != FORMAT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version: {frame['v']}")
+            if frame["kind"] == "base":
+                state = SessionState()
+                self._base_bytes, self._delta_bytes = _HEADER.size + length, 0
+            elif state is None:
+                break
+            else:
+                self._delta_bytes += _HEADER.size + length
+            self._apply(state, frame)
+            offset = start + length
+        
+        if offset < len(data):
+            # Drop the torn tail so the next delta is appended after the last good frame
+            os.truncate(self.path, offset)
+        if state is not None:
+            self._mark_saved(state)
+        return state
+    
+    @staticmethod
+    def _apply(state: SessionState, frame: Dict):
+        """Apply one frame to the state being loaded."""
+        if frame.get("drop"):
+            del state.messages[:frame["drop"]]
+        state.messages.extend((message_type, content) for message_type, content in frame.get("messages", ()))
+        if "summary" in frame:
+            state.summary = frame["summary"]
+        account = frame.get("account")
+        if account:
+            rows = TransactionHistory.from_bytes(account["rows"], account["count"], account["currency"])
+            if frame["kind"] == "base" or state.history is None:
+                state.history = rows
+            else:
+                state.history.extend(rows.codes, rows.amounts, rows.balances_before, rows.balances_after, rows.timestamps)
+            state.balance = account["balance"]
+    
+    def _mark_saved(self, state: SessionState):
+        """Remember what the file now holds, to compute the next delta."""
+        self._saved_messages = list(state.messages)
+        self._saved_summary = state.summary
+        self._saved_balance = state.balance
+        self._saved_rows = len(state.history) if state.history is not None else 0
+    
+    def _dropped(self, messages: List[Tuple[str, str]]) -> int:
+        """Count the saved messages evicted from the front since the last save."""
+        saved = self._saved_messages
+        for drop in range(len(saved)):
+            kept = len(saved) - drop
+            if saved[drop:] == messages[:kept]:
+                return drop
+        return len(saved)
+    
+    def save(self, state: SessionState) -> int:
+        """
+        Append the changes since the last save, or rewrite the file when the deltas grew too large.
+        
+        Args:
+            state: Current session state
+            
+        Returns:
+            Bytes written, 0 if nothing changed
+        """
+        if not self._loaded:
+            self.load()
+        rows = len(state.history) if state.history is not None else 0
+        if (not self._base_bytes or rows < self._saved_rows
+                or self._delta_bytes > self.compact_ratio * max(self._base_bytes, _MIN_COMPACT_BYTES)):
+            return self._write_base(state)
+        
+        frame = {"v": FORMAT_VERSION, "kind": "delta"}
+        drop = self._dropped(state.messages)
+        if drop:
+            frame["drop"] = drop
+        added = state.messages[len(self._saved_messages) - drop:]
+        if added:
+            frame["messages"] = added
+        if state.summary != self._saved_summary:
+            frame["summary"] = state.summary
+        if state.has_account and (rows > self._saved_rows or state.balance != self._saved_balance):
+            frame["account"] = self._account(state, self._saved_rows, rows)
+        if len(frame) == 2:
+            return 0
+        
+        written = self._append(frame)
+        self._delta_bytes += written
+        self._mark_saved(state)
+        return written
+    
+    @staticmethod
+    def _account(state: SessionState, start: int, stop: int) -> Dict:
+        """Account part of a frame with the transactions from start to stop."""
+        return {
+            "balance": state.balance,
+            "currency": state.history.currency,
+            "count": stop - start,
+            "rows": state.history.to_bytes(start, stop),
+        }
+    
+    def _encode(self, frame: Dict) -> bytes:
+        """Compress one frame and prefix its header."""
+        if self._compressor is None:
+            self._compressor = zstandard.ZstdCompressor(level=self.level)
+        payload = self._compressor.compress(ormsgpack.packb(frame))
+        return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+    
+    def _append(self, frame: Dict) -> int:
+        """Append one frame to the file."""
+        data = self._encode(frame)
+        with open(self.path, "ab") as fh:
+            fh.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+    
+    def _write_base(self, state: SessionState) -> int:
+        """Replace the file with a single base frame."""
+        frame = {"v": FORMAT_VERSION, "kind": "base", "messages": state.messages, "summary": state.summary}
+        if state.has_account:
+            frame["account"] = self._account(state, 0, len(state.history))
+        data = self._encode(frame)
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write aside and rename, so a crash leaves either the old or the new checkpoint
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as fh:
+            fh.write(data)
+        os.replace(temporary, self.path)
+        
+        self.bytes_written += len(data)
+        self._base_bytes, self._delta_bytes = len(data), 0
+        self._mark_saved(state)
+        return len(data)
+    
+    def delete(self):
+        """Remove the checkpoint file."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self._loaded = True
+        self._base_bytes, self._delta_bytes = 0, 0
+        self._mark_saved(SessionState())
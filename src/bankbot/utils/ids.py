@@ -0,0 +1,40 @@
+"""Session and account identifier helpers."""
+
+import hashlib
+import re
+
+# Ids accepted from clients: URL paths, request bodies and batch input files
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+_PLAIN_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def is_valid_session_id(value) -> bool:
+    """
+    Check an id supplied by a client.
+    
+    Args:
+        value: Candidate session or account id
+        
+    Returns:
+        True if it is 1-128 letters, digits, underscores or hyphens
+    """
+    return isinstance(value, str) and SESSION_ID_PATTERN.fullmatch(value) is not None
+
+
+def safe_file_name(value: str) -> str:
+    """
+    Turn an id into a name that can only refer to an entry of its parent directory.
+    
+    Plain names are kept so files stay recognizable; anything else, such as
+    "..", "/tmp/evil" or "a/b", is replaced by its SHA-256.
+    
+    Args:
+        value: Session or account id
+        
+    Returns:
+        File or directory name
+    """
+    if _PLAIN_NAME.fullmatch(value):
+        return value
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
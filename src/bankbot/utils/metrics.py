@@ -0,0 +1,172 @@
+"""Latency metrics for conversation turns."""
+
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple, ContextManager
+
+
+@dataclass
+class TurnMetrics:
+    """Timings of a single streamed turn, relative to when the turn started."""
+    
+    started: float = field(default_factory=time.perf_counter)
+    time_to_first_output: Optional[float] = None
+    time_to_action: Optional[float] = None
+    total_time: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    
+    def mark_output(self):
+        """Record the first time text was shown to the user."""
+        if self.time_to_first_output is None:
+            self.time_to_first_output = time.perf_counter() - self.started
+    
+    def mark_action(self):
+        """Record the first time an action was executed."""
+        if self.time_to_action is None:
+            self.time_to_action = time.perf_counter() - self.started
+    
+    def finish(self):
+        """Record the end of the turn."""
+        self.total_time = time.perf_counter() - self.started
+
+
+class LatencyStats:
+    """Aggregate turn metrics over a session using running sums."""
+    
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.turns = 0
+        self._sums = {"time_to_first_output": 0.0, "time_to_action": 0.0, "total_time": 0.0, "prompt_tokens": 0}
+        self._counts = {"time_to_first_output": 0, "time_to_action": 0, "total_time": 0, "prompt_tokens": 0}
+    
+    def record(self, metrics: TurnMetrics):
+        """
+        Add a finished turn.
+        
+        Args:
+            metrics: Metrics of the finished turn
+        """
+        self.turns += 1
+        for name in self._sums:
+            value = getattr(metrics, name)
+            if value is not None:
+                self._sums[name] += value
+                self._counts[name] += 1
+    
+    def _mean(self, name: str) -> Optional[float]:
+        """Average of a recorded metric, or None if it was never observed."""
+        return self._sums[name] / self._counts[name] if self._counts[name] else None
+    
+    @property
+    def avg_time_to_first_output(self) -> Optional[float]:
+        """Average time until the first text was shown."""
+        return self._mean("time_to_first_output")
+    
+    @property
+    def avg_time_to_action(self) -> Optional[float]:
+        """Average time until the first action ran, over turns with an action."""
+        return self._mean("time_to_action")
+    
+    @property
+    def avg_total_time(self) -> Optional[float]:
+        """Average turn duration."""
+        return self._mean("total_time")
+    
+    @property
+    def avg_prompt_tokens(self) -> Optional[float]:
+        """Average estimated prompt tokens per LLM turn."""
+        return self._mean("prompt_tokens")
+    
+    def summary(self) -> str:
+        """Get a one-line human readable summary."""
+        def fmt(value: Optional[float]) -> str:
+            return f"{value:.2f}s" if value is not None else "n/a"
+        
+        return (
+            f"Streaming: {self.turns} turns, "
+            f"first output {fmt(self.avg_time_to_first_output)}, "
+            f"action {fmt(self.avg_time_to_action)}, "
+            f"total {fmt(self.avg_total_time)}, "
+            f"prompt {self.avg_prompt_tokens or 0:.0f} tokens"
+        )
+
+
+class StageProfiler:
+    """
+    Collect wall-clock durations of the stages of a turn.
+    
+    Disabled profilers hand out a shared no-op context, so instrumented
+    code costs next to nothing. The spans of the current turn are kept
+    for telemetry; every sample is only kept with keep_samples, for
+    benchmarks that summarize whole runs.
+    """
+    
+    def __init__(self, enabled: bool = False, keep_samples: bool = True):
+        """
+        Initialize an empty profiler.
+        
+        Args:
+            enabled: Whether stages are timed
+            keep_samples: Whether every sample is kept for summary()
+        """
+        self.enabled = enabled
+        self.keep_samples = keep_samples
+        self.samples: Dict[str, List[float]] = {}
+        self.spans: List[Tuple[str, float, float]] = []
+    
+    def begin_turn(self):
+        """Start collecting the spans of a new turn."""
+        self.spans = []
+    
+    def stage(self, name: str) -> ContextManager:
+        """
+        Time the enclosed block as one sample of a stage.
+        
+        Args:
+            name: Stage name, e.g. "prompt_build" or "parse"
+            
+        Returns:
+            Context manager recording the block's duration
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+    
+    @contextmanager
+    def _timed(self, name: str):
+        """Record the duration of the block, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            self.spans.append((name, started, duration))
+            if self.keep_samples:
+                self.samples.setdefault(name, []).append(duration)
+    
+    def reset(self):
+        """Drop all samples and spans."""
+        self.samples = {}
+        self.spans = []
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize every stage.
+        
+        Returns:
+            Mapping of stage name to count, total and mean/p50/p95/max in seconds
+        """
+        result = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            result[name] = {
+                "count": count,
+                "total": sum(ordered),
+                "mean": sum(ordered) / count,
+                "p50": ordered[(count - 1) // 2],
+                "p95": ordered[int(0.95 * (count - 1))],
+                "max": ordered[-1],
+            }
+        return result
@@ -2,12 +2,144 @@
 
 import json
 import re
-from typing import Optional, Dict, Tuple
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Tuple, NamedTuple, Union
+
+
+_TEXT_SPECIAL = re.compile(r"[{`]")
+_OBJECT_SPECIAL = re.compile(r"[{}\"\\]")
+
+
+class Segment(NamedTuple):
+    """A piece of a parsed response."""
+    
+    kind: str  # "text", "action" or "invalid"
+    value: Union[str, Dict]
+
+
+@dataclass
+class ParsedResponse:
+    """A response split into text and actions, in the order they appeared."""
+    
+    segments: List[Segment] = field(default_factory=list)
+    
+    @property
+    def text(self) -> str:
+        """Conversational text with every JSON object removed."""
+        return "".join(value for kind, value in self.segments if kind == "text").strip()
+    
+    @property
+    def actions(self) -> List[Dict]:
+        """Actions in the order they should be executed."""
+        return [value for kind, value in self.segments if kind == "action"]
+    
+    @property
+    def invalid(self) -> List[str]:
+        """Raw JSON-like fragments that mentioned an action but could not be repaired."""
+        return [value for kind, value in self.segments if kind == "invalid"]
+
+
+def _repair_json(candidate: str) -> str:
+    """
+    Rewrite common LLM JSON defects into valid JSON in one pass.
+    
+    Handles single-quoted strings, trailing commas, unquoted keys and
+    Python literals (True, False, None).
+    """
+    out = []
+    i = 0
+    length = len(candidate)
+    while i < length:
+        char = candidate[i]
+        
+        if char in "\"'":
+            # Copy a string, normalizing it to double quotes
+            quote = char
+            out.append('"')
+            i += 1
+            while i < length and candidate[i] != quote:
+                char = candidate[i]
+                if char == "\\" and i + 1 < length:
+                    escaped = candidate[i + 1]
+                    out.append(escaped if escaped == "'" else char + escaped)
+                    i += 2
+                    continue
+                out.append('\\"' if char == '"' else char)
+                i += 1
+            out.append('"')
+            i += 1
+            continue
+        
+        if char == ",":
+            j = i + 1
+            while j < length and candidate[j].isspace():
+                j += 1
+            if j < length and candidate[j] in "}]":
+                i = j
+                continue
+        
+        if char.isalpha() or char == "_":
+            j = i
+            while j < length and (candidate[j].isalnum() or candidate[j] == "_"):
+                j += 1
+            word = candidate[i:j]
+            k = j
+            while k < length and candidate[k].isspace():
+                k += 1
+            if k < length and candidate[k] == ":":
+                out.append(f'"{word}"')
+            else:
+                out.append({"True": "true", "False": "false", "None": "null"}.get(word, word))
+            i = j
+            continue
+        
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def load_action(candidate: str) -> Tuple[Optional[Dict], bool]:
+    """
+    Decode a closed JSON object, repairing it if needed.
+    
+    Args:
+        candidate: Text from an opening to its matching closing brace
+        
+    Returns:
+        Tuple of (action dictionary or None, whether the candidate looked like a broken action)
+    """
+    try:
+        parsed = json.loads(candidate)
+    except json.JSONDecodeError:
+        try:
+            parsed = json.loads(_repair_json(candidate))
+        except json.JSONDecodeError:
+            return None, "action" in candidate
+    
+    if isinstance(parsed, dict) and ResponseParser.validate_action(parsed):
+        return parsed, False
+    return None, False
 
 
 class ResponseParser:
     """Parse LLM responses to extract actions and conversational text."""
     
+    @staticmethod
+    def parse(text: str) -> ParsedResponse:
+        """
+        Split a complete response into text and actions in a single pass.
+        
+        Args:
+            text: Full response text
+            
+        Returns:
+            ParsedResponse with segments in their original order
+        """
+        parser = StreamingResponseParser()
+        parser.feed(text)
+        parser.close()
+        return parser.result
+    
     @staticmethod
     def extract_json(text: str) -> Optional[Dict]:
         """
@@ -17,18 +149,10 @@ class ResponseParser:
             text: Text containing JSON
             
         Returns:
-            Parsed JSON dictionary or None
+            First action dictionary or None
         """
-        json_match = re.search(r'\{[^}]+\}', text)
-        
-        if json_match:
-            try:
-                json_str = json_match.group(0)
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                return None
-        
-        return None
+        actions = ResponseParser.parse(text).actions
+        return actions[0] if actions else None
     
     @staticmethod
     def extract_conversational_text(text: str) -> str:
@@ -41,7 +165,7 @@ class ResponseParser:
         Returns:
             Text without JSON
         """
-        return re.sub(r'\{[^}]+\}', '', text).strip()
+        return ResponseParser.parse(text).text
     
     @staticmethod
     def parse_response(text: str) -> Tuple[Optional[str], Optional[Dict]]:
@@ -52,14 +176,13 @@ class ResponseParser:
             text: Full response text
             
         Returns:
-            Tuple of (conversational_text, action_dict)
+            Tuple of (conversational_text, first action_dict)
         """
-        conversational_text = ResponseParser.extract_conversational_text(text)
-        action_dict = ResponseParser.extract_json(text)
-        
+        parsed = ResponseParser.parse(text)
+        actions = parsed.actions
         return (
-            conversational_text if conversational_text else None,
-            action_dict
+            parsed.text or None,
+            actions[0] if actions else None
         )
     
     @staticmethod
@@ -78,3 +201,186 @@ class ResponseParser:
         
         required_fields = ["action"]
         return all(field in action_dict for field in required_fields)
+
+
+class StreamingResponseParser:
+    """
+    Incrementally split a streamed LLM response into text and actions.
+    
+    Text outside of JSON objects is released as soon as it arrives. Text
+    inside braces is held back until the object closes, at which point it
+    is either returned as an action or released as plain text. Only double
+    quotes open strings, as in JSON, so an apostrophe in prose between
+    braces does not hide the rest of the reply. An opening brace that never
+    closes is released as text at the end, and what follows its next
+    opening brace is parsed again. Markdown code fence markers around JSON
+    are dropped, and objects with common defects are repaired before they
+    are decoded.
+    """
+    
+    def __init__(self):
+        """Initialize an empty parser state."""
+        self._pending = []
+        self._depth = 0
+        self._quote = None
+        self._escaped = False
+        self._backticks = 0
+        self._in_fence_tag = False
+        self._chunks = []
+        self.result = ParsedResponse()
+    
+    @property
+    def full_text(self) -> str:
+        """Get the complete response received so far."""
+        return "".join(self._chunks)
+    
+    def feed(self, chunk: str) -> Tuple[str, List[Dict]]:
+        """
+        Consume the next chunk of the response.
+        
+        Args:
+            chunk: Newly received text
+            
+        Returns:
+            Tuple of (text safe to display, actions completed in this chunk)
+        """
+        self._chunks.append(chunk)
+        return self._scan(chunk)
+    
+    def _scan(self, chunk: str) -> Tuple[str, List[Dict]]:
+        """Parse text from the current state; see feed."""
+        text = []
+        actions = []
+        segments = self.result.segments
+        # Index into text of the first character not yet recorded as a segment
+        recorded = 0
+        
+        i = 0
+        length = len(chunk)
+        while i < length:
+            if self._depth == 0:
+                if not self._backticks and not self._in_fence_tag:
+                    # Copy plain text up to the next brace or backtick in one go
+                    found = _TEXT_SPECIAL.search(chunk, i)
+                    end = found.start() if found else length
+                    if end > i:
+                        text.append(chunk[i:end])
+                        i = end
+                        continue
+                
+                char = chunk[i]
+                i += 1
+                if self._in_fence_tag:
+                    # Swallow the language tag of an opening fence, e.g. ```json
+                    if char.isalnum():
+                        continue
+                    self._in_fence_tag = False
+                    if char == "\n":
+                        continue
+                
+                if char == "`":
+                    self._backticks += 1
+                    if self._backticks == 3:
+                        self._backticks = 0
+                        self._in_fence_tag = True
+                    continue
+                if self._backticks:
+                    text.append("`" * self._backticks)
+                    self._backticks = 0
+                
+                if char == "{":
+                    self._depth = 1
+                    self._pending.append(char)
+                else:
+                    text.append(char)
+                continue
+            
+            if not self._escaped:
+                found = _OBJECT_SPECIAL.search(chunk, i)
+                end = found.start() if found else length
+                if end > i:
+                    self._pending.append(chunk[i:end])
+                    i = end
+                    continue
+            
+            char = chunk[i]
+            i += 1
+            self._pending.append(char)
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char == '"':
+                self._quote = char
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = "".join(self._pending)
+                    self._pending = []
+                    action_dict, broken = load_action(candidate)
+                    if action_dict is None and not broken:
+                        text.append(candidate)
+                        continue
+                    
+                    if recorded < len(text):
+                        segments.append(Segment("text", "".join(text[recorded:])))
+                        recorded = len(text)
+                    if action_dict is not None:
+                        segments.append(Segment("action", action_dict))
+                        actions.append(action_dict)
+                    else:
+                        segments.append(Segment("invalid", candidate))
+        
+        if recorded < len(text):
+            segments.append(Segment("text", "".join(text[recorded:])))
+        return "".join(text), actions
+    
+    def close(self) -> Tuple[str, List[Dict]]:
+        """
+        Finish parsing and release any unterminated JSON as text.
+        
+        An object that never closed is released up to its next opening
+        brace, and the rest is parsed again, so a stray brace in prose
+        does not swallow the actions after it.
+        
+        Returns:
+            Tuple of (remaining text to display, actions recovered after an unclosed brace)
+        """
+        texts = ["`" * self._backticks]
+        if texts[0]:
+            self.result.segments.append(Segment("text", texts[0]))
+        actions = []
+        pending = "".join(self._pending)
+        self._reset()
+        while pending:
+            restart = pending.find("{", 1)
+            head = pending if restart < 0 else pending[:restart]
+            self.result.segments.append(Segment("text", head))
+            texts.append(head)
+            if restart < 0:
+                break
+            text, found = self._scan(pending[restart:])
+            texts.append(text)
+            actions.extend(found)
+            pending = "".join(self._pending)
+            self._reset()
+        return "".join(texts), actions
+    
+    def _reset(self):
+        """Forget the unterminated object and any partial fence."""
+        self._pending = []
+        self._depth = 0
+        self._quote = None
+        self._escaped = False
+        self._backticks = 0
+        self._in_fence_tag = False
+    
+    @property
+    def invalid(self) -> List[str]:
+        """Broken action objects seen so far."""
+        return self.result.invalid
@@ -0,0 +1,263 @@
+"""Process-wide turn telemetry with Prometheus and JSON lines export."""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Dict, List, Tuple
+
+
+# Upper bounds in seconds; stages range from microseconds of parsing to seconds of generation
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Ollama reports durations in nanoseconds under these keys
+MODEL_PHASES = {"load": "load_duration", "prompt_eval": "prompt_eval_duration", "eval": "eval_duration"}
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds, as Prometheus expects."""
+    
+    def __init__(self, bounds: Tuple[float, ...] = DURATION_BUCKETS):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            bounds: Sorted upper bounds of the buckets
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        """Add one observation."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Get (le, cumulative count) pairs including +Inf."""
+        result = []
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            result.append((repr(bound), running))
+        result.append(("+Inf", running + self.counts[-1]))
+        return result
+
+
+@dataclass
+class TurnRecord:
+    """What happened during one turn, filled in while it runs."""
+    
+    session_id: Optional[str] = None
+    started: float = field(default_factory=time.perf_counter)
+    route: str = "llm"
+    actions: List[Tuple[str, bool]] = field(default_factory=list)
+    parse_failed: bool = False
+    error: bool = False
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    """Format a label set."""
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Telemetry:
+    """
+    Aggregate per-turn stage timings, model usage and outcome counters.
+    
+    Everything is kept as running sums and fixed-bucket histograms, so the
+    memory used does not grow with traffic. Each finished turn can also be
+    appended to a JSON lines file for offline analysis.
+    """
+    
+    def __init__(self, jsonl_path: Optional[str] = None):
+        """
+        Initialize empty telemetry.
+        
+        Args:
+            jsonl_path: File that receives one JSON line per turn
+        """
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._collectors: List[Callable[[], List[Tuple[str, Tuple[Tuple[str, str], ...], float]]]] = []
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8", buffering=1) if jsonl_path else None
+    
+    def _inc(self, name: str, labels: Tuple[Tuple[str, str], ...] = (), value: float = 1):
+        """Increment a counter; the caller holds the lock."""
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+    
+    def _observe(self, name: str, labels: Tuple[Tuple[str, str], ...], value: float):
+        """Add a histogram observation; the caller holds the lock."""
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+    
+    def record_turn(self, turn: TurnRecord, spans: List[Tuple[str, float, float]], model_metadata: Optional[Dict] = None,
+                    usage: Optional[Dict] = None):
+        """
+        Record a finished turn.
+        
+        Args:
+            turn: Outcome of the turn
+            spans: (stage, start, duration) tuples from the StageProfiler
+            model_metadata: Ollama response metadata of the turn, if the model was called
+            usage: LangChain usage metadata, used when the backend reports no eval counts
+        """
+        total = time.perf_counter() - turn.started
+        model_metadata = model_metadata or {}
+        usage = usage or {}
+        prompt_tokens = model_metadata.get("prompt_eval_count", usage.get("input_tokens"))
+        completion_tokens = model_metadata.get("eval_count", usage.get("output_tokens"))
+        phases = {
+            phase: model_metadata[key] / 1e9
+            for phase, key in MODEL_PHASES.items()
+            if model_metadata.get(key) is not None
+        }
+        stages = {}
+        for name, _, duration in spans:
+            stages[name] = stages.get(name, 0.0) + duration
+        
+        with self._lock:
+            route = (("route", turn.route),)
+            self._inc("bankbot_turns_total", route)
+            self._observe("bankbot_turn_seconds", route, total)
+            for name, duration in stages.items():
+                self._observe("bankbot_stage_seconds", (("stage", name),), duration)
+            for phase, seconds in phases.items():
+                self._observe("bankbot_model_seconds", (("phase", phase),), seconds)
+            if prompt_tokens:
+                self._inc("bankbot_tokens_total", (("kind", "prompt"),), prompt_tokens)
+            if completion_tokens:
+                self._inc("bankbot_tokens_total", (("kind", "completion"),), completion_tokens)
+            for action, success in turn.actions:
+                self._inc("bankbot_actions_total", (("action", action), ("result", "success" if success else "failure")))
+            if turn.parse_failed:
+                self._inc("bankbot_parse_failures_total")
+            if turn.error:
+                self._inc("bankbot_llm_errors_total")
+            
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps({
+                    "ts": time.time(),
+                    "session": turn.session_id,
+                    "route": turn.route,
+                    "total": total,
+                    "stages": stages,
+                    "model": phases,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "actions": [{"action": action, "success": success} for action, success in turn.actions],
+                    "parse_failed": turn.parse_failed,
+                    "error": turn.error,
+                }) + "\n")
+    
+    def add_collector(self, collector: Callable[[], List[Tuple[str, Tuple[Tuple[str, str], ...], float]]]):
+        """
+        Register a source of gauges read at export time.
+        
+        Args:
+            collector: Callable returning (name, labels, value) tuples
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+    
+    def _gauges(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """Read every registered collector; the caller holds the lock."""
+        return [gauge for collector in self._collectors for gauge in collector()]
+    
+    def snapshot(self) -> Dict:
+        """
+        Get every metric as a JSON-serializable dictionary.
+        
+        Returns:
+            Dictionary with "counters", "histograms" and "gauges" lists
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), "count": histogram.count, "sum": histogram.sum,
+                     "buckets": dict(histogram.cumulative())}
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for name, labels, value in self._gauges()
+                ],
+            }
+    
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        
+        Returns:
+            Exposition text
+        """
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+            for name, labels, value in sorted(self._gauges()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} gauge")
+                    typed.add(name)
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+    
+    def close(self):
+        """Close the JSON lines file."""
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
+
+_shared_telemetry = None
+_shared_lock = threading.Lock()
+
+
+def get_telemetry(jsonl_path: Optional[str] = None) -> Telemetry:
+    """
+    Get the process-wide telemetry, so every session reports into one place.
+    
+    Args:
+        jsonl_path: JSON lines file, used when the telemetry is first created
+        
+    Returns:
+        Shared Telemetry instance
+    """
+    global _shared_telemetry
+    with _shared_lock:
+        if _shared_telemetry is None:
+            _shared_telemetry = Telemetry(jsonl_path)
+    return _shared_telemetry
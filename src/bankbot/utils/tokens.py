@@ -0,0 +1,104 @@
+"""
+Token counting helpers.
+
+Counts are estimates from the text length, not the configured model's
+tokenizer, so they stay cheap enough for every turn; they are used for
+history trimming, which leaves headroom for the error. Prompt budgets are
+checked with get_token_counter, which uses the model's tokenizer when one
+is configured and falls back to the same estimate otherwise.
+"""
+
+import os
+from typing import Callable, Dict, Iterable
+
+from ..config.settings import LLMConfig
+
+# Average characters per token for the small chat models we target
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead for role markers and separators in chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Token counters by tokenizer name, loaded once per process
+_counters: Dict[str, Callable[[str], int]] = {}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(content: str) -> int:
+    """
+    Estimate the tokens a chat message occupies in the prompt.
+    
+    Args:
+        content: Message content
+        
+    Returns:
+        Estimated token count including message overhead
+    """
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def count_messages_tokens(contents: Iterable[str]) -> int:
+    """
+    Estimate the tokens used by several chat messages.
+    
+    Args:
+        contents: Message contents
+        
+    Returns:
+        Estimated token count
+    """
+    return sum(count_message_tokens(content) for content in contents)
+
+
+def get_token_counter(config: LLMConfig) -> Callable[[str], int]:
+    """
+    Get a counter of the tokens a chat message occupies for the configured model.
+    
+    With config.tokenizer set (a Hugging Face tokenizer name or the path
+    of a tokenizer.json), messages are counted with the model's own
+    tokenizer plus the message overhead. Without it the counter is
+    count_message_tokens, the estimate of about four characters per
+    token, which is close for English text but can be off by a third for
+    other languages, numbers and markup.
+    
+    Args:
+        config: LLM configuration
+        
+    Returns:
+        Function from message content to token count
+        
+    Raises:
+        ImportError: If a tokenizer is configured but the tokenizers package is not installed
+    """
+    name = config.tokenizer
+    if not name:
+        return count_message_tokens
+    counter = _counters.get(name)
+    if counter is None:
+        # Imported lazily: optional dependency, only needed when a tokenizer is configured
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise ImportError("LLM_TOKENIZER is set but the tokenizers package is not installed (pip install tokenizers)") from exc
+        tokenizer = Tokenizer.from_file(name) if os.path.isfile(name) else Tokenizer.from_pretrained(name)
+        
+        def counter(content: str) -> int:
+            tokens = len(tokenizer.encode(content, add_special_tokens=False).ids) if content else 0
+            return tokens + MESSAGE_OVERHEAD_TOKENS
+        
+        _counters[name] = counter
+    return counter
@@ -0,0 +1,41 @@
+"""Tool-calling and JSON modes return the same actions as text mode and record the same history."""
+
+import json
+
+from langchain_core.messages import AIMessage
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def _config(mode):
+    return llm_config.model_copy(update={"action_mode": mode, "response_cache_enabled": False})
+
+
+def test_tool_calls_and_schema_replies_become_actions():
+    tool_reply = AIMessage(content="Adding it now.", tool_calls=[
+        {"name": "add", "args": {"amount": 25}, "id": "call-1"},
+        {"name": "check_balance", "args": {}, "id": "call-2"},
+    ])
+    json_reply = json.dumps({"reply": "Adding it now.", "actions": [{"action": "add", "amount": 25}, {"action": "check_balance", "amount": 0}]})
+    
+    histories = []
+    for mode, reply in (("tools", tool_reply), ("json", json_reply)):
+        assistant = BankingAssistant(_config(mode), llm=SimulatedChatModel(responses=[reply]))
+        parsed = assistant.chat_turn("put 25 in and show my balance", 0.0)
+        assert parsed.text == "Adding it now."
+        assert parsed.actions == [{"action": "add", "amount": 25}, {"action": "check_balance", "amount": 0}]
+        assert assistant.schema_tokens() > 0
+        histories.append(assistant.chat_history.messages[-1].content)
+    assert histories[0] == histories[1]
+    assert histories[0].startswith("Adding it now. {")
+
+
+def test_json_mode_turn_runs_its_actions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reply = json.dumps({"reply": "Done.", "actions": [{"action": "add", "amount": 40}, {"action": "withdraw", "amount": 15}]})
+    app = BankBotApp(session_id="json-mode", llm=SimulatedChatModel(responses=[reply]), config=_config("json"))
+    assert app.process_user_input("could you sort out my money please")
+    assert app.account.balance == 25
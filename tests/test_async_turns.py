@@ -0,0 +1,45 @@
+"""Async turns keep blocking work off the event loop."""
+
+import asyncio
+import threading
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config.settings import app_config
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def test_actions_and_end_of_turn_run_on_worker_threads(monkeypatch):
+    app = BankBotApp(session_id="async-test", llm=SimulatedChatModel(responses=['{"action": "add", "amount": 50}']))
+    threads = {}
+    perform_action, end_turn = app.perform_action, app._end_turn
+    
+    def record(name, function):
+        def wrapper(*args):
+            threads[name] = threading.current_thread()
+            return function(*args)
+        return wrapper
+    
+    monkeypatch.setattr(app, "perform_action", record("action", perform_action))
+    monkeypatch.setattr(app, "_end_turn", record("end", end_turn))
+    monkeypatch.setattr(app, "_create_assistant", record("assistant", app._create_assistant))
+    
+    async def run():
+        loop_thread = threading.current_thread()
+        result = await app.aprocess_user_input("put some money in please")
+        return loop_thread, result
+    
+    loop_thread, result = asyncio.run(run())
+    assert result["actions"] and result["actions"][0]["success"]
+    assert result["balance"] == 50
+    assert set(threads) == {"action", "end", "assistant"}
+    assert all(thread is not loop_thread for thread in threads.values())
+
+
+def test_fast_path_turn_does_not_load_the_assistant(monkeypatch):
+    monkeypatch.setattr(app_config, "fast_path_enabled", True)
+    app = BankBotApp(session_id="async-fast-path", llm=SimulatedChatModel(responses=["unused"]))
+    assert app.router is not None
+    result = asyncio.run(app.aprocess_user_input("deposit 20"))
+    assert result["route"] == "fast_path"
+    assert app._assistant is None
+    assert app.assistant.get_history_length() == 2
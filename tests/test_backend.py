@@ -0,0 +1,78 @@
+"""The Ollama backend owns its connection pools and counts requests from any thread."""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+from standin_ollama import BackgroundServer  # noqa: E402
+
+from src.bankbot.config.settings import llm_config  # noqa: E402
+from src.bankbot.llm.backend import OllamaBackend, get_backend, parse_keep_alive  # noqa: E402
+from src.bankbot.llm.pool import get_pool  # noqa: E402
+
+
+def test_sync_and_async_calls_share_the_owned_pools():
+    with BackgroundServer(["--load-seconds", "0", "--ttft", "0", "--tokens-per-second", "0"]) as url:
+        backend = OllamaBackend(llm_config.model_copy(update={"base_url": url, "model_name": "gemma2:2b"}))
+        assert backend.warm_up()
+        model = backend.chat_model()
+        
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: model.invoke([HumanMessage(content="hi")]), range(32)))
+        
+        async def run():
+            await asyncio.gather(*(model.ainvoke([HumanMessage(content="hi")]) for _ in range(16)))
+            await backend.aclose()
+        
+        asyncio.run(run())
+        # Warm-up, 32 sync and 16 async chat requests, none lost to racing increments
+        assert backend.stats.requests == 1 + 32 + 16
+        assert 1 <= backend.stats.connections_opened <= 2 * llm_config.pool_max_connections
+
+
+def test_health_check_reloads_an_unloaded_model():
+    assert parse_keep_alive("-1") == -1 and parse_keep_alive("30m") == "30m" and parse_keep_alive("") is None
+    with BackgroundServer(["--load-seconds", "0", "--keep-alive", "0.2"]) as url:
+        backend = OllamaBackend(llm_config.model_copy(update={"base_url": url, "model_name": "gemma2:2b", "keep_alive": None}))
+        backend.start(background=False)
+        assert backend.stats.healthy and backend.stats.warmup_seconds is not None
+        assert backend.health_check() and backend.stats.reloads == 0
+        time.sleep(0.5)
+        assert backend.health_check() and backend.stats.reloads == 1
+        backend.close()
+    
+    unreachable = OllamaBackend(llm_config.model_copy(update={"base_url": "http://127.0.0.1:9"}))
+    assert not unreachable.warm_up() and unreachable.stats.warmup_error
+    assert not unreachable.health_check() and unreachable.stats.health_failures == 1
+    unreachable.close()
+
+
+def test_close_without_a_running_loop():
+    backend = OllamaBackend(llm_config)
+    backend.close()
+
+
+def test_closed_backends_and_pools_are_not_handed_out_again():
+    config = llm_config.model_copy(update={"base_url": "http://127.0.0.1:9", "model_name": "closed-test"})
+    backend = get_backend(config)
+    assert get_backend(config) is backend
+    asyncio.run(backend.aclose())
+    reopened = get_backend(config)
+    assert reopened is not backend
+    reopened.close()
+    fresh = get_backend(config)
+    assert fresh is not reopened
+    fresh.close()
+    
+    pool_config = config.model_copy(update={"endpoints": "http://127.0.0.1:9,http://127.0.0.1:10"})
+    pool = get_pool(pool_config)
+    asyncio.run(pool.aclose())
+    fresh_pool = get_pool(pool_config)
+    assert fresh_pool is not pool
+    fresh_pool.close()
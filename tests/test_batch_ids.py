@@ -0,0 +1,26 @@
+"""Batch input lines are rejected when their session id could escape the data directories."""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.bankbot.batch import BatchRunner
+
+
+@pytest.mark.parametrize("session_id", ["..", "../x", "/abs", "a/b", "", "x" * 129, None, True])
+def test_unsafe_session_ids_are_invalid_lines(session_id):
+    output = io.StringIO()
+    runner = BatchRunner(output)
+    line = json.dumps({"session_id": session_id, "utterance": "balance"})
+    asyncio.run(runner.run([line]))
+    
+    (record,) = [json.loads(text) for text in output.getvalue().splitlines()]
+    assert record["line"] == 1 and record["error"].startswith("Invalid input: Expected a \"session_id\"")
+    assert runner.failed == 1
+
+
+def test_plain_and_numeric_session_ids_are_accepted():
+    assert BatchRunner._parse('{"session_id": "alice-1", "utterance": " hi "}') == ("alice-1", "hi")
+    assert BatchRunner._parse('{"session_id": 42, "utterance": "hi"}') == ("42", "hi")
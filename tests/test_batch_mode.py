@@ -0,0 +1,64 @@
+"""Batch mode replays a JSONL file across sessions, in order within each one, with bounded read-ahead."""
+
+import asyncio
+import io
+import json
+
+from src.bankbot.batch import BatchRunner, run_batch
+from src.bankbot.config.settings import banking_config
+
+
+def _lines(records):
+    return [json.dumps({"session_id": session_id, "utterance": utterance}) for session_id, utterance in records]
+
+
+def test_run_batch_keeps_turns_in_order_per_session(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    records = []
+    for amount in range(1, 6):
+        for session_id in ("alice", "bob", "carol"):
+            records.append((session_id, f"deposit {amount * 10}"))
+    records.append(("alice", "withdraw 500"))
+    (tmp_path / "turns.jsonl").write_text("\n".join(_lines(records) + ["", "not json"]) + "\n", encoding="utf-8")
+    
+    summary = run_batch(str(tmp_path / "turns.jsonl"), parallelism=2)
+    assert summary["turns"] == 16 and summary["sessions"] == 3 and summary["failed"] == 1
+    
+    output = [json.loads(line) for line in (tmp_path / "turns.jsonl.out.jsonl").read_text(encoding="utf-8").splitlines()]
+    (invalid,) = [record for record in output if "session_id" not in record]
+    assert invalid["line"] == 18 and invalid["error"].startswith("Invalid input")
+    alice = [record for record in output if record.get("session_id") == "alice"]
+    assert [record["turn"] for record in alice] == list(range(1, 7))
+    assert [record["balance"] for record in alice] == [10.0, 30.0, 60.0, 100.0, 150.0, 150.0]
+    assert alice[-1]["actions"][0]["success"] is False
+    assert all(record["route"] == "fast_path" for record in alice)
+
+
+def test_read_ahead_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = BatchRunner(io.StringIO(), parallelism=1, max_pending=3)
+    read_ahead = []
+    
+    def lines():
+        for number, line in enumerate(_lines([("s1", "balance")] * 20), 1):
+            read_ahead.append(number - runner.turns)
+            yield line
+    
+    summary = asyncio.run(runner.run(lines()))
+    assert summary["turns"] == 20
+    # The line just read is waiting for a pending slot, the others hold one
+    assert max(read_ahead) == runner.max_pending + 1
+
+
+def test_evicted_idle_sessions_reopen_from_their_ledger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(banking_config, "ledger_path", str(tmp_path / "ledgers"))
+    output = io.StringIO()
+    # Reading one line at a time lets each session go idle before the next line arrives
+    runner = BatchRunner(output, parallelism=1, max_pending=1, max_idle_sessions=0)
+    records = [("a", "deposit 10"), ("b", "deposit 20"), ("a", "deposit 5")]
+    summary = asyncio.run(runner.run(_lines(records)))
+    
+    assert summary["sessions"] == 3
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [record["balance"] for record in results] == [10.0, 20.0, 15.0]
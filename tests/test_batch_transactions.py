@@ -0,0 +1,38 @@
+"""Batches of deposits and withdrawals apply all together or not at all."""
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.ledger import TransactionLedger
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def test_failing_operation_rejects_the_whole_batch(tmp_path):
+    account = BankAccount(initial_balance=50.0, ledger=TransactionLedger(str(tmp_path)))
+    result = account.apply_batch([("deposit", 20.0), ("withdraw", 60.0), ("withdraw", 20.0)])
+    assert not result.success
+    assert (result.failed_index, result.reason) == (2, "insufficient_funds")
+    assert account.balance == 50.0 and len(account.history) == 0
+    
+    assert account.apply_batch([("add", 0.0)]).reason == "non_positive_amount"
+    assert account.apply_batch([("transfer", 5.0)]).reason == "unsupported_action"
+    
+    result = account.apply_batch([("add", 0.1), ("add", 0.2), ("withdraw", 0.3), ("deposit", 10.0)])
+    assert result.success and result.count == 4
+    assert account.balance == 60.0
+    assert [t.balance_after for t in result.transactions] == [50.1, 50.3, 50.0, 60.0]
+    account.close()
+    
+    assert BankAccount(initial_balance=50.0, ledger=TransactionLedger(str(tmp_path))).balance == 60.0
+
+
+def test_batch_action_from_the_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="batch-action", llm=SimulatedChatModel(responses=["unused"]))
+    steps = [{"action": "add", "amount": 40}, {"action": "withdraw", "amount": "15.5"}]
+    assert app.perform_action({"action": "batch", "steps": steps})[0]
+    assert app.account.balance == 24.5
+    
+    success, message = app.perform_action({"action": "batch", "steps": [{"action": "withdraw", "amount": 100}]})
+    assert not success and message
+    assert app.perform_action({"action": "batch", "steps": [{"action": "add"}]})[0] is False
+    assert app.account.balance == 24.5
@@ -0,0 +1,64 @@
+"""The cascade sends simple turns to the small model and escalates its failures to the large one."""
+
+import numpy as np
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.cascade import SEED_EXAMPLES, IntentClassifier, ModelCascade, label_turn
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def test_seed_classifier_routes_simple_and_complex_turns(tmp_path):
+    cascade = ModelCascade(IntentClassifier.fit(SEED_EXAMPLES))
+    assert cascade.route("Hi!") == "small"
+    assert cascade.route("What's my balance?") == "small"
+    assert cascade.route("deposit 50 and then withdraw 20 and convert the rest to dollars") == "large"
+    
+    # A small label with too little margin is not trusted
+    cautious = ModelCascade(cascade.classifier, min_margin=1.0)
+    assert cautious.route("Hi!") == "large" and cautious.stats.ambiguous == 1
+    
+    path = str(tmp_path / "classifier.npz")
+    cascade.classifier.save(path)
+    loaded = IntentClassifier.load(path)
+    assert loaded.labels == cascade.classifier.labels
+    assert np.allclose(loaded.scores("Put 30 in"), cascade.classifier.scores("Put 30 in"))
+
+
+def test_logged_turns_are_labelled_by_outcome():
+    assert label_turn({"utterance": "hi", "actions": []}) == ("hi", "small")
+    assert label_turn({"utterance": "hi", "label": "large"}) == ("hi", "large")
+    assert label_turn({"utterance": "x", "error": "timeout"}) == ("x", "large")
+    two = [{"action": {"action": "add"}}, {"action": {"action": "withdraw"}}]
+    assert label_turn({"utterance": "x", "actions": two, "tier": "small"}) == ("x", "large")
+    assert label_turn({"line": 3, "error": "Invalid input"}) is None
+
+
+def _assistant(small_replies, large_replies):
+    config = llm_config.model_copy(update={"response_cache_enabled": False, "action_mode": "text"})
+    small, large = SimulatedChatModel(responses=small_replies), SimulatedChatModel(responses=large_replies)
+    return BankingAssistant(config=config, llm=large, small_llm=small), small, large
+
+
+def test_simple_turns_use_the_small_model():
+    assistant, small, large = _assistant(["Hello! How can I help?"], ["unused"])
+    turns_before = dict(assistant.cascade.stats.turns)
+    
+    parsed = assistant.chat_turn("Hi!", 100.0)
+    assert parsed.text == "Hello! How can I help?" and assistant.last_tier == "small"
+    assert assistant.cascade.stats.turns["small"] == turns_before["small"] + 1
+    assert assistant.cascade.stats.turns["large"] == turns_before["large"]
+    
+    assistant.chat_turn("deposit 50 and then withdraw 20 and convert the rest to dollars", 100.0)
+    assert assistant.last_tier == "large"
+
+
+def test_unparseable_small_reply_is_escalated():
+    assistant, _, _ = _assistant(['Sure {"action": "add", "amount": }'],
+                                 ['Done! {"action": "add", "amount": 30}'])
+    escalations = assistant.cascade.stats.escalations
+    
+    parsed = assistant.chat_turn("Put 30 in", 100.0)
+    assert parsed.actions == [{"action": "add", "amount": 30}]
+    assert assistant.last_tier == "large"
+    assert assistant.cascade.stats.escalations == escalations + 1
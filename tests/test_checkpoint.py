@@ -0,0 +1,80 @@
+"""Session checkpoints append small deltas, survive torn writes and resume the session."""
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.banking.history import TransactionHistory
+from src.bankbot.config.settings import app_config
+from src.bankbot.llm.simulated import SimulatedChatModel
+from src.bankbot.utils.checkpoint import SessionCheckpoint, SessionState
+
+
+def _state(turns, deposits):
+    history = TransactionHistory()
+    balance = 0.0
+    for _ in range(deposits):
+        history.append("deposit", 10.0, balance, balance + 10.0, timestamp=1.0)
+        balance += 10.0
+    messages = [message for turn in range(turns) for message in (("human", f"question {turn}"), ("ai", f"answer {turn}"))]
+    return SessionState(messages=messages, summary="", balance=balance, history=history)
+
+
+def test_saves_append_deltas_and_load_replays_them(tmp_path):
+    path = str(tmp_path / "session.ckpt")
+    checkpoint = SessionCheckpoint(path)
+    base = checkpoint.save(_state(50, 50))
+    delta = checkpoint.save(_state(51, 51))
+    assert 0 < delta < base
+    assert checkpoint.save(_state(51, 51)) == 0
+    
+    # The oldest turn is evicted: the delta only records how many messages to drop
+    state = _state(52, 52)
+    state.messages = state.messages[2:]
+    state.summary = "earlier: question 0"
+    checkpoint.save(state)
+    
+    loaded = SessionCheckpoint(path).load()
+    assert loaded.messages == state.messages and loaded.summary == "earlier: question 0"
+    assert loaded.balance == 520.0 and len(loaded.history) == 52
+
+
+def test_torn_tail_is_dropped_and_the_next_save_appends_after_it(tmp_path):
+    path = tmp_path / "session.ckpt"
+    checkpoint = SessionCheckpoint(str(path))
+    checkpoint.save(_state(1, 1))
+    checkpoint.save(_state(2, 2))
+    with open(path, "ab") as fh:
+        fh.write(b"\x40\x00\x00\x00torn")
+    
+    resumed = SessionCheckpoint(str(path))
+    assert len(resumed.load().messages) == 4
+    resumed.save(_state(3, 3))
+    assert SessionCheckpoint(str(path)).load().balance == 30.0
+
+
+def test_deltas_are_compacted_into_a_new_base(tmp_path):
+    path = str(tmp_path / "session.ckpt")
+    checkpoint = SessionCheckpoint(path, compact_ratio=0.0)
+    checkpoint.save(_state(1, 0))
+    checkpoint.save(_state(2, 0))
+    assert checkpoint._delta_bytes > 0
+    checkpoint.save(_state(3, 0))
+    assert checkpoint._delta_bytes == 0
+    assert len(SessionCheckpoint(path).load().messages) == 6
+
+
+def test_app_resumes_history_and_account(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_config, "checkpoint_path", str(tmp_path / "checkpoints"))
+    app = BankBotApp(session_id="resume", llm=SimulatedChatModel(responses=["Hello there!"]))
+    app.process_user_input("deposit 40 euros")
+    app.process_user_input("hi")
+    app.close()
+    
+    resumed = BankBotApp(session_id="resume", llm=SimulatedChatModel(responses=["Hello again!"]))
+    assert resumed.account.balance == 40.0
+    # The chat history is restored when the assistant is created
+    messages, _ = resumed.assistant.chat_history.dump()
+    assert [content for _, content in messages][:1] == ["deposit 40 euros"]
+    assert len(messages) == 4
+    resumed.discard_checkpoint()
+    assert not resumed._checkpoint.exists()
+    resumed.close()
@@ -0,0 +1,88 @@
+"""Exchange rates: cross rates are precomputed, batches are vectorized and stale tables are served on failure."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.banking.currency import CurrencyConverter, FileRateProvider, RateProvider, RateTable, StaticRateProvider
+from src.bankbot.banking.history import TransactionHistory
+
+
+RATES = {"USD": 1.25, "GBP": 0.8, "JPY": 160.0}
+
+
+class FlakyProvider(RateProvider):
+    """Serves fixed rates until told to fail."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+    
+    def fetch(self):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("rate service down")
+        return "EUR", dict(RATES)
+
+
+def test_cross_rates_and_batch_conversion():
+    table = RateTable("eur", RATES)
+    assert table.codes == ("EUR", "GBP", "JPY", "USD")
+    assert table.rate("USD", "GBP") == pytest.approx(0.8 / 1.25)
+    assert table.rate("gbp", "jpy") == pytest.approx(200.0)
+    assert np.allclose(np.diag(table.matrix), 1.0)
+    
+    converted = table.convert_many([10.0, 10.0, 100.0], ["EUR", "usd", "JPY"], "GBP")
+    assert np.allclose(converted, [8.0, 6.4, 0.5])
+    assert np.allclose(table.convert_many([1.0, 2.0], "EUR", "USD"), [1.25, 2.5])
+    with pytest.raises(ValueError, match="Unsupported currency: CHF"):
+        table.rate("EUR", "CHF")
+    with pytest.raises(ValueError):
+        RateTable("EUR", {"USD": 0.0})
+
+
+def test_rates_are_cached_and_stale_tables_survive_failures(monkeypatch):
+    provider = FlakyProvider()
+    converter = CurrencyConverter(provider, ttl=60.0, retry_interval=30.0)
+    assert converter.convert(10.0, "EUR", "USD") == pytest.approx(12.5)
+    converter.rate("USD", "JPY")
+    assert provider.calls == 1
+    
+    provider.failing = True
+    converter._table.fetched_at -= 61.0
+    assert converter.rate("EUR", "GBP") == pytest.approx(0.8)
+    assert converter.rate("EUR", "GBP") == pytest.approx(0.8)
+    # The second lookup is inside the retry back-off and does not call the provider
+    assert provider.calls == 2
+    assert converter.stats.fetch_failures == 1 and converter.stats.stale_serves == 2
+    
+    with pytest.raises(ConnectionError):
+        CurrencyConverter(provider).rate("EUR", "USD")
+
+
+def test_file_provider_and_history_conversion(tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"base": "USD", "rates": {"EUR": 0.5}}), encoding="utf-8")
+    converter = CurrencyConverter(FileRateProvider(str(path)))
+    assert converter.rate("EUR", "USD") == pytest.approx(2.0)
+    
+    history = TransactionHistory(currency="EUR")
+    history.append("deposit", 10.0, 0.0, 10.0)
+    history.append("withdraw", 4.0, 10.0, 6.0)
+    converted = converter.convert_history(history, "USD")
+    assert converted["amounts"].tolist() == [20.0, 8.0]
+    assert converted["balances_after"].tolist() == [20.0, 12.0]
+
+
+def test_convert_action_uses_the_target_currency(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="currency")
+    app._converter = CurrencyConverter(StaticRateProvider("EUR", RATES))
+    
+    ok, message = app.perform_action({"action": "convert", "amount": 10, "currency": "gbp"})
+    assert ok and "8.00" in message and "GBP" in message
+    ok, message = app.perform_action({"action": "convert", "amount": 10, "currency": "CHF"})
+    assert not ok and "CHF" in message
+    app.close()
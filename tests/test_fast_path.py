@@ -0,0 +1,33 @@
+"""Unambiguous commands are resolved by the fast-path router; anything else goes to the model."""
+
+import json
+
+from src.bankbot.llm.fast_path import FastPathRouter
+
+
+def test_unambiguous_commands_become_actions():
+    router = FastPathRouter()
+    cases = {
+        "Please deposit 50 euros into my account!": {"action": "add", "amount": 50},
+        "withdraw €12,50": {"action": "withdraw", "amount": 12.5},
+        "what's my balance?": {"action": "check_balance", "amount": 0},
+        "convert 100 eur to pounds": {"action": "convert", "amount": 100, "currency": "GBP"},
+        "show me my last 3 deposits": {"action": "recent_transactions", "amount": 3, "type": "deposit"},
+        "how much did I withdraw this week": {"action": "transaction_total", "amount": 0, "type": "withdraw", "period": "week"},
+    }
+    for text, expected in cases.items():
+        match = router.route(text, "EUR")
+        assert match is not None, text
+        assert match.action_dict == expected
+        # The reply carries the action like a model reply would
+        assert json.loads(match.reply[match.reply.index("{"):]) == expected
+    assert router.stats.hits == len(cases) and router.stats.misses == 0
+
+
+def test_ambiguous_input_falls_back_to_the_model():
+    router = FastPathRouter()
+    for text in ("deposit 50 dollars", "deposit 0", "hi, can I deposit money?", "withdraw all of it",
+                 "deposit 50 and withdraw 20"):
+        assert router.route(text, "EUR") is None, text
+    assert router.route("deposit 50 dollars", "USD") is not None
+    assert router.stats.misses == 5 and router.stats.hits == 1
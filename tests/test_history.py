@@ -0,0 +1,48 @@
+"""Columnar history: range totals and counts, newest-first queries, views and binary round trips."""
+
+from src.bankbot.banking.history import TransactionHistory
+
+
+def _history():
+    history = TransactionHistory()
+    balance = 0.0
+    for day, (action, amount) in enumerate([("deposit", 100.0), ("withdraw", 30.0), ("deposit", 50.0),
+                                            ("deposit", 20.0), ("withdraw", 10.0)]):
+        after = balance + amount if action == "deposit" else balance - amount
+        history.append(action, amount, balance, after, timestamp=1000.0 + day * 86400)
+        balance = after
+    return history
+
+
+def test_range_totals_and_counts():
+    history = _history()
+    assert history.total("deposit") == 170.0 and history.count("withdraw") == 2
+    second_day, fourth_day = 1000.0 + 86400, 1000.0 + 3 * 86400
+    assert history.total("deposit", start=second_day, end=fourth_day) == 70.0
+    assert history.count("deposit", start=second_day, end=fourth_day) == 2
+    assert history.total("withdraw", start=fourth_day) == 10.0
+    assert history.total("deposit", start=10.0 ** 10) == 0.0
+    
+    # A clock stepping back does not unsort the index
+    history.append("deposit", 5.0, 130.0, 135.0, timestamp=0.0)
+    assert history.timestamps[-1] == history.timestamps[-2]
+    assert history.count("deposit", start=1000.0 + 4 * 86400) == 1
+
+
+def test_recent_views_and_serialization():
+    history = _history()
+    assert [(t.action, t.amount) for t in history.last(3)] == [("withdraw", 10.0), ("deposit", 20.0), ("deposit", 50.0)]
+    assert [t.amount for t in history.last(5, "withdraw")] == [10.0, 30.0]
+    assert history.last(0) == []
+    
+    view = history.view()
+    history.append("deposit", 1.0, 130.0, 131.0)
+    assert len(view) == 5 and len(history) == 6
+    assert [t.amount for t in view[1:3]] == [30.0, 50.0]
+    assert [len(page) for page in history.iter_pages(4)] == [4, 2]
+    
+    restored = TransactionHistory.from_bytes(history.to_bytes(), len(history))
+    assert [t.balance_after for t in restored.page(0, 10)] == [t.balance_after for t in history.page(0, 10)]
+    assert restored.total("deposit") == history.total("deposit")
+    tail = TransactionHistory.from_bytes(history.to_bytes(4), 2)
+    assert [t.amount for t in tail.page()] == [10.0, 1.0]
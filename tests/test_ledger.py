@@ -0,0 +1,143 @@
+"""Ledger durability: acknowledged records are group-committed and replay never skips a gap."""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.ledger import TransactionLedger
+from src.bankbot.config.settings import BankingConfig
+
+
+def _account(directory):
+    return BankAccount(initial_balance=100.0, ledger=TransactionLedger(str(directory)))
+
+
+def _segment(directory):
+    (name,) = [name for name in os.listdir(directory) if name.startswith("wal-")]
+    return os.path.join(directory, name)
+
+
+def test_default_group_commit_syncs_before_acknowledging(tmp_path, monkeypatch):
+    assert TransactionLedger(str(tmp_path / "a")).fsync_policy == "group"
+    assert BankingConfig.model_fields["ledger_fsync"].default == "group"
+    
+    account = _account(tmp_path / "b")
+    ledger = account._ledger
+    synced = []
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(ledger.seq))
+    account.deposit(10.0)
+    assert synced and synced[-1] == ledger.seq
+
+
+def test_concurrent_transactions_share_fsyncs(tmp_path, monkeypatch):
+    account = _account(tmp_path)
+    ledger = account._ledger
+    real_fsync, fsyncs = os.fsync, []
+    
+    def slow_fsync(fd):
+        fsyncs.append(fd)
+        time.sleep(0.005)
+        real_fsync(fd)
+    
+    monkeypatch.setattr(os, "fsync", slow_fsync)
+    
+    def deposit(_):
+        transaction = account.deposit(1.0)
+        # Every deposit adds 1.0 and one record, so this is the record's sequence number
+        return ledger._synced_seq >= round(transaction.balance_after - 100.0)
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        assert all(pool.map(deposit, range(160)))
+    assert len(fsyncs) < 160
+    account.close()
+    assert _account(tmp_path).balance == 260.0
+
+
+def test_failed_fsync_fails_the_ledger(tmp_path, monkeypatch):
+    account = _account(tmp_path)
+    account.deposit(1.0)
+    
+    def broken_fsync(fd):
+        raise OSError(5, "Input/output error")
+    
+    monkeypatch.setattr(os, "fsync", broken_fsync)
+    with pytest.raises(OSError):
+        account.deposit(10.0)
+    monkeypatch.undo()
+    with pytest.raises(OSError, match="failed a write or fsync"):
+        account.deposit(10.0)
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    account = _account(tmp_path)
+    account.deposit(10.0)
+    account.deposit(20.0)
+    account.close()
+    with open(_segment(tmp_path), "ab") as fh:
+        fh.write(b"0badc0de [3,\"add\"")
+    
+    recovered = _account(tmp_path)
+    assert recovered.balance == 130.0
+    recovered.deposit(5.0)
+    recovered.close()
+    assert _account(tmp_path).balance == 135.0
+
+
+def test_corrupt_record_before_valid_ones_stops_replay(tmp_path):
+    account = _account(tmp_path)
+    for amount in (10.0, 20.0, 30.0):
+        account.deposit(amount)
+    account.close()
+    path = _segment(tmp_path)
+    with open(path, "rb") as fh:
+        lines = fh.readlines()
+    lines[1] = lines[1].replace(b"20.0", b"90.0")
+    with open(path, "wb") as fh:
+        fh.writelines(lines)
+    
+    with pytest.raises(ValueError, match="Corrupt ledger record"):
+        _account(tmp_path)
+
+
+def test_failed_append_leaves_the_account_unchanged(tmp_path, monkeypatch):
+    account = _account(tmp_path)
+    account.deposit(10.0)
+    
+    def disk_full(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+    
+    monkeypatch.setattr(account._ledger, "append_records", disk_full)
+    for attempt in (lambda: account.deposit(5.0), lambda: account.withdraw(5.0),
+                    lambda: account.apply_batch([("deposit", 1.0), ("withdraw", 2.0)])):
+        with pytest.raises(OSError):
+            attempt()
+        assert account.balance == 110.0
+        assert len(account.history) == 1
+    
+    monkeypatch.undo()
+    account.close()
+    assert _account(tmp_path).balance == 110.0
+
+
+def test_snapshots_replace_old_segments_and_replay_with_the_tail(tmp_path):
+    account = BankAccount(initial_balance=100.0, ledger=TransactionLedger(str(tmp_path), snapshot_interval=5))
+    for _ in range(12):
+        account.deposit(1.0)
+    account.withdraw(3.0)
+    account.close()
+    
+    assert os.path.exists(tmp_path / "snapshot.bin")
+    # Only the segment written after the last snapshot is kept
+    with open(_segment(tmp_path), "rb") as fh:
+        assert len(fh.readlines()) < 5
+    
+    state = TransactionLedger(str(tmp_path)).replay()
+    assert state.balance == 109.0 and state.seq == 13
+    assert len(state.history) == 13
+    assert state.recovered_records < 5
+    recovered = _account(tmp_path)
+    assert recovered.balance == 109.0
+    assert [t.action for t in recovered.get_recent(2)] == ["withdraw", "deposit"]
@@ -0,0 +1,83 @@
+"""Conversation memory summarizes off the turn path and keeps the prompt prefix stable."""
+
+import threading
+import time
+
+from langchain_core.messages import AIMessage, SystemMessage
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.memory import ConversationMemory, llm_summarizer
+from src.bankbot.utils.tokens import count_message_tokens, count_tokens
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def test_background_summary_does_not_block_eviction():
+    release = threading.Event()
+    
+    def slow_summarizer(previous, evicted):
+        release.wait(5)
+        return (previous + " " if previous else "") + f"{len(evicted)} messages"
+    
+    memory = ConversationMemory(max_tokens=1000, max_messages=2, summarizer=slow_summarizer, background=True)
+    started = time.perf_counter()
+    for turn in range(3):
+        memory.add_user_message(f"question {turn}")
+        memory.add_ai_message(f"answer {turn}")
+    assert time.perf_counter() - started < 1.0
+    assert len(memory) == 2
+    # Turns waiting for the summarizer still reach a checkpoint
+    assert "question 0" in memory.dump()[1]
+    
+    release.set()
+    assert memory.wait_for_summary(5)
+    assert memory.summary.endswith("messages")
+    assert memory.summary_messages[0].content.endswith(memory.summary)
+
+
+def test_token_budget_evicts_whole_turns_into_a_bounded_summary():
+    memory = ConversationMemory(max_tokens=120, summary_max_tokens=40)
+    for turn in range(12):
+        memory.add_user_message(f"Question number {turn} about my savings account. " * 2)
+        memory.add_ai_message(f"Answer number {turn}. It explains the account in some detail.")
+    
+    assert sum(count_message_tokens(message.content) for message in memory.messages) <= 120
+    assert len(memory) % 2 == 0 and memory.messages[0].type == "human"
+    assert "Question number 11" in memory.messages[-2].content
+    # The summary keeps the latest evicted turns and drops the oldest lines
+    oldest_kept = int(memory.messages[0].content.split()[2])
+    assert f"Question number {oldest_kept - 1}" in memory.summary
+    assert "Question number 0" not in memory.summary
+    assert count_tokens(memory.summary) <= 40
+    
+    messages, summary = memory.dump()
+    restored = ConversationMemory(max_tokens=120, summary_max_tokens=40)
+    restored.restore(messages, summary)
+    assert restored.messages == memory.messages and restored.summary == summary
+
+
+def test_llm_summary_containing_an_action_falls_back():
+    model = SimulatedChatModel(responses=['{"action": "check_balance"}'])
+    summarize = llm_summarizer(model, 64)
+    summary = summarize("", [AIMessage(content="Your balance is 10 EUR.")])
+    assert "action" not in summary
+    assert summary == "Assistant: Your balance is 10 EUR."
+
+
+def test_summary_follows_the_static_system_prompt():
+    config = llm_config.model_copy(update={"response_cache_enabled": False})
+    assistant = BankingAssistant(config, llm=SimulatedChatModel(responses=["ok"]), max_history=2)
+    for turn in range(3):
+        assistant.record_exchange(f"question {turn}", f"answer {turn}")
+    
+    inputs = assistant._prompt_inputs("next", 10.0)
+    messages = assistant.prompt.format_messages(**inputs)
+    first = messages[0]
+    assert isinstance(first, SystemMessage) and "question 0" not in first.content
+    assert isinstance(messages[1], SystemMessage) and "question 0" in messages[1].content
+    
+    # Another eviction changes the summary but not the static prefix
+    assistant.record_exchange("question 3", "answer 3")
+    inputs = assistant._prompt_inputs("next", 10.0)
+    later = assistant.prompt.format_messages(**inputs)
+    assert later[0].content == first.content
@@ -0,0 +1,64 @@
+"""The response parser splits replies into ordered text and actions, including nested, repaired and broken ones."""
+
+import asyncio
+
+import pytest
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.llm.simulated import SimulatedChatModel
+from src.bankbot.utils.parser import ResponseParser, StreamingResponseParser
+
+
+ADD = {"action": "add", "amount": 3}
+
+
+@pytest.mark.parametrize("reply, text", [
+    ('Use {it\'s} fine and then {"action":"add","amount":3}', "Use {it's} fine and then"),
+    ('It\'s done: {"action":"add","amount":3} and that\'s it', "It's done:  and that's it"),
+    ('Use {this and then {"action":"add","amount":3} ok', "Use {this and then  ok"),
+    ('{"action": "add", "amount": 3, "note": "it\'s {fine}"}', ""),
+])
+def test_actions_survive_apostrophes_and_unclosed_braces(reply, text):
+    parsed = ResponseParser.parse(reply)
+    assert parsed.actions == [dict(ADD, **({"note": "it's {fine}"} if "note" in reply else {}))]
+    assert parsed.text == text
+
+
+def test_multiple_nested_and_repaired_actions_keep_their_order():
+    reply = (
+        'First {"action": "add", "amount": 5} then ```json\n'
+        '{"action": "batch", "steps": [{"action": "add", "amount": 1}, {"action": "withdraw", "amount": 2}]}\n'
+        "``` and {'action': 'withdraw', 'amount': 3,} and {\"action\": \"add\", \"amount\": } end."
+    )
+    parsed = ResponseParser.parse(reply)
+    assert [kind for kind, _ in parsed.segments] == ["text", "action", "text", "action", "text", "action", "text", "invalid", "text"]
+    assert parsed.actions == [
+        {"action": "add", "amount": 5},
+        {"action": "batch", "steps": [{"action": "add", "amount": 1}, {"action": "withdraw", "amount": 2}]},
+        {"action": "withdraw", "amount": 3},
+    ]
+    assert parsed.invalid == ['{"action": "add", "amount": }']
+    assert "```" not in parsed.text and parsed.text.endswith("end.")
+    assert ResponseParser.parse('{"reply": "no action here"}').actions == []
+
+
+def test_streaming_recovers_actions_after_an_unclosed_brace():
+    parser = StreamingResponseParser()
+    reply = 'Use {this and then {"action":"add","amount":3} ok'
+    released, actions = [], []
+    for i in range(0, len(reply), 4):
+        chunk_text, chunk_actions = parser.feed(reply[i:i + 4])
+        released.append(chunk_text)
+        actions += chunk_actions
+    assert actions == []
+    remainder, recovered = parser.close()
+    assert recovered == [ADD]
+    assert "".join(released) + remainder == "Use {this and then  ok"
+
+
+def test_streamed_turn_runs_actions_recovered_at_the_end(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    llm = SimulatedChatModel(responses=['Use {this and then {"action": "add", "amount": 3}'])
+    app = BankBotApp(session_id="parser-recovery", llm=llm)
+    result = asyncio.run(app.aprocess_user_input("could you sort out my money please"))
+    assert result["balance"] == 3
@@ -0,0 +1,78 @@
+"""The backend pool routes to the fastest endpoint, hedges slow calls and fails over."""
+
+import time
+
+import pytest
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.pool import BackendPool, parse_endpoints
+
+
+URLS = ["http://gpu-1:11434", "http://gpu-2:11434"]
+
+
+def _pool(**overrides):
+    return BackendPool(llm_config.model_copy(update=overrides), URLS)
+
+
+def test_parse_endpoints_strips_and_deduplicates():
+    assert parse_endpoints(" http://gpu-1:11434/, http://gpu-2:11434,http://gpu-1:11434,") == URLS
+    assert parse_endpoints(None) == []
+    with pytest.raises(ValueError):
+        BackendPool(llm_config, [])
+
+
+def test_requests_prefer_the_faster_endpoint():
+    pool = _pool(hedge_enabled=False)
+    delays = {URLS[0]: 0.05, URLS[1]: 0.0}
+    
+    def call(endpoint):
+        time.sleep(delays[endpoint.url])
+        return endpoint.url
+    
+    # Both endpoints are tried once, after that the fast one takes the traffic
+    answers = [pool.invoke(call) for _ in range(6)]
+    assert answers[-4:] == [URLS[1]] * 4
+    assert pool.endpoints[1].wins > pool.endpoints[0].wins
+    pool.close()
+
+
+def test_failed_endpoint_is_retried_elsewhere_and_cooled_down():
+    pool = _pool(hedge_enabled=False, endpoint_cooldown=60.0)
+    
+    def call(endpoint):
+        if endpoint.url == URLS[0]:
+            raise ConnectionError("connection refused")
+        return endpoint.url
+    
+    assert [pool.invoke(call) for _ in range(3)] == [URLS[1]] * 3
+    down = pool.endpoints[0]
+    assert down.failures == 1 and down.down_until > time.monotonic()
+    assert down.last_error == "connection refused"
+    assert pool.stats.failovers == 1 and pool.stats.errors == 0
+    
+    def broken(endpoint):
+        raise ConnectionError(endpoint.url)
+    
+    with pytest.raises(ConnectionError):
+        pool.invoke(broken)
+    assert pool.stats.errors == 1
+    pool.close()
+
+
+def test_slow_call_is_hedged_and_the_duplicate_wins():
+    pool = _pool(hedge_min_samples=2, hedge_min_delay=0.01)
+    for endpoint in pool.endpoints:
+        for _ in range(2):
+            endpoint.latency.add(0.01)
+    slow = pool.pick(streaming=False)
+    
+    def call(endpoint):
+        time.sleep(1.0 if endpoint is slow else 0.0)
+        return endpoint.url
+    
+    started = time.perf_counter()
+    assert pool.invoke(call) != slow.url
+    assert time.perf_counter() - started < 0.5
+    assert pool.stats.hedges == 1 and pool.stats.hedge_wins == 1
+    pool.close()
@@ -0,0 +1,30 @@
+"""Each turn's prompt extends the previous one, so Ollama can reuse the KV cache of the shared prefix."""
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def _prompt(assistant, user_input, balance):
+    inputs = assistant._prompt_inputs(user_input, balance, "EUR")
+    return [(message.type, message.content) for message in assistant.prompt.format_messages(**inputs)]
+
+
+def test_balance_and_new_turns_only_change_the_prompt_tail():
+    config = llm_config.model_copy(update={"response_cache_enabled": False})
+    assistant = BankingAssistant(config, llm=SimulatedChatModel(responses=["ok"]), max_history=10)
+    
+    first = _prompt(assistant, "hello", 10.0)
+    assistant.record_exchange("hello", "Hi! How can I help?")
+    second = _prompt(assistant, "thanks", 99.5)
+    
+    # Everything before the account state and the new message is kept byte for byte
+    assert second[:len(first) - 2] == first[:-2]
+    assert second[len(first) - 2:-2] == [("human", "hello"), ("ai", "Hi! How can I help?")]
+    assert "10.00" in first[-2][1] and "99.50" in second[-2][1]
+    assert all("99.50" not in content for _, content in second[:-2])
+    
+    # Rebuilding the chain for the same currency keeps the same system prompt object
+    system_prompt = assistant.prompt.messages[0].content
+    assistant._ensure_chain("EUR")
+    assert assistant.prompt.messages[0].content is system_prompt
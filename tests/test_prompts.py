@@ -0,0 +1,51 @@
+"""Prompt templates stay within their token budgets."""
+
+import sys
+import types
+
+import pytest
+
+from src.bankbot.config.settings import LLMConfig
+from src.bankbot.prompts.registry import CompiledTemplate, PromptRegistry
+from src.bankbot.prompts.templates import PROMPTS
+from src.bankbot.utils.tokens import MESSAGE_OVERHEAD_TOKENS, count_message_tokens, get_token_counter
+
+
+def test_shipped_templates_fit_their_budgets():
+    counts = PROMPTS.check()
+    for template in PROMPTS:
+        assert template.budget is not None
+        assert counts[template.name] <= template.budget
+
+
+def test_template_over_budget_compiles_but_fails_the_check():
+    template = CompiledTemplate("long", "word " * 100, budget=10)
+    assert template.over_budget
+    registry = PromptRegistry()
+    registry.register("short", "word", budget=10)
+    registry.register("long", "word " * 100, budget=10)
+    assert [t.name for t in registry] == ["short", "long"]
+    with pytest.raises(ValueError, match=r"long \(\d+ > 10 tokens\)"):
+        registry.check()
+    # The budget is checked with the counter given, not the estimate taken at compile time
+    assert registry.check(lambda text: 1) == {"short": 1, "long": 1}
+
+
+def test_token_counter_uses_the_model_tokenizer_when_configured(monkeypatch):
+    assert get_token_counter(LLMConfig(tokenizer=None)) is count_message_tokens
+    
+    class Tokenizer:
+        @classmethod
+        def from_pretrained(cls, name):
+            return cls()
+        
+        def encode(self, text, add_special_tokens=True):
+            return types.SimpleNamespace(ids=text.split())
+    
+    monkeypatch.setitem(sys.modules, "tokenizers", types.SimpleNamespace(Tokenizer=Tokenizer))
+    counter = get_token_counter(LLMConfig(tokenizer="test/word-tokenizer"))
+    assert counter("one two three") == 3 + MESSAGE_OVERHEAD_TOKENS
+    
+    monkeypatch.setitem(sys.modules, "tokenizers", None)
+    with pytest.raises(ImportError, match="LLM_TOKENIZER"):
+        get_token_counter(LLMConfig(tokenizer="test/other-tokenizer"))
@@ -0,0 +1,39 @@
+"""Recent-transactions requests list the default count unless a positive one is asked for."""
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def _listed(app, **fields):
+    success, message = app.perform_action(dict(action="recent_transactions", **fields))
+    assert success
+    return len(message.splitlines()) - 1
+
+
+def test_requested_count_and_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="recent-count", llm=SimulatedChatModel(responses=["unused"]))
+    for _ in range(60):
+        assert app.perform_action({"action": "add", "amount": 10})[0]
+    
+    assert _listed(app) == 5
+    assert _listed(app, amount=3) == 3
+    assert _listed(app, count=7, amount=0) == 7
+    assert _listed(app, count=0) == 5
+    assert _listed(app, amount=0) == 5
+    assert _listed(app, count=-2) == 5
+    assert _listed(app, count="many") == 5
+    assert _listed(app, count=500) == 50
+
+
+def test_history_is_newest_first_and_filtered_by_type(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="recent-type", llm=SimulatedChatModel(responses=["unused"]))
+    for amount in (10, 20, 30):
+        app.perform_action({"action": "add", "amount": amount})
+    app.perform_action({"action": "withdraw", "amount": 5})
+    
+    deposits = app.account.get_recent(5, "deposit")
+    assert [t.amount for t in deposits] == [30, 20, 10]
+    assert [t.action for t in app.account.get_recent(5)][0] == "withdraw"
+    assert _listed(app, type="withdraw") == 1
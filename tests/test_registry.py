@@ -0,0 +1,61 @@
+"""The account registry opens each account once under concurrency and closes private ones with the last holder."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.banking.registry import AccountRegistry
+
+
+class _Tracked(BankAccount):
+    def __init__(self):
+        super().__init__(initial_balance=10.0)
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+
+def test_private_accounts_close_with_their_last_holder():
+    registry = AccountRegistry(shards=2, account_factory=lambda account_id: _Tracked())
+    account = registry.acquire("solo", shared=False)
+    assert registry.acquire("solo", shared=False) is account
+    assert not registry.release("solo") and not account.closed
+    assert registry.release("solo") and account.closed
+    assert "solo" not in registry
+
+
+def test_shared_accounts_outlive_private_holders():
+    registry = AccountRegistry(shards=2, account_factory=lambda account_id: _Tracked())
+    shared = registry.acquire("family")
+    assert registry.acquire("family", shared=False) is shared
+    assert not registry.release("family")
+    assert not registry.release("family")
+    assert registry.get("family") is shared and not shared.closed
+    registry.close_all()
+    assert shared.closed and len(registry) == 0
+
+
+def test_concurrent_sessions_open_each_account_once():
+    opened = []
+    
+    def slow_factory(account_id):
+        opened.append(account_id)
+        time.sleep(0.01)
+        return BankAccount()
+    
+    registry = AccountRegistry(shards=4, account_factory=slow_factory)
+    barrier = threading.Barrier(16)
+    
+    def session(i):
+        barrier.wait(5)
+        account = registry.get_or_create(f"user-{i % 4}")
+        for _ in range(50):
+            account.deposit(1.0)
+    
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(session, range(16)))
+    assert sorted(opened) == [f"user-{i}" for i in range(4)]
+    assert sorted(registry.ids()) == sorted(opened)
+    assert all(registry.get(account_id).balance == 200.0 for account_id in opened)
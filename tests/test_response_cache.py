@@ -0,0 +1,59 @@
+"""Repeated conversational replies come from an LRU/TTL cache, only for the same model and prompt."""
+
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.bankbot.config.settings import llm_config
+from src.bankbot.llm.assistant import BankingAssistant
+from src.bankbot.llm.cache import DiskCache, ResponseCache
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+def _assistant(cache, reply, **config):
+    config = llm_config.model_copy(update=config)
+    return BankingAssistant(config, cache=cache, llm=SimulatedChatModel(responses=[reply]))
+
+
+def test_cached_reply_is_not_shared_across_prompts():
+    cache = ResponseCache()
+    assert _assistant(cache, "Hello there!", action_mode="text").chat("hi", 10.0, "EUR") == "Hello there!"
+    assert _assistant(cache, "unused", action_mode="text").chat("hi", 10.0, "EUR") == "Hello there!"
+    
+    assert _assistant(cache, "Hi in dollars!", action_mode="text").chat("hi", 10.0, "USD") == "Hi in dollars!"
+    assert _assistant(cache, "Hi as JSON!", action_mode="json").chat("hi", 10.0, "EUR") == "Hi as JSON!"
+    assert _assistant(cache, "Hi from another model!", model_name="other:1b").chat("hi", 10.0, "EUR") == "Hi from another model!"
+    assert cache.stats.hits == 1 and cache.stats.misses == 4
+
+
+def test_keys_normalize_input_and_include_recent_history():
+    cache = ResponseCache(history_window=2)
+    assert cache.make_key("Hello!!", []) == cache.make_key("  hello ", [])
+    history = [HumanMessage(content="hi"), AIMessage(content="Hello!")]
+    assert cache.make_key("thanks", history) != cache.make_key("thanks", [])
+    assert cache.make_key("thanks", [HumanMessage(content="older")] + history) == cache.make_key("thanks", history)
+
+
+def test_replies_with_actions_or_amounts_are_not_stored():
+    cache = ResponseCache()
+    assert not cache.put("a", 'Done {"action": "add", "amount": 5}')
+    assert not cache.put("b", "Your balance is 10 EUR.")
+    assert cache.put("c", "You're welcome!")
+    assert cache.get("c") == "You're welcome!" and cache.get("a") is None
+    assert cache.stats.rejected == 2
+
+
+def test_least_recently_used_and_expired_replies_are_dropped(tmp_path, monkeypatch):
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, disk=DiskCache(str(tmp_path / "replies.db")))
+    for key in ("a", "b"):
+        cache.put(key, f"reply {key.upper()}")
+    cache.get("a")
+    cache.put("c", "reply C")
+    assert len(cache) == 2 and cache.stats.evictions == 1
+    # The evicted reply is still on disk and comes back into memory
+    assert cache.get("b") == "reply B" and cache.stats.disk_hits == 1
+    
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get("c") is None
+    assert cache.stats.expirations == 2
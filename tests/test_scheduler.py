@@ -0,0 +1,93 @@
+"""The scheduler is a fair queue with single-flight, on by default in the server only."""
+
+import asyncio
+import threading
+
+from src.bankbot.config import settings
+from src.bankbot.config.settings import LLMConfig, llm_config
+from src.bankbot.llm.scheduler import RequestScheduler
+from src.bankbot.server import create_app
+
+
+def test_scheduler_off_by_default_outside_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LLM_SCHEDULER_ENABLED", raising=False)
+    settings._read_env_file.cache_clear()
+    assert not LLMConfig().scheduler_enabled
+    settings._read_env_file.cache_clear()
+    
+    monkeypatch.setattr(llm_config, "scheduler_enabled", None)
+    sessions = create_app()["sessions"]
+    session = asyncio.run(sessions.get_or_create("scheduled"))
+    assert session.app.llm_config.scheduler_enabled is True
+    assert llm_config.scheduler_enabled is None
+    sessions.close_all()
+    
+    monkeypatch.setattr(llm_config, "scheduler_enabled", False)
+    assert create_app()["sessions"].config.scheduler_enabled is False
+
+
+def test_identical_requests_share_a_call_and_tenants_take_turns():
+    scheduler = RequestScheduler(max_concurrency=1)
+    running, release = threading.Event(), threading.Event()
+    order = []
+    
+    def call(name):
+        def run():
+            if name == "first":
+                running.set()
+                release.wait(5)
+            order.append(name)
+            yield name
+        return run
+    
+    first, _ = scheduler.submit("first", "a", call("first"))
+    assert running.wait(5)
+    burst = [scheduler.submit(f"a{i}", "a", call(f"a{i}"))[0] for i in range(3)]
+    other, _ = scheduler.submit("b0", "b", call("b0"))
+    joined, started = scheduler.submit("a0", "a", call("duplicate"))
+    assert joined is burst[0] and not started
+    
+    release.set()
+    for flight in [first, *burst, other]:
+        list(flight.follow())
+    scheduler.close()
+    
+    assert order == ["first", "a0", "b0", "a1", "a2"]
+    assert scheduler.stats.requests == 6 and scheduler.stats.calls == 5 and scheduler.stats.coalesced == 1
+
+
+def test_close_fails_queued_calls_and_their_followers():
+    scheduler = RequestScheduler(max_concurrency=1)
+    running, release = threading.Event(), threading.Event()
+    
+    def blocking():
+        running.set()
+        release.wait(5)
+        yield "done"
+    
+    active, _ = scheduler.submit("active", "a", blocking)
+    assert running.wait(5)
+    queued, _ = scheduler.submit("queued", "b", lambda: iter(["never"]))
+    joined, started = scheduler.submit("queued", "c", lambda: iter(["never"]))
+    assert joined is queued and not started
+    
+    results = []
+    
+    def follow(flight):
+        try:
+            results.append(list(flight.follow()))
+        except RuntimeError as exc:
+            results.append(str(exc))
+    
+    followers = [threading.Thread(target=follow, args=(queued,)) for _ in range(2)]
+    for follower in followers:
+        follower.start()
+    scheduler.close()
+    for follower in followers:
+        follower.join(5)
+        assert not follower.is_alive()
+    assert results == ["Request scheduler closed before the call ran"] * 2
+    
+    release.set()
+    assert list(active.follow()) == ["done"]
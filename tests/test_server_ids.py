@@ -0,0 +1,43 @@
+"""The server rejects session and account ids that are not plain names."""
+
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bankbot.server import create_app
+
+
+def _requests(calls):
+    """Run HTTP calls against an app without the model backend and return their statuses."""
+    async def run():
+        app = create_app(max_sessions=4, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        async with TestClient(TestServer(app)) as client:
+            statuses = []
+            for method, path, body in calls:
+                response = await client.request(method, path, json=body)
+                statuses.append(response.status)
+            assert len(app["sessions"]) == 0
+            return statuses
+    return asyncio.run(run())
+
+
+def test_invalid_account_id_is_rejected():
+    statuses = _requests([
+        ("POST", "/sessions", {"account_id": ".."}),
+        ("POST", "/sessions", {"account_id": "/tmp/evil"}),
+        ("POST", "/sessions", {"account_id": "x" * 129}),
+        ("POST", "/sessions", {"account_id": 7}),
+    ])
+    assert statuses == [400, 400, 400, 400]
+
+
+def test_invalid_session_id_is_rejected():
+    statuses = _requests([
+        ("POST", "/sessions/a.b/messages", {"message": "hi"}),
+        ("POST", "/sessions/..x/messages", {"message": "hi"}),
+        ("GET", "/sessions/a%20b/ws", None),
+        ("DELETE", "/sessions/a.b", None),
+    ])
+    assert statuses == [400, 400, 400, 400]
@@ -0,0 +1,107 @@
+"""Server session lifecycle: opening, expiry, deletion and account sharing."""
+
+import asyncio
+import threading
+import time
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bankbot.banking.account import BankAccount
+from src.bankbot.server import create_app
+
+
+def test_open_websocket_keeps_session_alive():
+    async def run():
+        app = create_app(max_sessions=4, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        sessions = app["sessions"]
+        async with TestClient(TestServer(app)) as client:
+            ws = await client.ws_connect("/sessions/quiet/ws")
+            assert (await ws.receive_json())["type"] == "session"
+            
+            session = sessions.get("quiet")
+            session.last_active = time.monotonic() - 3600
+            assert sessions.expire_idle() == 0
+            
+            await ws.close()
+            for _ in range(50):
+                if not session.sockets:
+                    break
+                await asyncio.sleep(0.01)
+            session.last_active = time.monotonic() - 3600
+            assert sessions.expire_idle() == 1
+            assert sessions.get("quiet") is None
+    
+    asyncio.run(run())
+
+
+def test_session_named_like_a_shared_account_does_not_close_it():
+    async def run():
+        app = create_app(max_sessions=8, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        sessions = app["sessions"]
+        async with TestClient(TestServer(app)) as client:
+            created = await client.post("/sessions", json={"account_id": "family"})
+            member = sessions.get((await created.json())["session_id"])
+            
+            for name in ("family", "solo"):
+                ws = await client.ws_connect(f"/sessions/{name}/ws")
+                assert (await ws.receive_json())["type"] == "session"
+                await ws.close()
+            assert sessions.get("family").app.account is member.app.account
+            
+            assert (await client.delete("/sessions/family")).status == 200
+            assert (await client.delete("/sessions/solo")).status == 200
+            assert sessions.accounts.get("family") is member.app.account
+            assert "solo" not in sessions.accounts
+    
+    asyncio.run(run())
+
+
+def test_message_waiting_on_a_deleted_session_is_not_run():
+    async def run():
+        app = create_app(max_sessions=4, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        sessions = app["sessions"]
+        async with TestClient(TestServer(app)) as client:
+            session_id = (await (await client.post("/sessions")).json())["session_id"]
+            session = sessions.get(session_id)
+            ran = []
+            session.app.aprocess_user_input = lambda text: ran.append(text)
+            
+            await session.lock.acquire()
+            waiting = asyncio.ensure_future(client.post(f"/sessions/{session_id}/messages", json={"message": "balance"}))
+            await asyncio.sleep(0.05)
+            assert (await client.delete(f"/sessions/{session_id}")).status == 200
+            session.lock.release()
+            response = await waiting
+            assert response.status == 410
+            assert ran == []
+    
+    asyncio.run(run())
+
+
+def test_sessions_open_once_off_the_event_loop():
+    async def run():
+        app = create_app(max_sessions=4, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        sessions = app["sessions"]
+        opened = []
+        
+        def open_account(account_id):
+            opened.append(threading.current_thread())
+            time.sleep(0.05)
+            return BankAccount()
+        
+        sessions.accounts.account_factory = open_account
+        loop_thread = threading.current_thread()
+        first, second = await asyncio.gather(sessions.get_or_create("twice"), sessions.get_or_create("twice"))
+        assert first is second is sessions.get("twice")
+        assert len(opened) == 1 and opened[0] is not loop_thread
+        sessions.close_all()
+    
+    asyncio.run(run())
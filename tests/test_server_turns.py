@@ -0,0 +1,45 @@
+"""Server turns over HTTP and WebSocket: sessions on one account share its balance, others stay apart."""
+
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.bankbot.config.settings import app_config
+from src.bankbot.server import create_app
+
+
+def test_http_and_websocket_turns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_config, "fast_path_enabled", True)
+    
+    async def run():
+        app = create_app(max_sessions=3, idle_timeout=60)
+        app.on_startup.clear()
+        app.on_cleanup.clear()
+        async with TestClient(TestServer(app)) as client:
+            ids = []
+            for body in ({"account_id": "family"}, {"account_id": "family"}, {}):
+                response = await client.post("/sessions", json=body)
+                assert response.status == 201
+                ids.append((await response.json())["session_id"])
+            assert (await client.post("/sessions", json={})).status == 503
+            
+            first, second, private = ids
+            turns = await asyncio.gather(
+                client.post(f"/sessions/{first}/messages", json={"message": "deposit 30"}),
+                client.post(f"/sessions/{second}/messages", json={"message": "deposit 12"}),
+            )
+            assert [(await turn.json())["route"] for turn in turns] == ["fast_path", "fast_path"]
+            
+            ws = await client.ws_connect(f"/sessions/{private}/ws")
+            assert (await ws.receive_json())["type"] == "session"
+            await ws.send_json({"message": "deposit 5"})
+            events = [await ws.receive_json(), await ws.receive_json()]
+            assert [event["type"] for event in events] == ["action", "done"]
+            assert events[-1]["balance"] == 5
+            await ws.close()
+            
+            response = await client.post(f"/sessions/{second}/messages", json={"message": "what's my balance"})
+            assert (await response.json())["balance"] == 42
+    
+    asyncio.run(run())
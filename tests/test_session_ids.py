@@ -0,0 +1,34 @@
+"""Session ids must never move a session's files out of their configured directory."""
+
+import os
+
+import pytest
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config.settings import app_config, banking_config
+from src.bankbot.utils.ids import is_valid_session_id
+
+
+@pytest.mark.parametrize("session_id", ["..", "/tmp/evil", "a/../../b", "../x", "alice"])
+def test_ledger_stays_under_root(tmp_path, monkeypatch, session_id):
+    root = tmp_path / "ledgers"
+    monkeypatch.setattr(banking_config, "ledger_path", str(root))
+    ledger = BankBotApp._open_ledger(session_id)
+    try:
+        directory = os.path.realpath(ledger.directory)
+        assert os.path.dirname(directory) == os.path.realpath(root)
+    finally:
+        ledger.close()
+
+
+@pytest.mark.parametrize("session_id", ["..", "/tmp/evil", "a/b"])
+def test_checkpoint_stays_under_root(tmp_path, monkeypatch, session_id):
+    monkeypatch.setattr(app_config, "checkpoint_path", str(tmp_path))
+    path = os.path.realpath(BankBotApp._checkpoint_file(session_id))
+    assert os.path.dirname(path) == os.path.realpath(tmp_path)
+
+
+def test_client_ids():
+    assert is_valid_session_id("alice_01-x")
+    for value in ["", "..", "/abs", "a/b", "a b", "x" * 129, None, 3]:
+        assert not is_valid_session_id(value)
@@ -0,0 +1,31 @@
+"""Settings read the shared .env file through public pydantic-settings API."""
+
+from src.bankbot.config import settings
+from src.bankbot.config.settings import AppConfig, BankingConfig, LLMConfig
+
+
+def test_env_file_values_and_precedence(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text(
+        "LLM_MODEL_NAME=tiny:1b\n"
+        "LLM_TEMPERATURE=0.1\n"
+        "LLM_MAX_TOKENS=\n"
+        "LLM_STREAMING=false\n"
+        "BANKING_CURRENCY=USD\n"
+        "DEBUG=true\n",
+        encoding="utf-8",
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LLM_MODEL_NAME", raising=False)
+    monkeypatch.setenv("LLM_TEMPERATURE", "0.3")
+    settings._read_env_file.cache_clear()
+    try:
+        llm = LLMConfig()
+        assert llm.model_name == "tiny:1b"
+        assert llm.temperature == 0.3
+        assert llm.max_tokens is None
+        assert llm.streaming is False
+        assert BankingConfig().currency == "USD"
+        assert AppConfig().debug is True
+        assert LLMConfig(model_name="explicit").model_name == "explicit"
+    finally:
+        settings._read_env_file.cache_clear()
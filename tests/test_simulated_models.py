@@ -0,0 +1,46 @@
+"""Offline chat models: scripted replies stream like a model, cassettes replay what was recorded."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.bankbot.llm.simulated import CassetteChatModel, SimulatedChatModel
+
+
+def test_simulated_model_streams_scripted_replies_with_usage():
+    model = SimulatedChatModel(responses=["first reply here", "second"])
+    chunks = list(model.stream([HumanMessage(content="hi")]))
+    assert "".join(chunk.content for chunk in chunks) == "first reply here"
+    # Word by word, with the usage on the last word like Ollama reports it
+    assert [chunk.content for chunk in chunks if chunk.content] == ["first ", "reply ", "here"]
+    usage = [chunk.usage_metadata for chunk in chunks if chunk.usage_metadata]
+    assert chunks[2].content == "here" and usage == [chunks[2].usage_metadata]
+    assert usage[0]["output_tokens"] == 4
+    assert model.invoke([HumanMessage(content="hi")]).content == "second"
+    
+    echo = SimulatedChatModel(respond=lambda text: f"you said {text}")
+    assert asyncio.run(echo.ainvoke([HumanMessage(content="hello")])).content == "you said hello"
+
+
+def test_cassette_records_and_replays_in_order(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    prompt = [SystemMessage(content="system"), HumanMessage(content="deposit please")]
+    scripted = SimulatedChatModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "add", "args": {"amount": 5}, "id": "x"}]),
+        "Sure!",
+    ])
+    recorder = CassetteChatModel(path=path, mode="record", model=scripted)
+    recorded = [recorder.invoke(prompt), recorder.invoke(prompt)]
+    
+    player = CassetteChatModel(path=path)
+    replayed = [player.invoke(prompt), asyncio.run(player.ainvoke(prompt))]
+    assert replayed[0].tool_calls[0]["name"] == "add" and replayed[0].tool_calls[0]["args"] == {"amount": 5}
+    assert [reply.content for reply in replayed] == [reply.content for reply in recorded]
+    # Once the recorded replies of a prompt run out, the last one repeats
+    assert player.invoke(prompt).content == "Sure!"
+    
+    with pytest.raises(LookupError, match="withdraw please"):
+        player.invoke([SystemMessage(content="system"), HumanMessage(content="withdraw please")])
+    with pytest.raises(FileNotFoundError):
+        CassetteChatModel(path=str(tmp_path / "missing.jsonl"))
@@ -0,0 +1,54 @@
+"""The soak tool generates reproducible dialogs and reports latency, actions and memory."""
+
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+
+import soak
+
+
+SOAK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "soak.py")
+
+
+def test_dialogs_are_reproducible():
+    assert soak.dialog(1, 20, "random", seed=7) == soak.dialog(1, 20, "random", seed=7)
+    assert soak.dialog(1, 20, "random", seed=7) != soak.dialog(3, 20, "random", seed=7)
+    scripted = soak.dialog(0, len(soak.SCRIPTED_INPUTS) + 1, "mixed", seed=7)
+    assert scripted[:-1] == list(soak.SCRIPTED_INPUTS) and scripted[-1] == soak.SCRIPTED_INPUTS[0]
+
+
+def test_summary_reports_percentiles_actions_and_growth():
+    assert soak.percentile([], 0.95) == 0.0
+    assert soak.percentile([0.1 * i for i in range(1, 101)], 0.95) == 0.1 * 96
+    
+    recorder = soak.Recorder(users=2, turns=3, warmup_share=0.0, trace=False)
+    recorder.sample()
+    for turn in range(6):
+        route = "fast_path" if turn % 2 else "llm"
+        recorder.record(0.01 * (turn + 1), route, [("add", turn != 4)], error=False, parse_failed=turn == 4)
+    recorder.sample()
+    results = soak.summarize(recorder, elapsed=2.0)
+    
+    assert results["turns"] == 6 and results["turns_per_second"] == 3.0
+    assert results["latency"]["llm"]["count"] == 3 and results["latency"]["all"]["max"] == 0.06
+    assert results["actions"] == {"add": {"count": 6, "succeeded": 5}}
+    assert results["parse_failures"] == 1
+    assert results["memory"]["warmup_turns"] == 2
+    assert set(results["memory"]["growth_per_1000_turns"]) == {"rss_bytes", "traced_bytes"}
+
+
+def test_app_soak_runs_against_the_stand_in(tmp_path):
+    output = tmp_path / "soak.json"
+    subprocess.run(
+        [sys.executable, SOAK, "--users", "3", "--turns", "4", "--ttft", "0.01", "--tail-probability", "0",
+         "--sample-interval", "0.1", "--no-tracemalloc", "--output", str(output)],
+        cwd=tmp_path, capture_output=True, text=True, check=True, timeout=120,
+    )
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert results["turns"] == 12 and results["llm_errors"] == 0
+    assert {"fast_path", "llm"} <= set(results["latency"])
+    assert all(counts["succeeded"] == counts["count"] for counts in results["actions"].values())
+    assert results["memory"]["samples"][-1]["turns"] == 12
@@ -0,0 +1,34 @@
+"""SQL-backed accounts: the database decides balance changes, so several instances can share an account."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bankbot.banking.storage import SQLBankAccount, SQLStorage
+
+
+def test_two_instances_share_one_account(tmp_path):
+    url = f"sqlite:///{tmp_path / 'bank.db'}"
+    first_storage, second_storage = SQLStorage(url), SQLStorage(url)
+    first = SQLBankAccount(first_storage, "alice", initial_balance=100.0)
+    second = SQLBankAccount(second_storage, "alice", initial_balance=999.0)
+    assert second.balance == 100.0
+    
+    assert first.withdraw(80.0).success
+    # The second instance still believes 100.0 is available; the database refuses
+    refused = second.withdraw(50.0)
+    assert not refused.success and second.balance == 20.0
+    
+    # A batch sees the deposit made through the other instance
+    assert first.deposit(30.0).success
+    result = second.apply_batch([("withdraw", 45.0), ("deposit", 5.0)])
+    assert result.success and second.balance == 10.0
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: first.deposit(1.0), range(40)))
+    assert first_storage.get_balance("alice") == 50.0
+    
+    reopened = SQLBankAccount(SQLStorage(url), "alice")
+    assert reopened.balance == 50.0
+    assert len(reopened.history) == 1 + 1 + 2 + 40
+    assert [t.action for t in reopened.get_recent(3, "withdraw")] == ["withdraw", "withdraw"]
+    for storage in (first_storage, second_storage):
+        storage.close()
@@ -0,0 +1,51 @@
+"""Importing the app does not load the LLM stack; fast-path turns work while it loads."""
+
+import json
+import os
+import subprocess
+import sys
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.config import settings
+from src.bankbot.llm.simulated import SimulatedChatModel
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def test_importing_the_app_does_not_import_the_llm_stack():
+    code = (
+        "import json, sys\n"
+        "from src.bankbot.app import BankBotApp\n"
+        "print(json.dumps(sorted(name for name in ('langchain_core', 'langchain_ollama', 'ollama', 'httpx')"
+        " if name in sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_env_file_is_parsed_once_and_instances_are_cached(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("LLM_MODEL_NAME=tiny:1b\nBANKING_CURRENCY=USD\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LLM_MODEL_NAME", raising=False)
+    monkeypatch.delenv("BANKING_CURRENCY", raising=False)
+    settings._read_env_file.cache_clear()
+    try:
+        assert settings.LLMConfig().model_name == "tiny:1b"
+        assert settings.BankingConfig().currency == "USD"
+        assert settings._read_env_file.cache_info().misses == 1
+    finally:
+        settings._read_env_file.cache_clear()
+    assert settings.llm_config is settings.llm_config
+
+
+def test_fast_path_turns_are_recorded_once_the_assistant_loads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="startup", llm=SimulatedChatModel(responses=["Hello!"]))
+    app.process_user_input("deposit 25 euros")
+    assert app._assistant is None
+    assert app.account.balance == 25.0
+    
+    messages, _ = app.assistant.chat_history.dump()
+    assert any("deposit 25 euros" in str(message) for message in messages)
+    app.close()
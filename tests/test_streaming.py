@@ -0,0 +1,41 @@
+"""Streamed replies run each action as soon as its JSON closes, before the rest of the reply arrives."""
+
+import asyncio
+
+from src.bankbot.app import BankBotApp
+from src.bankbot.llm.simulated import SimulatedChatModel
+from src.bankbot.utils.parser import StreamingResponseParser
+
+
+REPLY = 'Sure, adding it. {"action": "add", "amount": 40} Then {"action": "withdraw", "amount": 15} and that is all.'
+
+
+def test_action_is_released_by_the_chunk_that_closes_it():
+    parser = StreamingResponseParser()
+    closing = REPLY.index("}") + 1
+    text, actions = parser.feed(REPLY[:closing - 1])
+    assert text == "Sure, adding it. " and actions == []
+    text, actions = parser.feed(REPLY[closing - 1:closing])
+    assert actions == [{"action": "add", "amount": 40}]
+    text, actions = parser.feed(REPLY[closing:])
+    assert actions == [{"action": "withdraw", "amount": 15}]
+    assert parser.close() == ("", [])
+    assert parser.full_text == REPLY
+
+
+def test_streamed_turn_interleaves_text_and_actions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    app = BankBotApp(session_id="streaming", llm=SimulatedChatModel(responses=[REPLY]))
+    
+    async def run():
+        return [event async for event in app.astream_turn("could you sort out my money please")]
+    
+    events = asyncio.run(run())
+    kinds = [event["type"] for event in events]
+    assert kinds[0] == "text" and kinds[-1] == "done"
+    first_action, second_action = [i for i, kind in enumerate(kinds) if kind == "action"]
+    # Text between the actions was forwarded before the second action was generated
+    assert "text" in kinds[first_action + 1:second_action]
+    assert events[first_action]["success"] and events[second_action]["success"]
+    assert events[-1]["balance"] == 25
+    assert events[-1]["time_to_action"] <= events[-1]["total_time"]
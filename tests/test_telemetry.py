@@ -0,0 +1,41 @@
+"""Turn telemetry aggregates stage timings, model usage and action outcomes for Prometheus and JSON lines."""
+
+import json
+
+from src.bankbot.utils.metrics import StageProfiler
+from src.bankbot.utils.telemetry import Telemetry, TurnRecord
+
+
+def test_turns_are_exported_as_prometheus_and_json_lines(tmp_path):
+    path = tmp_path / "turns.jsonl"
+    telemetry = Telemetry(str(path))
+    telemetry.add_collector(lambda: [("bankbot_backend_healthy", (("model", 'gem"ma'),), 1)])
+    
+    profiler = StageProfiler(enabled=True, keep_samples=False)
+    profiler.begin_turn()
+    with profiler.stage("llm"):
+        pass
+    with profiler.stage("parse"):
+        pass
+    turn = TurnRecord(session_id="s1", actions=[("add", True), ("withdraw", False)])
+    metadata = {"prompt_eval_count": 120, "eval_count": 30, "eval_duration": 2_000_000_000}
+    telemetry.record_turn(turn, profiler.spans, metadata)
+    telemetry.record_turn(TurnRecord(session_id="s1", route="fast_path", parse_failed=True), [])
+    telemetry.close()
+    
+    text = telemetry.render_prometheus()
+    assert 'bankbot_turns_total{route="llm"} 1' in text
+    assert 'bankbot_turns_total{route="fast_path"} 1' in text
+    assert 'bankbot_tokens_total{kind="prompt"} 120' in text
+    assert 'bankbot_actions_total{action="withdraw",result="failure"} 1' in text
+    assert 'bankbot_model_seconds_sum{phase="eval"} 2.000000' in text
+    assert 'bankbot_stage_seconds_count{stage="parse"} 1' in text
+    assert 'bankbot_turn_seconds_bucket{route="llm",le="+Inf"} 1' in text
+    assert 'bankbot_backend_healthy{model="gem\\"ma"} 1' in text
+    assert "bankbot_parse_failures_total 1" in text
+    assert text.count("# TYPE bankbot_turns_total counter") == 1
+    
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["route"] for line in lines] == ["llm", "fast_path"]
+    assert lines[0]["completion_tokens"] == 30 and set(lines[0]["stages"]) == {"llm", "parse"}
+    assert {gauge["name"] for gauge in telemetry.snapshot()["gauges"]} == {"bankbot_backend_healthy"}